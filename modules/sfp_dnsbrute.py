@@ -12,9 +12,6 @@
 # -------------------------------------------------------------------------------
 
 import importlib
-import random
-import threading
-import time
 
 from spiderfoot import SpiderFootEvent, SpiderFootPlugin
 
@@ -53,14 +50,12 @@ class sfp_dnsbrute(SpiderFootPlugin):
 
     events = None
     sublist = None
-    lock = None
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.sublist = self.tempStorage()
         self.events = self.tempStorage()
         self.__dataSource__ = "DNS"
-        self.lock = threading.Lock()
 
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
@@ -92,42 +87,55 @@ class sfp_dnsbrute(SpiderFootPlugin):
 
     def tryHost(self, name):
         try:
-            if self.sf.resolveHost(name) or self.sf.resolveHost6(name):
-                with self.lock:
-                    self.hostResults[name] = True
+            return name, self.sf.resolveHost(name) or self.sf.resolveHost6(name)
         except Exception:
-            with self.lock:
-                self.hostResults[name] = False
-
-    def tryHostWrapper(self, hostList, sourceEvent):
-        self.hostResults = dict()
-        running = True
-        i = 0
-        t = []
-
-        # Spawn threads for scanning
-        self.info("Spawning threads to check hosts: " + str(hostList))
-        for name in hostList:
-            tn = 'thread_sfp_dnsbrute_' + str(random.SystemRandom().randint(1, 999999999))
-            t.append(threading.Thread(name=tn, target=self.tryHost, args=(name,)))
-            t[i].start()
-            i += 1
-
-        # Block until all threads are finished
-        while running:
-            found = False
-            for rt in threading.enumerate():
-                if rt.name.startswith("thread_sfp_dnsbrute_"):
-                    found = True
-
-            if not found:
-                running = False
-
-            time.sleep(0.05)
-
-        for res in self.hostResults:
-            if self.hostResults.get(res, False):
-                self.sendEvent(sourceEvent, res)
+            return name, list()
+
+    def numberSuffixes(self, host, dom):
+        for i in range(10):
+            yield host + str(i) + dom
+            yield host + "0" + str(i) + dom
+            yield host + "00" + str(i) + dom
+            yield host + "-" + str(i) + dom
+            yield host + "-0" + str(i) + dom
+            yield host + "-00" + str(i) + dom
+
+    def targetCandidates(self, domain):
+        dom = "." + domain
+        for sub in list(self.sublist):
+            yield sub + dom
+
+        if self.opts['numbersuffix'] and not self.opts['numbersuffixlimit']:
+            for sub in list(self.sublist):
+                yield from self.numberSuffixes(sub, dom)
+
+    def tryHostWrapper(self, hostList, sourceEvent, wildcard=None):
+        """Resolve candidate names using a bounded pool of resolver threads,
+        reporting each name as soon as it resolves.
+
+        Args:
+            hostList (iterable): names to resolve, consumed lazily
+            sourceEvent (SpiderFootEvent): source event for found names
+            wildcard (set): addresses returned by wildcard DNS, to be ignored
+        """
+        if wildcard is None:
+            wildcard = set()
+
+        self.debug(f"Resolving candidate hosts using {self.opts['_maxthreads']} threads")
+        with self.threadPool(self.opts['_maxthreads'], qsize=self.opts['_maxthreads'] * 10, name='sfp_dnsbrute') as pool:
+            for name, addrs in pool.map(self.tryHost, hostList, taskName='sfp_dnsbrute', saveResult=True):
+                if self.checkForStop():
+                    pool.stop = True
+                    return
+
+                if not addrs:
+                    continue
+
+                if wildcard and set(addrs).issubset(wildcard):
+                    self.debug(f"Host {name} resolved to wildcard DNS addresses; ignoring.")
+                    continue
+
+                self.sendEvent(sourceEvent, name)
 
     # Store the result internally and notify listening modules
     def sendEvent(self, source, result):
@@ -162,22 +170,12 @@ class sfp_dnsbrute(SpiderFootPlugin):
             h, dom = eventData.split(".", 1)
 
             # Try resolving common names
-            wildcard = self.sf.checkDnsWildcard(dom)
+            wildcard = set(self.sf.dnsWildcardAddresses(dom))
             if self.opts['skipcommonwildcard'] and wildcard:
                 self.debug("Wildcard DNS detected on " + dom + " so skipping host iteration.")
                 return
 
-            dom = "." + dom
-            nextsubs = dict()
-            for i in range(10):
-                nextsubs[h + str(i) + dom] = True
-                nextsubs[h + "0" + str(i) + dom] = True
-                nextsubs[h + "00" + str(i) + dom] = True
-                nextsubs[h + "-" + str(i) + dom] = True
-                nextsubs[h + "-0" + str(i) + dom] = True
-                nextsubs[h + "-00" + str(i) + dom] = True
-
-            self.tryHostWrapper(list(nextsubs.keys()), event)
+            self.tryHostWrapper(self.numberSuffixes(h, "." + dom), event, wildcard)
 
             # The rest of the module is for handling targets only
             return
@@ -188,50 +186,12 @@ class sfp_dnsbrute(SpiderFootPlugin):
 
         # Try resolving common names
         self.debug("Iterating through possible sub-domains.")
-        wildcard = self.sf.checkDnsWildcard(eventData)
+        wildcard = set(self.sf.dnsWildcardAddresses(eventData))
         if self.opts['skipcommonwildcard'] and wildcard:
             self.debug("Wildcard DNS detected.")
             return
 
-        targetList = list()
-        for sub in self.sublist:
-            if self.checkForStop():
-                return
-
-            name = f"{sub}.{eventData}"
-
-            if len(targetList) <= self.opts['_maxthreads']:
-                targetList.append(name)
-            else:
-                self.tryHostWrapper(targetList, event)
-                targetList = list()
-
-        # Scan whatever may be left over.
-        if len(targetList) > 0:
-            self.tryHostWrapper(targetList, event)
-
-        if self.opts['numbersuffix'] and not self.opts['numbersuffixlimit']:
-            nextsubs = dict()
-            dom = "." + eventData
-            for s in self.sublist:
-                if self.checkForStop():
-                    return
-
-                for i in range(10):
-                    nextsubs[s + str(i) + dom] = True
-                    nextsubs[s + "0" + str(i) + dom] = True
-                    nextsubs[s + "00" + str(i) + dom] = True
-                    nextsubs[s + "-" + str(i) + dom] = True
-                    nextsubs[s + "-0" + str(i) + dom] = True
-                    nextsubs[s + "-00" + str(i) + dom] = True
-
-                if len(list(nextsubs.keys())) >= self.opts['_maxthreads']:
-                    self.tryHostWrapper(list(nextsubs.keys()), event)
-                    nextsubs = dict()
-
-            # Scan whatever may be left over.
-            if len(nextsubs) > 0:
-                self.tryHostWrapper(list(nextsubs.keys()), event)
+        self.tryHostWrapper(self.targetCandidates(eventData), event, wildcard)
 
 
 # End of sfp_dnsbrute class
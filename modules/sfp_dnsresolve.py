@@ -36,6 +36,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
         'netblocklookup': True,
         'maxnetblock': 24,
         'maxv6netblock': 120,
+        '_maxthreads': 10
     }
 
     # Option descriptions
@@ -44,18 +45,27 @@ class sfp_dnsresolve(SpiderFootPlugin):
         'validatereverse': "Validate that reverse-resolved hostnames still resolve back to that IP before considering them as aliases of your target.",
         'netblocklookup': "Look up all IPs on netblocks deemed to be owned by your target for possible hosts on the same target subdomain/domain?",
         'maxnetblock': "Maximum owned IPv4 netblock size to look up all IPs within (CIDR value, 24 = /24, 16 = /16, etc.)",
-        'maxv6netblock': "Maximum owned IPv6 netblock size to look up all IPs within (CIDR value, 24 = /24, 16 = /16, etc.)"
+        'maxv6netblock': "Maximum owned IPv6 netblock size to look up all IPs within (CIDR value, 24 = /24, 16 = /16, etc.)",
+        '_maxthreads': "Maximum threads"
     }
 
     events = None
     domresults = None
     hostresults = None
+    forward = None
+    forward6 = None
+    reverse = None
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.events = self.tempStorage()
         self.domresults = self.tempStorage()
         self.hostresults = self.tempStorage()
+        # Resolution results for the lifetime of the scan, so that hosts
+        # reached through several parents are only looked up once.
+        self.forward = self.tempStorage()
+        self.forward6 = self.tempStorage()
+        self.reverse = self.tempStorage()
         self.__dataSource__ = "DNS"
 
         for opt in list(userOpts.keys()):
@@ -92,6 +102,76 @@ class sfp_dnsresolve(SpiderFootPlugin):
 
         return target
 
+    def resolveHost(self, host: str) -> list:
+        """Memoized IPv4 resolution of a hostname.
+
+        Args:
+            host (str): host to resolve
+
+        Returns:
+            list: IP addresses
+        """
+        if host not in self.forward:
+            self.forward[host] = self.sf.resolveHost(host)
+        return list(self.forward[host])
+
+    def resolveHost6(self, host: str) -> list:
+        """Memoized IPv6 resolution of a hostname.
+
+        Args:
+            host (str): host to resolve
+
+        Returns:
+            list: IPv6 addresses
+        """
+        if host not in self.forward6:
+            self.forward6[host] = self.sf.resolveHost6(host)
+        return list(self.forward6[host])
+
+    def resolveIP(self, ipaddr: str) -> list:
+        """Memoized reverse resolution of an IP address.
+
+        Args:
+            ipaddr (str): IP address to reverse resolve
+
+        Returns:
+            list: hostnames
+        """
+        if ipaddr not in self.reverse:
+            self.reverse[ipaddr] = self.sf.resolveIP(ipaddr)
+        return list(self.reverse[ipaddr])
+
+    def lookupName(self, host: str) -> tuple:
+        return host, self.sf.resolveHost(host), self.sf.resolveHost6(host)
+
+    def lookupIP(self, ipaddr: str) -> tuple:
+        return ipaddr, self.sf.resolveIP(ipaddr)
+
+    def resolveBatch(self, hosts: list = None, ipaddrs: list = None) -> None:
+        """Resolve newly seen hostnames and IP addresses concurrently,
+        storing the results for later use by resolveHost(), resolveHost6()
+        and resolveIP().
+
+        Args:
+            hosts (list): hostnames to forward resolve
+            ipaddrs (list): IP addresses to reverse resolve
+        """
+        hosts = [h for h in set(hosts or []) if h not in self.forward or h not in self.forward6]
+        ipaddrs = [ip for ip in set(ipaddrs or []) if ip not in self.reverse]
+
+        if len(hosts) > 1:
+            self.debug(f"Resolving {len(hosts)} hosts")
+            with self.threadPool(self.opts['_maxthreads'], qsize=self.opts['_maxthreads'] * 10, name='sfp_dnsresolve') as pool:
+                for host, addrs, addrs6 in pool.map(self.lookupName, hosts, taskName='sfp_dnsresolve', saveResult=True):
+                    self.forward[host] = addrs
+                    self.forward6[host] = addrs6
+
+        if len(ipaddrs) > 1:
+            self.debug(f"Reverse resolving {len(ipaddrs)} IP addresses")
+            with self.threadPool(self.opts['_maxthreads'], qsize=self.opts['_maxthreads'] * 10, name='sfp_dnsresolve') as pool:
+                for ipaddr, names in pool.map(self.lookupIP, ipaddrs, taskName='sfp_dnsresolve', saveResult=True):
+                    self.reverse[ipaddr] = names
+
     def resolveTargets(self, target, validateReverse: bool) -> list:
         """Resolve alternative names for a given target.
 
@@ -111,14 +191,14 @@ class sfp_dnsresolve(SpiderFootPlugin):
         v = target.targetValue
 
         if t in ["IP_ADDRESS", "IPV6_ADDRESS"]:
-            r = self.sf.resolveIP(v)
+            r = self.resolveIP(v)
             if r:
                 ret.extend(r)
         if t == "INTERNET_NAME":
-            r = self.sf.resolveHost(v)
+            r = self.resolveHost(v)
             if r:
                 ret.extend(r)
-            r = self.sf.resolveHost6(v)
+            r = self.resolveHost6(v)
             if r:
                 ret.extend(r)
         if t == "NETBLOCK_OWNER":
@@ -127,10 +207,8 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 self.debug(f"Network size bigger than permitted: {IPNetwork(v).prefixlen} > {max_netblock}")
                 return list(set(ret))
 
+            ipaddrs = list()
             for addr in IPNetwork(v):
-                if self.checkForStop():
-                    return list(set(ret))
-
                 ipaddr = str(addr)
                 if ipaddr.split(".")[3] in ['255', '0']:
                     continue
@@ -138,10 +216,20 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 if '255' in ipaddr.split("."):
                     continue
 
+                ipaddrs.append(ipaddr)
+
+            self.resolveBatch(ipaddrs=ipaddrs)
+            if validateReverse:
+                self.resolveBatch(hosts=[host for ipaddr in ipaddrs for host in self.resolveIP(ipaddr)])
+
+            for ipaddr in ipaddrs:
+                if self.checkForStop():
+                    return list(set(ret))
+
                 ret.append(ipaddr)
 
                 # Add the reverse-resolved hostnames as aliases too
-                names = self.sf.resolveIP(ipaddr)
+                names = self.resolveIP(ipaddr)
                 if not names:
                     continue
 
@@ -150,7 +238,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
                     continue
 
                 for host in names:
-                    chk = self.sf.resolveHost(host)
+                    chk = self.resolveHost(host)
                     if chk and ipaddr in chk:
                         ret.append(host)
         if t == "NETBLOCKV6_OWNER":
@@ -159,16 +247,20 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 self.debug(f"Network size bigger than permitted: {IPNetwork(v).prefixlen} > {max_netblock}")
                 return list(set(ret))
 
-            for addr in IPNetwork(v):
+            ipaddrs = [str(addr) for addr in IPNetwork(v)]
+
+            self.resolveBatch(ipaddrs=ipaddrs)
+            if validateReverse:
+                self.resolveBatch(hosts=[host for ipaddr in ipaddrs for host in self.resolveIP(ipaddr)])
+
+            for ipaddr in ipaddrs:
                 if self.checkForStop():
                     return list(set(ret))
 
-                ipaddr = str(addr)
-
                 ret.append(ipaddr)
 
                 # Add the reverse-resolved hostnames as aliases too
-                names = self.sf.resolveIP(ipaddr)
+                names = self.resolveIP(ipaddr)
                 if not names:
                     continue
 
@@ -177,7 +269,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
                     continue
 
                 for host in names:
-                    chk = self.sf.resolveHost6(host)
+                    chk = self.resolveHost6(host)
                     if chk and ipaddr in chk:
                         ret.append(host)
 
@@ -271,8 +363,8 @@ class sfp_dnsresolve(SpiderFootPlugin):
         # Resolve host names
         if eventName in ["INTERNET_NAME", "AFFILIATE_INTERNET_NAME"]:
             addrs = list()
-            addrs.extend(self.sf.resolveHost(eventData))
-            addrs.extend(self.sf.resolveHost6(eventData))
+            addrs.extend(self.resolveHost(eventData))
+            addrs.extend(self.resolveHost6(eventData))
 
             if not addrs:
                 return
@@ -296,7 +388,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
 
         # Reverse resolve IP addresses
         elif eventName in ["IP_ADDRESS", "IPV6_ADDRESS", "AFFILIATE_IPADDR", "AFFILIATE_IPV6_ADDRESS"]:
-            addrs = self.sf.resolveIP(eventData)
+            addrs = self.resolveIP(eventData)
 
             if not addrs:
                 return
@@ -332,10 +424,8 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 return
 
             self.debug(f"Looking up IPs in owned netblock: {eventData}")
+            ipaddrs = list()
             for ip in IPNetwork(eventData):
-                if self.checkForStop():
-                    return
-
                 ipaddr = str(ip)
 
                 # Skip 0 and 255 for IPv4 addresses
@@ -345,7 +435,16 @@ class sfp_dnsresolve(SpiderFootPlugin):
                     if '255' in ipaddr.split("."):
                         continue
 
-                addrs = self.sf.resolveIP(ipaddr)
+                ipaddrs.append(ipaddr)
+
+            self.resolveBatch(ipaddrs=ipaddrs)
+            self.resolveBatch(hosts=[host for ipaddr in ipaddrs for host in self.resolveIP(ipaddr)])
+
+            for ipaddr in ipaddrs:
+                if self.checkForStop():
+                    return
+
+                addrs = self.resolveIP(ipaddr)
                 if not addrs:
                     continue
 
@@ -371,6 +470,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
             if eventName == 'RAW_RIR_DATA':
                 data = re.sub(r'(\\x[0-f]{2}|\\n|\\r)', '\n', data)
 
+            hosts = list()
             for name in self.getTarget().getNames():
                 if self.checkForStop():
                     return
@@ -408,10 +508,18 @@ class sfp_dnsresolve(SpiderFootPlugin):
                                 m = match[1:]
                             else:
                                 m = match
-                            self.processHost(m, parentEvent, False)
+                            hosts.append(m)
 
                     offset = data.find(name, start + len(chunkhost))
 
+            # Resolve all the newly found hosts at once before processing them
+            self.resolveBatch(hosts=hosts)
+
+            for host in hosts:
+                if self.checkForStop():
+                    return
+                self.processHost(host, parentEvent, False)
+
     # Process a host/IP, parentEvent is the event that represents this entity
     def processHost(self, host, parentEvent, affiliate=None) -> None:
         parentHash = self.sf.hashstring(parentEvent.data)
@@ -419,9 +527,9 @@ class sfp_dnsresolve(SpiderFootPlugin):
             if parentHash in self.hostresults[host] or parentEvent.data == host:
                 self.debug(f"Skipping host, {host}, already processed.")
                 return
-            self.hostresults[host] = self.hostresults[host] + [parentHash]
+            self.hostresults[host].add(parentHash)
         else:
-            self.hostresults[host] = [parentHash]
+            self.hostresults[host] = {parentHash}
 
         self.debug(f"Found host: {host}")
 
@@ -434,13 +542,13 @@ class sfp_dnsresolve(SpiderFootPlugin):
             # If the IP the host resolves to is in our
             # list of aliases,
             if not self.sf.validIP(host):
-                hostips = self.sf.resolveHost(host)
+                hostips = self.resolveHost(host)
                 if hostips:
                     for hostip in hostips:
                         if self.getTarget().matches(hostip):
                             affil = False
                             break
-                hostips6 = self.sf.resolveHost6(host)
+                hostips6 = self.resolveHost6(host)
                 if hostips6:
                     for hostip6 in hostips6:
                         if self.getTarget().matches(hostip6):
@@ -469,7 +577,7 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 htype = "INTERNET_NAME"
 
         if htype in ["INTERNET_NAME", "AFFILIATE_INTERNET_NAME"]:
-            if not self.sf.resolveHost(host) and not self.sf.resolveHost6(host):
+            if not self.resolveHost(host) and not self.resolveHost6(host):
                 evt = SpiderFootEvent(f"{htype}_UNRESOLVED", host, self.__name__, parentEvent)
                 self.notifyListeners(evt)
                 return
@@ -487,18 +595,18 @@ class sfp_dnsresolve(SpiderFootPlugin):
                 self.processDomain(dom, evt, False, host)
 
             # Try obtain the IPv6 address
-            ip6s = self.sf.resolveHost6(host)
+            ip6s = self.resolveHost6(host)
             if not ip6s:
                 return
+            parentHash = self.sf.hashstring(evt.data)
             for ip6 in ip6s:
-                parentHash = self.sf.hashstring(evt.data)
                 if ip6 not in self.hostresults:
-                    self.hostresults[ip6] = [parentHash]
+                    self.hostresults[ip6] = {parentHash}
                 else:
                     if parentHash in self.hostresults[ip6] or evt.data == ip6:
                         self.debug(f"Skipping host, {ip6}, already processed.")
                         continue
-                    self.hostresults[ip6] = self.hostresults[ip6] + [parentHash]
+                    self.hostresults[ip6].add(parentHash)
 
                 evt6 = SpiderFootEvent("IPV6_ADDRESS", ip6, self.__name__, evt)
                 self.notifyListeners(evt6)
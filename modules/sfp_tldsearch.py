@@ -11,15 +11,16 @@
 # Licence:     MIT
 # -------------------------------------------------------------------------------
 
-import random
 import threading
-import time
-
-import dns.resolver
 
 from spiderfoot import SpiderFootEvent, SpiderFootPlugin
 
 
+# Wildcard DNS status of each TLD, shared by all keywords in this scan process
+tldWildcards = dict()
+tldWildcardsLock = threading.Lock()
+
+
 class sfp_tldsearch(SpiderFootPlugin):
 
     meta = {
@@ -41,21 +42,16 @@ class sfp_tldsearch(SpiderFootPlugin):
     optdescs = {
         'activeonly': "Only report domains that have content (try to fetch the page)?",
         "skipwildcards": "Skip TLDs and sub-TLDs that have wildcard DNS.",
-        "_maxthreads": "Maximum threads"
+        "_maxthreads": "Maximum threads; this is also the number of TLDs checked at once."
     }
 
     # Internal results tracking
     results = None
 
-    # Track TLD search results between threads
-    tldResults = dict()
-    lock = None
-
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
         self.__dataSource__ = "DNS"
-        self.lock = threading.Lock()
 
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
@@ -70,58 +66,80 @@ class sfp_tldsearch(SpiderFootPlugin):
     def producedEvents(self):
         return ["SIMILARDOMAIN"]
 
-    def tryTld(self, target, tld):
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = 1
-        resolver.lifetime = 1
-        resolver.search = list()
-        if self.opts.get('_dnsserver', "") != "":
-            resolver.nameservers = [self.opts['_dnsserver']]
+    def isWildcardTld(self, tld):
+        """Check whether a TLD has wildcard DNS, checking each TLD only
+        once per scan process.
 
-        if self.opts['skipwildcards'] and self.sf.checkDnsWildcard(tld):
-            return
+        Args:
+            tld (str): TLD
+
+        Returns:
+            bool: TLD has wildcard DNS
+        """
+        with tldWildcardsLock:
+            if tld in tldWildcards:
+                return tldWildcards[tld]
+
+        wildcard = self.sf.checkDnsWildcard(tld)
+
+        with tldWildcardsLock:
+            tldWildcards[tld] = wildcard
+
+        return wildcard
+
+    def tryTld(self, candidate):
+        target, tld = candidate
+
+        if self.opts['skipwildcards'] and self.isWildcardTld(tld):
+            return target, False
 
         try:
-            if not self.sf.resolveHost(target) and not self.sf.resolveHost6(target):
-                with self.lock:
-                    self.tldResults[target] = False
-            else:
-                with self.lock:
-                    self.tldResults[target] = True
+            found = bool(self.sf.resolveHost(target) or self.sf.resolveHost6(target))
         except Exception:
-            with self.lock:
-                self.tldResults[target] = False
+            found = False
+
+        return target, found
 
     def tryTldWrapper(self, tldList, sourceEvent):
-        self.tldResults = dict()
-        running = True
-        t = []
-
-        # Spawn threads for scanning
-        self.info(f"Spawning threads to check TLDs: {tldList}")
-        for i, pair in enumerate(tldList):
-            (domain, tld) = pair
-            tn = 'thread_sfp_tldsearch_' + str(random.SystemRandom().randint(0, 999999999))
-            t.append(threading.Thread(name=tn, target=self.tryTld, args=(domain, tld,)))
-            t[i].start()
-
-        # Block until all threads are finished
-        while running:
-            found = False
-            for rt in threading.enumerate():
-                if rt.name.startswith("thread_sfp_tldsearch_"):
-                    found = True
+        """Check candidate domains using a bounded pool of resolver threads,
+        reporting each domain as soon as it resolves.
+
+        Args:
+            tldList (iterable): (domain, tld) pairs, consumed lazily
+            sourceEvent (SpiderFootEvent): source event for found domains
+        """
+        self.debug(f"Checking TLDs using {self.opts['_maxthreads']} threads")
+        with self.threadPool(self.opts['_maxthreads'], qsize=self.opts['_maxthreads'] * 10, name='sfp_tldsearch') as pool:
+            for res, found in pool.map(self.tryTld, tldList, taskName='sfp_tldsearch', saveResult=True):
+                if self.checkForStop():
+                    pool.stop = True
+                    return
+
+                if not found or res in self.results:
+                    continue
+
+                if self.getTarget().matches(res, includeParents=True, includeChildren=True):
+                    continue
 
-            if not found:
-                running = False
+                self.sendEvent(sourceEvent, res)
 
-            time.sleep(0.1)
+    def tldCandidates(self, keyword):
+        for tld in self.opts['_internettlds']:
+            if type(tld) != str:
+                tld = str(tld.strip(), errors='ignore')
+            else:
+                tld = tld.strip()
 
-        for res in self.tldResults:
-            if self.getTarget().matches(res, includeParents=True, includeChildren=True):
+            if tld.startswith("//") or len(tld) == 0:
+                continue
+
+            if tld.startswith("!") or tld.startswith("*") or tld.startswith(".."):
                 continue
-            if self.tldResults[res] and res not in self.results:
-                self.sendEvent(sourceEvent, res)
+
+            if tld.endswith(".arpa"):
+                continue
+
+            yield keyword + "." + tld, tld
 
     # Store the result internally and notify listening modules
     def sendEvent(self, source, result):
@@ -168,35 +186,6 @@ class sfp_tldsearch(SpiderFootPlugin):
         self.results[keyword] = True
 
         # Look through all TLDs for the existence of this target keyword
-        targetList = list()
-        for tld in self.opts['_internettlds']:
-            if type(tld) != str:
-                tld = str(tld.strip(), errors='ignore')
-            else:
-                tld = tld.strip()
-
-            if tld.startswith("//") or len(tld) == 0:
-                continue
-
-            if tld.startswith("!") or tld.startswith("*") or tld.startswith(".."):
-                continue
-
-            if tld.endswith(".arpa"):
-                continue
-
-            tryDomain = keyword + "." + tld
-
-            if self.checkForStop():
-                return
-
-            if len(targetList) <= self.opts['_maxthreads']:
-                targetList.append([tryDomain, tld])
-            else:
-                self.tryTldWrapper(targetList, event)
-                targetList = list()
-
-        # Scan whatever may be left over.
-        if len(targetList) > 0:
-            self.tryTldWrapper(targetList, event)
+        self.tryTldWrapper(self.tldCandidates(keyword), event)
 
 # End of sfp_tldsearch class
@@ -29,6 +29,7 @@ from cherrypy.lib import auth_digest
 from sflib import SpiderFoot
 from sfscan import startSpiderFootScanner
 from sfwebui import SpiderFootWebUi
+from spiderfoot import SpiderFootArchive
 from spiderfoot import SpiderFootHelpers
 from spiderfoot import SpiderFootDb
 from spiderfoot import SpiderFootCorrelator
@@ -65,6 +66,8 @@ def main() -> None:
         '__database': f"{SpiderFootHelpers.dataPath()}/spiderfoot.db",
         '__modules__': None,  # List of modules. Will be set after start-up.
         '__correlationrules__': None,  # List of correlation rules. Will be set after start-up.
+        '_correlationinterval': 0,  # Seconds between updates of correlations while a scan runs, 0 for off
+        '_scanpartitions': False,  # Store each new scan's results in a database file of its own
         '_socks1type': '',
         '_socks2addr': '',
         '_socks3port': '',
@@ -80,6 +83,8 @@ def main() -> None:
         '_fetchtimeout': "Number of seconds before giving up on a HTTP request.",
         '_internettlds': "List of Internet TLDs.",
         '_internettlds_cache': "Hours to cache the Internet TLD list. This can safely be quite a long time given that the list doesn't change too often.",
+        '_correlationinterval': "Seconds between updates of correlation results while a scan is running. Set to 0 (the default) to only run correlation rules once the scan has finished.",
+        '_scanpartitions': "Store the results and logs of each new scan in a database file of its own, next to the main database, so that deleting the scan only deletes the file.",
         '_genericusers': "List of usernames that if found as usernames or as part of e-mail addresses, should be treated differently to non-generics.",
         '_socks1type': "SOCKS Server Type. Can be '4', '5', 'HTTP' or 'TOR'",
         '_socks2addr': 'SOCKS Server IP Address.',
@@ -97,6 +102,7 @@ def main() -> None:
     p.add_argument("-m", metavar="mod1,mod2,...", type=str, help="Modules to enable.")
     p.add_argument("-M", "--modules", action='store_true', help="List available modules.")
     p.add_argument("-C", "--correlate", metavar="scanID", help="Run correlation rules against a scan ID.")
+    p.add_argument("--archive", nargs=2, metavar=("scanID", "FILE"), help="Export a finished scan to a compressed, columnar archive file.")
     p.add_argument("-s", metavar="TARGET", help="Target for the scan.")
     p.add_argument("-t", metavar="type1,type2,...", type=str, help="Event types to collect (modules selected automatically).")
     p.add_argument("-u", choices=["all", "footprint", "investigate", "passive"], type=str, help="Select modules automatically by use case")
@@ -132,7 +138,7 @@ def main() -> None:
 
     loggingQueue = mp.Queue()
     logListenerSetup(loggingQueue, sfConfig)
-    logWorkerSetup(loggingQueue)
+    logWorkerSetup(loggingQueue, sfConfig)
     log = logging.getLogger(f"spiderfoot.{__name__}")
 
     # Add descriptions of the global config options
@@ -196,6 +202,16 @@ def main() -> None:
             sys.exit(-1)
         sys.exit(0)
 
+    if args.archive:
+        scanId, archivePath = args.archive
+        try:
+            log.info(f"Archiving scan {scanId} to {archivePath}.")
+            SpiderFootArchive.create(dbh, scanId, archivePath)
+        except Exception as e:
+            log.critical(f"Unable to archive scan: {e}", exc_info=True)
+            sys.exit(-1)
+        sys.exit(0)
+
     if args.modules:
         log.info("Modules available:")
         for m in sorted(sfModules.keys()):
@@ -476,7 +492,10 @@ def start_web_server(sfWebUiConfig: dict, sfConfig: dict, loggingQueue=None) ->
     cherrypy.config.update({
         'log.screen': False,
         'server.socket_host': web_host,
-        'server.socket_port': int(web_port)
+        'server.socket_port': int(web_port),
+        # Each page following a running scan holds a thread open, up to
+        # SpiderFootWebUi.maxEventStreams of them
+        'server.thread_pool': 30
     })
 
     log.info(f"Starting web server at {web_host}:{web_port} ...")
@@ -345,7 +345,7 @@ class SpiderFootCli(cmd.Cmd):
         return ''.join(out)
 
     # Make a request to the SpiderFoot server
-    def request(self, url, post=None):
+    def request(self, url, post=None, raw=False):
         if not url:
             self.edprint("Invalid request URL")
             return None
@@ -390,12 +390,46 @@ class SpiderFootCli(cmd.Cmd):
                 )
             self.ddprint(f"Response: {r}")
             if r.status_code == requests.codes.ok:  # pylint: disable=no-member
+                if raw:
+                    return r.content
                 return r.text
             r.raise_for_status()
         except BaseException as e:
             self.edprint(f"Failed communicating with server: {e}")
             return None
 
+    # Fetch the rows of a paged listing from the SpiderFoot server: all of
+    # them, a page at a time, or just the page of [count] rows after
+    # [cursor]. Returns the rows, the cursor of the next page and the
+    # total reported with the first page.
+    def request_pages(self, url, post, count=None, cursor=None):
+        rows = list()
+        total = None
+        post = dict(post)
+
+        while True:
+            post['pageSize'] = count or 1000
+            post['cursor'] = cursor or ''
+            d = self.request(url, post=post)
+            if not d:
+                return None
+
+            j = json.loads(d)
+            if total is None and j.get('total') is not None:
+                total = f"{j['total']}{'+' if j.get('totalCapped') else ''}"
+            rows.extend(j['rows'])
+            cursor = j['next']
+
+            if count or not cursor:
+                return rows, cursor, total
+
+    # Tell the user how to get the next page of a listing
+    def page_hint(self, rows, cursor, total):
+        if total is not None:
+            self.dprint(f"{len(rows)} of {total} results.")
+        if cursor:
+            self.dprint(f"More results: repeat with -p {cursor}")
+
     def emptyline(self):
         return
 
@@ -744,10 +778,15 @@ class SpiderFootCli(cmd.Cmd):
 
     # Show the data from a scan.
     def do_data(self, line):
-        """data <sid> [-t type] [-x] [-u]
+        """data <sid> [-t type] [-m module] [-r risk] [-q text] [-F] [-x] [-u] [-l count [-p cursor]]
         Get the scan data for scan ID <sid> and optionally the element
         type [type] (e.g. EMAILADDR), [type]. Use -x for extended format.
-        Use -u for a unique set of results."""
+        Use -u for a unique set of results.
+        Filter by the module [module], minimum risk [risk] or words in
+        the data [text], and use -F to hide false positives (-m, -r and
+        -q apply to the full set of results only).
+        Use -l to get [count] results at a time, and -p with the cursor
+        given to get the next [count]."""
         c = self.myparseline(line)
         if len(c[0]) < 1:
             self.edprint("Invalid syntax.")
@@ -760,6 +799,20 @@ class SpiderFootCli(cmd.Cmd):
         else:
             post["eventType"] = "ALL"
 
+        if "-F" in c[0]:
+            post["filterfp"] = "1"
+
+        count = None
+        if "-l" in c[0]:
+            count = c[0][c[0].index("-l") + 1]
+            if not count.isdigit():
+                self.edprint(f"Invalid result count: {count}")
+                return
+
+        cursor = None
+        if "-p" in c[0]:
+            cursor = c[0][c[0].index("-p") + 1]
+
         if "-u" in c[0]:
             url = self.ownopts['cli.server_baseurl'] + "/scaneventresultsunique"
             titles = {
@@ -771,12 +824,15 @@ class SpiderFootCli(cmd.Cmd):
                 "10": "Type",
                 "1": "Data"
             }
+            for opt, param in [("-m", "srcModule"), ("-r", "risk"), ("-q", "text")]:
+                if opt in c[0]:
+                    post[param] = c[0][c[0].index(opt) + 1]
 
-        d = self.request(url, post=post)
-        if not d:
+        page = self.request_pages(url, post, count, cursor)
+        if not page:
             return
-        j = json.loads(d)
-        if len(j) < 1:
+        rows, cursor, total = page
+        if len(rows) < 1:
             self.dprint("No results.")
             return
 
@@ -785,14 +841,17 @@ class SpiderFootCli(cmd.Cmd):
             titles["3"] = "Module"
             titles["2"] = "Source Data"
 
-        d = d.replace("&lt;/SFURL&gt;", "").replace("&lt;SFURL&gt;", "")
+        d = json.dumps(rows).replace("&lt;/SFURL&gt;", "").replace("&lt;SFURL&gt;", "")
         self.send_output(d, line, titles=titles)
+        if count:
+            self.page_hint(rows, cursor, total)
 
     # Export data from a scan.
     def do_export(self, line):
         """export <sid> [-t type] [-f file]
         Export the scan data for scan ID <sid> as type [type] to file [file].
-        Valid types: csv, json, gexf (default: json)."""
+        Valid types: csv, json, gexf, archive (default: json).
+        An archive is only written to [file], which must be supplied."""
         c = self.myparseline(line)
 
         if len(c[0]) < 1:
@@ -810,10 +869,32 @@ class SpiderFootCli(cmd.Cmd):
         base_url = self.ownopts['cli.server_baseurl']
         post = {"ids": c[0][0]}
 
-        if export_format not in ['json', 'csv', 'gexf']:
+        if export_format not in ['json', 'csv', 'gexf', 'archive']:
             self.edprint(f"Invalid export format: {export_format}")
             return
 
+        if export_format == 'archive':
+            if not file:
+                self.edprint("An archive can only be exported to a file (-f).")
+                return
+
+            data = self.request(base_url + '/scanarchive', post={"id": c[0][0]}, raw=True)
+            if not data:
+                self.dprint("No results.")
+                return
+
+            if not data.startswith(b"PK"):
+                self.edprint(f"Could not archive scan {c[0][0]}.")
+                return
+
+            try:
+                with io.open(file, "wb") as fp:
+                    fp.write(data)
+                self.dprint(f"Wrote scan {c[0][0]} archive to {file}")
+            except Exception as e:
+                self.edprint(f"Could not write scan {c[0][0]} archive to file '{file}': {e}")
+            return
+
         data = None
         if export_format == 'json':
             res = self.request(base_url + '/scanexportjsonmulti', post=post)
@@ -852,9 +933,10 @@ class SpiderFootCli(cmd.Cmd):
 
     # Show logs.
     def do_logs(self, line):
-        """logs <sid> [-l count] [-w]
+        """logs <sid> [-l count [-p cursor]] [-w]
         Show the most recent [count] logs for a given scan ID, <sid>.
-        If no count is supplied, all logs are given.
+        If no count is supplied, all logs are given. Use -p with the
+        cursor given to get the [count] logs before those.
         If -w is supplied, logs will be streamed to the console until
         Ctrl-C is entered."""
         c = self.myparseline(line)
@@ -875,19 +957,25 @@ class SpiderFootCli(cmd.Cmd):
             limit = int(limit)
 
         if "-w" not in c[0]:
-            d = self.request(
+            cursor = None
+            if "-p" in c[0]:
+                cursor = c[0][c[0].index("-p") + 1]
+
+            page = self.request_pages(
                 self.ownopts['cli.server_baseurl'] + "/scanlog",
-                post={'id': sid, 'limit': limit}
+                {'id': sid},
+                limit,
+                cursor
             )
-            if not d:
+            if not page:
                 return
-            j = json.loads(d)
-            if len(j) < 1:
+            rows, cursor, total = page
+            if len(rows) < 1:
                 self.dprint("No results.")
                 return
 
             self.send_output(
-                d,
+                json.dumps(rows),
                 line,
                 titles={
                     "0": "Generated",
@@ -896,6 +984,8 @@ class SpiderFootCli(cmd.Cmd):
                     "3": "Message"
                 }
             )
+            if limit:
+                self.page_hint(rows, cursor, total)
             return
 
         # Get the rowid of the latest log message
@@ -1040,9 +1130,10 @@ class SpiderFootCli(cmd.Cmd):
 
     # Search for data
     def do_find(self, line):
-        """find "<string|/regex/>" <[-s sid]|[-t type]> [-x]
+        """find "<string|/regex/>" <[-s sid]|[-t type]> [-x] [-l count [-p cursor]]
         Search for string/regex, limited to the scope of either a scan ID or
-        event type. -x for extended format."""
+        event type. -x for extended format. Use -l to get [count] results
+        at a time, and -p with the cursor given to get the next [count]."""
         c = self.myparseline(line)
         if len(c[0]) < 1:
             self.edprint("Invalid syntax.")
@@ -1057,6 +1148,17 @@ class SpiderFootCli(cmd.Cmd):
         if "-s" in c[0]:
             sid = c[0][c[0].index("-s") + 1]
 
+        count = None
+        if "-l" in c[0]:
+            count = c[0][c[0].index("-l") + 1]
+            if not count.isdigit():
+                self.edprint(f"Invalid result count: {count}")
+                return
+
+        cursor = None
+        if "-p" in c[0]:
+            cursor = c[0][c[0].index("-p") + 1]
+
         titles = {
             "0": "Last Seen",
             "1": "Data",
@@ -1065,22 +1167,23 @@ class SpiderFootCli(cmd.Cmd):
         if "-x" in c[0]:
             titles["2"] = "Source Data"
 
-        d = self.request(
+        page = self.request_pages(
             self.ownopts['cli.server_baseurl'] + "/search",
-            post={'value': val, 'id': sid, 'eventType': etype}
+            {'value': val, 'id': sid, 'eventType': etype},
+            count,
+            cursor
         )
-        if not d:
+        if not page:
             return
-        j = json.loads(d)
+        rows, cursor, total = page
 
-        if not j:
-            self.dprint("No results found.")
-            return
-        if len(j) < 1:
+        if len(rows) < 1:
             self.dprint("No results found.")
             return
 
-        self.send_output(d, line, titles)
+        self.send_output(json.dumps(rows), line, titles)
+        if count:
+            self.page_hint(rows, cursor, total)
 
     # Summary of a scan
     def do_summary(self, line):
@@ -21,12 +21,14 @@ import re
 import socket
 import ssl
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 from copy import deepcopy
 from datetime import datetime
+from functools import lru_cache
 
 import cryptography
 import dns.resolver
@@ -55,6 +57,15 @@ class SpiderFoot:
     _socksProxy = None
     opts = dict()
 
+    # Public suffix matchers, shared by all instances in this process.
+    # Each module receives its own copy of the TLD list, so matchers are
+    # keyed on a digest of the list contents rather than on the list
+    # object. The digests of the most recently used lists are kept.
+    _suffixMatchers = dict()
+    _tldListKeys = dict()
+    _tldListKeysSize = 512
+    _suffixMatchersLock = threading.Lock()
+
     def __init__(self, options: dict) -> None:
         """Initialize SpiderFoot object.
 
@@ -658,6 +669,40 @@ class SpiderFoot:
         self.debug(f"Keywords: {keywords}")
         return set([k for k in keywords if k])
 
+    def privateSuffix(self, hostname: str, tldList: list, acceptUnknown: bool = True) -> str:
+        """Obtain the private suffix (registrable domain) for a hostname.
+
+        The PublicSuffixList for a TLD list is only built once per process,
+        and lookups are memoized.
+
+        Args:
+            hostname (str): The hostname to check.
+            tldList (list): The list of TLDs based on the Mozilla public list.
+            acceptUnknown (bool): Treat unknown TLDs as public suffixes.
+
+        Returns:
+            str: The private suffix, or None if there is none.
+        """
+        with SpiderFoot._suffixMatchersLock:
+            if isinstance(tldList, list):
+                # keep a reference to the list so its id is not reused
+                ref, key = SpiderFoot._tldListKeys.pop(id(tldList), (None, None))
+                if ref is not tldList:
+                    key = hashlib.sha256("\n".join(tldList).encode('utf-8')).hexdigest()
+                SpiderFoot._tldListKeys[id(tldList)] = (tldList, key)
+                if len(SpiderFoot._tldListKeys) > SpiderFoot._tldListKeysSize:
+                    del SpiderFoot._tldListKeys[next(iter(SpiderFoot._tldListKeys))]
+            else:
+                key = tldList
+
+            matcher = SpiderFoot._suffixMatchers.get((key, acceptUnknown))
+            if matcher is None:
+                ps = PublicSuffixList(tldList, only_icann=True, accept_unknown=acceptUnknown)
+                matcher = lru_cache(maxsize=100000)(ps.privatesuffix)
+                SpiderFoot._suffixMatchers[(key, acceptUnknown)] = matcher
+
+        return matcher(hostname)
+
     def hostDomain(self, hostname: str, tldList: list) -> str:
         """Obtain the domain name for a supplied hostname.
 
@@ -673,8 +718,7 @@ class SpiderFoot:
         if not hostname:
             return None
 
-        ps = PublicSuffixList(tldList, only_icann=True)
-        return ps.privatesuffix(hostname)
+        return self.privateSuffix(hostname, tldList)
 
     def validHost(self, hostname: str, tldList: str) -> bool:
         """Check if the provided string is a valid hostname with a valid public suffix TLD.
@@ -697,8 +741,7 @@ class SpiderFoot:
         if not re.match(r"^[a-z0-9-\.]*$", hostname, re.IGNORECASE):
             return False
 
-        ps = PublicSuffixList(tldList, only_icann=True, accept_unknown=False)
-        sfx = ps.privatesuffix(hostname)
+        sfx = self.privateSuffix(hostname, tldList, acceptUnknown=False)
         return sfx is not None
 
     def isDomain(self, hostname: str, tldList: list) -> bool:
@@ -721,8 +764,7 @@ class SpiderFoot:
         if not hostname:
             return False
 
-        ps = PublicSuffixList(tldList, only_icann=True, accept_unknown=False)
-        sfx = ps.privatesuffix(hostname)
+        sfx = self.privateSuffix(hostname, tldList, acceptUnknown=False)
         return sfx == hostname
 
     def validIP(self, address: str) -> bool:
@@ -1445,16 +1487,25 @@ class SpiderFoot:
         Returns:
             bool: Domain returns DNS records for any subdomains
         """
+        return bool(self.dnsWildcardAddresses(target))
+
+    def dnsWildcardAddresses(self, target: str) -> list:
+        """Look up a random subdomain of a domain to learn the IPv4 and
+        IPv6 addresses returned by wildcard DNS, if enabled.
+
+        Args:
+            target (str): domain
+
+        Returns:
+            list: IP addresses returned for any subdomain
+        """
         if not target:
-            return False
+            return list()
 
         randpool = 'bcdfghjklmnpqrstvwxyz3456789'
         randhost = ''.join([random.SystemRandom().choice(randpool) for x in range(10)])
 
-        if not self.resolveHost(randhost + "." + target):
-            return False
-
-        return True
+        return self.resolveHost(randhost + "." + target) + self.resolveHost6(randhost + "." + target)
 
     def cveInfo(self, cveId: str, sources: str = "circl,nist") -> (str, str):
         """Look up a CVE ID for more information in the first available source.
@@ -10,6 +10,7 @@
 # License:      MIT
 # -----------------------------------------------------------------
 import socket
+import threading
 import time
 import queue
 from time import sleep
@@ -20,11 +21,13 @@ from collections import OrderedDict
 import dns.resolver
 
 from sflib import SpiderFoot
-from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget, SpiderFootHelpers, SpiderFootThreadPool, SpiderFootCorrelator, logger
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget, SpiderFootHelpers, SpiderFootThreadPool, SpiderFootCorrelator, SpiderFootIncrementalCorrelator, logger
 
 
 def startSpiderFootScanner(loggingQueue, *args, **kwargs):
-    logger.logWorkerSetup(loggingQueue)
+    # Filter log records by the scan's log level before they are queued
+    globalOpts = kwargs.get('globalOpts', args[5] if len(args) > 5 else None)
+    logger.logWorkerSetup(loggingQueue, globalOpts if isinstance(globalOpts, dict) else None)
     return SpiderFootScanner(*args, **kwargs)
 
 
@@ -48,6 +51,7 @@ class SpiderFootScanner():
     __moduleInstances = dict()
     __modconfig = dict()
     __scanName = None
+    __correlationQueueSize = 10000
 
     def __init__(self, scanName: str, scanId: str, targetValue: str, targetType: str, moduleList: list, globalOpts: dict, start: bool = True) -> None:
         """Initialize SpiderFootScanner object.
@@ -215,6 +219,12 @@ class SpiderFootScanner():
         # Used when module threading is enabled
         self.eventQueue = None
 
+        # Used when correlations are updated while the scan runs
+        self.__correlationQueue = None
+        self.__correlationThread = None
+        self.__correlationsReconciled = False
+        self.__correlationsDropped = 0
+
         if start:
             self.__startScan()
 
@@ -403,6 +413,7 @@ class SpiderFootScanner():
                 raise AssertionError("ABORT-REQUESTED")
 
             # start threads
+            self.__startCorrelations()
             self.waitForThreads()
             failed = False
 
@@ -423,18 +434,104 @@ class SpiderFootScanner():
                 self.__setStatus("FINISHED", None, time.time() * 1000)
                 self.runCorrelations()
                 self.__sf.status(f"Scan [{self.__scanId}] completed.")
+            else:
+                self.__stopCorrelations(reconcile=False)
             self.__dbh.close()
 
     def runCorrelations(self) -> None:
         """Run correlation rules."""
 
         self.__sf.status(f"Running {len(self.__config['__correlationrules__'])} correlation rules on scan {self.__scanId}.")
+        if self.__correlationThread is not None:
+            if self.__stopCorrelations(reconcile=True):
+                return
+
+            # Replace whatever was stored before correlating failed
+            self.__dbh.correlationResultDelete(self.__scanId)
+
+        # Rules were parsed and compiled into plans when they were loaded
         ruleset = dict()
         for rule in self.__config['__correlationrules__']:
-            ruleset[rule['id']] = rule['rawYaml']
+            ruleset[rule['id']] = rule
         corr = SpiderFootCorrelator(self.__dbh, ruleset, self.__scanId)
         corr.run_correlations()
 
+    def __startCorrelations(self) -> None:
+        """Start correlating the scan while it runs, if enabled, in a
+        thread of its own fed with the events of the scan."""
+        interval = self.__config.get('_correlationinterval', 0)
+        if not interval or not self.__config['__correlationrules__']:
+            return
+
+        # Correlations are built from the events the scan stores
+        storeOpts = self.__modconfig.get('sfp__stor_db', dict())
+        if 'sfp__stor_db' not in self.__moduleInstances or not storeOpts.get('_store', True):
+            return
+
+        ruleset = dict()
+        for rule in self.__config['__correlationrules__']:
+            ruleset[rule['id']] = rule
+
+        # Events the correlator cannot keep up with are dropped rather
+        # than held in memory; the results are reconciled in batch once
+        # the scan has finished.
+        self.__correlationQueue = queue.Queue(maxsize=self.__correlationQueueSize)
+        self.__correlationThread = threading.Thread(
+            target=self.__streamCorrelations,
+            args=(self.__correlationQueue, ruleset, int(storeOpts.get('maxstorage', 0)), float(interval)),
+            name=f"sfcorrelator_{self.__scanId}",
+            daemon=True
+        )
+        self.__correlationThread.start()
+
+    def __streamCorrelations(self, events: queue.Queue, ruleset: dict, truncateSize: int, interval: float) -> None:
+        """Correlate events of the scan as they arrive.
+
+        Args:
+            events (queue.Queue): events of the scan
+            ruleset (dict): correlation rules, keyed by rule ID
+            truncateSize (int): length event data is truncated to when stored
+            interval (float): minimum number of seconds between updates of the correlations
+        """
+        # The database handle of the scan belongs to the scan thread
+        dbh = SpiderFootDb(self.__config)
+        try:
+            corr = SpiderFootIncrementalCorrelator(dbh, ruleset, self.__scanId, truncateSize)
+            self.__correlationsReconciled = corr.stream_correlations(events, interval)
+        except Exception:
+            self.__sf.error(f"Correlating scan [{self.__scanId}] while it runs failed", exc_info=True)
+            self.__correlationQueue = None
+        finally:
+            dbh.close()
+
+    def __stopCorrelations(self, reconcile: bool) -> bool:
+        """Stop correlating the scan while it runs.
+
+        Args:
+            reconcile (bool): reconcile the correlations with batch mode before stopping
+
+        Returns:
+            bool: correlations were reconciled
+        """
+        if self.__correlationThread is None:
+            return False
+
+        events = self.__correlationQueue
+        while events is not None and self.__correlationThread.is_alive():
+            try:
+                events.put('FINISHED' if reconcile else None, timeout=1)
+                break
+            except queue.Full:
+                continue
+        self.__correlationThread.join()
+
+        if self.__correlationsDropped:
+            self.__sf.debug(f"Correlations of scan [{self.__scanId}] missed {self.__correlationsDropped} events while it ran")
+
+        self.__correlationQueue = None
+        self.__correlationThread = None
+        return self.__correlationsReconciled
+
     def waitForThreads(self) -> None:
         """Wait for threads.
 
@@ -446,6 +543,7 @@ class SpiderFootScanner():
             return
 
         counter = 0
+        debug = self.__config.get('_debug', False)
 
         try:
             # start one thread for each module
@@ -467,7 +565,8 @@ class SpiderFootScanner():
 
                 try:
                     sfEvent = self.eventQueue.get_nowait()
-                    self.__sf.debug(f"waitForThreads() got event, {sfEvent.eventType}, from eventQueue.")
+                    if debug:
+                        self.__sf.debug(f"waitForThreads() got event, {sfEvent.eventType}, from eventQueue.")
                 except queue.Empty:
                     # check if we're finished
                     if self.threadsFinished(log_status):
@@ -495,6 +594,13 @@ class SpiderFootScanner():
                 if not isinstance(sfEvent, SpiderFootEvent):
                     raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent")
 
+                events = self.__correlationQueue
+                if events is not None:
+                    try:
+                        events.put_nowait(sfEvent)
+                    except queue.Full:
+                        self.__correlationsDropped += 1
+
                 # for every module
                 for mod in self.__moduleInstances.values():
                     # if it's been aborted
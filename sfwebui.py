@@ -9,14 +9,22 @@
 # Copyright:    (c) Steve Micallef 2012
 # License:      MIT
 # -----------------------------------------------------------------
+import base64
+import collections
 import csv
+import hashlib
 import html
+import itertools
 import json
 import logging
 import multiprocessing as mp
+import queue
 import random
 import string
+import tempfile
+import threading
 import time
+import typing
 from copy import deepcopy
 from io import BytesIO, StringIO
 from operator import itemgetter
@@ -35,14 +43,34 @@ from sflib import SpiderFoot
 
 from sfscan import startSpiderFootScanner
 
+from spiderfoot import SpiderFootArchive
 from spiderfoot import SpiderFootDb
 from spiderfoot import SpiderFootHelpers
+from spiderfoot import SpiderFootLineage
+from spiderfoot import SpiderFootScanPublisher
 from spiderfoot import __version__
-from spiderfoot.logger import logListenerSetup, logWorkerSetup
+from spiderfoot.logger import logListenerSetup, logStats, logWorkerSetup
 
 mp.set_start_method("spawn", force=True)
 
 
+def jsonHandler(*args, **kwargs) -> bytes:
+    """Serialize the response of a JSON endpoint, unless it was served
+    already serialized from the scan response cache.
+
+    Args:
+        *args: handler arguments
+        **kwargs: handler keyword arguments
+
+    Returns:
+        bytes: JSON response
+    """
+    value = cherrypy.serving.request._json_inner_handler(*args, **kwargs)
+    if isinstance(value, bytes):
+        return value
+    return json.dumps(value).encode('utf-8')
+
+
 class SpiderFootWebUi:
     """SpiderFoot web interface."""
 
@@ -52,6 +80,31 @@ class SpiderFootWebUi:
     token = None
     docroot = ''
 
+    # Size in bytes of each chunk of a streamed export
+    exportChunkSize = 65536
+
+    # Most rows in a page of results
+    maxPageSize = 10000
+
+    # Most rows in an Excel sheet, including the column names
+    excelMaxRows = 1048576
+
+    # Seconds between keepalives on a scan event stream, and before the
+    # stream is ended for the browser to reconnect
+    eventKeepalive = 15
+    eventStreamDuration = 60
+
+    # Most scan event streams open at once. Each stream holds one of the
+    # web server's threads (server.thread_pool) for as long as it is
+    # open; past the limit, pages poll for changes instead.
+    maxEventStreams = 10
+
+    # Most bytes of responses about finished scans kept in memory
+    responseCacheSize = 64 * 1024 * 1024
+
+    # Most finished scans whose lineage is kept in memory
+    lineageCacheSize = 4
+
     def __init__(self: 'SpiderFootWebUi', web_config: dict, config: dict, loggingQueue: 'logging.handlers.QueueListener' = None) -> None:
         """Initialize web server.
 
@@ -89,9 +142,20 @@ class SpiderFootWebUi:
             logListenerSetup(self.loggingQueue, self.config)
         else:
             self.loggingQueue = loggingQueue
-        logWorkerSetup(self.loggingQueue)
+        logWorkerSetup(self.loggingQueue, self.config)
         self.log = logging.getLogger(f"spiderfoot.{__name__}")
 
+        self.publisher = SpiderFootScanPublisher(self.config)
+        self.eventStreams = threading.BoundedSemaphore(self.maxEventStreams)
+
+        # Serialized responses about finished scans, by endpoint,
+        # arguments and scan versions, least recently used first
+        self.responseCache = collections.OrderedDict()
+        self.responseCacheBytes = 0
+        self.responseCacheLock = threading.Lock()
+        self.lineageCache = collections.OrderedDict()
+        self.lineageCacheLock = threading.Lock()
+
         cherrypy.config.update({
             'error_page.401': self.error_page_401,
             'error_page.404': self.error_page_404,
@@ -234,95 +298,431 @@ class SpiderFootWebUi:
         Returns:
             list: search results
         """
-        retdata = []
+        try:
+            return list(self.searchBaseIter(id, eventType, value))
+        except Exception:
+            return []
+
+    def searchBaseIter(self: 'SpiderFootWebUi', id: str = None, eventType: str = None, value: str = None) -> typing.Iterator[list]:
+        """Search, reading the results from the database as they are
+        iterated over.
+
+        Args:
+            id (str): scan ID
+            eventType (str): TBD
+            value (str): TBD
+
+        Returns:
+            typing.Iterator[list]: search results
+        """
+        criteria = self.searchCriteria(id, eventType, value)
+        if criteria is None:
+            return iter([])
 
+        dbh = SpiderFootDb(self.config)
+
+        def results():
+            for row in dbh.searchIter(criteria):
+                yield self.searchResultData(row)
+
+        return results()
+
+    def searchCriteria(self: 'SpiderFootWebUi', id: str = None, eventType: str = None, value: str = None) -> dict:
+        """Search criteria for the database from a search in the web UI.
+
+        Args:
+            id (str): scan ID
+            eventType (str): event type
+            value (str): value, /regex/ or full-text search
+
+        Returns:
+            dict: search criteria, or None if there is nothing to search for
+        """
         if not id and not eventType and not value:
-            return retdata
+            return None
 
         if not value:
             value = ''
 
         regex = ""
+        text = ""
         if value.startswith("/") and value.endswith("/"):
             regex = value[1:len(value) - 1]
             value = ""
+        elif value.replace('*', '').strip():
+            text = value
+            value = ""
 
-        value = value.replace('*', '%')
-        if value in [None, ""] and regex in [None, ""]:
+        if value in [None, ""] and regex in [None, ""] and text in [None, ""]:
             value = "%"
             regex = ""
 
-        dbh = SpiderFootDb(self.config)
-        criteria = {
+        return {
             'scan_id': id or '',
             'type': eventType or '',
             'value': value or '',
             'regex': regex or '',
+            'text': text or '',
         }
 
+    def searchResultData(self: 'SpiderFootWebUi', row: tuple) -> list:
+        """Format a search result for the web UI.
+
+        Args:
+            row (tuple): search result, as returned by SpiderFootDb.searchIter()
+
+        Returns:
+            list: search result
+        """
+        lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
+        escapeddata = html.escape(row[1])
+        escapedsrc = html.escape(row[2])
+        return [lastseen, escapeddata, escapedsrc,
+                row[3], row[5], row[6], row[7], row[8], row[10],
+                row[11], row[4], row[13], row[14]]
+
+    def scanEventResultData(self: 'SpiderFootWebUi', row: tuple) -> list:
+        """Format a scan result for the web UI.
+
+        Args:
+            row (tuple): scan result, as returned by SpiderFootDb.scanResultEvent()
+
+        Returns:
+            list: scan result
+        """
+        lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
+        return [
+            lastseen,
+            html.escape(row[1]),
+            html.escape(row[2]),
+            row[3],
+            row[5],
+            row[6],
+            row[7],
+            row[8],
+            row[13],
+            row[14],
+            row[4]
+        ]
+
+    def pageCursor(self: 'SpiderFootWebUi', key: typing.Any) -> str:
+        """Cursor for the next page of a paged response.
+
+        Args:
+            key (typing.Any): key of the last row of the page, or None if it was the last page
+
+        Returns:
+            str: opaque cursor, or None
+        """
+        if key is None:
+            return None
+
+        return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+    def pageKey(self: 'SpiderFootWebUi', cursor: str) -> typing.Any:
+        """Key of the last row of the previous page of a paged response.
+
+        Args:
+            cursor (str): cursor returned with the previous page
+
+        Returns:
+            typing.Any: key of the last row, or None for the first page
+
+        Raises:
+            ValueError: cursor is invalid
+        """
+        if not cursor:
+            return None
+
         try:
-            data = dbh.search(criteria)
-        except Exception:
-            return retdata
+            return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception as e:
+            raise ValueError("Invalid cursor.") from e
 
-        for row in data:
-            lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-            escapeddata = html.escape(row[1])
-            escapedsrc = html.escape(row[2])
-            retdata.append([lastseen, escapeddata, escapedsrc,
-                            row[3], row[5], row[6], row[7], row[8], row[10],
-                            row[11], row[4], row[13], row[14]])
+    def pageSizeValue(self: 'SpiderFootWebUi', pageSize: str) -> int:
+        """Number of rows per page requested.
 
-        return retdata
+        Args:
+            pageSize (str): number of rows per page
+
+        Returns:
+            int: number of rows per page
+
+        Raises:
+            ValueError: number of rows is invalid
+        """
+        if not str(pageSize).isdigit() or not 0 < int(pageSize) <= self.maxPageSize:
+            raise ValueError(f"Invalid page size; expected 1 to {self.maxPageSize}.")
+
+        return int(pageSize)
+
+    def page(self: 'SpiderFootWebUi', rows: list, after: typing.Any, total: tuple = None) -> dict:
+        """Paged response.
+
+        Args:
+            rows (list): rows of the page
+            after (typing.Any): key of the last row if there are more pages
+            total (tuple): number of rows of all pages, and whether there may be more
+
+        Returns:
+            dict: rows, cursor of the next page and total
+        """
+        return {
+            'rows': rows,
+            'next': self.pageCursor(after),
+            'total': total[0] if total else None,
+            'totalCapped': bool(total and total[1])
+        }
+
+    def flagValue(self: 'SpiderFootWebUi', value: typing.Any) -> bool:
+        """Boolean query parameter.
+
+        Args:
+            value (typing.Any): parameter value
+
+        Returns:
+            bool: whether it is set
+        """
+        return str(value).lower() in ["1", "true"]
+
+    def scanResponse(self: 'SpiderFootWebUi', endpoint: str, scanIds: list, args: tuple, build: typing.Callable) -> typing.Any:
+        """Respond to a request about scans.
+
+        Every change to a scan bumps its version, so the response is
+        tagged (ETag) with the versions of the scans: a client that sends
+        the tag back (If-None-Match) is told the response has not changed
+        without it being built again. Responses about finished scans are
+        also kept serialized, and served again until the scans change.
+
+        Args:
+            endpoint (str): endpoint name
+            scanIds (list): IDs of the scans the response is about
+            args (tuple): other arguments the response depends on
+            build (typing.Callable): builds the response from a database handle
+
+        Returns:
+            typing.Any: response, serialized unless none of the scans exist
+        """
+        dbh = SpiderFootDb(self.config)
+
+        versions = list()
+        for scanId in scanIds:
+            try:
+                versions.append(dbh.scanVersion(scanId))
+            except Exception:
+                versions.append(None)
+
+        if not any(versions):
+            return build(dbh)
+
+        key = (endpoint, tuple(scanIds), args, tuple(versions))
+        etag = f'"{hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]}"'
+
+        tags = [tag.strip() for tag in cherrypy.request.headers.get('If-None-Match', '').split(',')]
+        if etag in tags or f"W/{etag}" in tags or '*' in tags:
+            cherrypy.response.status = 304
+            cherrypy.response.headers['ETag'] = etag
+            return b""
+
+        with self.responseCacheLock:
+            body = self.responseCache.get(key)
+            if body is not None:
+                self.responseCache.move_to_end(key)
+
+        if body is None:
+            value = build(dbh)
+            if value is None or (isinstance(value, dict) and 'error' in value):
+                # Errors and empty responses are neither tagged nor kept
+                return value
+
+            if isinstance(value, bytes):
+                body = value
+            elif isinstance(value, str):
+                body = value.encode('utf-8')
+            else:
+                body = json.dumps(value).encode('utf-8')
+
+            finished = all(version and version[0] in SpiderFootArchive.finishedStatuses for version in versions)
+            if finished and len(body) <= self.responseCacheSize:
+                with self.responseCacheLock:
+                    if key not in self.responseCache:
+                        self.responseCache[key] = body
+                        self.responseCacheBytes += len(body)
+                    while self.responseCacheBytes > self.responseCacheSize:
+                        self.responseCacheBytes -= len(self.responseCache.popitem(last=False)[1])
+
+        cherrypy.response.headers['ETag'] = etag
+        return body
+
+    def scanLineage(self: 'SpiderFootWebUi', dbh: SpiderFootDb, scanId: str) -> SpiderFootLineage:
+        """Parent/child graph of the results of a scan. The graphs of
+        finished scans are kept and used again until the scans change.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            scanId (str): scan instance ID
+
+        Returns:
+            SpiderFootLineage: scan lineage
+        """
+        version = dbh.scanVersion(scanId)
+        if not version or version[0] not in SpiderFootArchive.finishedStatuses:
+            return SpiderFootLineage(dbh, scanId)
+
+        with self.lineageCacheLock:
+            cached = self.lineageCache.get(scanId)
+            if cached and cached[0] == version:
+                self.lineageCache.move_to_end(scanId)
+                return cached[1]
 
-    def buildExcel(self: 'SpiderFootWebUi', data: list, columnNames: list, sheetNameIndex: int = 0) -> str:
-        """Convert supplied raw data into GEXF (Graph Exchange XML Format) format (e.g. for Gephi).
+        lineage = SpiderFootLineage(dbh, scanId)
+
+        with self.lineageCacheLock:
+            self.lineageCache[scanId] = (version, lineage)
+            self.lineageCache.move_to_end(scanId)
+            while len(self.lineageCache) > self.lineageCacheSize:
+                self.lineageCache.popitem(last=False)
+
+        return lineage
+
+    def buildExcel(self: 'SpiderFootWebUi', rows: typing.Iterable, columnNames: list, sheetNameIndex: int = 0) -> typing.Iterator[bytes]:
+        """Convert supplied rows into an Excel workbook with a sheet for
+        each value of one of the columns, such as the event type, a chunk
+        at a time.
+
+        The workbook is written in write-only mode, so each row is written
+        out to its sheet as it is read rather than kept in memory. A sheet
+        that is full continues in another sheet, with a number after its
+        name.
 
         Args:
-            data (list): Scan result as list
+            rows (typing.Iterable): rows of column values
             columnNames (list): column names
-            sheetNameIndex (int): TBD
+            sheetNameIndex (int): column naming the sheet each row goes in
 
         Returns:
-            str: Excel workbook
+            typing.Iterator[bytes]: Excel workbook
         """
-        rowNums = dict()
-        workbook = openpyxl.Workbook()
-        defaultSheet = workbook.active
-        columnNames.pop(sheetNameIndex)
+        columnNames = [name for i, name in enumerate(columnNames) if i != sheetNameIndex]
         allowed_sheet_chars = string.ascii_uppercase + string.digits + '_'
-        for row in data:
-            sheetName = "".join([c for c in str(row.pop(sheetNameIndex)) if c.upper() in allowed_sheet_chars])
-            try:
-                sheet = workbook[sheetName]
-            except KeyError:
-                # Create sheet
-                workbook.create_sheet(sheetName)
-                sheet = workbook[sheetName]
-                # Write headers
-                for col_num, column_title in enumerate(columnNames, 1):
-                    cell = sheet.cell(row=1, column=col_num)
-                    cell.value = column_title
-                rowNums[sheetName] = 2
-
-            # Write row
-            for col_num, cell_value in enumerate(row, 1):
-                cell = sheet.cell(row=rowNums[sheetName], column=col_num)
-                cell.value = cell_value
-
-            rowNums[sheetName] += 1
-
-        if rowNums:
-            workbook.remove(defaultSheet)
-
-        # Sort sheets alphabetically
-        workbook._sheets.sort(key=lambda ws: ws.title)
-
-        # Save workbook
-        with BytesIO() as f:
-            workbook.save(f)
-            f.seek(0)
-            return f.read()
+
+        def chunks():
+            workbook = openpyxl.Workbook(write_only=True)
+
+            # Sheet, number of rows and number of sheets, by sheet name
+            sheets = dict()
+            for row in rows:
+                row = list(row)
+                sheetName = "".join([c for c in str(row.pop(sheetNameIndex)) if c.upper() in allowed_sheet_chars])
+                sheet = sheets.get(sheetName)
+                if sheet is None or sheet[1] >= self.excelMaxRows:
+                    part = sheet[2] + 1 if sheet else 1
+                    suffix = f"_{part}" if part > 1 else ""
+                    # Excel cannot open sheets with names over 31 characters
+                    sheet = [workbook.create_sheet(sheetName[:31 - len(suffix)] + suffix), 1, part]
+                    sheet[0].append(columnNames)
+                    sheets[sheetName] = sheet
+
+                sheet[0].append(row)
+                sheet[1] += 1
+
+            if not sheets:
+                workbook.create_sheet()
+
+            # Sort sheets alphabetically
+            workbook._sheets.sort(key=lambda ws: ws.title)
+
+            with tempfile.TemporaryFile() as f:
+                workbook.save(f)
+                f.seek(0)
+                while True:
+                    chunk = f.read(self.exportChunkSize)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        return chunks()
+
+    def buildCsv(self: 'SpiderFootWebUi', rows: typing.Iterable, columnNames: list, dialect: str = "excel") -> typing.Iterator[bytes]:
+        """Convert supplied rows into CSV format, a chunk at a time, so
+        that the rows can be read and sent as they are converted.
+
+        Args:
+            rows (typing.Iterable): rows of column values
+            columnNames (list): column names
+            dialect (str): CSV dialect (default: excel)
+
+        Returns:
+            typing.Iterator[bytes]: CSV data
+        """
+        fileobj = StringIO()
+        parser = csv.writer(fileobj, dialect=dialect)
+        parser.writerow(columnNames)
+
+        def chunks():
+            for row in rows:
+                parser.writerow(row)
+                if fileobj.tell() >= self.exportChunkSize:
+                    yield fileobj.getvalue().encode('utf-8')
+                    fileobj.seek(0)
+                    fileobj.truncate()
+
+            yield fileobj.getvalue().encode('utf-8')
+
+        return chunks()
+
+    def buildJson(self: 'SpiderFootWebUi', records: typing.Iterable, ndjson: bool = False) -> typing.Iterator[bytes]:
+        """Join JSON encoded records into a JSON array, a chunk at a time,
+        so that the records can be read and sent as they are encoded. The
+        array is written out the same as json.dumps() would write it.
+
+        Args:
+            records (typing.Iterable): JSON encoded records
+            ndjson (bool): write one record per line rather than an array
+
+        Returns:
+            typing.Iterator[bytes]: JSON data
+        """
+        if ndjson:
+            opening, separator, closing = "", "", ""
+            records = (record + "\n" for record in records)
+        else:
+            opening, separator, closing = "[", ", ", "]"
+
+        def chunks():
+            chunk = [opening]
+            size = 0
+            for i, record in enumerate(records):
+                if i:
+                    chunk.append(separator)
+                chunk.append(record)
+                size += len(record)
+                if size >= self.exportChunkSize:
+                    yield "".join(chunk).encode('utf-8')
+                    chunk = list()
+                    size = 0
+
+            chunk.append(closing)
+            yield "".join(chunk).encode('utf-8')
+
+        return chunks()
+
+    def peekRows(self: 'SpiderFootWebUi', rows: typing.Iterable) -> typing.Iterator:
+        """Read the first of a set of rows, so that a query which fails or
+        finds nothing is known about before a response is streamed.
+
+        Args:
+            rows (typing.Iterable): rows
+
+        Returns:
+            typing.Iterator: the same rows, or None if there are none
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return None
+
+        return itertools.chain([first], rows)
 
     #
     # USER INTERFACE PAGES
@@ -342,7 +742,7 @@ class SpiderFootWebUi:
         dbh = SpiderFootDb(self.config)
 
         try:
-            data = dbh.scanLogs(id, None, None, True)
+            data = dbh.scanLogs(id, None, None, True, includeDebug=True)
         except Exception:
             return self.error("Scan ID not found.")
 
@@ -367,6 +767,41 @@ class SpiderFootWebUi:
         return fileobj.getvalue().encode('utf-8')
 
     @cherrypy.expose
+    def scanarchive(self: 'SpiderFootWebUi', id: str) -> bytes:
+        """Export a finished scan as a compressed, columnar archive.
+
+        Args:
+            id (str): scan ID
+
+        Returns:
+            bytes: scan archive
+        """
+        dbh = SpiderFootDb(self.config)
+
+        try:
+            scan = dbh.scanInstanceGet(id)
+        except Exception:
+            return self.error("Scan ID not found.")
+
+        if not scan:
+            return self.error("Scan ID not found.")
+
+        if scan[5] not in SpiderFootArchive.finishedStatuses:
+            return self.error("Only finished scans can be archived.")
+
+        fileobj = BytesIO()
+        try:
+            SpiderFootArchive.create(dbh, id, fileobj)
+        except Exception as e:
+            return self.error(f"Unable to archive scan: {html.escape(str(e))}")
+
+        cherrypy.response.headers['Content-Disposition'] = f"attachment; filename=SpiderFoot-{id}.archive.zip"
+        cherrypy.response.headers['Content-Type'] = "application/zip"
+        cherrypy.response.headers['Pragma'] = "no-cache"
+        return fileobj.getvalue()
+
+    @cherrypy.expose
+    @cherrypy.config(**{'response.stream': True})
     def scancorrelationsexport(self: 'SpiderFootWebUi', id: str, filetype: str = "csv", dialect: str = "excel") -> str:
         """Get scan correlation data in CSV or Excel format.
 
@@ -413,16 +848,7 @@ class SpiderFootWebUi:
             return self.buildExcel(rows, headings, sheetNameIndex=0)
 
         if filetype.lower() == 'csv':
-            fileobj = StringIO()
-            parser = csv.writer(fileobj, dialect=dialect)
-            parser.writerow(headings)
-
-            for row in correlations:
-                correlation = row[1]
-                rule_name = row[2]
-                rule_risk = row[3]
-                rule_description = row[5]
-                parser.writerow([rule_name, correlation, rule_risk, rule_description])
+            rows = ([row[2], row[1], row[3], row[5]] for row in correlations)
 
             if scan_name:
                 fname = f"{scan_name}-SpiderFoot-correlations.csv"
@@ -432,11 +858,12 @@ class SpiderFootWebUi:
             cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
             cherrypy.response.headers['Content-Type'] = "application/csv"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return fileobj.getvalue().encode('utf-8')
+            return self.buildCsv(rows, headings, dialect)
 
         return self.error("Invalid export filetype.")
 
     @cherrypy.expose
+    @cherrypy.config(**{'response.stream': True})
     def scaneventresultexport(self: 'SpiderFootWebUi', id: str, type: str, filetype: str = "csv", dialect: str = "excel") -> str:
         """Get scan event result data in CSV or Excel format
 
@@ -450,44 +877,35 @@ class SpiderFootWebUi:
             str: results in CSV or Excel format
         """
         dbh = SpiderFootDb(self.config)
-        data = dbh.scanResultEvent(id, type)
+        data = dbh.scanResultEventIter(id, type)
 
-        if filetype.lower() in ["xlsx", "excel"]:
-            rows = []
+        def rows():
             for row in data:
                 if row[4] == "ROOT":
                     continue
                 lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
                 datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                rows.append([lastseen, str(row[4]), str(row[3]), str(row[2]), row[13], datafield])
+                yield [lastseen, str(row[4]), str(row[3]), str(row[2]), row[13], datafield]
 
+        if filetype.lower() in ["xlsx", "excel"]:
             fname = "SpiderFoot.xlsx"
             cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
             cherrypy.response.headers['Content-Type'] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return self.buildExcel(rows, ["Updated", "Type", "Module", "Source",
+            return self.buildExcel(rows(), ["Updated", "Type", "Module", "Source",
                                    "F/P", "Data"], sheetNameIndex=1)
 
         if filetype.lower() == 'csv':
-            fileobj = StringIO()
-            parser = csv.writer(fileobj, dialect=dialect)
-            parser.writerow(["Updated", "Type", "Module", "Source", "F/P", "Data"])
-            for row in data:
-                if row[4] == "ROOT":
-                    continue
-                lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-                datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                parser.writerow([lastseen, str(row[4]), str(row[3]), str(row[2]), row[13], datafield])
-
             fname = "SpiderFoot.csv"
             cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
             cherrypy.response.headers['Content-Type'] = "application/csv"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return fileobj.getvalue().encode('utf-8')
+            return self.buildCsv(rows(), ["Updated", "Type", "Module", "Source", "F/P", "Data"], dialect)
 
         return self.error("Invalid export filetype.")
 
     @cherrypy.expose
+    @cherrypy.config(**{'response.stream': True})
     def scaneventresultexportmulti(self: 'SpiderFootWebUi', ids: str, filetype: str = "csv", dialect: str = "excel") -> str:
         """Get scan event result data in CSV or Excel format for multiple scans
 
@@ -501,7 +919,6 @@ class SpiderFootWebUi:
         """
         dbh = SpiderFootDb(self.config)
         scaninfo = dict()
-        data = list()
         scan_name = ""
 
         for id in ids.split(','):
@@ -509,21 +926,24 @@ class SpiderFootWebUi:
             if scaninfo[id] is None:
                 continue
             scan_name = scaninfo[id][0]
-            data = data + dbh.scanResultEvent(id)
 
-        if not data:
+        def rows():
+            for id in scaninfo:
+                if scaninfo[id] is None:
+                    continue
+                for row in dbh.scanResultEventIter(id):
+                    if row[4] == "ROOT":
+                        continue
+                    lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
+                    datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
+                    yield [scaninfo[row[12]][0], lastseen, str(row[4]), str(row[3]),
+                           str(row[2]), row[13], datafield]
+
+        data = self.peekRows(rows())
+        if data is None:
             return None
 
         if filetype.lower() in ["xlsx", "excel"]:
-            rows = []
-            for row in data:
-                if row[4] == "ROOT":
-                    continue
-                lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-                datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                rows.append([scaninfo[row[12]][0], lastseen, str(row[4]), str(row[3]),
-                            str(row[2]), row[13], datafield])
-
             if len(ids.split(',')) > 1 or scan_name == "":
                 fname = "SpiderFoot.xlsx"
             else:
@@ -532,21 +952,10 @@ class SpiderFootWebUi:
             cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
             cherrypy.response.headers['Content-Type'] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return self.buildExcel(rows, ["Scan Name", "Updated", "Type", "Module",
+            return self.buildExcel(data, ["Scan Name", "Updated", "Type", "Module",
                                    "Source", "F/P", "Data"], sheetNameIndex=2)
 
         if filetype.lower() == 'csv':
-            fileobj = StringIO()
-            parser = csv.writer(fileobj, dialect=dialect)
-            parser.writerow(["Scan Name", "Updated", "Type", "Module", "Source", "F/P", "Data"])
-            for row in data:
-                if row[4] == "ROOT":
-                    continue
-                lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-                datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                parser.writerow([scaninfo[row[12]][0], lastseen, str(row[4]), str(row[3]),
-                                str(row[2]), row[13], datafield])
-
             if len(ids.split(',')) > 1 or scan_name == "":
                 fname = "SpiderFoot.csv"
             else:
@@ -555,11 +964,12 @@ class SpiderFootWebUi:
             cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
             cherrypy.response.headers['Content-Type'] = "application/csv"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return fileobj.getvalue().encode('utf-8')
+            return self.buildCsv(data, ["Scan Name", "Updated", "Type", "Module", "Source", "F/P", "Data"], dialect)
 
         return self.error("Invalid export filetype.")
 
     @cherrypy.expose
+    @cherrypy.config(**{'response.stream': True})
     def scansearchresultexport(self: 'SpiderFootWebUi', id: str, eventType: str = None, value: str = None, filetype: str = "csv", dialect: str = "excel") -> str:
         """Get search result data in CSV or Excel format
 
@@ -573,52 +983,50 @@ class SpiderFootWebUi:
         Returns:
             str: results in CSV or Excel format
         """
-        data = self.searchBase(id, eventType, value)
+        try:
+            data = self.peekRows(self.searchBaseIter(id, eventType, value))
+        except Exception:
+            data = None
 
-        if not data:
+        if data is None:
             return None
 
-        if filetype.lower() in ["xlsx", "excel"]:
-            rows = []
+        def rows():
             for row in data:
                 if row[10] == "ROOT":
                     continue
                 datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                rows.append([row[0], str(row[10]), str(row[3]), str(row[2]), row[11], datafield])
+                yield [row[0], str(row[10]), str(row[3]), str(row[2]), row[11], datafield]
+
+        if filetype.lower() in ["xlsx", "excel"]:
             cherrypy.response.headers['Content-Disposition'] = "attachment; filename=SpiderFoot.xlsx"
             cherrypy.response.headers['Content-Type'] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return self.buildExcel(rows, ["Updated", "Type", "Module", "Source",
+            return self.buildExcel(rows(), ["Updated", "Type", "Module", "Source",
                                    "F/P", "Data"], sheetNameIndex=1)
 
         if filetype.lower() == 'csv':
-            fileobj = StringIO()
-            parser = csv.writer(fileobj, dialect=dialect)
-            parser.writerow(["Updated", "Type", "Module", "Source", "F/P", "Data"])
-            for row in data:
-                if row[10] == "ROOT":
-                    continue
-                datafield = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                parser.writerow([row[0], str(row[10]), str(row[3]), str(row[2]), row[11], datafield])
             cherrypy.response.headers['Content-Disposition'] = "attachment; filename=SpiderFoot.csv"
             cherrypy.response.headers['Content-Type'] = "application/csv"
             cherrypy.response.headers['Pragma'] = "no-cache"
-            return fileobj.getvalue().encode('utf-8')
+            return self.buildCsv(rows(), ["Updated", "Type", "Module", "Source", "F/P", "Data"], dialect)
 
         return self.error("Invalid export filetype.")
 
     @cherrypy.expose
-    def scanexportjsonmulti(self: 'SpiderFootWebUi', ids: str) -> str:
+    @cherrypy.config(**{'response.stream': True})
+    def scanexportjsonmulti(self: 'SpiderFootWebUi', ids: str, filetype: str = "json") -> str:
         """Get scan event result data in JSON format for multiple scans.
 
         Args:
             ids (str): comma separated list of scan IDs
+            filetype (str): type of file ("json" for a JSON array, or "ndjson" for one JSON object per line)
 
         Returns:
             str: results in JSON format
         """
         dbh = SpiderFootDb(self.config)
-        scaninfo = list()
+        scans = dict()
         scan_name = ""
 
         for id in ids.split(','):
@@ -627,39 +1035,49 @@ class SpiderFootWebUi:
             if scan is None:
                 continue
 
+            scans[id] = scan
             scan_name = scan[0]
 
-            for row in dbh.scanResultEvent(id):
-                lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-                event_data = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
-                source_data = str(row[2])
-                source_module = str(row[3])
-                event_type = row[4]
-                false_positive = row[13]
-
-                if event_type == "ROOT":
-                    continue
-
-                scaninfo.append({
-                    "data": event_data,
-                    "event_type": event_type,
-                    "module": source_module,
-                    "source_data": source_data,
-                    "false_positive": false_positive,
-                    "last_seen": lastseen,
-                    "scan_name": scan_name,
-                    "scan_target": scan[1]
-                })
+        def results():
+            for id, scan in scans.items():
+                for row in dbh.scanResultEventIter(id):
+                    lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
+                    event_data = str(row[1]).replace("<SFURL>", "").replace("</SFURL>", "")
+                    source_data = str(row[2])
+                    source_module = str(row[3])
+                    event_type = row[4]
+                    false_positive = row[13]
+
+                    if event_type == "ROOT":
+                        continue
 
+                    yield json.dumps({
+                        "data": event_data,
+                        "event_type": event_type,
+                        "module": source_module,
+                        "source_data": source_data,
+                        "false_positive": false_positive,
+                        "last_seen": lastseen,
+                        "scan_name": scan[0],
+                        "scan_target": scan[1]
+                    })
+
+        if filetype.lower() not in ["json", "ndjson"]:
+            return self.error("Invalid export filetype.")
+
+        extension = filetype.lower()
         if len(ids.split(',')) > 1 or scan_name == "":
-            fname = "SpiderFoot.json"
+            fname = f"SpiderFoot.{extension}"
         else:
-            fname = scan_name + "-SpiderFoot.json"
+            fname = f"{scan_name}-SpiderFoot.{extension}"
 
         cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
-        cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
+        if extension == "ndjson":
+            cherrypy.response.headers['Content-Type'] = "application/x-ndjson; charset=utf-8"
+        else:
+            cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
         cherrypy.response.headers['Pragma'] = "no-cache"
-        return json.dumps(scaninfo).encode('utf-8')
+        return self.buildJson(results(), ndjson=(extension == "ndjson"))
 
     @cherrypy.expose
     def scanviz(self: 'SpiderFootWebUi', id: str, gexf: str = "0") -> str:
@@ -676,7 +1094,6 @@ class SpiderFootWebUi:
             return None
 
         dbh = SpiderFootDb(self.config)
-        data = dbh.scanResultEvent(id, filterFp=True)
         scan = dbh.scanInstanceGet(id)
 
         if not scan:
@@ -686,8 +1103,14 @@ class SpiderFootWebUi:
 
         root = scan[1]
 
+        def build(dbh: SpiderFootDb) -> typing.Any:
+            data = dbh.scanResultEvent(id, filterFp=True)
+            if gexf == "0":
+                return SpiderFootHelpers.buildGraphJson([root], data)
+            return SpiderFootHelpers.buildGraphGexf([root], "SpiderFoot Export", data)
+
         if gexf == "0":
-            return SpiderFootHelpers.buildGraphJson([root], data)
+            return self.scanResponse("scanviz", [id], ("json",), build)
 
         if not scan_name:
             fname = "SpiderFoot.gexf"
@@ -697,7 +1120,7 @@ class SpiderFootWebUi:
         cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
         cherrypy.response.headers['Content-Type'] = "application/gexf"
         cherrypy.response.headers['Pragma'] = "no-cache"
-        return SpiderFootHelpers.buildGraphGexf([root], "SpiderFoot Export", data)
+        return self.scanResponse("scanviz", [id], ("gexf",), build)
 
     @cherrypy.expose
     def scanvizmulti(self: 'SpiderFootWebUi', ids: str, gexf: str = "1") -> str:
@@ -711,27 +1134,37 @@ class SpiderFootWebUi:
             str: GEXF data
         """
         dbh = SpiderFootDb(self.config)
-        data = list()
         roots = list()
+        scan_ids = list()
         scan_name = ""
 
         if not ids:
             return None
 
+        if gexf == "0":
+            # Not implemented yet
+            return None
+
         for id in ids.split(','):
             scan = dbh.scanInstanceGet(id)
             if not scan:
                 continue
-            data = data + dbh.scanResultEvent(id, filterFp=True)
+            scan_ids.append(id)
             roots.append(scan[1])
             scan_name = scan[0]
 
-        if not data:
+        if not scan_ids:
             return None
 
-        if gexf == "0":
-            # Not implemented yet
-            return None
+        def build(dbh: SpiderFootDb) -> typing.Any:
+            data = list()
+            for id in scan_ids:
+                data.extend(dbh.scanResultEvent(id, filterFp=True))
+
+            if not data:
+                return None
+
+            return SpiderFootHelpers.buildGraphGexf(roots, "SpiderFoot Export", data)
 
         if len(ids.split(',')) > 1 or scan_name == "":
             fname = "SpiderFoot.gexf"
@@ -741,7 +1174,7 @@ class SpiderFootWebUi:
         cherrypy.response.headers['Content-Disposition'] = f"attachment; filename={fname}"
         cherrypy.response.headers['Content-Type'] = "application/gexf"
         cherrypy.response.headers['Pragma'] = "no-cache"
-        return SpiderFootHelpers.buildGraphGexf(roots, "SpiderFoot Export", data)
+        return self.scanResponse("scanvizmulti", scan_ids, ("gexf",), build)
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -1255,10 +1688,7 @@ class SpiderFootWebUi:
                     ]).encode('utf-8')
 
         # Set all the children as FPs too.. it's only logical afterall, right?
-        childs = dbh.scanElementChildrenAll(id, ids)
-        allIds = ids + childs
-
-        ret = dbh.scanResultsUpdateFP(id, allIds, fp)
+        ret = dbh.scanResultsUpdateFP(id, ids, fp, children=True)
         if ret:
             return json.dumps(["SUCCESS", ""]).encode('utf-8')
 
@@ -1344,6 +1774,18 @@ class SpiderFootWebUi:
         """
         return ["SUCCESS", __version__]
 
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def logstats(self: 'SpiderFootWebUi') -> dict:
+        """Counters of the scan logs written to the database: records
+        waiting to be written, written and dropped, and how long the last
+        and slowest batches waited, in seconds.
+
+        Returns:
+            dict: scan log counters
+        """
+        return logStats()
+
     @cherrypy.expose
     @cherrypy.tools.json_out()
     def query(self: 'SpiderFootWebUi', query: str) -> str:
@@ -1557,33 +1999,252 @@ class SpiderFootWebUi:
     # DATA PROVIDERS
     #
 
+    def scanStatusData(self: 'SpiderFootWebUi', data: list, correlations: list) -> list:
+        """Format a scan's status and correlation counts for the web UI.
+
+        Args:
+            data (list): scan instance, as returned by SpiderFootDb.scanInstanceGet()
+            correlations (list): correlation counts by risk
+
+        Returns:
+            list: scan status
+        """
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[2]))
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[3]))
+        ended = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[4]))
+        riskmatrix = {
+            "HIGH": 0,
+            "MEDIUM": 0,
+            "LOW": 0,
+            "INFO": 0
+        }
+        if correlations:
+            for c in correlations:
+                riskmatrix[c[0]] = c[1]
+
+        return [data[0], data[1], created, started, ended, data[5], riskmatrix]
+
+    def scanSummaryData(self: 'SpiderFootWebUi', scandata: list, status: str) -> list:
+        """Format a summary of scan results for the web UI.
+
+        Args:
+            scandata (list): summary rows, as returned by SpiderFootDb.scanResultSummary()
+            status (str): scan status
+
+        Returns:
+            list: scan summary
+        """
+        retdata = []
+
+        for row in scandata:
+            if row[0] == "ROOT":
+                continue
+            lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[2]))
+            retdata.append([row[0], row[1], lastseen, row[3], row[4], status])
+
+        return retdata
+
+    def scanLogData(self: 'SpiderFootWebUi', data: list) -> list:
+        """Format scan log lines for the web UI.
+
+        Args:
+            data (list): log rows, as returned by SpiderFootDb.scanLogs()
+
+        Returns:
+            list: scan log
+        """
+        retdata = []
+
+        for row in data:
+            generated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0] / 1000))
+            retdata.append([generated, row[1], row[2], html.escape(row[3]), row[4]])
+
+        return retdata
+
+    def scanEventData(self: 'SpiderFootWebUi', message: str, data) -> typing.Any:
+        """Format a message from the scan publisher for the web UI.
+
+        Args:
+            message (str): message type
+            data: message content
+
+        Returns:
+            typing.Any: message content as sent to the browser
+        """
+        if message == 'status':
+            return self.scanStatusData(*data)
+        if message == 'summary':
+            return self.scanSummaryData(*data)
+        if message == 'log':
+            return self.scanLogData(data)
+        if message == 'results':
+            return [
+                [
+                    row[0],
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[1])),
+                    html.escape(row[2]),
+                    row[3],
+                    row[4],
+                    row[5],
+                    row[6],
+                    row[7]
+                ] for row in data
+            ]
+        return data
+
+    @cherrypy.expose
+    @cherrypy.config(**{'response.stream': True})
+    def scanevents(self: 'SpiderFootWebUi', id: str, results: str = "0", logsFrom: str = None) -> typing.Generator:
+        """Stream a scan's progress as it runs, as Server-Sent Events.
+
+        The first events carry the current status, result summary and
+        number of errors; after that an event is only sent when something
+        changes. Each log event has the ID of its last log line, so a
+        browser reconnecting with Last-Event-ID gets the lines it missed.
+        The stream ends with an 'end' event once the scan is no longer
+        running, or after eventStreamDuration seconds, when the browser
+        reconnects.
+
+        No more than maxEventStreams streams are open at once. Past that,
+        the response is an HTTP 503 error, on which the browser stops
+        following the stream and polls for changes instead.
+
+        Args:
+            id (str): scan ID
+            results (str): also send each new result ("1")
+            logsFrom (str): send the log lines after this log row ID first
+
+        Returns:
+            typing.Generator: event stream
+        """
+        cherrypy.response.headers['Content-Type'] = "text/event-stream"
+        cherrypy.response.headers['Cache-Control'] = "no-cache"
+        cherrypy.response.headers['X-Accel-Buffering'] = "no"
+
+        retry = f"retry: {self.publisher.interval * 3 * 1000:.0f}\n\n".encode('utf-8')
+
+        if not self.eventStreams.acquire(blocking=False):
+            cherrypy.response.status = 503
+            cherrypy.response.headers['Retry-After'] = str(self.eventStreamDuration)
+            return iter([retry])
+
+        # The stream is given up once the response has been sent, or
+        # failed to be
+        cherrypy.request.hooks.attach('on_end_request', self.eventStreams.release)
+
+        logsFrom = cherrypy.request.headers.get('Last-Event-ID', logsFrom)
+        try:
+            logsFrom = int(logsFrom) if logsFrom else None
+        except ValueError:
+            logsFrom = None
+
+        def event(message: str, data, eventId: int = None) -> bytes:
+            lines = [f"event: {message}"]
+            if eventId is not None:
+                lines.append(f"id: {eventId}")
+            lines.append(f"data: {json.dumps(self.scanEventData(message, data))}")
+            return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+        def stream() -> typing.Generator:
+            yield retry
+
+            dbh = SpiderFootDb(self.config)
+            if not dbh.scanInstanceGet(id):
+                yield event('end', None)
+                return
+
+            cursor = logsFrom
+            subscriber = self.publisher.subscribe(id, results == "1")
+            try:
+                if cursor is not None:
+                    rows = dbh.scanLogs(id, None, cursor, True)
+                    if rows:
+                        cursor = max(row[4] for row in rows)
+                        yield event('log', rows, cursor)
+                dbh = None
+
+                deadline = time.monotonic() + self.eventStreamDuration
+                while time.monotonic() < deadline:
+                    try:
+                        message, data = subscriber.get(timeout=self.eventKeepalive)
+                    except queue.Empty:
+                        yield b": keepalive\n\n"
+                        continue
+
+                    if message == 'log':
+                        # Skip lines already sent from logsFrom
+                        if cursor is not None:
+                            data = [row for row in data if row[4] > cursor]
+                            if not data:
+                                continue
+                        yield event(message, data, max(row[4] for row in data))
+                        continue
+
+                    yield event(message, data)
+                    if message == 'end':
+                        return
+            finally:
+                self.publisher.unsubscribe(id, subscriber)
+
+        return stream()
+
     @cherrypy.expose
     @cherrypy.tools.json_out()
-    def scanlog(self: 'SpiderFootWebUi', id: str, limit: str = None, rowId: str = None, reverse: str = None) -> list:
-        """Scan log data.
+    def scanlog(
+        self: 'SpiderFootWebUi',
+        id: str,
+        limit: str = None,
+        rowId: str = None,
+        reverse: str = None,
+        logType: str = None,
+        component: str = None,
+        pageSize: str = None,
+        cursor: str = None
+    ) -> typing.Any:
+        """Scan log data, either all at once or, if pageSize is given, a
+        page at a time, latest first unless reversed, as for
+        scaneventresults.
 
         Args:
             id (str): scan ID
             limit (str): TBD
             rowId (str): TBD
             reverse (str): TBD
+            logType (str): filter by type, such as ERROR (paged only)
+            component (str): filter by component (paged only)
+            pageSize (str): number of log lines per page
+            cursor (str): cursor returned with the previous page
 
         Returns:
-            list: scan log
+            typing.Any: scan log, or a page of it
         """
         dbh = SpiderFootDb(self.config)
-        retdata = []
+
+        if pageSize is not None:
+            try:
+                rows, after = dbh.scanLogPage(
+                    id,
+                    logType or None,
+                    component or None,
+                    descending=not self.flagValue(reverse),
+                    after=self.pageKey(cursor),
+                    limit=self.pageSizeValue(pageSize),
+                    includeDebug=True
+                )
+                total = None if cursor else dbh.scanLogCount(id, logType or None, component or None, includeDebug=True)
+            except ValueError as e:
+                return self.jsonify_error('400', str(e))
+            except Exception:
+                return self.jsonify_error('500', "Unable to read scan logs.")
+
+            return self.page(self.scanLogData(rows), after, total)
 
         try:
             data = dbh.scanLogs(id, limit, rowId, reverse)
         except Exception:
-            return retdata
-
-        for row in data:
-            generated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0] / 1000))
-            retdata.append([generated, row[1], row[2], html.escape(row[3]), row[4]])
+            return []
 
-        return retdata
+        return self.scanLogData(data)
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -1623,6 +2284,11 @@ class SpiderFootWebUi:
         data = dbh.scanInstanceList()
         retdata = []
 
+        # Correlation counts of all scans, read at once rather than per scan
+        correlations = dict()
+        for scanId, risk, total in dbh.scanCorrelationRiskSummary():
+            correlations.setdefault(scanId, list()).append((risk, total))
+
         for row in data:
             created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[3]))
             riskmatrix = {
@@ -1631,10 +2297,8 @@ class SpiderFootWebUi:
                 "LOW": 0,
                 "INFO": 0
             }
-            correlations = dbh.scanCorrelationSummary(row[0], by="risk")
-            if correlations:
-                for c in correlations:
-                    riskmatrix[c[0]] = c[1]
+            for c in correlations.get(row[0], list()):
+                riskmatrix[c[0]] = c[1]
 
             if row[4] == 0:
                 started = "Not yet"
@@ -1667,25 +2331,11 @@ class SpiderFootWebUi:
         if not data:
             return []
 
-        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[2]))
-        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[3]))
-        ended = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data[4]))
-        riskmatrix = {
-            "HIGH": 0,
-            "MEDIUM": 0,
-            "LOW": 0,
-            "INFO": 0
-        }
-        correlations = dbh.scanCorrelationSummary(id, by="risk")
-        if correlations:
-            for c in correlations:
-                riskmatrix[c[0]] = c[1]
-
-        return [data[0], data[1], created, started, ended, data[5], riskmatrix]
+        return self.scanStatusData(data, dbh.scanCorrelationSummary(id, by="risk"))
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def scansummary(self: 'SpiderFootWebUi', id: str, by: str) -> list:
+    @cherrypy.tools.json_out(handler=jsonHandler)
+    def scansummary(self: 'SpiderFootWebUi', id: str, by: str) -> typing.Any:
         """Summary of scan results.
 
         Args:
@@ -1693,113 +2343,178 @@ class SpiderFootWebUi:
             by (str): filter by type
 
         Returns:
-            list: scan summary
+            typing.Any: scan summary
         """
-        retdata = []
-
-        dbh = SpiderFootDb(self.config)
+        def build(dbh: SpiderFootDb) -> list:
+            retdata = []
 
-        try:
-            scandata = dbh.scanResultSummary(id, by)
-        except Exception:
-            return retdata
+            try:
+                scandata = dbh.scanResultSummary(id, by)
+            except Exception:
+                return retdata
 
-        try:
-            statusdata = dbh.scanInstanceGet(id)
-        except Exception:
-            return retdata
+            try:
+                statusdata = dbh.scanInstanceGet(id)
+            except Exception:
+                return retdata
 
-        for row in scandata:
-            if row[0] == "ROOT":
-                continue
-            lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[2]))
-            retdata.append([row[0], row[1], lastseen, row[3], row[4], statusdata[5]])
+            return self.scanSummaryData(scandata, statusdata[5])
 
-        return retdata
+        return self.scanResponse("scansummary", [id], (by,), build)
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def scancorrelations(self: 'SpiderFootWebUi', id: str) -> list:
+    @cherrypy.tools.json_out(handler=jsonHandler)
+    def scancorrelations(self: 'SpiderFootWebUi', id: str) -> typing.Any:
         """Correlation results from a scan.
 
         Args:
             id (str): scan ID
 
         Returns:
-            list: correlation result list
+            typing.Any: correlation result list
         """
-        retdata = []
+        def build(dbh: SpiderFootDb) -> list:
+            retdata = []
 
-        dbh = SpiderFootDb(self.config)
+            try:
+                corrdata = dbh.scanCorrelationList(id)
+            except Exception:
+                return retdata
 
-        try:
-            corrdata = dbh.scanCorrelationList(id)
-        except Exception:
-            return retdata
+            for row in corrdata:
+                retdata.append([row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7]])
 
-        for row in corrdata:
-            retdata.append([row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7]])
+            return retdata
 
-        return retdata
+        return self.scanResponse("scancorrelations", [id], (), build)
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def scaneventresults(self: 'SpiderFootWebUi', id: str, eventType: str = None, filterfp: bool = False, correlationId: str = None) -> list:
-        """Return all event results for a scan as JSON.
+    @cherrypy.tools.json_out(handler=jsonHandler)
+    def scaneventresults(
+        self: 'SpiderFootWebUi',
+        id: str,
+        eventType: str = None,
+        filterfp: bool = False,
+        correlationId: str = None,
+        srcModule: str = None,
+        risk: str = None,
+        text: str = None,
+        sort: str = 'generated',
+        order: str = 'asc',
+        pageSize: str = None,
+        cursor: str = None
+    ) -> typing.Any:
+        """Return event results for a scan as JSON, either all at once or,
+        if pageSize is given, a page at a time.
+
+        A page is returned as a dict of its rows, the cursor of the next
+        page, if there is one, and, for the first page, the number of
+        results of all pages. The number is a lower bound if totalCapped
+        is set.
 
         Args:
             id (str): scan ID
             eventType (str): filter by event type
             filterfp (bool): remove false positives from search results
             correlationId (str): filter by events associated with a correlation
+            srcModule (str): filter by module (paged only)
+            risk (str): filter by minimum risk (paged only)
+            text (str): full-text search of the data (paged only)
+            sort (str): sort by 'generated', 'type' or 'module' (paged only)
+            order (str): 'asc' or 'desc' (paged only)
+            pageSize (str): number of results per page
+            cursor (str): cursor returned with the previous page
 
         Returns:
-            list: scan results
+            typing.Any: scan results, or a page of scan results
         """
-        retdata = []
-
-        dbh = SpiderFootDb(self.config)
-
         if not eventType:
             eventType = 'ALL'
 
-        try:
-            data = dbh.scanResultEvent(id, eventType, filterfp, correlationId=correlationId)
-        except Exception:
-            return retdata
+        def build(dbh: SpiderFootDb) -> typing.Any:
+            if pageSize is not None:
+                filters = {
+                    'eventType': eventType,
+                    'srcModule': srcModule or None,
+                    'risk': int(risk) if str(risk).isdigit() else None,
+                    'text': text or None,
+                    'correlationId': correlationId or None,
+                    'filterFp': self.flagValue(filterfp)
+                }
+
+                try:
+                    rows, after = dbh.scanResultEventPage(
+                        id,
+                        sort=sort,
+                        descending=(order == 'desc'),
+                        after=self.pageKey(cursor),
+                        limit=self.pageSizeValue(pageSize),
+                        **filters
+                    )
+                    total = None if cursor else dbh.scanResultEventCount(id, **filters)
+                except ValueError as e:
+                    return self.jsonify_error('400', str(e))
+                except Exception:
+                    return self.jsonify_error('500', "Unable to read scan results.")
+
+                return self.page([self.scanEventResultData(row) for row in rows], after, total)
 
-        for row in data:
-            lastseen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0]))
-            retdata.append([
-                lastseen,
-                html.escape(row[1]),
-                html.escape(row[2]),
-                row[3],
-                row[5],
-                row[6],
-                row[7],
-                row[8],
-                row[13],
-                row[14],
-                row[4]
-            ])
+            try:
+                data = dbh.scanResultEvent(id, eventType, filterFp=self.flagValue(filterfp), correlationId=correlationId)
+            except Exception:
+                return []
 
-        return retdata
+            return [self.scanEventResultData(row) for row in data]
+
+        return self.scanResponse("scaneventresults", [id], (eventType, filterfp, correlationId, srcModule, risk, text, sort, order, pageSize, cursor), build)
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
-    def scaneventresultsunique(self: 'SpiderFootWebUi', id: str, eventType: str, filterfp: bool = False) -> list:
-        """Return unique event results for a scan as JSON.
+    def scaneventresultsunique(
+        self: 'SpiderFootWebUi',
+        id: str,
+        eventType: str,
+        filterfp: bool = False,
+        pageSize: str = None,
+        cursor: str = None
+    ) -> typing.Any:
+        """Return unique event results for a scan as JSON, either all at
+        once or, if pageSize is given, a page at a time in order of their
+        data, as for scaneventresults.
 
         Args:
             id (str): filter search results by scan ID
             eventType (str): filter search results by event type
             filterfp (bool): remove false positives from search results
+            pageSize (str): number of results per page
+            cursor (str): cursor returned with the previous page
 
         Returns:
-            list: unique search results
+            typing.Any: unique search results, or a page of them
         """
         dbh = SpiderFootDb(self.config)
+
+        if pageSize is not None:
+            try:
+                rows, after = dbh.scanResultEventUniquePage(
+                    id,
+                    eventType or 'ALL',
+                    self.flagValue(filterfp),
+                    after=self.pageKey(cursor),
+                    limit=self.pageSizeValue(pageSize)
+                )
+                total = None
+                if not cursor:
+                    # Counted as results are stored, false positives included
+                    summary = dbh.scanResultSummary(id, "type")
+                    total = (sum(row[4] for row in summary if eventType in [None, '', 'ALL', row[0]]), False)
+            except ValueError as e:
+                return self.jsonify_error('400', str(e))
+            except Exception:
+                return self.jsonify_error('500', "Unable to read scan results.")
+
+            return self.page([[html.escape(row[0]), row[1], row[2]] for row in rows], after, total)
+
         retdata = []
 
         try:
@@ -1815,17 +2530,44 @@ class SpiderFootWebUi:
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
-    def search(self: 'SpiderFootWebUi', id: str = None, eventType: str = None, value: str = None) -> list:
-        """Search scans.
+    def search(
+        self: 'SpiderFootWebUi',
+        id: str = None,
+        eventType: str = None,
+        value: str = None,
+        pageSize: str = None,
+        cursor: str = None
+    ) -> typing.Any:
+        """Search scans, either all at once or, if pageSize is given, a page
+        at a time in the order the results were stored, as for
+        scaneventresults but without a total.
 
         Args:
             id (str): filter search results by scan ID
             eventType (str): filter search results by event type
             value (str): filter search results by event value
+            pageSize (str): number of results per page
+            cursor (str): cursor returned with the previous page
 
         Returns:
-            list: search results
+            typing.Any: search results, or a page of them
         """
+        if pageSize is not None:
+            try:
+                limit = self.pageSizeValue(pageSize)
+                after = self.pageKey(cursor)
+                criteria = self.searchCriteria(id, eventType, value)
+                if criteria is None:
+                    return self.page([], None)
+
+                rows, after = SpiderFootDb(self.config).searchPage(criteria, after=after, limit=limit)
+            except ValueError as e:
+                return self.jsonify_error('400', str(e))
+            except Exception:
+                return self.jsonify_error('500', "Unable to search scan results.")
+
+            return self.page([self.searchResultData(row) for row in rows], after)
+
         try:
             return self.searchBase(id, eventType, value)
         except Exception:
@@ -1853,8 +2595,8 @@ class SpiderFootWebUi:
             return []
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def scanelementtypediscovery(self: 'SpiderFootWebUi', id: str, eventType: str) -> dict:
+    @cherrypy.tools.json_out(handler=jsonHandler)
+    def scanelementtypediscovery(self: 'SpiderFootWebUi', id: str, eventType: str) -> typing.Any:
         """Scan element type discovery.
 
         Args:
@@ -1862,23 +2604,45 @@ class SpiderFootWebUi:
             eventType (str): filter by event type
 
         Returns:
-            dict
+            typing.Any: discovery paths
         """
-        dbh = SpiderFootDb(self.config)
-        pc = dict()
-        datamap = dict()
-        retdata = dict()
+        def build(dbh: SpiderFootDb) -> dict:
+            pc = dict()
+            retdata = dict()
 
-        # Get the events we will be tracing back from
-        try:
-            leafSet = dbh.scanResultEvent(id, eventType)
-            [datamap, pc] = dbh.scanElementSourcesAll(id, leafSet)
-        except Exception:
-            return retdata
+            # Get the events we will be tracing back from, and walk up
+            # their discovery paths in the lineage of the scan
+            try:
+                leafSet = dbh.scanResultEvent(id, eventType)
+                if not leafSet:
+                    return retdata
+                lineage = self.scanLineage(dbh, id)
+            except Exception:
+                return retdata
+
+            datamap = {row[8]: row for row in leafSet}
+            leaves = [lineage.node(eventHash) for eventHash in datamap]
+            parents = lineage.discoveryPaths([node for node in leaves if node is not None])
+            for node, parent in parents.items():
+                # ROOT is its own source, but not its own child
+                if parent >= 0 and parent != node:
+                    pc.setdefault(lineage.hash(parent), list()).append(lineage.hash(node))
+
+            sources = [lineage.hash(parent) for parent in dict.fromkeys(parents.values()) if parent >= 0]
+            try:
+                for row in dbh.scanElementSourcesDirect(id, sources):
+                    datamap[row[8]] = row
+            except Exception:
+                return retdata
 
-        # Delete the ROOT key as it adds no value from a viz perspective
-        del pc['ROOT']
-        retdata['tree'] = SpiderFootHelpers.dataParentChildToTree(pc)
-        retdata['data'] = datamap
+            # Delete the ROOT key as it adds no value from a viz perspective
+            pc.pop('ROOT', None)
+            if not pc:
+                return retdata
 
-        return retdata
+            retdata['tree'] = SpiderFootHelpers.dataParentChildToTree(pc)
+            retdata['data'] = datamap
+
+            return retdata
+
+        return self.scanResponse("scanelementtypediscovery", [id], (eventType,), build)
@@ -4,5 +4,8 @@ from .threadpool import SpiderFootThreadPool
 from .plugin import SpiderFootPlugin
 from .target import SpiderFootTarget
 from .helpers import SpiderFootHelpers
-from .correlation import SpiderFootCorrelator
+from .lineage import SpiderFootLineage
+from .archive import SpiderFootArchive
+from .publisher import SpiderFootScanPublisher
+from .correlation import SpiderFootCorrelator, SpiderFootIncrementalCorrelator
 from spiderfoot.__version__ import __version__
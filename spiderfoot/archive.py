@@ -0,0 +1,700 @@
+from array import array
+from collections import Counter
+import itertools
+import json
+import operator
+import sys
+import typing
+import zipfile
+
+from spiderfoot import SpiderFootDb
+
+
+class SpiderFootArchive():
+    """Finished scan stored in a compressed, columnar archive file.
+
+    An archive is a ZIP file holding a manifest and, for each table of
+    the scan (results, correlations, the results of each correlation
+    and logs), one compressed member per column. Columns are only read
+    the first time they are used. Columns with few distinct values,
+    such as the event type or module, are stored as a list of values
+    and a code per row, and filters on them are evaluated over the
+    codes of all rows at once rather than row by row.
+
+    The query helpers return rows in the same format as the
+    SpiderFootDb methods of the same name, so that an archived scan
+    can be read like one stored in the database.
+
+    Attributes:
+        path: archive file path or file object
+        scanId (str): scan instance ID
+    """
+
+    formatName = "spiderfoot-archive"
+    formatVersion = 1
+
+    # Only scans which are no longer running can be archived
+    finishedStatuses = ["FINISHED", "ABORTED", "ERROR-FAILED"]
+
+    # Columns of each table and their encoding: 'int' and 'float' as
+    # arrays of 64-bit values, 'dict' as distinct values and a code per
+    # row, 'text' as a JSON list. Results refer to their source, and
+    # correlations to their results, by row number.
+    tables = {
+        'results': [
+            ('hash', 'text'),
+            ('type', 'dict'),
+            ('generated', 'float'),
+            ('confidence', 'int'),
+            ('visibility', 'int'),
+            ('risk', 'int'),
+            ('module', 'dict'),
+            ('data', 'text'),
+            ('false_positive', 'int'),
+            ('source_event_hash', 'text'),
+            ('source', 'int'),
+            ('event_descr', 'dict'),
+            ('event_type', 'dict')
+        ],
+        'correlations': [
+            ('id', 'text'),
+            ('title', 'text'),
+            ('rule_id', 'dict'),
+            ('rule_risk', 'dict'),
+            ('rule_name', 'dict'),
+            ('rule_descr', 'dict'),
+            ('rule_logic', 'dict'),
+            ('event_count', 'int')
+        ],
+        'correlation_events': [
+            ('correlation', 'int'),
+            ('result', 'int')
+        ],
+        'logs': [
+            ('generated', 'float'),
+            ('component', 'dict'),
+            ('type', 'dict'),
+            ('message', 'text')
+        ]
+    }
+
+    def __init__(self, path) -> None:
+        """Open an archive for reading.
+
+        Args:
+            path: archive file path or file object
+
+        Raises:
+            ValueError: the file is not a SpiderFoot archive, or was
+                written by a newer version
+        """
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'r')
+
+        try:
+            manifest = json.loads(self._zip.read("manifest.json"))
+        except (KeyError, ValueError):
+            self._zip.close()
+            raise ValueError("Not a SpiderFoot archive") from None
+
+        if manifest.get('format') != self.formatName or manifest.get('version', 0) > self.formatVersion:
+            self._zip.close()
+            raise ValueError(f"Unsupported archive format: {manifest.get('format')} {manifest.get('version')}")
+
+        self._manifest = manifest
+        self.scanId = manifest['scan']['id']
+        self._columns = dict()
+        self._dictColumns = dict()
+
+    def close(self) -> None:
+        """Close the archive file."""
+        self._zip.close()
+
+    def __enter__(self) -> 'SpiderFootArchive':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @classmethod
+    def create(cls, dbh: SpiderFootDb, instanceId: str, path) -> None:
+        """Write a finished scan to an archive.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            instanceId (str): scan instance ID
+            path: archive file path or writable binary file object
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: the scan does not exist or has not finished
+        """
+        if not isinstance(dbh, SpiderFootDb):
+            raise TypeError(f"dbh is {type(dbh)}; expected SpiderFootDb()")
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        scan = dbh.scanInstanceGet(instanceId)
+        if not scan:
+            raise ValueError(f"Scan {instanceId} does not exist")
+
+        if scan[5] not in cls.finishedStatuses:
+            raise ValueError(f"Scan {instanceId} has not finished ({scan[5]})")
+
+        columns = {table: {name: list() for name, _ in tableColumns} for table, tableColumns in cls.tables.items()}
+
+        results = columns['results']
+        rowNumbers = dict()
+        names = ['generated', 'data', 'module', 'type', 'confidence', 'visibility', 'risk',
+                 'hash', 'source_event_hash', 'event_descr', 'event_type', 'false_positive']
+        for row in dbh.scanResultRowsIter(instanceId):
+            rowNumbers.setdefault(row[7], len(results['hash']))
+            for i, name in enumerate(names):
+                results[name].append(row[i])
+        results['source'] = [rowNumbers.get(sourceHash, -1) for sourceHash in results['source_event_hash']]
+
+        correlations = columns['correlations']
+        events = columns['correlation_events']
+        for row in dbh.scanCorrelationList(instanceId):
+            correlation = len(correlations['id'])
+            for i, name in enumerate(correlations):
+                correlations[name].append(row[i])
+            for event in dbh.scanResultEvent(instanceId, correlationId=row[0]):
+                if event[8] in rowNumbers:
+                    events['correlation'].append(correlation)
+                    events['result'].append(rowNumbers[event[8]])
+
+        logs = columns['logs']
+        for row in dbh.scanLogs(instanceId, reverse=True, includeDebug=True):
+            for i, name in enumerate(logs):
+                logs[name].append(row[i])
+
+        manifest = {
+            'format': cls.formatName,
+            'version': cls.formatVersion,
+            'scan': {
+                'id': instanceId,
+                'name': scan[0],
+                'seed_target': scan[1],
+                'created': scan[2],
+                'started': scan[3],
+                'ended': scan[4],
+                'status': scan[5]
+            },
+            'config': dbh.scanConfigGet(instanceId),
+            'rows': {table: len(columns[table][tableColumns[0][0]]) for table, tableColumns in cls.tables.items()}
+        }
+
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for table, tableColumns in cls.tables.items():
+                for name, encoding in tableColumns:
+                    for suffix, content in cls._encode(columns[table][name], encoding).items():
+                        archive.writestr(f"{table}/{name}{suffix}", content)
+            archive.writestr("manifest.json", json.dumps(manifest))
+
+    @staticmethod
+    def _encode(values: list, encoding: str) -> dict:
+        """Encode the values of a column.
+
+        Args:
+            values (list): column values
+            encoding (str): column encoding
+
+        Returns:
+            dict: content of each archive member, by member name suffix
+        """
+        if encoding == 'dict':
+            distinct = list(dict.fromkeys(values))
+            codes = {value: code for code, value in enumerate(distinct)}
+            return {
+                '.values': json.dumps(distinct),
+                '.codes': SpiderFootArchive._arrayBytes(array('q', [codes[value] for value in values]))
+            }
+
+        if encoding == 'int':
+            return {'': SpiderFootArchive._arrayBytes(array('q', values))}
+
+        if encoding == 'float':
+            return {'': SpiderFootArchive._arrayBytes(array('d', values))}
+
+        return {'': json.dumps(values)}
+
+    @staticmethod
+    def _arrayBytes(values: array) -> bytes:
+        """Little-endian bytes of an array.
+
+        Args:
+            values (array): array
+
+        Returns:
+            bytes: array content
+        """
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values.tobytes()
+
+    def _readArray(self, member: str, typecode: str) -> array:
+        """Read an array written by _arrayBytes().
+
+        Args:
+            member (str): archive member name
+            typecode (str): array type code
+
+        Returns:
+            array: array content
+        """
+        values = array(typecode)
+        values.frombytes(self._zip.read(member))
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def _encoding(self, table: str, name: str) -> str:
+        """Encoding of a column.
+
+        Args:
+            table (str): table name
+            name (str): column name
+
+        Returns:
+            str: column encoding
+
+        Raises:
+            KeyError: no such column
+        """
+        for columnName, encoding in self.tables.get(table, list()):
+            if columnName == name:
+                return encoding
+
+        raise KeyError(f"No such column: {table}.{name}")
+
+    def _dictColumn(self, table: str, name: str) -> tuple:
+        """Distinct values and per-row codes of a dictionary-encoded column.
+
+        Args:
+            table (str): table name
+            name (str): column name
+
+        Returns:
+            tuple: list of distinct values and array of codes
+        """
+        key = (table, name)
+        if key not in self._dictColumns:
+            self._dictColumns[key] = (
+                json.loads(self._zip.read(f"{table}/{name}.values")),
+                self._readArray(f"{table}/{name}.codes", 'q')
+            )
+
+        return self._dictColumns[key]
+
+    def column(self, table: str, name: str) -> list:
+        """Values of a column, read from the archive the first time.
+
+        Args:
+            table (str): table name
+            name (str): column name
+
+        Returns:
+            list: column values, one per row
+        """
+        key = (table, name)
+        if key not in self._columns:
+            encoding = self._encoding(table, name)
+            if encoding == 'dict':
+                values, codes = self._dictColumn(table, name)
+                self._columns[key] = [values[code] for code in codes]
+            elif encoding == 'int':
+                self._columns[key] = self._readArray(f"{table}/{name}", 'q')
+            elif encoding == 'float':
+                self._columns[key] = self._readArray(f"{table}/{name}", 'd')
+            else:
+                self._columns[key] = json.loads(self._zip.read(f"{table}/{name}"))
+
+        return self._columns[key]
+
+    def rowCount(self, table: str) -> int:
+        """Number of rows of a table.
+
+        Args:
+            table (str): table name
+
+        Returns:
+            int: number of rows
+        """
+        return self._manifest['rows'].get(table, 0)
+
+    def _mask(self, table: str, name: str, wanted) -> typing.Iterable[bool]:
+        """Whether the value of a column is one of those wanted, for
+        each row of a table.
+
+        Args:
+            table (str): table name
+            name (str): column name
+            wanted: value or list of values
+
+        Returns:
+            typing.Iterable[bool]: one flag per row
+        """
+        if not isinstance(wanted, list):
+            wanted = [wanted]
+
+        if self._encoding(table, name) == 'dict':
+            # Compare the codes of the rows with the codes of the
+            # wanted values, rather than each row's value.
+            values, codes = self._dictColumn(table, name)
+            wantedCodes = {code for code, value in enumerate(values) if value in wanted}
+            return map(wantedCodes.__contains__, codes)
+
+        return map(set(wanted).__contains__, self.column(table, name))
+
+    def _select(self, table: str, filters: dict) -> list:
+        """Rows of a table whose columns have the values wanted.
+
+        Args:
+            table (str): table name
+            filters (dict): value, or list of values, wanted by column name
+
+        Returns:
+            list: row numbers
+        """
+        rows = range(self.rowCount(table))
+
+        mask = None
+        for name, wanted in filters.items():
+            columnMask = self._mask(table, name, wanted)
+            mask = columnMask if mask is None else map(operator.and_, mask, columnMask)
+
+        if mask is None:
+            return list(rows)
+
+        return list(itertools.compress(rows, mask))
+
+    def resultRows(
+        self,
+        eventType: str = 'ALL',
+        srcModule: str = None,
+        risk: int = None,
+        filterFp: bool = False
+    ) -> list:
+        """Numbers of the results of a given event type, module and risk.
+
+        Args:
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            risk (int): filter by risk
+            filterFp (bool): filter false positives
+
+        Returns:
+            list: result row numbers
+        """
+        filters = dict()
+
+        if eventType != "ALL":
+            filters['type'] = eventType
+
+        if srcModule:
+            filters['module'] = srcModule
+
+        if risk is not None:
+            filters['risk'] = risk
+
+        if filterFp:
+            filters['false_positive'] = 0
+
+        return self._select('results', filters)
+
+    def scanInstanceGet(self, instanceId: str) -> tuple:
+        """Return info about the scan (name, target, created, started, ended, status)
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            tuple: scan instance info, or None if the archive is of another scan
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if instanceId != self.scanId:
+            return None
+
+        scan = self._manifest['scan']
+        return (scan['name'], scan['seed_target'], scan['created'], scan['started'], scan['ended'], scan['status'])
+
+    def scanConfigGet(self, instanceId: str) -> dict:
+        """Retrieve the configuration of the scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            dict: configuration data
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if instanceId != self.scanId:
+            return dict()
+
+        return dict(self._manifest['config'])
+
+    def scanResultEvent(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        srcModule: str = None,
+        data: list = None,
+        sourceId: list = None,
+        correlationId: str = None,
+        filterFp: bool = False,
+        risk: int = None
+    ) -> list:
+        """Obtain the data for the scan and event type, as for
+        SpiderFootDb.scanResultEvent().
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            data (list): filter by the data
+            sourceId (list): filter by the ID of the source event
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+            risk (int): filter by risk
+
+        Returns:
+            list: scan results
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        if instanceId != self.scanId:
+            return list()
+
+        # As in the database, results whose source was not stored are
+        # left out.
+        sources = self.column('results', 'source')
+        rows = [row for row in self.resultRows(eventType, srcModule, risk, filterFp) if sources[row] >= 0]
+
+        if data:
+            wanted = set(data) if isinstance(data, list) else {data}
+            values = self.column('results', 'data')
+            rows = [row for row in rows if values[row] in wanted]
+
+        if sourceId:
+            wanted = set(sourceId) if isinstance(sourceId, list) else {sourceId}
+            sources = self.column('results', 'source_event_hash')
+            rows = [row for row in rows if sources[row] in wanted]
+
+        if correlationId:
+            correlations = self._select('correlations', {'id': correlationId})
+            events = self._select('correlation_events', {'correlation': correlations})
+            eventRows = self.column('correlation_events', 'result')
+            wanted = {eventRows[event] for event in events}
+            rows = [row for row in rows if row in wanted]
+
+        return [self._resultRow(row) for row in rows]
+
+    def _resultRow(self, row: int) -> tuple:
+        """A result in the format of SpiderFootDb.scanResultEvent().
+
+        Args:
+            row (int): result row number
+
+        Returns:
+            tuple: scan result
+        """
+        column = self.column
+        source = column('results', 'source')[row]
+
+        return (
+            column('results', 'generated')[row],
+            column('results', 'data')[row],
+            column('results', 'data')[source],
+            column('results', 'module')[row],
+            column('results', 'type')[row],
+            column('results', 'confidence')[row],
+            column('results', 'visibility')[row],
+            column('results', 'risk')[row],
+            column('results', 'hash')[row],
+            column('results', 'source_event_hash')[row],
+            column('results', 'event_descr')[row],
+            column('results', 'event_type')[row],
+            self.scanId,
+            column('results', 'false_positive')[row],
+            column('results', 'false_positive')[source]
+        )
+
+    def scanResultSummary(self, instanceId: str, by: str = "type") -> list:
+        """Obtain a summary of the results, filtered by event type, module
+        or entity, as for SpiderFootDb.scanResultSummary().
+
+        Args:
+            instanceId (str): scan instance ID
+            by (str): filter by type
+
+        Returns:
+            list: scan instance info
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(by, str):
+            raise TypeError(f"by is {type(by)}; expected str()") from None
+
+        if by not in ["type", "module", "entity"]:
+            raise ValueError(f"Invalid filter by value: {by}") from None
+
+        if instanceId != self.scanId:
+            return list()
+
+        generated = self.column('results', 'generated')
+        data = self.column('results', 'data')
+        descriptions = self.column('results', 'event_descr')
+
+        if by == "entity":
+            rows = self._select('results', {'event_type': 'ENTITY'})
+        else:
+            rows = range(self.rowCount('results'))
+            keys = self.column('results', 'type' if by == "type" else 'module')
+
+        groups = dict()
+        for row in rows:
+            key = (data[row], descriptions[row]) if by == "entity" else keys[row]
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [generated[row], set(), 0, descriptions[row]]
+            elif generated[row] > group[0]:
+                group[0] = generated[row]
+            group[1].add(data[row])
+            group[2] += 1
+
+        if by == "entity":
+            summary = [(key[0], key[1], last, total, len(unique)) for key, (last, unique, total, _) in groups.items()]
+            return sorted(summary, key=lambda row: row[3], reverse=True)[:50]
+
+        if by == "type":
+            summary = [(key, descr, last, total, len(unique)) for key, (last, unique, total, descr) in groups.items()]
+            return sorted(summary, key=lambda row: row[1])
+
+        summary = [(key, '', last, total, len(unique)) for key, (last, unique, total, _) in groups.items()]
+        return sorted(summary, key=lambda row: row[0], reverse=True)
+
+    def scanCorrelationList(self, instanceId: str) -> list:
+        """Obtain a list of the correlations of the scan, as for
+        SpiderFootDb.scanCorrelationList().
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            list: scan correlation list
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if instanceId != self.scanId:
+            return list()
+
+        columns = [self.column('correlations', name) for name, _ in self.tables['correlations']]
+        return [tuple(column[row] for column in columns) for row in range(self.rowCount('correlations'))]
+
+    def scanCorrelationSummary(self, instanceId: str, by: str = "rule") -> list:
+        """Obtain a summary of the correlations, filtered by rule or risk,
+        as for SpiderFootDb.scanCorrelationSummary().
+
+        Args:
+            instanceId (str): scan instance ID
+            by (str): filter by rule or risk
+
+        Returns:
+            list: scan correlation summary
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(by, str):
+            raise TypeError(f"by is {type(by)}; expected str()") from None
+
+        if by not in ["rule", "risk"]:
+            raise ValueError(f"Invalid filter by value: {by}") from None
+
+        if instanceId != self.scanId:
+            return list()
+
+        if by == "risk":
+            values, codes = self._dictColumn('correlations', 'rule_risk')
+            counts = Counter(codes)
+            return sorted((values[code], total) for code, total in counts.items())
+
+        values, codes = self._dictColumn('correlations', 'rule_id')
+        counts = Counter(codes)
+        summary = list()
+        for code, total in counts.items():
+            row = codes.index(code)
+            summary.append((
+                values[code],
+                self.column('correlations', 'rule_name')[row],
+                self.column('correlations', 'rule_risk')[row],
+                self.column('correlations', 'rule_descr')[row],
+                total
+            ))
+
+        return sorted(summary, key=lambda row: row[0])
+
+    def scanLogs(self, instanceId: str, limit: int = None, fromRowId: int = 0, reverse: bool = False) -> list:
+        """Get the scan logs, as for SpiderFootDb.scanLogs(). Logs are
+        numbered from 1 in the order they were generated.
+
+        Args:
+            instanceId (str): scan instance ID
+            limit (int): limit number of results
+            fromRowId (int): retrieve logs starting from row ID
+            reverse (bool): search result order
+
+        Returns:
+            list: scan logs
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if instanceId != self.scanId:
+            return list()
+
+        columns = [self.column('logs', name) for name, _ in self.tables['logs']]
+        rows = range(int(fromRowId or 0), self.rowCount('logs'))
+        if not reverse:
+            rows = reversed(rows)
+
+        logs = [tuple(column[row] for column in columns) + (row + 1,) for row in rows]
+        if limit is None:
+            return logs
+
+        return logs[:int(limit)]
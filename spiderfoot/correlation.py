@@ -1,9 +1,12 @@
 import logging
-from copy import deepcopy
+from collections import Counter
+import queue
 import re
+import threading
+import time
 import netaddr
 import yaml
-from spiderfoot import SpiderFootDb
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootLineage, SpiderFootThreadPool
 
 
 class SpiderFootCorrelator:
@@ -19,6 +22,9 @@ class SpiderFootCorrelator:
     types = None
     rules = list()
     type_entity_map = dict()
+    collection_cache = None
+    collection_lock = None
+    lineage = None
 
     # For syntax checking
     mandatory_components = ["meta", "collections", "headline"]
@@ -43,7 +49,8 @@ class SpiderFootCorrelator:
         "id": {},
         "version": {},
         "enabled": {},
-        "rawYaml": {}
+        "rawYaml": {},
+        "plan": {}
     }
 
     def __init__(self, dbh: SpiderFootDb, ruleset: dict, scanId: str = None) -> None:
@@ -51,7 +58,9 @@ class SpiderFootCorrelator:
 
         Args:
             dbh (SpiderFootDb): database handle
-            ruleset (dict): correlation rule set
+            ruleset (dict): correlation rule set, keyed by rule ID. Each rule is either
+                            raw YAML, or a rule as returned by get_ruleset(), which
+                            is used as-is without being parsed and compiled again.
             scanId (str): scan instance ID
 
         Raises:
@@ -71,6 +80,10 @@ class SpiderFootCorrelator:
 
         self.scanId = scanId
 
+        # Events collected from the database, shared between rules
+        self.collection_cache = dict()
+        self.collection_lock = threading.RLock()
+
         self.types = self.dbh.eventTypes()
         for t in self.types:
             self.type_entity_map[t[1]] = t[3]
@@ -78,16 +91,22 @@ class SpiderFootCorrelator:
         self.rules = list()
 
         # Sanity-check the rules
+        parsed = list()
         for rule_id in ruleset.keys():
+            if isinstance(ruleset[rule_id], dict):
+                self.rules.append(ruleset[rule_id])
+                continue
+
             self.log.debug(f"Parsing rule {rule_id}...")
             try:
                 self.rules.append(yaml.safe_load(ruleset[rule_id]))
                 self.rules[len(self.rules) - 1]['rawYaml'] = ruleset[rule_id]
             except Exception as e:
                 raise SyntaxError(f"Unable to process a YAML correlation rule [{rule_id}]") from e
+            parsed.append(self.rules[len(self.rules) - 1])
 
         # Strip any trailing newlines that may have creeped into meta name/description
-        for rule in self.rules:
+        for rule in parsed:
             for k in rule['meta'].keys():
                 if isinstance(rule['meta'][k], str):
                     rule['meta'][k] = rule['meta'][k].strip()
@@ -97,6 +116,12 @@ class SpiderFootCorrelator:
         if not self.check_ruleset_validity(self.rules):
             raise SyntaxError("Sanity check of correlation rules failed.")
 
+        # Compile rules into plans once, up front, rather than
+        # re-interpreting them each time they are run.
+        for rule in self.rules:
+            if 'plan' not in rule:
+                rule['plan'] = self.compile_rule(rule)
+
     def get_ruleset(self) -> list:
         """Correlation rule set.
 
@@ -105,9 +130,42 @@ class SpiderFootCorrelator:
         """
         return self.rules
 
-    def run_correlations(self) -> None:
+    def run_correlations(self, threads: int = 4) -> None:
         """Run all correlation rules.
 
+        Collections shared by several rules are fetched from the database
+        once, then the rules are processed concurrently.
+
+        Args:
+            threads (int): number of rules to process concurrently
+        """
+        results = self.process_rules(threads)
+
+        # Store results in rule order, regardless of completion order
+        for ruleIndex, rule in enumerate(self.rules):
+            if ruleIndex not in results:
+                self.log.error(f"Rule {rule['id']} failed to complete.")
+                continue
+
+            if not results[ruleIndex]:
+                self.log.debug(f"No results for rule {rule['id']}.")
+                continue
+
+            self.log.info(f"Rule {rule['id']} returned {len(results[ruleIndex].keys())} results.")
+
+            for result in results[ruleIndex]:
+                self.create_correlation(rule, results[ruleIndex][result])
+
+    def process_rules(self, threads: int = 4) -> dict:
+        """Process all correlation rules against the scan, without
+        storing the results.
+
+        Args:
+            threads (int): number of rules to process concurrently
+
+        Returns:
+            dict: results of each rule which completed, keyed by position in the rule set
+
         Raises:
             ValueError: correlation rules cannot be run on specified scanId
         """
@@ -118,17 +176,185 @@ class SpiderFootCorrelator:
         if scan_instance[5] in ["RUNNING", "STARTING", "STARTED"]:
             raise ValueError(f"Scan {self.scanId} is {scan_instance[5]}. You cannot run correlations on running scans.")
 
-        for rule in self.rules:
-            self.log.debug(f"Processing rule: {rule['id']}")
-            results = self.process_rule(rule)
-            if not results:
-                self.log.debug(f"No results for rule {rule['id']}.")
+        # Database access happens here, on the calling thread, so
+        # that the rule workers only ever read from the cache.
+        self.collection_cache = dict()
+        self.lineage = None
+        self.prefetch_collections(self.rules)
+
+        results = dict()
+        with SpiderFootThreadPool(threads, qsize=len(self.rules) + 1, name="sfcorrelator") as pool:
+            for ruleIndex, ruleResults in pool.map(self.process_rule_indexed, enumerate(self.rules), taskName="correlation", saveResult=True):
+                results[ruleIndex] = ruleResults
+
+        self.collection_cache = dict()
+        self.lineage = None
+
+        return results
+
+    def process_rule_indexed(self, indexedRule: tuple) -> tuple:
+        """Process a rule on behalf of a thread pool worker.
+
+        Args:
+            indexedRule (tuple): position of the rule in the rule set, and the rule
+
+        Returns:
+            tuple: position of the rule in the rule set, and the rule results
+        """
+        ruleIndex, rule = indexedRule
+        self.log.debug(f"Processing rule: {rule['id']}")
+        return ruleIndex, self.process_rule(rule)
+
+    def prefetch_collections(self, rules: list) -> None:
+        """Fetch every collection used by the rules into the collection
+        cache, enriched as required by the most demanding rule.
+
+        Args:
+            rules (list): correlation rules
+        """
+        wanted = dict()
+        for rule in rules:
+            plan = rule.get('plan') or self.compile_rule(rule)
+            fetchChildren, fetchSources, fetchEntities = plan['scope']
+            for collection in plan['collections']:
+                if not collection:
+                    continue
+
+                key = collection['key']
+                if key not in wanted:
+                    wanted[key] = [collection['query'], False, False, False]
+                wanted[key][1] |= fetchChildren
+                wanted[key][2] |= fetchSources
+                wanted[key][3] |= fetchEntities
+
+        self.log.debug(f"Prefetching {len(wanted)} collections for {len(rules)} rules")
+        for query_args, fetchChildren, fetchSources, fetchEntities in wanted.values():
+            self.collect_from_query(query_args, fetchChildren, fetchSources, fetchEntities)
+
+    def compile_rule(self, rule: dict) -> dict:
+        """Compile a rule into a plan: the data it needs fetched, and for
+        each collection the database query and remaining filters, with
+        event types resolved and patterns compiled.
+
+        Args:
+            rule (dict): correlation rule
+
+        Returns:
+            dict: rule plan
+        """
+        return {
+            'scope': self.analyze_rule_scope(rule),
+            'collections': [self.compile_collection(c['collect']) for c in rule.get('collections', list())]
+        }
+
+    def compile_collection(self, collection: list) -> dict:
+        """Compile the match rules of a collection. The first match rule
+        becomes the database query, and subsequent match rules on event
+        type, or on exact module names, are folded into that query.
+        Any other match rules are kept as compiled filters.
+
+        Args:
+            collection (list): match rules
+
+        Returns:
+            dict: database query, collection cache key and filters, or None if the collection is invalid
+        """
+        query_args = self.build_db_criteria(collection[0])
+        if not query_args:
+            self.log.error(f"Error encountered parsing match rule: {collection[0]}.")
+            return None
+
+        filters = list()
+        for matchrule in collection[1:]:
+            patterns = self.compile_patterns(matchrule['value'], matchrule['method'])
+            if self.pushdown_filter(query_args, matchrule['field'], patterns):
                 continue
+            filters.append((matchrule['field'], patterns))
+
+        return {
+            'query': query_args,
+            'key': self.collection_key(query_args),
+            'filters': filters
+        }
+
+    def compile_patterns(self, values, method: str) -> tuple:
+        """Compile the values of a match rule.
+
+        Args:
+            values (str|list): match rule value(s), optionally prefixed with "not "
+            method (str): match rule method, exact or regex
+
+        Returns:
+            tuple: negation flag, pattern and compiled regex (None if exact) for
+                   each value, or None if the method is unknown
+        """
+        if method not in ["exact", "regex"]:
+            return None
+
+        if not isinstance(values, list):
+            values = [values]
+
+        compiled = list()
+        for pattern in values:
+            pattern = str(pattern)
+            negate = pattern.startswith("not ")
+            if negate:
+                pattern = re.sub(r"^not\s+", "", pattern)
+            regex = re.compile(pattern, re.IGNORECASE) if method == "regex" else None
+            compiled.append((negate, pattern, regex))
+
+        return tuple(compiled)
+
+    def pushdown_filter(self, query_args: dict, field: str, patterns: tuple) -> bool:
+        """Fold a filter into a database query where the query can apply
+        it exactly: any filter on event type, since the set of event types
+        is known, and filters on exact module names.
+
+        Args:
+            query_args (dict): criteria built by build_db_criteria(), updated in place
+            field (str): field the filter applies to
+            patterns (tuple): patterns compiled by compile_patterns()
+
+        Returns:
+            bool: filter was folded into the query
+        """
+        if patterns is None:
+            return False
+
+        if field == "type":
+            allowed = [t[1] for t in self.types if self.event_match({'type': t[1]}, field, patterns)]
+            if 'eventType' in query_args:
+                query_args['eventType'] = [t for t in query_args['eventType'] if t in allowed]
+            else:
+                query_args['eventType'] = allowed
+            return True
+
+        if field == "module" and all(not negate and regex is None for negate, pattern, regex in patterns):
+            modules = [pattern for negate, pattern, regex in patterns]
+            if 'srcModule' in query_args:
+                query_args['srcModule'] = [m for m in query_args['srcModule'] if m in modules]
+            else:
+                query_args['srcModule'] = modules
+            return True
 
-            self.log.info(f"Rule {rule['id']} returned {len(results.keys())} results.")
+        return False
 
-            for result in results:
-                self.create_correlation(rule, results[result])
+    def collection_key(self, criteria: dict) -> tuple:
+        """Normalize database criteria into a collection cache key, so
+        that rules listing the same types or modules in a different
+        order share one collection.
+
+        Args:
+            criteria (dict): criteria built by build_db_criteria()
+
+        Returns:
+            tuple: collection cache key
+        """
+        return tuple(sorted(
+            (k, tuple(sorted(set(v))))
+            for k, v in criteria.items()
+            if k != 'instanceId'
+        ))
 
     def build_db_criteria(self, matchrule: dict) -> dict:
         """Build up the criteria to be used to query the database.
@@ -215,6 +441,39 @@ class SpiderFootCorrelator:
 
         return criterias
 
+    def scan_lineage(self) -> SpiderFootLineage:
+        """Parent/child graph of the scan, loaded once and shared by the
+        source, child and entity enrichment of all rules.
+
+        Returns:
+            SpiderFootLineage: scan lineage
+        """
+        with self.collection_lock:
+            if self.lineage is None:
+                self.log.debug(f"Loading lineage for scan {self.scanId}")
+                self.lineage = SpiderFootLineage(self.dbh, self.scanId)
+                self.log.debug(f"Loaded lineage of {len(self.lineage)} events")
+            return self.lineage
+
+    def lineage_event(self, node: int) -> dict:
+        """Describe an event of the scan lineage the way enrichment does.
+
+        Args:
+            node (int): event number in the scan lineage
+
+        Returns:
+            dict: event type, data, module, ID and entity type
+        """
+        lineage = self.scan_lineage()
+        eventType = lineage.eventType(node)
+        return {
+            'type': eventType,
+            'data': lineage.data(node),
+            'module': lineage.module(node),
+            'id': lineage.hash(node),
+            'entity_type': self.type_entity_map[eventType]
+        }
+
     def enrich_event_sources(self, events: dict) -> None:
         """Enrich event sources.
 
@@ -227,20 +486,23 @@ class SpiderFootCorrelator:
         if not isinstance(events, dict):
             raise TypeError(f"events is {type(events)}; expected dict()")
 
-        event_chunks = [list(events.keys())[x:(x + 5000)] for x in range(0, len(list(events.keys())), 5000)]
-
-        for chunk in event_chunks:
-            # Get sources
-            self.log.debug(f"Getting sources for {len(chunk)} events")
-            source_data = self.dbh.scanElementSourcesDirect(self.scanId, chunk)
-            for row in source_data:
-                events[row[8]]['source'].append({
-                    'type': row[15],
-                    'data': row[2],
-                    'module': row[16],
-                    'id': row[9],
-                    'entity_type': self.type_entity_map[row[15]]
-                })
+        lineage = self.scan_lineage()
+
+        sources = dict()
+        for event_id in events:
+            node = lineage.node(event_id)
+            if node is None:
+                continue
+            parent = lineage.parent(node)
+            if parent < 0:
+                continue
+            sources[event_id] = parent
+
+        self.log.debug(f"Getting sources for {len(sources)} events")
+        lineage.fetchData(list(sources.values()))
+
+        for event_id, parent in sources.items():
+            events[event_id]['source'].append(self.lineage_event(parent))
 
     def enrich_event_children(self, events: dict) -> None:
         """Enrich event children.
@@ -254,24 +516,33 @@ class SpiderFootCorrelator:
         if not isinstance(events, dict):
             raise TypeError(f"events is {type(events)}; expected dict()")
 
-        event_chunks = [list(events.keys())[x:x + 5000] for x in range(0, len(list(events.keys())), 5000)]
-
-        for chunk in event_chunks:
-            # Get children
-            self.log.debug(f"Getting children for {len(chunk)} events")
-            child_data = self.dbh.scanResultEvent(self.scanId, sourceId=chunk)
-            for row in child_data:
-                events[row[9]]['child'].append({
-                    'type': row[4],
-                    'data': row[1],
-                    'module': row[3],
-                    'id': row[8]
+        lineage = self.scan_lineage()
+
+        children = dict()
+        for event_id in events:
+            node = lineage.node(event_id)
+            if node is None:
+                continue
+            children[event_id] = lineage.children(node)
+
+        self.log.debug(f"Getting children for {len(children)} events")
+        lineage.fetchData([c for nodes in children.values() for c in nodes])
+
+        for event_id, nodes in children.items():
+            # Children are ordered by data, as they were when queried
+            # from the database.
+            nodes.sort(key=lambda n: (lineage.data(n) is not None, lineage.data(n) or ''))
+            for child in nodes:
+                events[event_id]['child'].append({
+                    'type': lineage.eventType(child),
+                    'data': lineage.data(child),
+                    'module': lineage.module(child),
+                    'id': lineage.hash(child)
                 })
 
     def enrich_event_entities(self, events: dict) -> None:
-        """Given our starting set of ids, loop through the source
-        of each until you have a match according to the criteria
-        provided.
+        """Given our starting set of ids, walk up the discovery path
+        of each until you find an entity.
 
         Args:
             events (dict): events
@@ -282,60 +553,38 @@ class SpiderFootCorrelator:
         if not isinstance(events, dict):
             raise TypeError(f"events is {type(events)}; expected dict()")
 
+        lineage = self.scan_lineage()
+        entity_types = set(t for t, e in self.type_entity_map.items() if e in ['ENTITY', 'INTERNAL'])
+
         entity_missing = dict()
         for event_id in events:
             if 'source' not in events[event_id]:
                 continue
 
             row = events[event_id]
-            # Go through each source if it's not an ENTITY, capture its ID
-            # so we can capture its source, otherwise copy the source as
-            # an entity record, since it's of a valid type to be considered one.
+            # Go through each source if it's not an ENTITY, look for the
+            # closest entity further up the discovery path, otherwise copy
+            # the source as an entity record, since it's of a valid type
+            # to be considered one.
             for source in row['source']:
                 if source['entity_type'] in ['ENTITY', 'INTERNAL']:
                     events[row['id']]['entity'].append(source)
-                else:
-                    # key is the element ID that we need to find an entity for
-                    # by checking its source, and the value is the original ID
-                    # for which we are seeking an entity. As we traverse up the
-                    # discovery path the key will change but the value must always
-                    # point back to the same ID.
-                    entity_missing[source['id']] = row['id']
-
-        while len(entity_missing) > 0:
-            self.log.debug(f"{len(entity_missing.keys())} entities are missing, going deeper...")
-            new_missing = dict()
-            self.log.debug(f"Getting sources for {len(entity_missing.keys())} items")
-            if len(entity_missing.keys()) > 5000:
-                chunks = [list(entity_missing.keys())[x:x + 5000] for x in range(0, len(list(entity_missing.keys())), 5000)]
-                entity_data = list()
-                self.log.debug("Fetching data in chunks")
-                for chunk in chunks:
-                    self.log.debug(f"chunk size: {len(chunk)}")
-                    entity_data.extend(self.dbh.scanElementSourcesDirect(self.scanId, chunk))
-            else:
-                self.log.debug(f"fetching sources for {len(entity_missing)} items")
-                entity_data = self.dbh.scanElementSourcesDirect(self.scanId, list(entity_missing.keys()))
-
-            for entity_candidate in entity_data:
-                event_id = entity_missing[entity_candidate[8]]
-                if self.type_entity_map[entity_candidate[15]] not in ['ENTITY', 'INTERNAL']:
-                    # key of this dictionary is the id we need to now get a source for,
-                    # and the value is the original ID of the item missing an entity
-                    new_missing[entity_candidate[9]] = event_id
-                else:
-                    events[event_id]['entity'].append({
-                        'type': entity_candidate[15],
-                        'data': entity_candidate[2],
-                        'module': entity_candidate[16],
-                        'id': entity_candidate[9],
-                        'entity_type': self.type_entity_map[entity_candidate[15]]
-                    })
+                    continue
+
+                node = lineage.node(source['id'])
+                if node is None:
+                    continue
+
+                entity = lineage.nearestAncestor(node, entity_types)
+                if entity >= 0:
+                    entity_missing.setdefault(row['id'], list()).append(entity)
 
-            if len(new_missing) == 0:
-                break
+        self.log.debug(f"Resolved entities further up the discovery path for {len(entity_missing)} events")
+        lineage.fetchData([n for nodes in entity_missing.values() for n in nodes])
 
-            entity_missing = deepcopy(new_missing)
+        for event_id, nodes in entity_missing.items():
+            for node in nodes:
+                events[event_id]['entity'].append(self.lineage_event(node))
 
     def collect_from_db(self, matchrule: dict, fetchChildren: bool, fetchSources: bool, fetchEntities: bool) -> list:
         """Collect event values from database.
@@ -350,8 +599,6 @@ class SpiderFootCorrelator:
             list: event values
         """
 
-        events = dict()
-
         self.log.debug(f"match rule: {matchrule}")
         # Parse the criteria from the match rule
         query_args = self.build_db_criteria(matchrule)
@@ -359,33 +606,79 @@ class SpiderFootCorrelator:
             self.log.error(f"Error encountered parsing match rule: {matchrule}.")
             return None
 
-        query_args['instanceId'] = self.scanId
-        self.log.debug(f"db query: {query_args}")
-        for row in self.dbh.scanResultEvent(**query_args):
-            events[row[8]] = {
-                'type': row[4],
-                'data': row[1],
-                'module': row[3],
-                'id': row[8],
-                'entity_type': self.type_entity_map[row[4]],
-                'source': [],
-                'child': [],
-                'entity': []
-            }
-
-        # You need to fetch sources if you need entities, since
-        # the source will often be the entity.
-        if fetchSources or fetchEntities:
-            self.enrich_event_sources(events)
+        return self.collect_from_query(query_args, fetchChildren, fetchSources, fetchEntities)
 
-        if fetchChildren:
-            self.enrich_event_children(events)
+    def collect_from_query(self, query_args: dict, fetchChildren: bool, fetchSources: bool, fetchEntities: bool) -> list:
+        """Collect event values from database, using the collection cache.
 
-        if fetchEntities:
-            self.enrich_event_entities(events)
+        Args:
+            query_args (dict): criteria built by build_db_criteria()
+            fetchChildren (bool): fetch the children of each event
+            fetchSources (bool): fetch the source of each event
+            fetchEntities (bool): fetch the entity each event relates to
 
-        self.log.debug(f"returning {len(events.values())} events from match_rule {matchrule}")
-        return list(events.values())
+        Returns:
+            list: event values
+        """
+        key = self.collection_key(query_args)
+
+        with self.collection_lock:
+            cached = self.collection_cache.get(key)
+            if cached is None:
+                events = dict()
+                if any(isinstance(v, list) and not v for v in query_args.values()):
+                    # Filters folded into the query left no value to match,
+                    # such as two module rules naming different modules.
+                    rows = list()
+                else:
+                    query_args = dict(query_args, instanceId=self.scanId)
+                    self.log.debug(f"db query: {query_args}")
+                    rows = self.dbh.scanResultEvent(**query_args)
+                for row in rows:
+                    events[row[8]] = {
+                        'type': row[4],
+                        'data': row[1],
+                        'module': row[3],
+                        'id': row[8],
+                        'entity_type': self.type_entity_map[row[4]],
+                        'source': [],
+                        'child': [],
+                        'entity': []
+                    }
+                cached = {'events': events, 'source': False, 'child': False, 'entity': False}
+                self.collection_cache[key] = cached
+            else:
+                self.log.debug(f"collection cache hit for {key}")
+
+            events = cached['events']
+
+            # You need to fetch sources if you need entities, since
+            # the source will often be the entity.
+            if (fetchSources or fetchEntities) and not cached['source']:
+                self.enrich_event_sources(events)
+                cached['source'] = True
+
+            if fetchChildren and not cached['child']:
+                self.enrich_event_children(events)
+                cached['child'] = True
+
+            if fetchEntities and not cached['entity']:
+                self.enrich_event_entities(events)
+                cached['entity'] = True
+
+        # Hand out copies, as later stages modify events in place. Only
+        # the enrichment requested is included, as the cached events may
+        # have been enriched further on behalf of another rule.
+        copies = list()
+        for event in events.values():
+            e = dict(event)
+            e['source'] = [dict(s) for s in event['source']] if fetchSources or fetchEntities else []
+            e['child'] = [dict(c) for c in event['child']] if fetchChildren else []
+            e['entity'] = [dict(ee) for ee in event['entity']] if fetchEntities else []
+            copies.append(e)
+
+        self.log.debug(f"returning {len(copies)} events for {key}")
+        return copies
 
     def event_extract(self, event: dict, field: str) -> list:
         """Event event field.
@@ -420,45 +713,45 @@ class SpiderFootCorrelator:
             bool: TBD
         """
 
+        return self.event_match(event, field, self.compile_patterns(patterns, patterntype))
+
+    def event_match(self, event: dict, field: str, patterns: tuple) -> bool:
+        """Check an event field against compiled match rule patterns.
+
+        Args:
+            event (dict): event
+            field (str): field to check
+            patterns (tuple): patterns compiled by compile_patterns()
+
+        Returns:
+            bool: event should be kept
+        """
+        if patterns is None:
+            return False
+
         if "." in field:
             key, field = field.split(".")
-            return any(self.event_keep(subevent, field, patterns, patterntype) for subevent in event[key])
+            return any(self.event_match(subevent, field, patterns) for subevent in event[key])
 
         value = event[field]
 
-        if patterntype == "exact":
-            ret = False
-            for pattern in patterns:
-                if pattern.startswith("not "):
-                    ret = True
-                    pattern = re.sub(r"^not\s+", "", pattern)
-                    if value == pattern:
-                        return False
-                else:
-                    ret = False
-                    if value == pattern:
-                        return True
-            if ret:
-                return True
-            return False
+        ret = False
+        for negate, pattern, regex in patterns:
+            if regex is None:
+                matched = value == pattern
+            else:
+                matched = regex.search(value) is not None
 
-        if patterntype == "regex":
-            ret = False
-            for pattern in patterns:
-                if pattern.startswith("not "):
-                    ret = True
-                    pattern = re.sub(r"^not\s+", "", pattern)
-                    if re.search(pattern, value, re.IGNORECASE):
-                        return False
-                else:
-                    ret = False
-                    if re.search(pattern, value, re.IGNORECASE):
-                        return True
-            if ret:
-                return True
-            return False
+            if negate:
+                ret = True
+                if matched:
+                    return False
+            else:
+                ret = False
+                if matched:
+                    return True
 
-        return False
+        return ret
 
     def refine_collection(self, matchrule: dict, events: list) -> None:
         """Cull events from the events list if they don't meet the match criteria.
@@ -467,23 +760,30 @@ class SpiderFootCorrelator:
             matchrule (dict): TBD
             events (list): TBD
         """
-        patterns = list()
+        self.filter_collection(matchrule['field'], self.compile_patterns(matchrule['value'], matchrule['method']), events)
 
-        if isinstance(matchrule['value'], list):
-            for r in matchrule['value']:
-                patterns.append(str(r))
-        else:
-            patterns = [str(matchrule['value'])]
+    def filter_collection(self, field: str, patterns: tuple, events: list) -> None:
+        """Cull events from the events list if they don't match compiled patterns.
 
-        field = matchrule['field']
-        self.log.debug(f"attempting to match {patterns} against the {field} field in {len(events)} events")
+        Args:
+            field (str): field to match against
+            patterns (tuple): patterns compiled by compile_patterns()
+            events (list): events, modified in place
+        """
+        self.log.debug(f"attempting to match {len(patterns or [])} patterns against the {field} field in {len(events)} events")
 
         # Go through each event, remove it if we shouldn't keep it
-        # according to the match rule patterns.
-        for event in events[:]:
-            if not self.event_keep(event, field, patterns, matchrule['method']):
-                self.log.debug(f"removing {event} because of {field}")
-                events.remove(event)
+        # according to the match rule patterns. The list is rebuilt in
+        # place, as removing events one at a time is quadratic.
+        debug = self.log.isEnabledFor(logging.DEBUG)
+        keep = list()
+        for event in events:
+            if not self.event_match(event, field, patterns):
+                if debug:
+                    self.log.debug(f"removing {event} because of {field}")
+                continue
+            keep.append(event)
+        events[:] = keep
 
     def collect_events(self, collection: dict, fetchChildren: bool, fetchSources: bool, fetchEntities: bool, collectIndex: int) -> list:
         """Collect data for aggregation and analysis.
@@ -498,21 +798,34 @@ class SpiderFootCorrelator:
         Returns:
             list: TBD
         """
-        step = 0
-
-        for matchrule in collection:
-            # First match rule means we fetch from the database, every
-            # other step happens locally to avoid burdening the db.
-            if step == 0:
-                events = self.collect_from_db(matchrule,
-                                              fetchEntities=fetchEntities,
-                                              fetchChildren=fetchChildren,
-                                              fetchSources=fetchSources)
-                step += 1
-                continue
+        return self.collect_planned_events(self.compile_collection(collection), fetchChildren, fetchSources, fetchEntities, collectIndex)
+
+    def collect_planned_events(self, plan: dict, fetchChildren: bool, fetchSources: bool, fetchEntities: bool, collectIndex: int) -> list:
+        """Collect data for aggregation and analysis, for a compiled collection.
 
-            # Remove events in-place based on subsequent match-rules
-            self.refine_collection(matchrule, events)
+        Args:
+            plan (dict): collection compiled by compile_collection()
+            fetchChildren (bool): fetch the children of each event
+            fetchSources (bool): fetch the source of each event
+            fetchEntities (bool): fetch the entity each event relates to
+            collectIndex (int): position of the collection in the rule
+
+        Returns:
+            list: events
+        """
+        if not plan:
+            return list()
+
+        # The query fetches from the database, every other step
+        # happens locally to avoid burdening the db.
+        events = self.collect_from_query(plan['query'],
+                                         fetchEntities=fetchEntities,
+                                         fetchChildren=fetchChildren,
+                                         fetchSources=fetchSources)
+
+        # Remove events in-place based on subsequent match-rules
+        for field, patterns in plan['filters']:
+            self.filter_collection(field, patterns, events)
 
         # Stamp events with this collection ID for potential
         # use in analysis later.
@@ -545,34 +858,36 @@ class SpiderFootCorrelator:
             self.log.error(f"Unable to find field definition for aggregation in {rule['id']}")
             return False
 
-        def event_strip(event: dict, field: str, value: str) -> None:
-            """Strip sub fields that don't match value.
+        field = rule['field']
+        ret = dict()
 
-            Args:
-                event (dict): event
-                field (str): TBD
-                value (str): TBD
-            """
-            topfield, subfield = field.split(".")
-            if field.startswith(topfield + "."):
-                for s in event[topfield]:
-                    if s[subfield] != value:
-                        event[topfield].remove(s)
+        # Buckets hold the collected events themselves rather than copies,
+        # as nothing downstream modifies an event once it is aggregated.
+        if "." not in field:
+            for e in events:
+                b = e[field]
+                if b in ret:
+                    ret[b].append(e)
+                    continue
+                ret[b] = [e]
+            return ret
 
-        ret = dict()
+        # If the bucket is of a child, source or entity, the bucket holds
+        # a projection of the event: a shallow copy sharing everything with
+        # the event, except for the children, sources or entities, which
+        # are narrowed down to those matching the bucket.
+        topfield, subfield = field.split(".")
         for e in events:
-            buckets = self.event_extract(e, rule['field'])
-            for b in buckets:
-                e_copy = deepcopy(e)
-                # if the bucket is of a child, source or entity,
-                # remove the children, sources or entities that
-                # aren't matching this bucket
-                if "." in rule['field']:
-                    event_strip(e_copy, rule['field'], b)
+            projections = dict()
+            for b in self.event_extract(e, field):
+                if b not in projections:
+                    projection = dict(e)
+                    projection[topfield] = [s for s in e[topfield] if s[subfield] == b]
+                    projections[b] = projection
                 if b in ret:
-                    ret[b].append(e_copy)
+                    ret[b].append(projections[b])
                     continue
-                ret[b] = [e_copy]
+                ret[b] = [projections[b]]
 
         return ret
 
@@ -612,7 +927,8 @@ class SpiderFootCorrelator:
             rule (dict): correlation rule
             buckets (dict): TBD
         """
-        self.log.debug(f"called with buckets {buckets}")
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"called with buckets {buckets}")
 
         def check_event(events: list, reference: list) -> bool:
             """Check event.
@@ -660,14 +976,17 @@ class SpiderFootCorrelator:
 
         for bucket in list(buckets.keys()):
             pluszerocount = 0
-            for event in buckets[bucket][:]:
+            keep = list()
+            for event in buckets[bucket]:
                 if event['_collection'] == 0:
+                    keep.append(event)
                     continue
-                pluszerocount += 1
 
-                if not check_event(self.event_extract(event, rule['field']), reference):
-                    buckets[bucket].remove(event)
-                    pluszerocount -= 1
+                if check_event(self.event_extract(event, rule['field']), reference):
+                    keep.append(event)
+                    pluszerocount += 1
+
+            buckets[bucket] = keep
 
             # delete the bucket if there are no events > collection 0
             if pluszerocount == 0:
@@ -750,13 +1069,9 @@ class SpiderFootCorrelator:
         """
 
         for bucket in list(buckets.keys()):
-            countmap = dict()
+            countmap = Counter()
             for event in buckets[bucket]:
-                e = self.event_extract(event, rule['field'])
-                for ef in e:
-                    if ef not in countmap:
-                        countmap[ef] = 0
-                    countmap[ef] += 1
+                countmap.update(self.event_extract(event, rule['field']))
 
             if not rule.get('count_unique_only'):
                 for v in countmap:
@@ -858,11 +1173,12 @@ class SpiderFootCorrelator:
         events = list()
         buckets = dict()
 
-        fetchChildren, fetchSources, fetchEntities = self.analyze_rule_scope(rule)
+        plan = rule.get('plan') or self.compile_rule(rule)
+        fetchChildren, fetchSources, fetchEntities = plan['scope']
 
         # Go through collections and collect the data from the DB
-        for collectIndex, c in enumerate(rule.get('collections')):
-            events.extend(self.collect_events(c['collect'],
+        for collectIndex, c in enumerate(plan['collections']):
+            events.extend(self.collect_planned_events(c,
                           fetchChildren,
                           fetchSources,
                           fetchEntities,
@@ -873,7 +1189,8 @@ class SpiderFootCorrelator:
             return None
 
         self.log.debug(f"{len(events)} proceeding to next stage: aggregation.")
-        self.log.debug(f"{events} ready to be processed.")
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"{events} ready to be processed.")
 
         # Perform aggregations. Aggregating breaks up the events
         # into buckets with the key being the field to aggregate by.
@@ -1073,3 +1390,364 @@ class SpiderFootCorrelator:
         if ok:
             return True
         return False
+
+
+class SpiderFootIncrementalCorrelator(SpiderFootCorrelator):
+    """SpiderFoot correlation of a scan while it is running.
+
+    Events are added as the scan produces them. The lineage of the scan,
+    and which events belong to each collection, are kept in memory and
+    updated as events arrive. Event data stored before the correlator
+    started is read when a rule needs it. Only the rules whose results a new event may change are
+    processed again, and their stored correlation results are updated.
+    Once the scan has finished, the rules are run in batch and the stored
+    results reconciled with those of the batch.
+    """
+
+    truncateSize = 0
+    members = None
+    collection_queries = None
+    collection_rules = None
+    child_rules = None
+    type_collections = None
+    dirty = None
+    emitted = None
+
+    def __init__(self, dbh: SpiderFootDb, ruleset: dict, scanId: str, truncateSize: int = 0) -> None:
+        """Initialize incremental correlation of a scan.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            ruleset (dict): correlation rule set, keyed by rule ID
+            scanId (str): scan instance ID
+            truncateSize (int): length event data is truncated to when stored, 0 for no truncation
+
+        Raises:
+            TypeError: argument type was invalid
+        """
+        super().__init__(dbh, ruleset, scanId)
+
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        if not isinstance(truncateSize, int):
+            raise TypeError(f"truncateSize is {type(truncateSize)}; expected int()")
+
+        self.truncateSize = truncateSize
+
+        # Events of each collection, keyed by collection cache key
+        self.members = dict()
+        self.collection_queries = dict()
+        self.collection_rules = dict()
+        self.child_rules = dict()
+        self.type_collections = dict()
+        self.dirty = set()
+
+        # Correlation results stored for each rule
+        self.emitted = dict()
+
+        for ruleIndex, rule in enumerate(self.rules):
+            fetchChildren = rule['plan']['scope'][0]
+            for collection in rule['plan']['collections']:
+                if not collection:
+                    continue
+
+                key = collection['key']
+                if key not in self.members:
+                    self.members[key] = dict()
+                    self.collection_queries[key] = collection['query']
+                    self.collection_rules[key] = set()
+                self.collection_rules[key].add(ruleIndex)
+
+                if fetchChildren:
+                    self.child_rules.setdefault(key, set()).add(ruleIndex)
+
+        # Start from whatever the scan has already stored. Event data is
+        # only read for the events of collections matching on data; the
+        # data of other events is read when a rule needs it.
+        self.lineage = SpiderFootLineage(self.dbh, self.scanId)
+        self.lineage.fetchData([
+            node for node in range(len(self.lineage))
+            if any('data' in self.collection_queries[key] for key in self.collections_for_type(self.lineage.eventType(node)))
+        ])
+        for node in range(len(self.lineage)):
+            self.index_event(node)
+
+    def add_event(self, sfEvent: SpiderFootEvent) -> None:
+        """Add an event produced by the scan, and mark the rules whose
+        results it may change.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Raises:
+            TypeError: argument type was invalid
+        """
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        # Events without data are never stored
+        if not sfEvent.data:
+            return
+
+        data = sfEvent.data
+        if self.truncateSize > 0:
+            data = data[0:self.truncateSize]
+
+        adopted = self.lineage.orphans(sfEvent.hash)
+        node = self.lineage.addResult(sfEvent.hash, sfEvent.sourceEventHash, sfEvent.eventType, sfEvent.module, data)
+        if node is None:
+            return
+
+        # Events which arrived before this one, their source, now have
+        # a source and possibly entities, for any rule.
+        if adopted:
+            self.dirty.update(range(len(self.rules)))
+
+        self.index_event(node)
+
+    def index_event(self, node: int) -> None:
+        """Add an event of the scan lineage to the collections it belongs
+        to, and mark the rules whose results it may change.
+
+        Args:
+            node (int): event number in the scan lineage
+        """
+        eventType = self.lineage.eventType(node)
+        eventHash = self.lineage.hash(node)
+
+        for key in self.collections_for_type(eventType):
+            query = self.collection_queries[key]
+            data = self.lineage.data(node) if 'data' in query else None
+            if self.query_match(query, eventType, self.lineage.module(node), data):
+                self.members[key][eventHash] = node
+                self.dirty.update(self.collection_rules[key])
+
+        # A new child changes the results of rules looking at the
+        # children of its source.
+        parent = self.lineage.parent(node)
+        if parent < 0 or parent == node:
+            return
+
+        parentHash = self.lineage.hash(parent)
+        for key, rules in self.child_rules.items():
+            if parentHash in self.members[key]:
+                self.dirty.update(rules)
+
+    def collections_for_type(self, eventType: str) -> list:
+        """Collections which events of a type may belong to.
+
+        Args:
+            eventType (str): event type
+
+        Returns:
+            list: collection cache keys
+        """
+        if eventType not in self.type_collections:
+            self.type_collections[eventType] = [
+                key for key, query in self.collection_queries.items()
+                if 'eventType' not in query or eventType in query['eventType']
+            ]
+
+        return self.type_collections[eventType]
+
+    def query_match(self, query_args: dict, eventType: str, module: str, data: str) -> bool:
+        """Check an event against database criteria, the way the database
+        would apply them.
+
+        Args:
+            query_args (dict): criteria built by build_db_criteria()
+            eventType (str): event type
+            module (str): module which produced the event
+            data (str): event data, as stored, or None if the criteria do not match on data
+
+        Returns:
+            bool: event matches the criteria
+        """
+        if 'eventType' in query_args and eventType not in query_args['eventType']:
+            return False
+
+        if 'srcModule' in query_args and module not in query_args['srcModule']:
+            return False
+
+        if 'data' in query_args and data not in query_args['data']:
+            return False
+
+        return True
+
+    def collection_events(self, key: tuple) -> dict:
+        """Events of a collection, as they would be read from the database.
+
+        Args:
+            key (tuple): collection cache key
+
+        Returns:
+            dict: events, keyed by ID and ordered by data
+        """
+        lineage = self.lineage
+
+        # The database only returns events whose source is stored, and
+        # whose type is known.
+        nodes = [
+            node for node in self.members[key].values()
+            if lineage.parent(node) >= 0 and lineage.eventType(node) in self.type_entity_map
+        ]
+        lineage.fetchData(nodes)
+        nodes.sort(key=lineage.data)
+
+        events = dict()
+        for node in nodes:
+            eventType = lineage.eventType(node)
+            events[lineage.hash(node)] = {
+                'type': eventType,
+                'data': lineage.data(node),
+                'module': lineage.module(node),
+                'id': lineage.hash(node),
+                'entity_type': self.type_entity_map[eventType],
+                'source': [],
+                'child': [],
+                'entity': []
+            }
+
+        return events
+
+    def refresh_correlations(self) -> int:
+        """Process the rules whose results may have changed since they
+        were last processed, and update their stored correlation results.
+
+        Returns:
+            int: number of rules processed
+        """
+        if not self.dirty:
+            return 0
+
+        dirty = sorted(self.dirty)
+        self.dirty = set()
+
+        self.collection_cache = dict()
+        for ruleIndex in dirty:
+            rule = self.rules[ruleIndex]
+            for collection in rule['plan']['collections']:
+                if collection and collection['key'] not in self.collection_cache:
+                    self.collection_cache[collection['key']] = {
+                        'events': self.collection_events(collection['key']),
+                        'source': False,
+                        'child': False,
+                        'entity': False
+                    }
+
+            try:
+                results = self.process_rule(rule)
+            except Exception:
+                self.log.error(f"Rule {rule['id']} failed to complete.", exc_info=True)
+                continue
+
+            self.update_correlations(ruleIndex, results)
+
+        self.collection_cache = dict()
+
+        self.log.debug(f"Refreshed {len(dirty)} rules")
+        return len(dirty)
+
+    def update_correlations(self, ruleIndex: int, results: dict) -> None:
+        """Bring the stored correlation results of a rule in line with its
+        latest results. Correlation results which have not changed are
+        left as they are.
+
+        Args:
+            ruleIndex (int): position of the rule in the rule set
+            results (dict): rule results, as returned by process_rule()
+        """
+        rule = self.rules[ruleIndex]
+
+        wanted = dict()
+        for result in (results or dict()):
+            title = self.build_correlation_title(rule, results[result])
+            eventIds = [e['id'] for e in results[result]]
+            wanted.setdefault((title, tuple(sorted(eventIds))), list()).append(eventIds)
+
+        kept = dict()
+        stale = list()
+        for key, correlationIds in self.emitted.get(ruleIndex, dict()).items():
+            count = len(wanted.get(key, list()))
+            kept[key] = correlationIds[:count]
+            stale.extend(correlationIds[count:])
+
+        if stale:
+            self.log.info(f"Removing {len(stale)} correlations no longer produced by [{rule['id']}]")
+            self.dbh.correlationResultDelete(self.scanId, stale)
+
+        for key, eventIdLists in wanted.items():
+            correlationIds = kept.setdefault(key, list())
+            for eventIds in eventIdLists[len(correlationIds):]:
+                self.log.info(f"New correlation [{rule['id']}]: {key[0]}")
+                correlationIds.append(self.dbh.correlationResultCreate(self.scanId,
+                                                                       rule['id'],
+                                                                       rule['meta']['name'],
+                                                                       rule['meta']['description'],
+                                                                       rule['meta']['risk'],
+                                                                       rule['rawYaml'],
+                                                                       key[0],
+                                                                       eventIds))
+
+        self.emitted[ruleIndex] = {key: ids for key, ids in kept.items() if ids}
+
+    def reconcile_correlations(self, threads: int = 4) -> None:
+        """Run the rules in batch over the finished scan, and bring the
+        stored correlation results in line with the batch results.
+
+        Args:
+            threads (int): number of rules to process concurrently
+        """
+        results = self.process_rules(threads)
+
+        for ruleIndex, rule in enumerate(self.rules):
+            if ruleIndex not in results:
+                self.log.error(f"Rule {rule['id']} failed to complete.")
+            self.update_correlations(ruleIndex, results.get(ruleIndex))
+
+        self.dirty = set()
+
+    def stream_correlations(self, events: queue.Queue, interval: float) -> bool:
+        """Correlate events from a queue as they arrive. Rules are
+        processed again at most once per interval.
+
+        The queue is ended with 'FINISHED' once the scan has finished,
+        upon which the results are reconciled with batch mode, or with
+        None to stop without reconciling.
+
+        Args:
+            events (queue.Queue): events produced by the scan
+            interval (float): minimum number of seconds between updates of the results
+
+        Returns:
+            bool: results were reconciled with batch mode
+
+        Raises:
+            TypeError: argument type was invalid
+        """
+        if not isinstance(events, queue.Queue):
+            raise TypeError(f"events is {type(events)}; expected queue.Queue()")
+
+        if not isinstance(interval, (int, float)):
+            raise TypeError(f"interval is {type(interval)}; expected float()")
+
+        refreshed = time.monotonic()
+        while True:
+            try:
+                sfEvent = events.get(timeout=max(0.0, refreshed + interval - time.monotonic()))
+            except queue.Empty:
+                pass
+            else:
+                if sfEvent is None:
+                    return False
+                if isinstance(sfEvent, str) and sfEvent == 'FINISHED':
+                    break
+                self.add_event(sfEvent)
+
+            if time.monotonic() - refreshed >= interval:
+                self.refresh_correlations()
+                refreshed = time.monotonic()
+
+        self.reconcile_correlations()
+        return True
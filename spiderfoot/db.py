@@ -10,13 +10,98 @@
 # Licence:     MIT
 # -------------------------------------------------------------------------------
 
+from contextlib import suppress
+from functools import lru_cache
 from pathlib import Path
 import hashlib
+import heapq
+import itertools
+import json
 import random
 import re
 import sqlite3
 import threading
 import time
+import typing
+import zlib
+
+
+@lru_cache(maxsize=256)
+def _compileRegex(qry: str):
+    """Compile a regular expression used in database queries.
+
+    SQLite calls REGEXP once per row, so compiled expressions are
+    cached rather than compiled again for every row.
+
+    Args:
+        qry (str): regular expression
+
+    Returns:
+        re.Pattern: compiled expression, or None if it is invalid
+    """
+    try:
+        return re.compile(qry, re.IGNORECASE | re.DOTALL)
+    except (re.error, TypeError):
+        return None
+
+
+def _searchTerms(text: str) -> list:
+    """Split a full-text search into the terms it must match.
+
+    Double-quoted text is a phrase; anything else is split into words.
+    A term followed by '*' matches any word starting with it.
+
+    Args:
+        text (str): search text
+
+    Returns:
+        list: tuples of term and whether it is a prefix
+    """
+    terms = list()
+    for phrase, phrasePrefix, word in re.findall(r'"([^"]*)"(\*?)|([^\s"]+)', text):
+        if word:
+            term = word.replace('*', '')
+            prefix = word.endswith('*')
+        else:
+            term = phrase.replace('*', '').strip()
+            prefix = bool(phrasePrefix)
+
+        if term:
+            terms.append((term, prefix))
+
+    return terms
+
+
+def _inflate(data: bytes) -> str:
+    """Decompress result data read from the blob store.
+
+    Args:
+        data (bytes): compressed data
+
+    Returns:
+        str: result data
+    """
+    if data is None:
+        return None
+
+    return zlib.decompress(data).decode('utf-8')
+
+
+def _dataHash(data: str) -> int:
+    """64-bit hash of result data, used to count unique data values
+    without storing the data again.
+
+    Args:
+        data (str): result data
+
+    Returns:
+        int: signed 64-bit hash, or None if there is no data
+    """
+    if data is None:
+        return None
+
+    digest = hashlib.blake2b(str(data).encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
 
 
 class SpiderFootDb:
@@ -26,6 +111,10 @@ class SpiderFootDb:
         conn: SQLite connect() connection
         dbh: SQLite cursor() database handle
         dbhLock (_thread.RLock): thread lock on database handle
+        searchIndex (bool): scan result data is indexed for full-text search
+        scanPartitions (bool): store the results and logs of new scans in
+            database files of their own
+        scanPartitionDir (Path): directory of the per-scan database files
     """
 
     dbh = None
@@ -34,6 +123,41 @@ class SpiderFootDb:
     # Prevent multithread access to sqlite database
     dbhLock = threading.RLock()
 
+    # Number of rows to read at a time when iterating over query results
+    _fetchChunkSize = 1000
+
+    # Result data of at least this many characters is compressed and
+    # stored once in the blob store, however many results share it.
+    _blobThreshold = 1024
+
+    # Maximum number of per-scan database files attached at once. SQLite
+    # allows 10 by default.
+    _maxAttached = 8
+
+    # Seconds to wait for the database to be unlocked, and for an upgrade
+    # of the database schema by another process to finish
+    _busyTimeout = 5
+    _upgradeTimeout = 600
+
+    # Columns selected for each result by scanResultEvent()
+    _resultEventColumns = "ROUND(c.generated) AS generated, \
+        COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+        COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) as 'source_data', \
+        c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
+        c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
+        c.false_positive as 'fp', s.false_positive as 'parent_fp'"
+
+    # Bumps the version of a scan, in the same transaction as the change
+    _scanVersionQuery = "UPDATE tbl_scan_instance SET version = version + 1 WHERE guid = ?"
+
+    # Columns results can be sorted by when read a page at a time, each
+    # indexed together with the scan instance ID
+    _resultSortColumns = {
+        'generated': 'c.generated',
+        'type': 'c.type',
+        'module': 'c.module'
+    }
+
     # Queries for creating the SpiderFoot database
     createSchemaQueries = [
         "PRAGMA journal_mode=WAL",
@@ -56,7 +180,8 @@ class SpiderFootDb:
             created     INT DEFAULT 0, \
             started     INT DEFAULT 0, \
             ended       INT DEFAULT 0, \
-            status      VARCHAR NOT NULL \
+            status      VARCHAR NOT NULL, \
+            version     INT NOT NULL DEFAULT 0 \
         )",
         "CREATE TABLE tbl_scan_log ( \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
@@ -65,6 +190,13 @@ class SpiderFootDb:
             type                VARCHAR NOT NULL, \
             message             VARCHAR \
         )",
+        "CREATE TABLE tbl_scan_log_debug ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            first_generated     INT NOT NULL, \
+            last_generated      INT NOT NULL, \
+            total               INT NOT NULL, \
+            data                BLOB NOT NULL \
+        )",
         "CREATE TABLE tbl_scan_config ( \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
             component           VARCHAR NOT NULL, \
@@ -82,7 +214,14 @@ class SpiderFootDb:
             module              VARCHAR NOT NULL, \
             data                VARCHAR, \
             false_positive      INT NOT NULL DEFAULT 0, \
-            source_event_hash  VARCHAR DEFAULT 'ROOT' \
+            source_event_hash  VARCHAR DEFAULT 'ROOT', \
+            data_hash           VARCHAR \
+        )",
+        "CREATE TABLE tbl_scan_blob ( \
+            hash                VARCHAR NOT NULL PRIMARY KEY, \
+            data                BLOB NOT NULL, \
+            size                INT NOT NULL, \
+            refcount            INT NOT NULL DEFAULT 0 \
         )",
         "CREATE TABLE tbl_scan_correlation_results ( \
             id                  VARCHAR NOT NULL PRIMARY KEY, \
@@ -98,16 +237,53 @@ class SpiderFootDb:
             correlation_id      VARCHAR NOT NULL REFERENCES tbl_scan_correlation_results(id), \
             event_hash          VARCHAR NOT NULL REFERENCES tbl_scan_results(hash) \
         )",
+        "CREATE TABLE tbl_scan_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            field               VARCHAR NOT NULL, \
+            value               VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            unique_total        INT NOT NULL DEFAULT 0, \
+            last_in             INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, field, value) \
+        )",
+        "CREATE TABLE tbl_scan_summary_data ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            field               VARCHAR NOT NULL, \
+            value               VARCHAR NOT NULL, \
+            data_hash           INT NOT NULL, \
+            PRIMARY KEY (scan_instance_id, field, value, data_hash) \
+        ) WITHOUT ROWID",
         "CREATE INDEX idx_scan_results_id ON tbl_scan_results (scan_instance_id)",
         "CREATE INDEX idx_scan_results_type ON tbl_scan_results (scan_instance_id, type)",
         "CREATE INDEX idx_scan_results_hash ON tbl_scan_results (scan_instance_id, hash)",
         "CREATE INDEX idx_scan_results_module ON tbl_scan_results(scan_instance_id, module)",
         "CREATE INDEX idx_scan_results_srchash ON tbl_scan_results (scan_instance_id, source_event_hash)",
+        "CREATE INDEX idx_scan_results_generated ON tbl_scan_results (scan_instance_id, generated)",
         "CREATE INDEX idx_scan_logs ON tbl_scan_log (scan_instance_id)",
+        "CREATE INDEX idx_scan_log_debug ON tbl_scan_log_debug (scan_instance_id, first_generated)",
         "CREATE INDEX idx_scan_correlation ON tbl_scan_correlation_results (scan_instance_id, id)",
         "CREATE INDEX idx_scan_correlation_events ON tbl_scan_correlation_results_events (correlation_id)"
     ]
 
+    # Queries for creating the full-text index of scan result data,
+    # kept in sync with tbl_scan_results by triggers. Requires SQLite
+    # to be built with FTS5.
+    createSearchIndexQueries = [
+        "CREATE VIRTUAL TABLE tbl_scan_results_fts USING fts5( \
+            data, content='tbl_scan_results', content_rowid='rowid' \
+        )",
+        "CREATE TRIGGER trg_scan_results_fts_insert AFTER INSERT ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (rowid, data) VALUES (new.rowid, new.data); \
+        END",
+        "CREATE TRIGGER trg_scan_results_fts_delete AFTER DELETE ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts, rowid, data) VALUES ('delete', old.rowid, old.data); \
+        END",
+        "CREATE TRIGGER trg_scan_results_fts_update AFTER UPDATE OF data ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts, rowid, data) VALUES ('delete', old.rowid, old.data); \
+            INSERT INTO tbl_scan_results_fts (rowid, data) VALUES (new.rowid, new.data); \
+        END"
+    ]
+
     eventDetails = [
         ['ROOT', 'Internal SpiderFoot Root event', 1, 'INTERNAL'],
         ['ACCOUNT_EXTERNAL_OWNED', 'Account on External Site', 0, 'ENTITY'],
@@ -315,7 +491,7 @@ class SpiderFootDb:
         # at least we can use this opportunity to ensure we have permissions to
         # read and write to such a file.
         try:
-            dbh = sqlite3.connect(database_path)
+            dbh = sqlite3.connect(database_path, timeout=self._busyTimeout)
         except Exception as e:
             raise IOError(f"Error connecting to internal database {database_path}") from e
 
@@ -327,6 +503,12 @@ class SpiderFootDb:
         self.conn = dbh
         self.dbh = dbh.cursor()
 
+        # Scans stored in database files of their own, and attached to
+        # this connection, by scan instance ID.
+        self.scanPartitions = bool(opts.get('_scanpartitions', False))
+        self.scanPartitionDir = Path(f"{database_path}-scans")
+        self._attached = dict()
+
         def __dbregex__(qry: str, data: str) -> bool:
             """SQLite doesn't support regex queries, so we create
             a custom function to do so.
@@ -339,19 +521,20 @@ class SpiderFootDb:
                 bool: matches
             """
 
-            try:
-                rx = re.compile(qry, re.IGNORECASE | re.DOTALL)
-                ret = rx.match(data)
-            except Exception:
+            rx = _compileRegex(qry)
+            if rx is None or not isinstance(data, str):
                 return False
-            return ret is not None
+            return rx.match(data) is not None
+
+        self.conn.create_function("REGEXP", 2, __dbregex__)
+        self.conn.create_function("DATAHASH", 1, _dataHash)
+        self.conn.create_function("INFLATE", 1, _inflate)
 
         # Now we actually check to ensure the database file has the schema set
         # up correctly.
         with self.dbhLock:
             try:
                 self.dbh.execute('SELECT COUNT(*) FROM tbl_scan_config')
-                self.conn.create_function("REGEXP", 2, __dbregex__)
             except sqlite3.Error:
                 init = True
                 try:
@@ -374,6 +557,102 @@ class SpiderFootDb:
                                   "SpiderFoot wasn't able to migrate you, so you'll need to delete "
                                   "your SpiderFoot database in order to proceed.") from None
 
+            # The upgrades below run holding the database write lock, as
+            # several processes may open a database being upgraded at once.
+
+            # For databases created before large result data was moved to
+            # the blob store, add the blob store. Data already stored is
+            # left where it is.
+            def addBlobStore() -> None:
+                self._addDataHashColumn("main")
+                self._createTables("main", ["tbl_scan_blob"])
+
+            try:
+                self._upgradeSchema(
+                    lambda: self._hasTable("main", "tbl_scan_blob") and self._hasColumn("main", "tbl_scan_results", "data_hash"),
+                    addBlobStore
+                )
+            except sqlite3.Error as e:
+                raise IOError("Unable to add the blob store to the SpiderFoot database") from e
+
+            # For databases created before debug logs were stored
+            # compressed, add the debug log table. Debug logs already
+            # stored are left where they are.
+            try:
+                self._upgradeSchema(
+                    lambda: self._hasTable("main", "tbl_scan_log_debug"),
+                    lambda: self._createTables("main", ["tbl_scan_log_debug"])
+                )
+            except sqlite3.Error as e:
+                raise IOError("Unable to add the debug log table to the SpiderFoot database") from e
+
+            # For databases created before scan summaries were kept up to
+            # date as results are stored, add the summary tables and
+            # summarize the scans already stored. Scans stored in files
+            # of their own can only be attached outside a transaction, so
+            # are summarized once the tables have been added.
+            partitioned = list()
+
+            def addSummaries() -> None:
+                self._createTables("main", ["tbl_scan_summary", "tbl_scan_summary_data"])
+                self.dbh.execute("SELECT guid FROM tbl_scan_instance")
+                for row in self.dbh.fetchall():
+                    path = self._scanPartitionPath(row[0])
+                    if path is not None and path.exists():
+                        partitioned.append(row[0])
+                    else:
+                        self._summarizeResults("main", row[0])
+                    self._summarizeCorrelations(row[0])
+
+            try:
+                self._upgradeSchema(
+                    lambda: self._hasTable("main", "tbl_scan_summary") and self._hasTable("main", "tbl_scan_summary_data"),
+                    addSummaries
+                )
+                for instanceId in partitioned:
+                    schema = self._scanSchema(instanceId)
+                    self._upgradeSchema(lambda: False, lambda schema=schema, instanceId=instanceId: self._summarizeResults(schema, instanceId))
+            except sqlite3.Error as e:
+                raise IOError("Unable to add scan summaries to the SpiderFoot database") from e
+
+            # For databases created before scans were versioned, add the
+            # version, which is bumped by every change to a scan.
+            try:
+                self._upgradeSchema(
+                    lambda: self._hasColumn("main", "tbl_scan_instance", "version"),
+                    lambda: self.dbh.execute("ALTER TABLE tbl_scan_instance ADD COLUMN version INT NOT NULL DEFAULT 0")
+                )
+            except sqlite3.Error as e:
+                raise IOError("Unable to add scan versions to the SpiderFoot database") from e
+
+            # For databases created before scan results could be read a
+            # page at a time in the order they were generated, add the
+            # index the pages are read from.
+            try:
+                self._upgradeSchema(
+                    lambda: self._hasIndex("main", "idx_scan_results_generated"),
+                    lambda: self.dbh.execute(self._ifNotExists(next(q for q in self.createSchemaQueries if "idx_scan_results_generated" in q)))
+                )
+            except sqlite3.Error as e:
+                raise IOError("Unable to add the result generation index to the SpiderFoot database") from e
+
+            # For databases created before scan results were indexed for
+            # full-text search, create the index and fill it with the
+            # results already stored.
+            def addSearchIndex() -> None:
+                for query in self.createSearchIndexQueries:
+                    self.dbh.execute(self._ifNotExists(query))
+                self.dbh.execute("INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts) VALUES ('rebuild')")
+
+            self.searchIndex = True
+            try:
+                self._upgradeSchema(lambda: self._hasTable("main", "tbl_scan_results_fts"), addSearchIndex)
+                self.dbh.execute("SELECT COUNT(*) FROM tbl_scan_results_fts WHERE rowid = 0")
+            except sqlite3.Error:
+                # SQLite was built without FTS5; searches fall back to
+                # scanning the results.
+                self.searchIndex = False
+
             if init:
                 for row in self.eventDetails:
                     event = row[0]
@@ -427,6 +706,315 @@ class SpiderFootDb:
         with self.dbhLock:
             self.dbh.close()
 
+    def _upgradeSchema(self, upgraded: typing.Callable[[], bool], upgrade: typing.Callable[[], None]) -> bool:
+        """Upgrade the database schema, unless it has been upgraded
+        already.
+
+        The upgrade runs in a transaction holding the database write
+        lock, and only if the schema has not been upgraded by another
+        process by the time the lock is held. It is rolled back if it
+        fails.
+
+        Args:
+            upgraded (typing.Callable[[], bool]): checks whether the schema has been upgraded
+            upgrade (typing.Callable[[], None]): upgrades the schema, without committing
+
+        Returns:
+            bool: the schema was upgraded by this connection
+        """
+        if upgraded():
+            return False
+
+        with self.dbhLock:
+            if self.conn.in_transaction:
+                self.conn.commit()
+
+            # Upgrades such as summarizing the scans stored may take a
+            # while, so wait for one run by another process to finish.
+            self.dbh.execute(f"PRAGMA busy_timeout = {int(self._upgradeTimeout * 1000)}")
+            try:
+                self.dbh.execute("BEGIN IMMEDIATE")
+                if upgraded():
+                    self.conn.rollback()
+                    return False
+                upgrade()
+                self.conn.commit()
+            finally:
+                # Roll back an upgrade which failed
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                self.dbh.execute(f"PRAGMA busy_timeout = {int(self._busyTimeout * 1000)}")
+
+        return True
+
+    @staticmethod
+    def _ifNotExists(query: str) -> str:
+        """Make a query creating a table, index or trigger do nothing if
+        it already exists.
+
+        Args:
+            query (str): CREATE query
+
+        Returns:
+            str: query
+        """
+        return re.sub(r"^CREATE (TABLE|INDEX|VIRTUAL TABLE|TRIGGER) ", r"CREATE \1 IF NOT EXISTS ", query)
+
+    def _createTables(self, schema: str, tables: list) -> None:
+        """Create tables of the database schema, and their indexes,
+        unless they already exist.
+
+        Args:
+            schema (str): schema name
+            tables (list): table names
+        """
+        with self.dbhLock:
+            for query in self.createSchemaQueries:
+                match = re.match(r"CREATE (?:TABLE (\w+)|INDEX (\w+) ON (\w+))", query)
+                if not match or (match.group(1) or match.group(3)) not in tables:
+                    continue
+                name = match.group(1) or match.group(2)
+                self.dbh.execute(self._ifNotExists(query).replace(f" {name} ", f" {schema}.{name} ", 1))
+
+    def _hasTable(self, schema: str, table: str) -> bool:
+        """Check whether a schema has a table.
+
+        Args:
+            schema (str): schema name
+            table (str): table name
+
+        Returns:
+            bool: the table exists
+        """
+        with self.dbhLock:
+            self.dbh.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", [table])
+            return bool(self.dbh.fetchone()[0])
+
+    def _hasIndex(self, schema: str, index: str) -> bool:
+        """Check whether a schema has an index.
+
+        Args:
+            schema (str): schema name
+            index (str): index name
+
+        Returns:
+            bool: the index exists
+        """
+        with self.dbhLock:
+            self.dbh.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master WHERE type = 'index' AND name = ?", [index])
+            return bool(self.dbh.fetchone()[0])
+
+    def _hasColumn(self, schema: str, table: str, column: str) -> bool:
+        """Check whether a table has a column.
+
+        Args:
+            schema (str): schema name
+            table (str): table name
+            column (str): column name
+
+        Returns:
+            bool: the column exists
+        """
+        with self.dbhLock:
+            self.dbh.execute(f"PRAGMA {schema}.table_info({table})")
+            return column in [row[1] for row in self.dbh.fetchall()]
+
+    def _scanPartitionPath(self, instanceId: str) -> Path:
+        """Path of the database file of a scan stored in a file of its own.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            Path: database file path, or None if the scan ID could not be a file name
+        """
+        if not isinstance(instanceId, str) or not re.fullmatch(r"[A-Za-z0-9_-]+", instanceId):
+            return None
+
+        return self.scanPartitionDir / f"{instanceId}.db"
+
+    def scanPartitionList(self) -> list:
+        """List the scans stored in database files of their own.
+
+        Returns:
+            list: scan instance IDs
+        """
+        if not self.scanPartitionDir.is_dir():
+            return list()
+
+        return sorted(path.stem for path in self.scanPartitionDir.glob("*.db"))
+
+    def _createScanPartition(self, instanceId: str) -> None:
+        """Create the database file holding the results and logs of a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Raises:
+            IOError: database I/O failed
+        """
+        path = self._scanPartitionPath(instanceId)
+
+        queries = ["PRAGMA journal_mode=WAL"]
+        for query in self.createSchemaQueries:
+            if re.search(r"\btbl_scan_(results|log|log_debug|summary_data|blob)\b", query) and "correlation" not in query:
+                queries.append(query)
+        if self.searchIndex:
+            queries.extend(self.createSearchIndexQueries)
+
+        self.scanPartitionDir.mkdir(exist_ok=True, parents=True)
+        try:
+            conn = sqlite3.connect(path)
+            try:
+                for query in queries:
+                    conn.execute(query)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            raise IOError("SQL error encountered when creating scan database") from e
+
+    def _scanSchema(self, instanceId: str) -> str:
+        """Name of the schema holding the results and logs of a scan.
+
+        Scans stored in database files of their own are attached to the
+        connection the first time they are needed. Once too many are
+        attached, the least recently used is detached.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            str: schema name
+
+        Raises:
+            IOError: database I/O failed
+        """
+        path = self._scanPartitionPath(instanceId)
+        if path is None or not path.exists():
+            if instanceId in self._attached:
+                self._detachScan(instanceId)
+            return "main"
+
+        with self.dbhLock:
+            if instanceId in self._attached:
+                # Mark as most recently used
+                schema = self._attached.pop(instanceId)
+                self._attached[instanceId] = schema
+                return schema
+
+            for attachedId in list(self._attached):
+                if len(self._attached) < self._maxAttached:
+                    break
+                self._detachScan(attachedId)
+
+            schema = "scan_" + hashlib.sha256(instanceId.encode('utf-8')).hexdigest()[:16]
+            try:
+                if self.conn.in_transaction:
+                    self.conn.commit()
+                self.dbh.execute(f"ATTACH DATABASE ? AS {schema}", [str(path)])
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when attaching the database of scan {instanceId}") from e
+
+            try:
+                self._upgradeSchema(lambda: self._scanPartitionUpgraded(schema), lambda: self._upgradeScanPartition(schema, instanceId))
+            except sqlite3.Error as e:
+                with suppress(sqlite3.Error):
+                    self.dbh.execute(f"DETACH DATABASE {schema}")
+                raise IOError(f"SQL error encountered when upgrading the database of scan {instanceId}") from e
+
+            self._attached[instanceId] = schema
+            return schema
+
+    def _addDataHashColumn(self, schema: str) -> None:
+        """Add the column referring to the blob store to the results
+        table of a database created before there was a blob store.
+
+        Args:
+            schema (str): schema name
+        """
+        with self.dbhLock:
+            if not self._hasColumn(schema, "tbl_scan_results", "data_hash"):
+                self.dbh.execute(f"ALTER TABLE {schema}.tbl_scan_results ADD COLUMN data_hash VARCHAR")
+
+    def _scanPartitionUpgraded(self, schema: str) -> bool:
+        """Check whether the database of a scan stored in a file of its
+        own has the schema of the current version.
+
+        Args:
+            schema (str): schema name
+
+        Returns:
+            bool: the database is up to date
+        """
+        return self._hasColumn(schema, "tbl_scan_results", "data_hash") and self._hasTable(schema, "tbl_scan_blob") \
+            and self._hasTable(schema, "tbl_scan_summary_data") and self._hasTable(schema, "tbl_scan_log_debug")
+
+    def _upgradeScanPartition(self, schema: str, instanceId: str) -> None:
+        """Upgrade the database of a scan stored in a file of its own,
+        created by an earlier version.
+
+        Large result data was kept in the blob store of the main database,
+        and is moved to the blob store of the file. The data counted in
+        the scan summaries was kept in the main database, or not at all,
+        before it was kept with the results. The scan is summarized again
+        from its results. Debug logs were kept in the main database, and
+        are moved to the file of the scan.
+
+        Args:
+            schema (str): schema name
+            instanceId (str): scan instance ID
+        """
+        with self.dbhLock:
+            self._addDataHashColumn(schema)
+
+            if not self._hasTable(schema, "tbl_scan_blob"):
+                self._createTables(schema, ["tbl_scan_blob"])
+                refs = f"SELECT data_hash, COUNT(*) AS total FROM {schema}.tbl_scan_results \
+                    WHERE data_hash IS NOT NULL GROUP BY data_hash"
+                self.dbh.execute(f"INSERT INTO {schema}.tbl_scan_blob (hash, data, size, refcount) \
+                    SELECT b.hash, b.data, b.size, r.total FROM main.tbl_scan_blob b, ({refs}) r \
+                    WHERE b.hash = r.data_hash")
+                self.dbh.execute(f"UPDATE main.tbl_scan_blob SET refcount = refcount - \
+                    (SELECT r.total FROM ({refs}) r WHERE r.data_hash = main.tbl_scan_blob.hash) \
+                    WHERE hash IN (SELECT hash FROM {schema}.tbl_scan_blob)")
+                self.dbh.execute("DELETE FROM main.tbl_scan_blob WHERE refcount <= 0")
+
+            if not self._hasTable(schema, "tbl_scan_summary_data"):
+                self._createTables(schema, ["tbl_scan_summary_data"])
+                self._summarizeResults(schema, instanceId)
+                self.dbh.execute("DELETE FROM main.tbl_scan_summary_data WHERE scan_instance_id = ?", [instanceId])
+
+            if not self._hasTable(schema, "tbl_scan_log_debug"):
+                self._createTables(schema, ["tbl_scan_log_debug"])
+                self.dbh.execute(f"INSERT INTO {schema}.tbl_scan_log_debug \
+                    SELECT * FROM main.tbl_scan_log_debug WHERE scan_instance_id = ? ORDER BY rowid", [instanceId])
+                self.dbh.execute("DELETE FROM main.tbl_scan_log_debug WHERE scan_instance_id = ?", [instanceId])
+
+    def _detachScan(self, instanceId: str) -> bool:
+        """Detach the database file of a scan from the connection.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            bool: detached; a database still being read from is left attached
+        """
+        with self.dbhLock:
+            schema = self._attached.get(instanceId)
+            if schema is None:
+                return True
+
+            try:
+                if self.conn.in_transaction:
+                    self.conn.commit()
+                self.dbh.execute(f"DETACH DATABASE {schema}")
+            except sqlite3.Error:
+                return False
+
+            del self._attached[instanceId]
+            return True
+
     def vacuumDB(self) -> None:
         """Vacuum the database. Clears unused database file pages.
 
@@ -439,36 +1027,182 @@ class SpiderFootDb:
         with self.dbhLock:
             try:
                 self.dbh.execute("VACUUM")
+                # VACUUM may renumber the rows of tbl_scan_results, which
+                # the search index refers to by rowid.
+                if self.searchIndex:
+                    self.dbh.execute("INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts) VALUES ('rebuild')")
                 self.conn.commit()
                 return True
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when vacuuming the database") from e
         return False
 
+    def _fetchRows(self, qry: str, qvars: list, errorMessage: str) -> typing.Iterator[tuple]:
+        """Run a query, and read its results in chunks as they are
+        iterated over, so that a large result set is never held in
+        memory at once.
+
+        The query runs on a cursor of its own, and the database lock is
+        only held while each chunk is read.
+
+        Args:
+            qry (str): SQL query
+            qvars (list): query parameters
+            errorMessage (str): message of the IOError raised if the query fails
+
+        Returns:
+            typing.Iterator[tuple]: query results
+
+        Raises:
+            IOError: database I/O failed
+        """
+        cursor = self.conn.cursor()
+
+        with self.dbhLock:
+            try:
+                cursor.execute(qry, qvars)
+            except sqlite3.Error as e:
+                cursor.close()
+                raise IOError(errorMessage) from e
+
+        def rows():
+            try:
+                while True:
+                    with self.dbhLock:
+                        try:
+                            chunk = cursor.fetchmany(self._fetchChunkSize)
+                        except sqlite3.Error as e:
+                            raise IOError(errorMessage) from e
+
+                    if not chunk:
+                        break
+
+                    yield from chunk
+            finally:
+                cursor.close()
+
+        return rows()
+
     def search(self, criteria: dict, filterFp: bool = False) -> list:
         """Search database.
 
+        Args:
+            criteria (dict): search criteria, as for searchIter()
+            filterFp (bool): filter out false positives
+
+        Returns:
+            list: search results
+        """
+        return list(self.searchIter(criteria, filterFp))
+
+    def searchIter(self, criteria: dict, filterFp: bool = False) -> typing.Iterator[tuple]:
+        """Search database, reading the results from the database as they
+        are iterated over rather than all at once.
+
         Args:
             criteria (dict): search criteria such as:
                 - scan_id (search within a scan, if omitted search all)
                 - type (search a specific type, if omitted search all)
                 - value (search values for a specific string, if omitted search all)
                 - regex (search values for a regular expression)
-                ** at least two criteria must be set **
+                - text (full-text search of values for words, "phrases"
+                  and prefixes ending with *; may be used on its own)
+                ** at least two criteria must be set, unless searching text **
             filterFp (bool): filter out false positives
 
         Returns:
-            list: search results
+            typing.Iterator[tuple]: search results
+        """
+        qry, qvars = self._searchQuery(criteria, filterFp)
+        qry += " ORDER BY data"
+
+        if criteria.get('scan_id') is not None:
+            schema = self._scanSchema(criteria['scan_id'])
+            return self._fetchRows(qry.format(schema=schema), qvars, "SQL error encountered when fetching search results")
+
+        # Search every scan. Scans stored in files of their own are
+        # searched one at a time, so that no more than one is attached
+        # for the search, and the results are merged.
+        partitions = self.scanPartitionList()
+        if not partitions:
+            return self._fetchRows(qry.format(schema="main"), qvars, "SQL error encountered when fetching search results")
+
+        results = [list(self._fetchRows(qry.format(schema="main"), qvars, "SQL error encountered when fetching search results"))]
+        for instanceId in partitions:
+            schema = self._scanSchema(instanceId)
+            results.append(list(self._fetchRows(qry.format(schema=schema), qvars, "SQL error encountered when fetching search results")))
+
+        return heapq.merge(*results, key=lambda row: (row[1] is not None, row[1] or ""))
+
+    def searchPage(self, criteria: dict, filterFp: bool = False, after: list = None, limit: int = 100) -> tuple:
+        """Search database, a page of results at a time. Results are in
+        the order they were stored, by scan.
+
+        Args:
+            criteria (dict): search criteria, as for searchIter()
+            filterFp (bool): filter out false positives
+            after (list): key of the last result of the previous page
+            limit (int): number of results per page
+
+        Returns:
+            tuple: search results, as for searchIter(), and the key of the
+                last result if there are more
+
+        Raises:
+            IOError: database I/O failed
+        """
+        qry, qvars = self._searchQuery(criteria, filterFp, keyColumn="c.scan_instance_id")
+
+        if after:
+            qry += " AND (c.scan_instance_id, c.rowid) > (?, ?)"
+            qvars.extend([str(after[0]), int(after[1])])
+
+        qry += " ORDER BY c.scan_instance_id, c.rowid LIMIT ?"
+        qvars.append(int(limit) + 1)
+
+        # Scans to search, or None for the scans stored in the main
+        # database, each resolved to its schema once
+        if criteria.get('scan_id') is not None:
+            instanceIds = [criteria['scan_id']]
+        else:
+            instanceIds = [None] + self.scanPartitionList()
+
+        results = list()
+        for instanceId in instanceIds:
+            schema = "main" if instanceId is None else self._scanSchema(instanceId)
+
+            with self.dbhLock:
+                try:
+                    self.dbh.execute(qry.format(schema=schema), qvars)
+                    results.append(self.dbh.fetchall())
+                except sqlite3.Error as e:
+                    raise IOError("SQL error encountered when fetching search results") from e
+
+        rows = list(itertools.islice(heapq.merge(*results, key=lambda row: row[-2:]), int(limit) + 1))
+
+        return self._page(rows, limit)
+
+    def _searchQuery(self, criteria: dict, filterFp: bool, keyColumn: str = None) -> tuple:
+        """Build the query for a search of the database.
+
+        Args:
+            criteria (dict): search criteria, as for searchIter()
+            filterFp (bool): filter out false positives
+            keyColumn (str): also select this column and the row ID, to
+                read the results a page at a time
+
+        Returns:
+            tuple: SQL query, with the schema to search left to be filled
+                in, and its parameters
 
         Raises:
             TypeError: arg type was invalid
             ValueError: arg value was invalid
-            IOError: database I/O failed
         """
         if not isinstance(criteria, dict):
             raise TypeError(f"criteria is {type(criteria)}; expected dict()") from None
 
-        valid_criteria = ['scan_id', 'type', 'value', 'regex']
+        valid_criteria = ['scan_id', 'type', 'value', 'regex', 'text']
 
         for key in list(criteria.keys()):
             if key not in valid_criteria:
@@ -485,16 +1219,21 @@ class SpiderFootDb:
         if len(criteria) == 0:
             raise ValueError(f"No valid search criteria provided; expected: {', '.join(valid_criteria)}") from None
 
-        if len(criteria) == 1:
+        if len(criteria) == 1 and 'text' not in criteria:
             raise ValueError("Only one search criteria provided; expected at least two")
 
         qvars = list()
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = "SELECT ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+            COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, c.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp' \
-            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
+            c.false_positive as 'fp', s.false_positive as 'parent_fp' "
+
+        if keyColumn:
+            qry += f", {keyColumn}, c.rowid "
+
+        qry += "FROM {schema}.tbl_scan_results c, {schema}.tbl_scan_results s, tbl_event_types t \
             WHERE s.scan_instance_id = c.scan_instance_id AND \
             t.event = c.type AND c.source_event_hash = s.hash "
 
@@ -510,23 +1249,74 @@ class SpiderFootDb:
             qvars.append(criteria['type'])
 
         if criteria.get('value') is not None:
-            qry += " AND (c.data LIKE ? OR s.data LIKE ?) "
+            qry += " AND (COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) LIKE ? \
+                OR COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) LIKE ?) "
             qvars.append(criteria['value'])
             qvars.append(criteria['value'])
 
         if criteria.get('regex') is not None:
-            qry += " AND (c.data REGEXP ? OR s.data REGEXP ?) "
+            qry += " AND (COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) REGEXP ? \
+                OR COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) REGEXP ?) "
             qvars.append(criteria['regex'])
             qvars.append(criteria['regex'])
 
-        qry += " ORDER BY c.data"
+        if criteria.get('text') is not None:
+            textQry, textVars = self._textQuery(criteria['text'])
+            qry += textQry
+            qvars.extend(textVars)
 
-        with self.dbhLock:
-            try:
-                self.dbh.execute(qry, qvars)
-                return self.dbh.fetchall()
-            except sqlite3.Error as e:
-                raise IOError("SQL error encountered when fetching search results") from e
+        return qry, qvars
+
+    def _textQuery(self, text: str) -> tuple:
+        """Build the condition for a full-text search of result data.
+
+        Args:
+            text (str): search text, as for searchIter()
+
+        Returns:
+            tuple: SQL condition on the results aliased 'c', and its parameters
+        """
+        terms = _searchTerms(text)
+        if not terms:
+            return " AND 0 ", []
+
+        like = ""
+        likeVars = list()
+        for term, _ in terms:
+            like += " AND COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) LIKE ? ESCAPE '\\' "
+            likeVars.append('%' + re.sub(r'([%_\\])', r'\\\1', term) + '%')
+
+        if not self.searchIndex:
+            return like, likeVars
+
+        # Data stored compressed in tbl_scan_blob is not in the index, as
+        # the result row holds no data for the triggers to index, so those
+        # results are searched by scanning their data.
+        return (
+            " AND (c.rowid IN (SELECT rowid FROM {schema}.tbl_scan_results_fts WHERE tbl_scan_results_fts MATCH ?) \
+            OR (c.data IS NULL AND c.data_hash IS NOT NULL " + like + ")) ",
+            [" AND ".join('"' + term.replace('"', '""') + '"' + (' *' if prefix else '') for term, prefix in terms)] + likeVars
+        )
+
+    def _page(self, rows: list, limit: int, keyLength: int = 2) -> tuple:
+        """Split a page of rows, read with one row more than the page
+        holds, from the key of its last row.
+
+        Each row ends with its key, which is not part of the rows returned.
+
+        Args:
+            rows (list): rows read, with their keys
+            limit (int): number of rows per page
+            keyLength (int): number of key columns at the end of each row
+
+        Returns:
+            tuple: rows of the page, and the key of the last row if
+                there are more
+        """
+        rows, more = rows[:int(limit)], len(rows) > int(limit)
+        after = list(rows[-1][-keyLength:]) if more else None
+
+        return [tuple(row[:-keyLength]) for row in rows], after
 
     def eventTypes(self) -> list:
         """Get event types.
@@ -549,6 +1339,10 @@ class SpiderFootDb:
     def scanLogEvents(self, batch: list) -> bool:
         """Logs a batch of events to the database.
 
+        Debug messages, which can be numerous, are stored apart from the
+        other logs: those of each scan in the batch are compressed
+        together into a single row of tbl_scan_log_debug.
+
         Args:
             batch (list): tuples containing: instanceId, classification, message, component, logTime
 
@@ -560,7 +1354,8 @@ class SpiderFootDb:
             bool: Whether the logging operation succeeded
         """
 
-        inserts = []
+        inserts = dict()
+        debugInserts = dict()
 
         for instanceId, classification, message, component, logTime in batch:
             if not isinstance(instanceId, str):
@@ -575,16 +1370,33 @@ class SpiderFootDb:
             if not component:
                 component = "SpiderFoot"
 
-            inserts.append((instanceId, logTime * 1000, component, classification, message))
+            if classification == "DEBUG":
+                debugInserts.setdefault(instanceId, list()).append((logTime * 1000, component, message))
+            else:
+                inserts.setdefault(instanceId, list()).append((instanceId, logTime * 1000, component, classification, message))
 
-        if inserts:
-            qry = "INSERT INTO tbl_scan_log \
+        if inserts or debugInserts:
+            qry = "INSERT INTO {schema}.tbl_scan_log \
                 (scan_instance_id, generated, component, type, message) \
                 VALUES (?, ?, ?, ?, ?)"
 
+            qryDebug = "INSERT INTO {schema}.tbl_scan_log_debug \
+                (scan_instance_id, first_generated, last_generated, total, data) \
+                VALUES (?, ?, ?, ?, ?)"
+
+            debugRows = [
+                (instanceId, rows[0][0], rows[-1][0], len(rows), zlib.compress(json.dumps(rows).encode('utf-8')))
+                for instanceId, rows in debugInserts.items()
+            ]
+
             with self.dbhLock:
                 try:
-                    self.dbh.executemany(qry, inserts)
+                    # Attaching the file of a scan ends the transaction
+                    schemas = {instanceId: self._scanSchema(instanceId) for instanceId in list(inserts) + list(debugInserts)}
+                    for instanceId, rows in inserts.items():
+                        self.dbh.executemany(qry.format(schema=schemas[instanceId]), rows)
+                    for row in debugRows:
+                        self.dbh.execute(qryDebug.format(schema=schemas[row[0]]), row)
                     self.conn.commit()
                 except sqlite3.Error as e:
                     if "locked" not in e.args[0] and "thread" not in e.args[0]:
@@ -621,13 +1433,13 @@ class SpiderFootDb:
         if not component:
             component = "SpiderFoot"
 
-        qry = "INSERT INTO tbl_scan_log \
+        qry = "INSERT INTO {schema}.tbl_scan_log \
             (scan_instance_id, generated, component, type, message) \
             VALUES (?, ?, ?, ?, ?)"
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, (
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), (
                     instanceId, time.time() * 1000, component, classification, message
                 ))
                 self.conn.commit()
@@ -673,6 +1485,9 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError("Unable to create scan instance in database") from e
 
+        if self.scanPartitions and self._scanPartitionPath(instanceId) is not None:
+            self._createScanPartition(instanceId)
+
     def scanInstanceSet(self, instanceId: str, started: str = None, ended: str = None, status: str = None) -> None:
         """Update the start time, end time or status (or all 3) of a scan instance.
 
@@ -705,8 +1520,8 @@ class SpiderFootDb:
             qry += " status = ?,"
             qvars.append(status)
 
-        # guid = guid is a little hack to avoid messing with , placement above
-        qry += " guid = guid WHERE guid = ?"
+        # version is bumped last to avoid messing with , placement above
+        qry += " version = version + 1 WHERE guid = ?"
         qvars.append(instanceId)
 
         with self.dbhLock:
@@ -745,6 +1560,66 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when retrieving scan instance") from e
 
+    def _summarizeResults(self, schema: str, instanceId: str) -> None:
+        """Count the results of a scan again for the scan summaries.
+        The summaries are otherwise updated as results are stored.
+
+        Args:
+            schema (str): schema name
+            instanceId (str): scan instance ID
+        """
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            self.dbh.execute("DELETE FROM tbl_scan_summary WHERE scan_instance_id = ? \
+                AND field IN ('type', 'module')", qvars)
+
+            for field in ["type", "module"]:
+                self.dbh.execute(f"INSERT INTO tbl_scan_summary \
+                    (scan_instance_id, field, value, total, unique_total, last_in) \
+                    SELECT scan_instance_id, '{field}', {field}, COUNT(*), COUNT(DISTINCT COALESCE(data, data_hash)), \
+                    MAX(generated) FROM {schema}.tbl_scan_results WHERE scan_instance_id = ? GROUP BY {field}", qvars)
+
+            self._summarizeResultData(schema, instanceId)
+
+    def _summarizeResultData(self, schema: str, instanceId: str) -> None:
+        """Record again the data of the results of a scan counted as
+        unique in the scan summaries. The data is kept in the schema
+        holding the results, so that it goes with them.
+
+        Args:
+            schema (str): schema name
+            instanceId (str): scan instance ID
+        """
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            self.dbh.execute(f"DELETE FROM {schema}.tbl_scan_summary_data WHERE scan_instance_id = ?", qvars)
+
+            for field in ["type", "module"]:
+                self.dbh.execute(f"INSERT OR IGNORE INTO {schema}.tbl_scan_summary_data \
+                    (scan_instance_id, field, value, data_hash) \
+                    SELECT scan_instance_id, '{field}', {field}, \
+                    DATAHASH(COALESCE(r.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = r.data_hash))) \
+                    FROM {schema}.tbl_scan_results r WHERE scan_instance_id = ? \
+                    AND (data IS NOT NULL OR data_hash IS NOT NULL)", qvars)
+
+    def _summarizeCorrelations(self, instanceId: str) -> None:
+        """Count the correlations of each risk level of a scan again for
+        the scan summaries.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            self.dbh.execute("DELETE FROM tbl_scan_summary WHERE scan_instance_id = ? AND field = 'risk'", qvars)
+            self.dbh.execute("INSERT INTO tbl_scan_summary \
+                (scan_instance_id, field, value, total) \
+                SELECT scan_instance_id, 'risk', rule_risk, COUNT(*) \
+                FROM tbl_scan_correlation_results WHERE scan_instance_id = ? GROUP BY rule_risk", qvars)
+
     def scanResultSummary(self, instanceId: str, by: str = "type") -> list:
         """Obtain a summary of the results, filtered by event type, module or entity.
 
@@ -770,30 +1645,35 @@ class SpiderFootDb:
         if by not in ["type", "module", "entity"]:
             raise ValueError(f"Invalid filter by value: {by}") from None
 
+        # Counts by type and module are kept up to date as results are
+        # stored, rather than counted on every request.
         if by == "type":
-            qry = "SELECT r.type, e.event_descr, MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.type ORDER BY e.event_descr"
+            qry = "SELECT s.value, e.event_descr, ROUND(s.last_in) AS last_in, \
+                s.total, s.unique_total FROM \
+                tbl_scan_summary s, tbl_event_types e WHERE e.event = s.value \
+                AND s.scan_instance_id = ? AND s.field = 'type' ORDER BY e.event_descr"
 
         if by == "module":
-            qry = "SELECT r.module, '', MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.module ORDER BY r.module DESC"
+            qry = "SELECT s.value, '', ROUND(s.last_in) AS last_in, \
+                s.total, s.unique_total FROM \
+                tbl_scan_summary s WHERE s.scan_instance_id = ? AND s.field = 'module' \
+                ORDER BY s.value DESC"
 
         if by == "entity":
-            qry = "SELECT r.data, e.event_descr, MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
+            qry = "SELECT COALESCE(r.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = r.data_hash)) AS entity, \
+                e.event_descr, MAX(ROUND(generated)) AS last_in, \
+                count(*) AS total, count(DISTINCT COALESCE(r.data, r.data_hash)) as utotal FROM \
+                {schema}.tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
                 AND r.scan_instance_id = ? \
                 AND e.event_type in ('ENTITY') \
-                GROUP BY r.data, e.event_descr ORDER BY total DESC limit 50"
+                GROUP BY entity, e.event_descr ORDER BY total DESC limit 50"
 
         qvars = [instanceId]
 
         with self.dbhLock:
             try:
+                if by == "entity":
+                    qry = qry.format(schema=self._scanSchema(instanceId))
                 self.dbh.execute(qry, qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
@@ -825,9 +1705,8 @@ class SpiderFootDb:
             raise ValueError(f"Invalid filter by value: {by}") from None
 
         if by == "risk":
-            qry = "SELECT rule_risk, count(*) AS total FROM \
-                tbl_scan_correlation_results \
-                WHERE scan_instance_id = ? GROUP BY rule_risk ORDER BY rule_id"
+            qry = "SELECT value, total FROM tbl_scan_summary \
+                WHERE scan_instance_id = ? AND field = 'risk' AND total > 0 ORDER BY value"
 
         if by == "rule":
             qry = "SELECT rule_id, rule_name, rule_risk, rule_descr, \
@@ -844,6 +1723,26 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when fetching correlation summary") from e
 
+    def scanCorrelationRiskSummary(self) -> list:
+        """Obtain the number of correlations of each risk level, for all scans.
+
+        Returns:
+            list: scan instance ID, risk and number of correlations
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        qry = "SELECT scan_instance_id, value, total FROM tbl_scan_summary \
+            WHERE field = 'risk' AND total > 0"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching correlation summary") from e
+
     def scanCorrelationList(self, instanceId: str) -> list:
         """Obtain a list of the correlations from a scan
 
@@ -911,12 +1810,270 @@ class SpiderFootDb:
         if not isinstance(eventType, str) and not isinstance(eventType, list):
             raise TypeError(f"eventType is {type(eventType)}; expected str() or list()") from None
 
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry, qvars = self._scanResultEventQuery(instanceId, eventType, srcModule, data, sourceId, correlationId, filterFp)
+        qry += " ORDER BY data"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching result events") from e
+
+    def scanResultEventIter(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        srcModule: str = None,
+        data: list = None,
+        sourceId: list = None,
+        correlationId: str = None,
+        filterFp: bool = False
+    ) -> typing.Iterator[tuple]:
+        """Obtain the data for a scan and event type, reading the results
+        from the database as they are iterated over rather than all at once.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            data (list): filter by the data
+            sourceId (list): filter by the ID of the source event
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+
+        Returns:
+            typing.Iterator[tuple]: scan results, as for scanResultEvent()
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        qry, qvars = self._scanResultEventQuery(instanceId, eventType, srcModule, data, sourceId, correlationId, filterFp)
+        qry += " ORDER BY data"
+
+        return self._fetchRows(qry, qvars, "SQL error encountered when fetching result events")
+
+    def scanResultRowsIter(self, instanceId: str) -> typing.Iterator[tuple]:
+        """Obtain all the results of a scan, including those whose source
+        was not stored, reading them as they are iterated over.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            typing.Iterator[tuple]: generated, data, module, type, confidence,
+                visibility, risk, hash, source event hash, event type
+                description, event type class and false positive flag of
+                each result
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
-            c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp' \
-            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t "
+            c.source_event_hash, t.event_descr, t.event_type, c.false_positive \
+            FROM {schema}.tbl_scan_results c, tbl_event_types t \
+            WHERE c.scan_instance_id = ? AND t.event = c.type ORDER BY data"
+
+        return self._fetchRows(
+            qry.format(schema=self._scanSchema(instanceId)),
+            [instanceId],
+            "SQL error encountered when fetching result events"
+        )
+
+    def scanResultEventPage(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        srcModule: str = None,
+        risk: int = None,
+        text: str = None,
+        correlationId: str = None,
+        filterFp: bool = False,
+        sort: str = 'generated',
+        descending: bool = False,
+        after: list = None,
+        limit: int = 100
+    ) -> tuple:
+        """Obtain the data for a scan a page at a time.
+
+        Pages are read from the index of the column sorted by, starting
+        after the key of the last result of the previous page rather than
+        counting results to skip, so that reading a page takes as long
+        however far into the results it is.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            risk (int): filter by the minimum risk
+            text (str): full-text search of the data, as for searchIter()
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+            sort (str): sort by 'generated', 'type' or 'module'
+            descending (bool): sort in descending order
+            after (list): key of the last result of the previous page
+            limit (int): number of results per page
+
+        Returns:
+            tuple: scan results, as for scanResultEvent(), and the key of
+                the last result if there are more
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        if sort not in self._resultSortColumns:
+            raise ValueError(f"Invalid sort value: {sort}") from None
+
+        column = self._resultSortColumns[sort]
+        qry, qvars = self._scanResultEventQuery(
+            instanceId, eventType, srcModule, None, None, correlationId, filterFp, risk, text,
+            columns=self._resultEventColumns + f", {column}, c.rowid"
+        )
+
+        if after:
+            qry += f" AND ({column}, c.rowid) {'<' if descending else '>'} (?, ?)"
+            qvars.extend([after[0], int(after[1])])
+
+        direction = "DESC" if descending else "ASC"
+        qry += f" ORDER BY {column} {direction}, c.rowid {direction} LIMIT ?"
+        qvars.append(int(limit) + 1)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self._page(self.dbh.fetchall(), limit)
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching result events") from e
+
+    def scanResultEventCount(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        srcModule: str = None,
+        risk: int = None,
+        text: str = None,
+        correlationId: str = None,
+        filterFp: bool = False,
+        maxCount: int = 10000
+    ) -> tuple:
+        """Count the data for a scan, as filtered by scanResultEventPage().
+
+        Results of all types, or of some types or modules, are counted
+        from the scan summary, however many there are. Otherwise results
+        are counted up to maxCount.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            risk (int): filter by the minimum risk
+            text (str): full-text search of the data, as for searchIter()
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+            maxCount (int): most results to count
+
+        Returns:
+            tuple: number of results, and whether there may be more
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        summarized = risk is None and not text and not correlationId and not filterFp
+        if summarized and (eventType == 'ALL' or not srcModule):
+            field, values = ('module', srcModule) if srcModule else ('type', eventType)
+            qry = "SELECT COALESCE(SUM(total), 0) FROM tbl_scan_summary WHERE scan_instance_id = ? AND field = ?"
+            qvars = [instanceId, field]
+            if values != 'ALL':
+                values = values if isinstance(values, list) else [values]
+                qry += " AND value IN (" + ','.join(['?'] * len(values)) + ")"
+                qvars.extend(values)
+
+            with self.dbhLock:
+                try:
+                    self.dbh.execute(qry, qvars)
+                    return self.dbh.fetchone()[0], False
+                except sqlite3.Error as e:
+                    raise IOError("SQL error encountered when counting result events") from e
+
+        qry, qvars = self._scanResultEventQuery(
+            instanceId, eventType, srcModule, None, None, correlationId, filterFp, risk, text, columns="1"
+        )
+        qvars.append(int(maxCount) + 1)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(f"SELECT COUNT(*) FROM ({qry} LIMIT ?)", qvars)
+                total = self.dbh.fetchone()[0]
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when counting result events") from e
+
+        return min(total, int(maxCount)), total > int(maxCount)
+
+    def _scanResultEventQuery(
+        self,
+        instanceId: str,
+        eventType: str,
+        srcModule: str,
+        data: list,
+        sourceId: list,
+        correlationId: str,
+        filterFp: bool,
+        risk: int = None,
+        text: str = None,
+        columns: str = None
+    ) -> tuple:
+        """Build the query for the data of a scan and event type.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            data (list): filter by the data
+            sourceId (list): filter by the ID of the source event
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+            risk (int): filter by the minimum risk
+            text (str): full-text search of the data, as for searchIter()
+            columns (str): columns to select instead of the result data
+
+        Returns:
+            tuple: SQL query, without an order, and its parameters
+        """
+        if columns is None:
+            columns = self._resultEventColumns
+
+        qry = f"SELECT {columns} \
+            FROM {{schema}}.tbl_scan_results c, {{schema}}.tbl_scan_results s, tbl_event_types t "
 
         if correlationId:
             qry += ", tbl_scan_correlation_results_events ce "
@@ -951,10 +2108,10 @@ class SpiderFootDb:
 
         if data:
             if isinstance(data, list):
-                qry += " AND c.data in (" + ','.join(['?'] * len(data)) + ")"
+                qry += " AND COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) in (" + ','.join(['?'] * len(data)) + ")"
                 qvars.extend(data)
             else:
-                qry += " AND c.data = ?"
+                qry += " AND COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) = ?"
                 qvars.append(data)
 
         if sourceId:
@@ -965,25 +2122,339 @@ class SpiderFootDb:
                 qry += " AND c.source_event_hash = ?"
                 qvars.append(sourceId)
 
-        qry += " ORDER BY c.data"
+        if risk is not None:
+            qry += " AND c.risk >= ?"
+            qvars.append(int(risk))
+
+        if text:
+            textQry, textVars = self._textQuery(text)
+            qry += textQry
+            qvars.extend(textVars)
+
+        return qry.format(schema=self._scanSchema(instanceId)), qvars
+
+    def scanResultEventUnique(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False) -> list:
+        """Obtain a unique list of elements.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+
+        Returns:
+            list: unique scan results
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str):
+            raise TypeError(f"eventType is {type(eventType)}; expected str()") from None
+
+        qry = "SELECT DISTINCT COALESCE(r.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = r.data_hash)) AS result_data, type, COUNT(*) \
+            FROM {schema}.tbl_scan_results r WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if eventType != "ALL":
+            qry += " AND type = ?"
+            qvars.append(eventType)
+
+        if filterFp:
+            qry += " AND false_positive <> 1"
+
+        qry += " GROUP BY type, result_data ORDER BY COUNT(*)"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching unique result events") from e
+
+    def scanResultEventUniquePage(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        filterFp: bool = False,
+        after: list = None,
+        limit: int = 100
+    ) -> tuple:
+        """Obtain a unique list of elements a page at a time, in order of
+        their data.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+            after (list): key of the last element of the previous page
+            limit (int): number of elements per page
+
+        Returns:
+            tuple: unique scan results, as for scanResultEventUnique(),
+                and the key of the last element if there are more
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str):
+            raise TypeError(f"eventType is {type(eventType)}; expected str()") from None
+
+        qry = "SELECT result_data, type, total, result_data, type FROM ( \
+            SELECT COALESCE(r.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = r.data_hash)) AS result_data, \
+            type, COUNT(*) AS total FROM {schema}.tbl_scan_results r WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if eventType != "ALL":
+            qry += " AND type = ?"
+            qvars.append(eventType)
+
+        if filterFp:
+            qry += " AND false_positive <> 1"
+
+        qry += " GROUP BY type, result_data)"
+
+        if after:
+            qry += " WHERE (result_data, type) > (?, ?)"
+            qvars.extend([str(after[0]), str(after[1])])
+
+        qry += " ORDER BY result_data, type LIMIT ?"
+        qvars.append(int(limit) + 1)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self._page(self.dbh.fetchall(), limit)
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching unique result events") from e
+
+    def scanLogs(self, instanceId: str, limit: int = None, fromRowId: int = 0, reverse: bool = False, includeDebug: bool = False) -> list:
+        """Get scan logs.
+
+        Args:
+            instanceId (str): scan instance ID
+            limit (int): limit number of results
+            fromRowId (int): retrieve logs starting from row ID
+            reverse (bool): search result order
+            includeDebug (bool): include the debug logs, which are stored apart
+                from the others and have no row ID, unless reading from a row ID
+
+        Returns:
+            list: scan logs
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT generated AS generated, component, \
+            type, message, rowid FROM {schema}.tbl_scan_log WHERE scan_instance_id = ?"
+        if fromRowId:
+            qry += " and rowid > ?"
+
+        qry += " ORDER BY generated "
+        if reverse:
+            qry += "ASC"
+        else:
+            qry += "DESC"
+        qvars = [instanceId]
+
+        if fromRowId:
+            qvars.append(str(fromRowId))
+
+        if limit is not None:
+            qry += " LIMIT ?"
+            qvars.append(str(limit))
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                rows = self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching scan logs") from e
+
+        if not includeDebug or fromRowId:
+            return rows
+
+        debugRows = [row + (None,) for row in self.scanDebugLogs(instanceId)]
+        if not reverse:
+            debugRows.reverse()
+        rows = list(heapq.merge(rows, debugRows, key=lambda row: row[0], reverse=not reverse))
+        if limit is not None:
+            return rows[:int(limit)]
+        return rows
+
+    def _debugLogLines(self, instanceId: str, component: str = None, descending: bool = False, after: list = None) -> typing.Iterator[tuple]:
+        """Read the debug logs of a scan a line at a time, in the order
+        they were written. The compressed batches of lines are read as
+        the lines are iterated over.
+
+        Args:
+            instanceId (str): scan instance ID
+            component (str): filter by component
+            descending (bool): latest first
+            after (list): row ID of the batch holding the last line read, and its position in the batch
+
+        Yields:
+            tuple: generated, component, type and message of each line, followed by no row ID,
+                the row ID of its batch and its position in the batch
+        """
+        qry = "SELECT rowid, data FROM {schema}.tbl_scan_log_debug WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if after:
+            qry += f" AND rowid {'<=' if descending else '>='} ?"
+            qvars.append(int(after[0]))
+
+        qry += f" ORDER BY rowid {'DESC' if descending else 'ASC'}"
+
+        chunks = self._fetchRows(qry.format(schema=self._scanSchema(instanceId)), qvars, "SQL error encountered when fetching scan debug logs")
+        for chunkId, data in chunks:
+            lines = list(enumerate(json.loads(zlib.decompress(data))))
+            if descending:
+                lines.reverse()
+            for index, (generated, lineComponent, message) in lines:
+                if after and chunkId == int(after[0]) and (index >= int(after[1]) if descending else index <= int(after[1])):
+                    continue
+                if component and lineComponent != component:
+                    continue
+                yield generated, lineComponent, "DEBUG", message, None, chunkId, index
+
+    def scanLogPage(
+        self,
+        instanceId: str,
+        logType: str = None,
+        component: str = None,
+        descending: bool = True,
+        after: typing.Any = None,
+        limit: int = 100,
+        includeDebug: bool = False
+    ) -> tuple:
+        """Get scan logs a page at a time, in the order they were written.
+
+        Debug logs are stored apart from the others. When they are
+        included, the two are merged by the time they were generated,
+        and a page ends at a position in each.
+
+        Args:
+            instanceId (str): scan instance ID
+            logType (str): filter by type, such as ERROR
+            component (str): filter by component
+            descending (bool): latest first
+            after (typing.Any): key of the last log of the previous page, as returned with it
+            limit (int): number of logs per page
+            includeDebug (bool): include the debug logs
+
+        Returns:
+            tuple: scan logs, as for scanLogs(), and the key of the last
+                log if there are more
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if includeDebug:
+            if after is not None and (not isinstance(after, list) or len(after) != 3):
+                raise ValueError(f"after is {after}; expected the key of a log") from None
+            return self._scanLogPageWithDebug(instanceId, logType, component, descending, after, limit)
+
+        qry = "SELECT generated AS generated, component, \
+            type, message, rowid, rowid FROM {schema}.tbl_scan_log WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if logType:
+            qry += " AND type = ?"
+            qvars.append(logType)
+
+        if component:
+            qry += " AND component = ?"
+            qvars.append(component)
+
+        if after:
+            qry += f" AND rowid {'<' if descending else '>'} ?"
+            qvars.append(int(after))
+
+        qry += f" ORDER BY rowid {'DESC' if descending else 'ASC'} LIMIT ?"
+        qvars.append(int(limit) + 1)
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
-                return self.dbh.fetchall()
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                rows, after = self._page(self.dbh.fetchall(), limit, keyLength=1)
             except sqlite3.Error as e:
-                raise IOError("SQL error encountered when fetching result events") from e
+                raise IOError("SQL error encountered when fetching scan logs") from e
 
-    def scanResultEventUnique(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False) -> list:
-        """Obtain a unique list of elements.
+        return rows, after[0] if after else None
+
+    def _scanLogPageWithDebug(self, instanceId: str, logType: str, component: str, descending: bool, after: list, limit: int) -> tuple:
+        """Get a page of scan logs, as for scanLogPage(), including the
+        debug logs.
 
         Args:
             instanceId (str): scan instance ID
-            eventType (str): filter by event type
-            filterFp (bool): filter false positives
+            logType (str): filter by type, such as ERROR
+            component (str): filter by component
+            descending (bool): latest first
+            after (list): row ID of the last log, and row ID of the batch and position of the last
+                debug log, of the previous page
+            limit (int): number of logs per page
 
         Returns:
-            list: unique scan results
+            tuple: scan logs, and the key of the last log if there are more
+        """
+        logAfter, debugAfter = (after[0], after[1:]) if after else (None, None)
+
+        # One more of each than the page holds, to tell if there are more
+        rows, _ = self.scanLogPage(instanceId, logType, component, descending, logAfter, int(limit) + 1)
+
+        debugRows = list()
+        if not logType or logType == "DEBUG":
+            lines = self._debugLogLines(instanceId, component, descending, debugAfter if debugAfter and debugAfter[0] is not None else None)
+            debugRows = list(itertools.islice(lines, int(limit) + 1))
+
+        merged = list(itertools.islice(heapq.merge(rows, debugRows, key=lambda row: row[0], reverse=descending), int(limit) + 1))
+        page = merged[:int(limit)]
+        if len(merged) <= int(limit):
+            return [tuple(row[:5]) for row in page], None
+
+        # Where the page ends in each of the logs and the debug logs.
+        # Logs have a row ID, debug logs do not.
+        lastLog = [row[4] for row in page if row[4] is not None]
+        lastDebug = [row[5:] for row in page if row[4] is None]
+        after = [
+            lastLog[-1] if lastLog else logAfter,
+            *(lastDebug[-1] if lastDebug else (debugAfter or (None, None)))
+        ]
+        return [tuple(row[:5]) for row in page], after
+
+    def scanLogCount(self, instanceId: str, logType: str = None, component: str = None, maxCount: int = 10000, includeDebug: bool = False) -> tuple:
+        """Count scan logs, as filtered by scanLogPage(), up to maxCount.
+
+        Args:
+            instanceId (str): scan instance ID
+            logType (str): filter by type, such as ERROR
+            component (str): filter by component
+            maxCount (int): most logs to count
+            includeDebug (bool): include the debug logs
+
+        Returns:
+            tuple: number of logs, and whether there may be more
 
         Raises:
             TypeError: arg type was invalid
@@ -993,40 +2464,50 @@ class SpiderFootDb:
         if not isinstance(instanceId, str):
             raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
 
-        if not isinstance(eventType, str):
-            raise TypeError(f"eventType is {type(eventType)}; expected str()") from None
-
-        qry = "SELECT DISTINCT data, type, COUNT(*) FROM tbl_scan_results \
-            WHERE scan_instance_id = ?"
+        qry = "SELECT 1 FROM {schema}.tbl_scan_log WHERE scan_instance_id = ?"
         qvars = [instanceId]
 
-        if eventType != "ALL":
+        if logType:
             qry += " AND type = ?"
-            qvars.append(eventType)
+            qvars.append(logType)
 
-        if filterFp:
-            qry += " AND false_positive <> 1"
+        if component:
+            qry += " AND component = ?"
+            qvars.append(component)
+
+        qvars.append(int(maxCount) + 1)
 
-        qry += " GROUP BY type, data ORDER BY COUNT(*)"
+        qryDebug = "SELECT COALESCE(SUM(total), 0) FROM {schema}.tbl_scan_log_debug WHERE scan_instance_id = ?"
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
-                return self.dbh.fetchall()
+                self.dbh.execute(f"SELECT COUNT(*) FROM ({qry} LIMIT ?)".format(schema=self._scanSchema(instanceId)), qvars)
+                total = self.dbh.fetchone()[0]
+
+                # Each batch of debug logs records how many lines it holds
+                if includeDebug and not component and logType in [None, "", "DEBUG"] and total <= int(maxCount):
+                    self.dbh.execute(qryDebug.format(schema=self._scanSchema(instanceId)), [instanceId])
+                    total += self.dbh.fetchone()[0]
             except sqlite3.Error as e:
-                raise IOError("SQL error encountered when fetching unique result events") from e
+                raise IOError("SQL error encountered when counting scan logs") from e
 
-    def scanLogs(self, instanceId: str, limit: int = None, fromRowId: int = 0, reverse: bool = False) -> list:
-        """Get scan logs.
+        if includeDebug and component and logType in [None, "", "DEBUG"]:
+            for _ in self._debugLogLines(instanceId, component):
+                if total > int(maxCount):
+                    break
+                total += 1
+
+        return min(total, int(maxCount)), total > int(maxCount)
+
+    def scanDebugLogs(self, instanceId: str) -> list:
+        """Get the debug logs of a scan, which are stored apart from the
+        other logs.
 
         Args:
             instanceId (str): scan instance ID
-            limit (int): limit number of results
-            fromRowId (int): retrieve logs starting from row ID
-            reverse (bool): search result order
 
         Returns:
-            list: scan logs
+            list: generated, component, type and message of each debug log, oldest first
 
         Raises:
             TypeError: arg type was invalid
@@ -1036,31 +2517,24 @@ class SpiderFootDb:
         if not isinstance(instanceId, str):
             raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
 
-        qry = "SELECT generated AS generated, component, \
-            type, message, rowid FROM tbl_scan_log WHERE scan_instance_id = ?"
-        if fromRowId:
-            qry += " and rowid > ?"
-
-        qry += " ORDER BY generated "
-        if reverse:
-            qry += "ASC"
-        else:
-            qry += "DESC"
+        qry = "SELECT data FROM {schema}.tbl_scan_log_debug WHERE scan_instance_id = ? \
+            ORDER BY first_generated, rowid"
         qvars = [instanceId]
 
-        if fromRowId:
-            qvars.append(str(fromRowId))
-
-        if limit is not None:
-            qry += " LIMIT ?"
-            qvars.append(str(limit))
-
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
-                return self.dbh.fetchall()
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                chunks = self.dbh.fetchall()
             except sqlite3.Error as e:
-                raise IOError("SQL error encountered when fetching scan logs") from e
+                raise IOError("SQL error encountered when fetching scan debug logs") from e
+
+        logs = list()
+        for [data] in chunks:
+            logs.extend((generated, component, "DEBUG", message) for generated, component, message in json.loads(zlib.decompress(data)))
+
+        # Batches written by more than one process may overlap
+        logs.sort(key=lambda row: row[0])
+        return logs
 
     def scanErrors(self, instanceId: str, limit: int = 0) -> list:
         """Get scan errors.
@@ -1084,7 +2558,7 @@ class SpiderFootDb:
             raise TypeError(f"limit is {type(limit)}; expected int()") from None
 
         qry = "SELECT generated AS generated, component, \
-            message FROM tbl_scan_log WHERE scan_instance_id = ? \
+            message FROM {schema}.tbl_scan_log WHERE scan_instance_id = ? \
             AND type = 'ERROR' ORDER BY generated DESC"
         qvars = [instanceId]
 
@@ -1094,7 +2568,7 @@ class SpiderFootDb:
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when fetching scan errors") from e
@@ -1120,27 +2594,62 @@ class SpiderFootDb:
         qry2 = "DELETE FROM tbl_scan_config WHERE scan_instance_id = ?"
         qry3 = "DELETE FROM tbl_scan_results WHERE scan_instance_id = ?"
         qry4 = "DELETE FROM tbl_scan_log WHERE scan_instance_id = ?"
+        qry5 = "DELETE FROM tbl_scan_summary WHERE scan_instance_id = ?"
+        # The data counted in the summaries of a scan stored in a file of
+        # its own goes with the file
+        qry6 = "DELETE FROM main.tbl_scan_summary_data WHERE scan_instance_id = ?"
+        qry7 = "DELETE FROM main.tbl_scan_log_debug WHERE scan_instance_id = ?"
         qvars = [instanceId]
 
+        # Blobs no longer referred to by any result are deleted. The blobs
+        # of a scan stored in a file of its own go with the file.
+        qryBlobs = "SELECT data_hash, COUNT(*) FROM main.tbl_scan_results \
+            WHERE scan_instance_id = ? AND data_hash IS NOT NULL GROUP BY data_hash"
+        qryRelease = "UPDATE main.tbl_scan_blob SET refcount = refcount - ? WHERE hash = ?"
+        qryPurge = "DELETE FROM main.tbl_scan_blob WHERE refcount <= 0"
+
         with self.dbhLock:
             try:
+                if self._scanSchema(instanceId) == "main":
+                    self.dbh.execute(qryBlobs, qvars)
+                    self.dbh.executemany(qryRelease, [(count, blobHash) for blobHash, count in self.dbh.fetchall()])
+                    self.dbh.execute(qryPurge)
                 self.dbh.execute(qry1, qvars)
                 self.dbh.execute(qry2, qvars)
                 self.dbh.execute(qry3, qvars)
                 self.dbh.execute(qry4, qvars)
+                self.dbh.execute(qry5, qvars)
+                self.dbh.execute(qry6, qvars)
+                self.dbh.execute(qry7, qvars)
                 self.conn.commit()
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when deleting scan") from e
 
+            # Results and logs stored in a file of their own go with the file
+            path = self._scanPartitionPath(instanceId)
+            if path is not None and path.exists():
+                self._detachScan(instanceId)
+                try:
+                    for suffix in ["", "-wal", "-shm"]:
+                        with suppress(FileNotFoundError):
+                            Path(f"{path}{suffix}").unlink()
+                except OSError as e:
+                    raise IOError(f"Unable to delete the database of scan {instanceId}") from e
+
         return True
 
-    def scanResultsUpdateFP(self, instanceId: str, resultHashes: list, fpFlag: int) -> bool:
-        """Set the false positive flag for a result.
+    def scanResultsUpdateFP(self, instanceId: str, resultHashes: list, fpFlag: int, children: bool = False) -> bool:
+        """Set the false positive flag for a set of results, and
+        optionally for everything further down their discovery paths.
+
+        The hashes are loaded into a temporary table and the results are
+        updated by joining with it, all in a single transaction.
 
         Args:
             instanceId (str): scan instance ID
             resultHashes (list): list of event hashes
             fpFlag (int): false positive
+            children (bool): also set the flag for the children of the results, and their children
 
         Returns:
             bool: success
@@ -1156,19 +2665,41 @@ class SpiderFootDb:
         if not isinstance(resultHashes, list):
             raise TypeError(f"resultHashes is {type(resultHashes)}; expected list()") from None
 
-        with self.dbhLock:
-            for resultHash in resultHashes:
-                qry = "UPDATE tbl_scan_results SET false_positive = ? WHERE \
-                    scan_instance_id = ? AND hash = ?"
-                qvars = [fpFlag, instanceId, resultHash]
-                try:
-                    self.dbh.execute(qry, qvars)
-                except sqlite3.Error as e:
-                    raise IOError("SQL error encountered when updating false-positive") from e
+        qryCreate = "CREATE TEMP TABLE IF NOT EXISTS tbl_result_hashes (hash VARCHAR NOT NULL PRIMARY KEY)"
+        qryClear = "DELETE FROM temp.tbl_result_hashes"
+        qryInsert = "INSERT OR IGNORE INTO temp.tbl_result_hashes (hash) VALUES (?)"
+
+        if children:
+            # UNION rather than UNION ALL visits each result once, so the
+            # walk ends even though ROOT is its own source.
+            qry = "WITH RECURSIVE descendants(hash) AS ( \
+                    SELECT hash FROM temp.tbl_result_hashes \
+                    UNION \
+                    SELECT c.hash FROM {schema}.tbl_scan_results c, descendants d \
+                    WHERE c.scan_instance_id = ? AND c.source_event_hash = d.hash \
+                ) \
+                UPDATE {schema}.tbl_scan_results SET false_positive = ? \
+                WHERE scan_instance_id = ? AND hash IN (SELECT hash FROM descendants)"
+            qvars = [instanceId, fpFlag, instanceId]
+        else:
+            qry = "UPDATE {schema}.tbl_scan_results SET false_positive = ? \
+                WHERE scan_instance_id = ? AND hash IN (SELECT hash FROM temp.tbl_result_hashes)"
+            qvars = [fpFlag, instanceId]
 
+        with self.dbhLock:
+            # Attaching the file of a scan ends the transaction
+            schema = self._scanSchema(instanceId)
             try:
+                self.dbh.execute(qryCreate)
+                self.dbh.execute(qryClear)
+                self.dbh.executemany(qryInsert, [(resultHash,) for resultHash in resultHashes])
+                self.dbh.execute(qry.format(schema=schema), qvars)
+                self.dbh.execute(qryClear)
+                self.dbh.execute(self._scanVersionQuery, [instanceId])
                 self.conn.commit()
             except sqlite3.Error as e:
+                # Leave no results updated if any could not be
+                self.conn.rollback()
                 raise IOError("SQL error encountered when updating false-positive") from e
 
         return True
@@ -1418,19 +2949,54 @@ class SpiderFootDb:
         if isinstance(truncateSize, int) and truncateSize > 0:
             storeData = storeData[0:truncateSize]
 
+        # Large data is compressed and stored once in the blob store of
+        # the database holding the scan, where it is shared with any other
+        # result there with the same data.
+        blobHash = None
+        blob = None
+        if len(storeData) >= self._blobThreshold:
+            blobHash = hashlib.sha256(storeData.encode('utf-8')).hexdigest()
+            blob = zlib.compress(storeData.encode('utf-8'))
+
+        qryBlob = "INSERT INTO {schema}.tbl_scan_blob (hash, data, size, refcount) \
+            VALUES (?, ?, ?, 1) \
+            ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1"
+
         # retrieve scan results
-        qry = "INSERT INTO tbl_scan_results \
+        qry = "INSERT INTO {schema}.tbl_scan_results \
             (scan_instance_id, hash, type, generated, confidence, \
-            visibility, risk, module, data, source_event_hash) \
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            visibility, risk, module, data, source_event_hash, data_hash) \
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
 
         qvals = [instanceId, sfEvent.hash, sfEvent.eventType, sfEvent.generated,
                  sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
-                 sfEvent.module, storeData, sfEvent.sourceEventHash]
+                 sfEvent.module, None if blob else storeData, sfEvent.sourceEventHash, blobHash]
+
+        # Keep the counts by type and module up to date. The data is
+        # only counted as unique the first time it is seen.
+        qryData = "INSERT OR IGNORE INTO {schema}.tbl_scan_summary_data \
+            (scan_instance_id, field, value, data_hash) \
+            VALUES (?, ?, ?, ?)"
+
+        qrySummary = "INSERT INTO tbl_scan_summary \
+            (scan_instance_id, field, value, total, unique_total, last_in) \
+            VALUES (?, ?, ?, 1, ?, ?) \
+            ON CONFLICT (scan_instance_id, field, value) DO UPDATE SET \
+            total = total + 1, unique_total = unique_total + excluded.unique_total, \
+            last_in = MAX(last_in, excluded.last_in)"
+
+        dataHash = _dataHash(storeData)
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvals)
+                schema = self._scanSchema(instanceId)
+                if blob:
+                    self.dbh.execute(qryBlob.format(schema=schema), [blobHash, blob, len(storeData)])
+                self.dbh.execute(qry.format(schema=schema), qvals)
+                for field, value in [("type", sfEvent.eventType), ("module", sfEvent.module)]:
+                    self.dbh.execute(qryData.format(schema=schema), [instanceId, field, value, dataHash])
+                    self.dbh.execute(qrySummary, [instanceId, field, value, self.dbh.rowcount, sfEvent.generated])
+                self.dbh.execute(self._scanVersionQuery, [instanceId])
                 self.conn.commit()
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when storing event data ({self.dbh})") from e
@@ -1445,19 +3011,13 @@ class SpiderFootDb:
             IOError: database I/O failed
         """
 
-        # SQLite doesn't support OUTER JOINs, so we need a work-around that
-        # does a UNION of scans with results and scans without results to
-        # get a complete listing.
+        # Results are counted from the scan summaries, which are kept up
+        # to date as results are stored.
         qry = "SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, COUNT(r.type) \
-            FROM tbl_scan_instance i, tbl_scan_results r WHERE i.guid = r.scan_instance_id \
-            AND r.type <> 'ROOT' GROUP BY i.guid \
-            UNION ALL \
-            SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, '0' \
-            FROM tbl_scan_instance i  WHERE i.guid NOT IN ( \
-            SELECT distinct scan_instance_id FROM tbl_scan_results WHERE type <> 'ROOT') \
-            ORDER BY started DESC"
+            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, \
+            COALESCE((SELECT SUM(s.total) FROM tbl_scan_summary s \
+            WHERE s.scan_instance_id = i.guid AND s.field = 'type' AND s.value <> 'ROOT'), '0') \
+            FROM tbl_scan_instance i ORDER BY started DESC"
 
         with self.dbhLock:
             try:
@@ -1466,6 +3026,112 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when fetching scan list") from e
 
+    def scanProgress(self, instanceId: str) -> tuple:
+        """Obtain, in a single query, what is needed to tell whether a
+        scan has changed: its status, the number of results and
+        correlations stored, and the row IDs of its latest result and log.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            tuple: status, number of results, number of correlations, last
+                result row ID and last log row ID, or None if the scan does
+                not exist
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT i.status, \
+            (SELECT COALESCE(SUM(s.total), 0) FROM tbl_scan_summary s \
+                WHERE s.scan_instance_id = i.guid AND s.field = 'type'), \
+            (SELECT COALESCE(SUM(s.total), 0) FROM tbl_scan_summary s \
+                WHERE s.scan_instance_id = i.guid AND s.field = 'risk'), \
+            (SELECT COALESCE(MAX(r.rowid), 0) FROM {schema}.tbl_scan_results r \
+                WHERE r.scan_instance_id = i.guid), \
+            (SELECT COALESCE(MAX(l.rowid), 0) FROM {schema}.tbl_scan_log l \
+                WHERE l.scan_instance_id = i.guid) \
+            FROM tbl_scan_instance i WHERE i.guid = ?"
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self.dbh.fetchone()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching scan progress") from e
+
+    def scanVersion(self, instanceId: str) -> tuple:
+        """Obtain the status of a scan and its version, which is bumped by
+        every change to the scan: results stored, false positives set,
+        correlations created or deleted and its status or times set.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            tuple: status and version, or None if the scan does not exist
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT status, version FROM tbl_scan_instance WHERE guid = ?"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId])
+                return self.dbh.fetchone()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching scan version") from e
+
+    def scanResultsSince(self, instanceId: str, fromRowId: int = 0, limit: int = None) -> list:
+        """Obtain the results of a scan stored after a given result.
+
+        Args:
+            instanceId (str): scan instance ID
+            fromRowId (int): retrieve results stored after this row ID
+            limit (int): limit number of results
+
+        Returns:
+            list: row ID, generated, data, module, type, hash, source event
+                hash and false positive flag of each result, oldest first
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT c.rowid, ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+            c.module, c.type, c.hash, c.source_event_hash, c.false_positive \
+            FROM {schema}.tbl_scan_results c \
+            WHERE c.scan_instance_id = ? AND c.rowid > ? ORDER BY c.rowid"
+        qvars = [instanceId, int(fromRowId or 0)]
+
+        if limit is not None:
+            qry += " LIMIT ?"
+            qvars.append(int(limit))
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching scan results") from e
+
     def scanResultHistory(self, instanceId: str) -> list:
         """History of data from the scan.
 
@@ -1484,13 +3150,13 @@ class SpiderFootDb:
             raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
 
         qry = "SELECT STRFTIME('%H:%M %w', generated, 'unixepoch') AS hourmin, \
-                type, COUNT(*) FROM tbl_scan_results \
+                type, COUNT(*) FROM {schema}.tbl_scan_results \
                 WHERE scan_instance_id = ? GROUP BY hourmin, type"
         qvars = [instanceId]
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when fetching history for scan {instanceId}") from e
@@ -1526,13 +3192,14 @@ class SpiderFootDb:
 
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = "SELECT ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+            COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp', \
             s.type, s.module, st.event_type as 'source_entity_type' \
-            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t, \
+            FROM {schema}.tbl_scan_results c, {schema}.tbl_scan_results s, tbl_event_types t, \
             tbl_event_types st \
             WHERE c.scan_instance_id = ? AND c.source_event_hash = s.hash AND \
             s.scan_instance_id = c.scan_instance_id AND st.event = s.type AND \
@@ -1541,7 +3208,7 @@ class SpiderFootDb:
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when getting source element IDs") from e
@@ -1577,12 +3244,13 @@ class SpiderFootDb:
 
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = "SELECT ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+            COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp' \
-            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
+            FROM {schema}.tbl_scan_results c, {schema}.tbl_scan_results s, tbl_event_types t \
             WHERE c.scan_instance_id = ? AND c.source_event_hash = s.hash AND \
             s.scan_instance_id = c.scan_instance_id AND \
             t.event = c.type AND s.hash in ('%s')" % "','".join(hashIds)
@@ -1590,7 +3258,7 @@ class SpiderFootDb:
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
                 raise IOError("SQL error encountered when getting child element IDs") from e
@@ -1598,16 +3266,19 @@ class SpiderFootDb:
     def scanElementSourcesAll(self, instanceId: str, childData: list) -> list:
         """Get the full set of upstream IDs which are parents to the supplied set of IDs.
 
+        The whole discovery path is walked up in a single recursive query.
+
         Args:
             instanceId (str): scan instance ID
-            childData (list): TBD
+            childData (list): result rows, as returned by scanResultEvent(), to trace back from
 
         Returns:
-            list: TBD
+            list: map of IDs to result rows, and map of parent IDs to lists of child IDs
 
         Raises:
             TypeError: arg type was invalid
             ValueError: arg value was invalid
+            IOError: database I/O failed
         """
 
         if not isinstance(instanceId, str):
@@ -1619,65 +3290,82 @@ class SpiderFootDb:
         if not childData:
             raise ValueError("childData is empty")
 
-        # Get the first round of source IDs for the leafs
-        keepGoing = True
-        nextIds = list()
         datamap = dict()
         pc = dict()
+        seen = set()
+
+        def link(parentId: str, childId: str) -> None:
+            if (parentId, childId) in seen:
+                return
+            seen.add((parentId, childId))
+            pc.setdefault(parentId, list()).append(childId)
 
+        # The leaf set
+        parentIds = set()
         for row in childData:
             # these must be unique values!
             parentId = row[9]
             childId = row[8]
             datamap[childId] = row
+            link(parentId, childId)
+
+            if parentId and parentId.isalnum():
+                parentIds.add(parentId)
+
+        # Everything further up the discovery path of the leaf set, in the
+        # same format as scanElementSourcesDirect(). UNION rather than UNION
+        # ALL stops the walk at ROOT, which is its own source.
+        qry = "WITH RECURSIVE ancestors(hash) AS ( \
+                SELECT hash FROM {schema}.tbl_scan_results \
+                WHERE scan_instance_id = ? AND hash IN ('%s') \
+                UNION \
+                SELECT r.source_event_hash FROM {schema}.tbl_scan_results r, ancestors a \
+                WHERE r.scan_instance_id = ? AND r.hash = a.hash \
+            ) \
+            SELECT ROUND(c.generated) AS generated, \
+            COALESCE(c.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = c.data_hash)) AS data, \
+            COALESCE(s.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = s.data_hash)) as 'source_data', \
+            c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
+            c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
+            c.false_positive as 'fp', s.false_positive as 'parent_fp', \
+            s.type, s.module, st.event_type as 'source_entity_type' \
+            FROM ancestors a, {schema}.tbl_scan_results c, {schema}.tbl_scan_results s, tbl_event_types t, \
+            tbl_event_types st \
+            WHERE c.scan_instance_id = ? AND c.hash = a.hash AND c.source_event_hash = s.hash AND \
+            s.scan_instance_id = c.scan_instance_id AND st.event = s.type AND \
+            t.event = c.type" % "','".join(parentIds)
+        qvars = [instanceId, instanceId, instanceId]
 
-            if parentId in pc:
-                if childId not in pc[parentId]:
-                    pc[parentId].append(childId)
-            else:
-                pc[parentId] = [childId]
-
-            # parents of the leaf set
-            if parentId not in nextIds:
-                nextIds.append(parentId)
-
-        while keepGoing:
-            parentSet = self.scanElementSourcesDirect(instanceId, nextIds)
-            nextIds = list()
-            keepGoing = False
-
-            for row in parentSet:
-                parentId = row[9]
-                childId = row[8]
-                datamap[childId] = row
-
-                if parentId in pc:
-                    if childId not in pc[parentId]:
-                        pc[parentId].append(childId)
-                else:
-                    pc[parentId] = [childId]
-                if parentId not in nextIds:
-                    nextIds.append(parentId)
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                parentSet = self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when getting source element IDs") from e
 
-                # Prevent us from looping at root
-                if parentId != "ROOT":
-                    keepGoing = True
+        for row in parentSet:
+            datamap[row[8]] = row
+            # ROOT is its own source, but not its own child
+            if row[8] != row[9]:
+                link(row[9], row[8])
 
-        datamap[parentId] = row
         return [datamap, pc]
 
     def scanElementChildrenAll(self, instanceId: str, parentIds: list) -> list:
         """Get the full set of downstream IDs which are children of the supplied set of IDs.
 
+        The whole tree below the supplied IDs is walked in a single recursive query.
+
         Args:
             instanceId (str): scan instance ID
-            parentIds (list): TBD
+            parentIds (list): IDs of the results to start from
 
         Returns:
-            list: TBD
+            list: IDs of all the results further down the discovery path
 
         Raises:
             TypeError: arg type was invalid
+            IOError: database I/O failed
 
         Note: This function is not the same as the scanElementParent* functions.
               This function returns only ids.
@@ -1689,30 +3377,102 @@ class SpiderFootDb:
         if not isinstance(parentIds, list):
             raise TypeError(f"parentIds is {type(parentIds)}; expected list()")
 
-        datamap = list()
-        keepGoing = True
-        nextIds = list()
+        hashIds = []
+        for hashId in parentIds:
+            if not hashId:
+                continue
+            if not hashId.isalnum():
+                continue
+            hashIds.append(hashId)
+
+        # UNION rather than UNION ALL visits each result once, so the walk
+        # ends even though ROOT is its own source.
+        qry = "WITH RECURSIVE descendants(hash) AS ( \
+                SELECT hash FROM {schema}.tbl_scan_results \
+                WHERE scan_instance_id = ? AND source_event_hash IN ('%s') \
+                UNION \
+                SELECT c.hash FROM {schema}.tbl_scan_results c, descendants d \
+                WHERE c.scan_instance_id = ? AND c.source_event_hash = d.hash \
+            ) \
+            SELECT hash FROM descendants" % "','".join(hashIds)
+        qvars = [instanceId, instanceId]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return [row[0] for row in self.dbh.fetchall()]
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when getting child element IDs") from e
+
+    def scanResultLineage(self, instanceId: str) -> list:
+        """Get the parent/child structure of all the results of a scan in
+        a single read, without the result data.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            list: row ID, parent row ID, hash, type and module of each result.
+                  The parent row ID is None if the parent was not stored.
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
+
+        qry = "SELECT c.rowid, s.rowid, c.hash, c.type, c.module \
+            FROM {schema}.tbl_scan_results c LEFT OUTER JOIN {schema}.tbl_scan_results s \
+            ON s.scan_instance_id = c.scan_instance_id AND s.hash = c.source_event_hash \
+            WHERE c.scan_instance_id = ?"
+
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching result lineage") from e
+
+    def scanResultData(self, instanceId: str, hashIds: list) -> list:
+        """Get the data of a set of results.
+
+        Args:
+            instanceId (str): scan instance ID
+            hashIds (list): hashes of the results
+
+        Returns:
+            list: hash and data of each result
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
 
-        nextSet = self.scanElementChildrenDirect(instanceId, parentIds)
-        for row in nextSet:
-            datamap.append(row[8])
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()") from None
 
-        for row in nextSet:
-            if row[8] not in nextIds:
-                nextIds.append(row[8])
+        if not isinstance(hashIds, list):
+            raise TypeError(f"hashIds is {type(hashIds)}; expected list()") from None
 
-        while keepGoing:
-            nextSet = self.scanElementChildrenDirect(instanceId, nextIds)
-            if nextSet is None or len(nextSet) == 0:
-                keepGoing = False
-                break
+        if not hashIds:
+            return []
 
-            for row in nextSet:
-                datamap.append(row[8])
-                nextIds = list()
-                nextIds.append(row[8])
+        qry = "SELECT hash, COALESCE(r.data, (SELECT INFLATE(b.data) FROM {schema}.tbl_scan_blob b WHERE b.hash = r.data_hash)) FROM {schema}.tbl_scan_results r \
+            WHERE scan_instance_id = ? AND hash IN (" + ','.join(['?'] * len(hashIds)) + ")"
+
+        qvars = [instanceId]
+        qvars.extend(hashIds)
 
-        return datamap
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry.format(schema=self._scanSchema(instanceId)), qvars)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when fetching result data") from e
 
     def correlationResultCreate(
         self,
@@ -1775,11 +3535,16 @@ class SpiderFootDb:
             (id, scan_instance_id, title, rule_name, rule_descr, rule_risk, rule_id, rule_logic) \
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
 
+        qrySummary = "INSERT INTO tbl_scan_summary \
+            (scan_instance_id, field, value, total) VALUES (?, 'risk', ?, 1) \
+            ON CONFLICT (scan_instance_id, field, value) DO UPDATE SET total = total + 1"
+
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, (
                     uniqueId, instanceId, correlationTitle, ruleName, ruleDescr, ruleRisk, ruleId, ruleYaml
                 ))
+                self.dbh.execute(qrySummary, (instanceId, ruleRisk))
                 self.conn.commit()
             except sqlite3.Error as e:
                 raise IOError("Unable to create correlation result in database") from e
@@ -1799,4 +3564,58 @@ class SpiderFootDb:
                 except sqlite3.Error as e:
                     raise IOError("Unable to create correlation result in database") from e
 
+            # Bump the version once the correlation is complete
+            try:
+                self.dbh.execute(self._scanVersionQuery, [instanceId])
+                self.conn.commit()
+            except sqlite3.Error as e:
+                raise IOError("Unable to create correlation result in database") from e
+
         return uniqueId
+
+    def correlationResultDelete(self, instanceId: str, correlationIds: list = None) -> bool:
+        """Delete correlation results of a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+            correlationIds (list): IDs of the correlation results to delete, or None for all of them
+
+        Returns:
+            bool: success
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if correlationIds is not None and not isinstance(correlationIds, list):
+            raise TypeError(f"correlationIds is {type(correlationIds)}; expected list()")
+
+        qry1 = "DELETE FROM tbl_scan_correlation_results_events WHERE correlation_id IN \
+            (SELECT id FROM tbl_scan_correlation_results WHERE scan_instance_id = ?"
+        qry2 = "DELETE FROM tbl_scan_correlation_results WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if correlationIds is not None:
+            if not correlationIds:
+                return True
+            qry1 += " AND id IN (" + ','.join(['?'] * len(correlationIds)) + ")"
+            qry2 += " AND id IN (" + ','.join(['?'] * len(correlationIds)) + ")"
+            qvars.extend(correlationIds)
+
+        qry1 += ")"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry1, qvars)
+                self.dbh.execute(qry2, qvars)
+                self._summarizeCorrelations(instanceId)
+                self.dbh.execute(self._scanVersionQuery, [instanceId])
+                self.conn.commit()
+            except sqlite3.Error as e:
+                raise IOError("SQL error encountered when deleting correlation results") from e
+
+        return True
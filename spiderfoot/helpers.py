@@ -496,6 +496,7 @@ class SpiderFootHelpers():
             flt = []
 
         mapping = SpiderFootHelpers.buildGraphData(data, flt)
+        rand = random.SystemRandom()
         ret: _Graph = {}
         ret['nodes'] = list()
         ret['edges'] = list()
@@ -520,8 +521,8 @@ class SpiderFootHelpers():
                 ret['nodes'].append({
                     'id': str(ncounter),
                     'label': str(dst),
-                    'x': random.SystemRandom().randint(1, 1000),
-                    'y': random.SystemRandom().randint(1, 1000),
+                    'x': rand.randint(1, 1000),
+                    'y': rand.randint(1, 1000),
                     'size': "1",
                     'color': col
                 })
@@ -537,8 +538,8 @@ class SpiderFootHelpers():
                 ret['nodes'].append({
                     'id': str(ncounter),
                     'label': str(src),
-                    'x': random.SystemRandom().randint(1, 1000),
-                    'y': random.SystemRandom().randint(1, 1000),
+                    'x': rand.randint(1, 1000),
+                    'y': rand.randint(1, 1000),
                     'size': "1",
                     'color': col
                 })
@@ -580,26 +581,9 @@ class SpiderFootHelpers():
         if not data:
             raise ValueError("data is empty")
 
-        def get_next_parent_entities(item: str, pids: typing.Optional[typing.List[str]] = None) -> typing.List[str]:
-            if not pids:
-                pids = []
-
-            ret: typing.List[str] = list()
-
-            for [parent, entity_id] in parents[item]:
-                if entity_id in pids:
-                    continue
-                if parent in entities:
-                    ret.append(parent)
-                else:
-                    pids.append(entity_id)
-                    for p in get_next_parent_entities(parent, pids):
-                        ret.append(p)
-            return ret
-
         mapping: typing.Set[typing.Tuple[str, str]] = set()
         entities: typing.Dict[str, bool] = dict()
-        parents: typing.Dict[str, typing.List[typing.List[str]]] = dict()
+        parents: typing.Dict[str, typing.List[typing.Tuple[str, str]]] = dict()
 
         for row in data:
             if len(row) != 15:
@@ -615,18 +599,79 @@ class SpiderFootHelpers():
 
             if row[1] not in parents:
                 parents[row[1]] = list()
-            parents[row[1]].append([row[2], row[8]])
+            parents[row[1]].append((row[2], row[8]))
+
+        # Nearest entities above each value that is not an entity,
+        # found by walking up through other values that are not. Every
+        # value is walked once: values in a loop share the same
+        # entities, so they are grouped (Tarjan's strongly connected
+        # components, without recursion) and each group is completed
+        # after the groups above it.
+        ancestors: typing.Dict[str, typing.FrozenSet[str]] = dict()
+
+        def get_next_parent_entities(item: str) -> typing.FrozenSet[str]:
+            if item in ancestors:
+                return ancestors[item]
+
+            index = {item: 0}
+            lowlink = {item: 0}
+            stack = [item]
+            onStack = {item}
+            work = [(item, iter(parents.get(item, ())))]
+
+            while work:
+                value, edges = work[-1]
+                for parent, _id in edges:
+                    if parent in entities or parent in ancestors:
+                        continue
+                    if parent not in index:
+                        index[parent] = lowlink[parent] = len(index)
+                        stack.append(parent)
+                        onStack.add(parent)
+                        work.append((parent, iter(parents.get(parent, ()))))
+                        break
+                    if parent in onStack:
+                        lowlink[value] = min(lowlink[value], index[parent])
+                else:
+                    work.pop()
+                    if work:
+                        child = work[-1][0]
+                        lowlink[child] = min(lowlink[child], lowlink[value])
+
+                    if lowlink[value] != index[value]:
+                        continue
+
+                    group = list()
+                    while True:
+                        member = stack.pop()
+                        onStack.discard(member)
+                        group.append(member)
+                        if member == value:
+                            break
+
+                    found: typing.Set[str] = set()
+                    for member in group:
+                        for parent, _id in parents.get(member, ()):
+                            if parent in entities:
+                                found.add(parent)
+                            elif parent in ancestors:
+                                found.update(ancestors[parent])
+
+                    groupAncestors = frozenset(found)
+                    for member in group:
+                        ancestors[member] = groupAncestors
+
+            return ancestors[item]
 
         for entity in entities:
-            for [parent, _id] in parents[entity]:
+            for parent, _id in parents[entity]:
                 if parent in entities:
                     if entity != parent:
                         # Add entity parent
                         mapping.add((entity, parent))
                 else:
                     # Check parent for entityship.
-                    next_parents = get_next_parent_entities(parent)
-                    for next_parent in next_parents:
+                    for next_parent in get_next_parent_entities(parent):
                         if entity != next_parent:
                             # Add next entity parent
                             mapping.add((entity, next_parent))
@@ -653,41 +698,43 @@ class SpiderFootHelpers():
         if not data:
             raise ValueError("data is empty")
 
-        def get_children(needle: str, haystack: typing.Dict[str, typing.Optional[typing.List[str]]]) -> typing.Optional[typing.List[Tree]]:
-            ret: typing.List[Tree] = list()
-
-            if needle not in list(haystack.keys()):
-                return None
-
-            if haystack[needle] is None:
-                return None
-
-            for c in haystack[needle]:
-                ret.append({"name": c, "children": get_children(c, haystack)})
-            return ret
-
         # Find the element with no parents, that's our root.
-        root = None
-        for k in list(data.keys()):
-            if data[k] is None:
-                continue
-
-            contender = True
-            for ck in list(data.keys()):
-                if data[ck] is None:
-                    continue
+        children = set()
+        for v in data.values():
+            if v is not None:
+                children.update(v)
 
-                if k in data[ck]:
-                    contender = False
-
-            if contender:
+        root = None
+        for k, v in data.items():
+            if v is not None and k not in children:
                 root = k
                 break
 
         if root is None:
             return {}
 
-        return {"name": root, "children": get_children(root, data)}
+        # Walk the tree depth first without recursion, so that long
+        # discovery paths do not exhaust the stack. An element that is
+        # already on the path from the root is not expanded again.
+        tree: Tree = {"name": root, "children": None}
+        path: typing.List[str] = list()
+        onPath = set()
+        stack = [(tree, 0)]
+        while stack:
+            node, depth = stack.pop()
+            while len(path) > depth:
+                onPath.discard(path.pop())
+
+            name = node["name"]
+            if data.get(name) is None or name in onPath:
+                continue
+
+            path.append(name)
+            onPath.add(name)
+            node["children"] = [{"name": c, "children": None} for c in data[name]]
+            stack.extend((child, depth + 1) for child in reversed(node["children"]))
+
+        return tree
 
     @staticmethod
     def validLEI(lei: str) -> bool:
@@ -0,0 +1,358 @@
+from array import array
+
+from spiderfoot import SpiderFootDb
+
+
+class SpiderFootLineage():
+    """Parent/child graph of the results of a scan.
+
+    The structure of the whole scan is loaded with a single read. Each
+    result is numbered, and its parent, type and module are kept in
+    compact arrays indexed by that number. Result data is only fetched
+    from the database for the results it is asked for.
+
+    Attributes:
+        dbh (SpiderFootDb): database handle
+        scanId (str): scan instance ID
+    """
+
+    # Number of results to fetch data for per query
+    _chunkSize = 5000
+
+    def __init__(self, dbh: SpiderFootDb, scanId: str) -> None:
+        """Load the lineage of a scan.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            scanId (str): scan instance ID
+
+        Raises:
+            TypeError: argument type was invalid
+        """
+        if not isinstance(dbh, SpiderFootDb):
+            raise TypeError(f"dbh is {type(dbh)}; expected SpiderFootDb()")
+
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        self.dbh = dbh
+        self.scanId = scanId
+
+        self._nodes = dict()
+        self._hashes = list()
+        self._parents = array('l')
+        self._types = array('H')
+        self._modules = array('H')
+        self._typeNames = list()
+        self._moduleNames = list()
+        self._typeIds = dict()
+        self._moduleIds = dict()
+        self._orphans = dict()
+        self._childOffsets = None
+        self._children = None
+        self._data = dict()
+        self._ancestors = dict()
+
+        self._load()
+
+    def _load(self) -> None:
+        """Read the structure of the scan from the database."""
+        rowNodes = dict()
+        parentRows = list()
+
+        for rowId, parentRowId, eventHash, eventType, module in self.dbh.scanResultLineage(self.scanId):
+            # A result stored more than once, or joined to more than
+            # one parent, is only kept the first time it is seen.
+            if rowId in rowNodes or eventHash in self._nodes:
+                continue
+
+            node = len(self._hashes)
+            rowNodes[rowId] = node
+            self._nodes[eventHash] = node
+            self._hashes.append(eventHash)
+            self._types.append(self._typeId(eventType))
+            self._modules.append(self._moduleId(module))
+            parentRows.append(parentRowId)
+
+        self._parents = array('l', (rowNodes.get(rowId, -1) for rowId in parentRows))
+
+    def _typeId(self, eventType: str) -> int:
+        """Index of an event type in the list of event type names.
+
+        Args:
+            eventType (str): event type
+
+        Returns:
+            int: event type index
+        """
+        if eventType not in self._typeIds:
+            self._typeIds[eventType] = len(self._typeNames)
+            self._typeNames.append(eventType)
+            # Memoized ancestors were resolved without this type
+            self._ancestors = dict()
+
+        return self._typeIds[eventType]
+
+    def _moduleId(self, module: str) -> int:
+        """Index of a module in the list of module names.
+
+        Args:
+            module (str): module name
+
+        Returns:
+            int: module index
+        """
+        if module not in self._moduleIds:
+            self._moduleIds[module] = len(self._moduleNames)
+            self._moduleNames.append(module)
+
+        return self._moduleIds[module]
+
+    def addResult(self, eventHash: str, parentHash: str, eventType: str, module: str, data: str) -> int:
+        """Add a result produced since the lineage was loaded, such as
+        an event of a scan which is still running.
+
+        A result whose parent is not known yet is linked to it if the
+        parent is added later.
+
+        Args:
+            eventHash (str): result hash
+            parentHash (str): hash of the result's source
+            eventType (str): event type
+            module (str): module which produced the result
+            data (str): result data, as stored
+
+        Returns:
+            int: result number, or None if the result was already known
+        """
+        if eventHash in self._nodes:
+            return None
+
+        node = len(self._hashes)
+        self._nodes[eventHash] = node
+        self._hashes.append(eventHash)
+        self._types.append(self._typeId(eventType))
+        self._modules.append(self._moduleId(module))
+        self._data[node] = data
+
+        parent = self._nodes.get(parentHash, -1)
+        self._parents.append(parent)
+        if parent < 0:
+            self._orphans.setdefault(parentHash, list()).append(node)
+
+        adopted = self._orphans.pop(eventHash, None)
+        if adopted:
+            for child in adopted:
+                self._parents[child] = node
+            self._ancestors = dict()
+
+        self._childOffsets = None
+        self._children = None
+
+        return node
+
+    def orphans(self, eventHash: str) -> list:
+        """Results added whose parent has not been seen yet.
+
+        Args:
+            eventHash (str): hash of the missing parent
+
+        Returns:
+            list: result numbers waiting for the parent
+        """
+        return list(self._orphans.get(eventHash, list()))
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def node(self, eventHash: str) -> int:
+        """Number of a result.
+
+        Args:
+            eventHash (str): result hash
+
+        Returns:
+            int: result number, or None if the result is not part of the scan
+        """
+        return self._nodes.get(eventHash)
+
+    def hash(self, node: int) -> str:  # noqa: A003
+        """Hash of a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            str: result hash
+        """
+        return self._hashes[node]
+
+    def eventType(self, node: int) -> str:
+        """Event type of a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            str: event type
+        """
+        return self._typeNames[self._types[node]]
+
+    def module(self, node: int) -> str:
+        """Module which produced a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            str: module name
+        """
+        return self._moduleNames[self._modules[node]]
+
+    def parent(self, node: int) -> int:
+        """Parent of a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            int: parent result number, or -1 if the parent was not stored
+        """
+        return self._parents[node]
+
+    def children(self, node: int) -> list:
+        """Children of a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            list: child result numbers
+        """
+        if self._childOffsets is None:
+            self._buildChildren()
+
+        return list(self._children[self._childOffsets[node]:self._childOffsets[node + 1]])
+
+    def _buildChildren(self) -> None:
+        """Index the children of each result, grouped by parent."""
+        offsets = array('l', [0] * (len(self._hashes) + 1))
+        for parent in self._parents:
+            if parent >= 0:
+                offsets[parent + 1] += 1
+
+        for i in range(len(self._hashes)):
+            offsets[i + 1] += offsets[i]
+
+        children = array('l', [0] * offsets[-1])
+        fill = array('l', offsets)
+        for child, parent in enumerate(self._parents):
+            if parent < 0:
+                continue
+            children[fill[parent]] = child
+            fill[parent] += 1
+
+        self._childOffsets = offsets
+        self._children = children
+
+    def fetchData(self, nodes: list) -> None:
+        """Fetch the data of a set of results from the database, in as
+        few queries as possible.
+
+        Args:
+            nodes (list): result numbers
+        """
+        missing = [self._hashes[n] for n in set(nodes) if n not in self._data]
+
+        for i in range(0, len(missing), self._chunkSize):
+            for eventHash, data in self.dbh.scanResultData(self.scanId, missing[i:i + self._chunkSize]):
+                node = self._nodes.get(eventHash)
+                if node is not None:
+                    self._data[node] = data
+
+    def data(self, node: int) -> str:
+        """Data of a result.
+
+        Args:
+            node (int): result number
+
+        Returns:
+            str: result data
+        """
+        if node not in self._data:
+            self.fetchData([node])
+
+        return self._data.get(node)
+
+    def nearestAncestor(self, node: int, eventTypes: set) -> int:
+        """Closest result up the discovery path of a result, not
+        including the result itself, whose event type is one of those
+        specified. Answers are memoized per set of event types, so
+        results sharing part of their discovery path walk it once.
+
+        Args:
+            node (int): result number
+            eventTypes (set): event types to look for
+
+        Returns:
+            int: ancestor result number, or -1 if there is none
+        """
+        key = frozenset(eventTypes)
+        if key not in self._ancestors:
+            wanted = set()
+            for typeId, typeName in enumerate(self._typeNames):
+                if typeName in key:
+                    wanted.add(typeId)
+            self._ancestors[key] = (wanted, dict())
+
+        wanted, memo = self._ancestors[key]
+
+        # Walk up until a result with a known answer, or a result of
+        # one of the wanted types, is found.
+        path = list()
+        seen = set()
+        current = node
+        found = -1
+        while True:
+            if current in memo:
+                found = memo[current]
+                break
+
+            parent = self._parents[current]
+            if parent < 0 or current in seen:
+                break
+
+            path.append(current)
+            seen.add(current)
+
+            if self._types[parent] in wanted:
+                found = parent
+                break
+
+            current = parent
+
+        for n in path:
+            memo[n] = found
+
+        return found
+
+    def discoveryPaths(self, nodes: list) -> dict:
+        """Parents of a set of results and of every result up their
+        discovery paths. Paths shared by several results are walked once.
+
+        Args:
+            nodes (list): result numbers
+
+        Returns:
+            dict: parent result number of each result on the paths, in the
+                  order they were reached. A parent of -1 was not stored.
+        """
+        parents = dict()
+        for node in nodes:
+            current = node
+            while current >= 0 and current not in parents:
+                parent = self._parents[current]
+                parents[current] = parent
+                current = parent
+
+        return parents
@@ -1,7 +1,9 @@
 import atexit
 import logging
 import sys
+import threading
 import time
+import weakref
 from contextlib import suppress
 from logging.handlers import QueueHandler, QueueListener
 
@@ -13,8 +15,21 @@ class SpiderFootSqliteLogHandler(logging.Handler):
 
     This ensure all sqlite logging is done from a single
     process and a single database handle.
+
+    Records are buffered, and written to the database by a thread of
+    its own, either once a batch is full or once the oldest record
+    buffered has waited for flushInterval seconds, so that the
+    listener reading the logging queue never waits on the database.
+    If the database falls behind, debug records are dropped once
+    maxBuffered records are waiting; other records are always kept.
     """
 
+    # Seconds a record may wait in the buffer before it is written
+    flushInterval = 1.0
+
+    # Handlers of this process, for logStats()
+    instances = weakref.WeakSet()
+
     def __init__(self, opts: dict) -> None:
         """TBD.
 
@@ -25,11 +40,19 @@ class SpiderFootSqliteLogHandler(logging.Handler):
         self.dbh = None
         self.batch = []
         if self.opts.get('_debug', False):
-            self.batch_size = 100
+            self.batch_size = 1000
         else:
-            self.batch_size = 5
-        self.shutdown_hook = False
+            self.batch_size = 100
+        self.maxBuffered = self.batch_size * 50
+        self.written = 0
+        self.dropped = 0
+        self.lag = 0.0
+        self.maxLag = 0.0
+        self._ready = threading.Condition()
+        self._writer = None
+        self._stopping = False
         super().__init__()
+        self.instances.add(self)
 
     def emit(self, record: 'logging.LogRecord') -> None:
         """TBD
@@ -37,34 +60,155 @@ class SpiderFootSqliteLogHandler(logging.Handler):
         Args:
             record (logging.LogRecord): Log event record
         """
-        if not self.shutdown_hook:
-            atexit.register(self.logBatch)
-            self.shutdown_hook = True
         scanId = getattr(record, "scanId", None)
         component = getattr(record, "module", None)
-        if scanId:
-            level = ("STATUS" if record.levelname == "INFO" else record.levelname)
-            self.batch.append((scanId, level, record.getMessage(), component, time.time()))
+        if not scanId:
+            return
+
+        level = ("STATUS" if record.levelname == "INFO" else record.levelname)
+        row = (scanId, level, record.getMessage(), component, record.created)
+
+        with self._ready:
+            if self._stopping:
+                # Closed: write what is left straight away
+                self.logBatch([row])
+                return
+
+            if len(self.batch) >= self.maxBuffered and record.levelno < logging.INFO:
+                self.dropped += 1
+                return
+
+            self.batch.append(row)
+
+            if self._writer is None:
+                self._writer = threading.Thread(name="SpiderFootSqliteLogWriter", target=self._write, daemon=True)
+                self._writer.start()
+
             if len(self.batch) >= self.batch_size:
-                self.logBatch()
+                self._ready.notify()
+
+    def _write(self) -> None:
+        """Write buffered records to the database until the handler is closed."""
+        while True:
+            with self._ready:
+                while not self._stopping and len(self.batch) < self.batch_size:
+                    if not self.batch:
+                        self._ready.wait()
+                        continue
+
+                    wait = self.batch[0][4] + self.flushInterval - time.time()
+                    if wait <= 0:
+                        break
+                    self._ready.wait(wait)
+
+                batch = self.batch
+                self.batch = []
+                stopping = self._stopping
+
+            if batch:
+                self.logBatch(batch)
+
+            if stopping:
+                return
+
+    def logBatch(self, batch: list) -> None:
+        """Write a batch of records to the database.
+
+        Args:
+            batch (list): records, as for SpiderFootDb.scanLogEvents()
+        """
+        try:
+            if self.dbh is None:
+                # Create a new database handle when the first log batch is processed
+                self.makeDbh()
+            logResult = self.dbh.scanLogEvents(batch)
+            if logResult is False:
+                # Try to recreate database handle if insert failed
+                self.makeDbh()
+                logResult = self.dbh.scanLogEvents(batch)
+        except Exception as e:
+            print(f"[-] Unable to log scan events to database: {e}", file=sys.stderr)
+            logResult = False
 
-    def logBatch(self):
-        batch = self.batch
-        self.batch = []
-        if self.dbh is None:
-            # Create a new database handle when the first log batch is processed
-            self.makeDbh()
-        logResult = self.dbh.scanLogEvents(batch)
         if logResult is False:
-            # Try to recreate database handle if insert failed
-            self.makeDbh()
-            self.dbh.scanLogEvents(batch)
+            self.dropped += len(batch)
+            return
+
+        self.written += len(batch)
+        self.lag = time.time() - min(row[4] for row in batch)
+        self.maxLag = max(self.maxLag, self.lag)
+
+    def flush(self) -> None:
+        """Write the records buffered so far, without waiting for the batch to fill."""
+        with self._ready:
+            batch = self.batch
+            self.batch = []
+
+        if batch:
+            self.logBatch(batch)
+
+    def close(self) -> None:
+        """Write the records buffered and stop the writer thread."""
+        with self._ready:
+            self._stopping = True
+            self._ready.notify()
+            writer = self._writer
+
+        if writer is not None:
+            writer.join()
+
+        self.flush()
+        super().close()
+
+    def stats(self) -> dict:
+        """Counters of the records handled so far.
+
+        Returns:
+            dict: records buffered, written and dropped, and the seconds
+                the last and slowest batches waited before being written
+        """
+        with self._ready:
+            buffered = len(self.batch)
+
+        return {
+            'buffered': buffered,
+            'written': self.written,
+            'dropped': self.dropped,
+            'lag': self.lag,
+            'maxLag': self.maxLag
+        }
 
     def makeDbh(self) -> None:
         """TBD."""
         self.dbh = SpiderFootDb(self.opts)
 
 
+def logStats() -> dict:
+    """Counters of the scan log records written to the database by this
+    process, as for SpiderFootSqliteLogHandler.stats().
+
+    Returns:
+        dict: records buffered, written and dropped, and the seconds the
+            last and slowest batches waited before being written
+    """
+    stats = {
+        'buffered': 0,
+        'written': 0,
+        'dropped': 0,
+        'lag': 0.0,
+        'maxLag': 0.0
+    }
+
+    for handler in list(SpiderFootSqliteLogHandler.instances):
+        handlerStats = handler.stats()
+        for key in ['buffered', 'written', 'dropped']:
+            stats[key] += handlerStats[key]
+        for key in ['lag', 'maxLag']:
+            stats[key] = max(stats[key], handlerStats[key])
+
+    return stats
+
+
 def logListenerSetup(loggingQueue, opts: dict = None) -> 'logging.handlers.QueueListener':
     """Create and start a SpiderFoot log listener in its own thread.
 
@@ -133,11 +277,16 @@ def logListenerSetup(loggingQueue, opts: dict = None) -> 'logging.handlers.Queue
     return spiderFootLogListener
 
 
-def logWorkerSetup(loggingQueue) -> 'logging.Logger':
+def logWorkerSetup(loggingQueue, opts: dict = None) -> 'logging.Logger':
     """Root SpiderFoot logger.
 
+    Records below the level set by the SpiderFoot config are discarded
+    here, in the process which logs them, rather than sent through the
+    queue only to be discarded by the listener.
+
     Args:
         loggingQueue (Queue): TBD
+        opts (dict): SpiderFoot config
 
     Returns:
         logging.Logger: Logger
@@ -148,6 +297,8 @@ def logWorkerSetup(loggingQueue) -> 'logging.Logger':
         log.setLevel(logging.DEBUG)
         queue_handler = QueueHandler(loggingQueue)
         log.addHandler(queue_handler)
+    if opts is not None:
+        log.setLevel(logging.DEBUG if opts.get("_debug", False) else logging.INFO)
     return log
 
 
@@ -159,3 +310,9 @@ def stop_listener(listener: 'logging.handlers.QueueListener') -> None:
     """
     with suppress(Exception):
         listener.stop()
+
+    # Write the scan logs still buffered
+    for handler in listener.handlers:
+        if isinstance(handler, SpiderFootSqliteLogHandler):
+            with suppress(Exception):
+                handler.close()
@@ -0,0 +1,222 @@
+import contextlib
+import queue
+import threading
+
+from spiderfoot import SpiderFootDb
+
+
+class SpiderFootScanPublisher():
+    """Publishes the progress of running scans to the pages watching them.
+
+    Scans run in processes of their own and write straight to the
+    database, so their progress is read from there: once per interval
+    for each scan being watched, however many pages watch it. A single
+    query tells whether anything changed; the status, result summary,
+    new results and new log lines are only read when they did.
+
+    Each subscriber gets a queue of (message, data) tuples:
+
+    - ('status', (scan instance row, correlation risk summary))
+    - ('summary', result summary by type, as for scanResultSummary())
+    - ('results', results stored since the last message, as for scanResultsSince())
+    - ('log', log lines written since the last message, oldest first)
+    - ('errors', number of errors logged)
+    - ('end', status) once the scan is no longer running
+
+    Attributes:
+        opts (dict): SpiderFoot config
+    """
+
+    # Seconds between checks for changes
+    interval = 1.0
+
+    # Most results read per check
+    resultsLimit = 1000
+
+    # Most messages waiting for a subscriber before more are dropped
+    queueSize = 1000
+
+    finishedStatuses = ["FINISHED", "ABORTED", "ERROR-FAILED"]
+
+    def __init__(self, opts: dict) -> None:
+        """Create a publisher.
+
+        Args:
+            opts (dict): SpiderFoot config
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(opts, dict):
+            raise TypeError(f"opts is {type(opts)}; expected dict()")
+
+        self.opts = opts
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._scans = dict()
+        self._thread = None
+
+    def subscribe(self, scanId: str, results: bool = False) -> queue.Queue:
+        """Start watching a scan. The latest status, summary and number
+        of errors, if known, are queued straight away.
+
+        Args:
+            scanId (str): scan instance ID
+            results (bool): also publish each new result
+
+        Returns:
+            queue.Queue: messages for this subscriber
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        subscriber = queue.Queue(self.queueSize)
+
+        with self._lock:
+            scan = self._scans.get(scanId)
+            if scan is None:
+                scan = self._scans[scanId] = {
+                    'subscribers': dict(),
+                    'progress': None,
+                    'resultCursor': None,
+                    'logCursor': None,
+                    'errors': None,
+                    'latest': dict()
+                }
+
+            scan['subscribers'][subscriber] = results
+            for message in ['status', 'summary', 'errors']:
+                if message in scan['latest']:
+                    subscriber.put_nowait((message, scan['latest'][message]))
+
+            if self._thread is None:
+                self._thread = threading.Thread(name="SpiderFootScanPublisher", target=self._run, daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+        return subscriber
+
+    def unsubscribe(self, scanId: str, subscriber: queue.Queue) -> None:
+        """Stop watching a scan.
+
+        Args:
+            scanId (str): scan instance ID
+            subscriber (queue.Queue): queue returned by subscribe()
+        """
+        with self._lock:
+            scan = self._scans.get(scanId)
+            if scan is None:
+                return
+
+            scan['subscribers'].pop(subscriber, None)
+            if not scan['subscribers']:
+                del self._scans[scanId]
+
+    def _publish(self, scanId: str, message: str, data) -> None:
+        """Queue a message for the subscribers of a scan.
+
+        Args:
+            scanId (str): scan instance ID
+            message (str): message type
+            data: message content
+        """
+        with self._lock:
+            scan = self._scans.get(scanId)
+            if scan is None:
+                return
+
+            if message in ['status', 'summary', 'errors']:
+                scan['latest'][message] = data
+
+            for subscriber, results in scan['subscribers'].items():
+                if message == 'results' and not results:
+                    continue
+                # A page that stopped reading catches up on the next
+                # status, summary or error count.
+                with contextlib.suppress(queue.Full):
+                    subscriber.put_nowait((message, data))
+
+    def _run(self) -> None:
+        """Check the scans being watched for changes until there are none left."""
+        dbh = None
+
+        while True:
+            with self._lock:
+                if not self._scans:
+                    self._thread = None
+                    return
+                scanIds = list(self._scans)
+
+            if dbh is None:
+                dbh = SpiderFootDb(self.opts)
+
+            for scanId in scanIds:
+                try:
+                    self.poll(dbh, scanId)
+                except Exception:
+                    # Try again on the next check
+                    dbh = None
+                    break
+
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def poll(self, dbh: SpiderFootDb, scanId: str) -> None:
+        """Publish what changed in a scan since it was last checked.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            scanId (str): scan instance ID
+        """
+        with self._lock:
+            scan = self._scans.get(scanId)
+            if scan is None:
+                return
+            wantsResults = any(scan['subscribers'].values())
+
+        progress = dbh.scanProgress(scanId)
+        if progress is None:
+            self._publish(scanId, 'end', None)
+            return
+
+        status, resultTotal, correlationTotal, lastResult, lastLog = progress
+        previous = scan['progress'] or (None, None, None, None, None)
+        scan['progress'] = progress
+
+        if (status, correlationTotal) != (previous[0], previous[2]):
+            self._publish(scanId, 'status', (dbh.scanInstanceGet(scanId), dbh.scanCorrelationSummary(scanId, by="risk")))
+
+        if resultTotal != previous[1]:
+            self._publish(scanId, 'summary', dbh.scanResultSummary(scanId, "type"))
+
+        # Only results and logs stored from now on are published
+        if scan['resultCursor'] is None:
+            scan['resultCursor'] = lastResult
+        elif wantsResults and lastResult > scan['resultCursor']:
+            rows = dbh.scanResultsSince(scanId, scan['resultCursor'], self.resultsLimit)
+            if rows:
+                scan['resultCursor'] = rows[-1][0]
+                self._publish(scanId, 'results', rows)
+        else:
+            scan['resultCursor'] = max(scan['resultCursor'], lastResult)
+
+        if scan['logCursor'] is None:
+            scan['logCursor'] = lastLog
+            scan['errors'] = len(dbh.scanErrors(scanId))
+            self._publish(scanId, 'errors', scan['errors'])
+        elif lastLog > scan['logCursor']:
+            rows = dbh.scanLogs(scanId, None, scan['logCursor'], True)
+            if rows:
+                scan['logCursor'] = max(row[4] for row in rows)
+                self._publish(scanId, 'log', rows)
+
+                errors = sum(1 for row in rows if row[2] == "ERROR")
+                if errors:
+                    scan['errors'] += errors
+                    self._publish(scanId, 'errors', scan['errors'])
+
+        if status in self.finishedStatuses:
+            self._publish(scanId, 'end', status)
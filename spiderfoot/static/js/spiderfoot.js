@@ -136,6 +136,32 @@ sf.fetchData = function (url, postData, postFunc) {
   });
 };
 
+// Fetch data about a scan with GET, so that the browser can keep it and
+// ask again only whether it changed (the scan's ETag)
+sf.fetchScanData = function (url, getData, postFunc) {
+  var req = $.ajax({
+    type: "GET",
+    url: url,
+    data: getData,
+    dataType: "json",
+  });
+
+  req.done(postFunc);
+  req.fail(function (hr, status) {
+      alertify.error('<i class="glyphicon glyphicon-minus-sign"></i> <b>Error</b><br/>' + status);
+  });
+};
+
+// Rows per page when reading results a page at a time
+sf.pageSize = 500;
+
+// Fetch the page of rows after cursor (null for the first page) from
+// an endpoint that pages its results
+sf.fetchPage = function (url, postData, cursor, postFunc) {
+  var pageData = $.extend({}, postData, { pageSize: sf.pageSize, cursor: cursor || "" });
+  sf.fetchScanData(url, pageData, postFunc);
+};
+
 /*
 sf.simpleTable = function(id, data, cols, linkcol=null, linkstring=null, sortable=true, rowfunc=null) {
 	var table = "<table id='" + id + "' ";
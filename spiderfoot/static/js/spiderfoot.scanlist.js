@@ -229,6 +229,9 @@ function showlisttable(types, filter, data) {
         } else {
             table += "<a rel='tooltip' title='Delete Scan' href='javascript:deleteScan(\"" + data[i][0] + "\");'><i class='glyphicon glyphicon-trash text-muted'></i></a>";
             table += "&nbsp;&nbsp;<a rel='tooltip' title='Re-run Scan' href=" + docroot + "/rerunscan?id=" + data[i][0] + "><i class='glyphicon glyphicon-repeat text-muted'></i></a>";
+            if (data[i][6] == "FINISHED" || data[i][6] == "ABORTED" || data[i][6] == "ERROR-FAILED") {
+                table += "&nbsp;&nbsp;<a rel='tooltip' title='Download Archive' href=" + docroot + "/scanarchive?id=" + data[i][0] + "><i class='glyphicon glyphicon-compressed text-muted'></i></a>";
+            }
         }
         table += "&nbsp;&nbsp;<a rel='tooltip' title='Clone Scan' href=" + docroot + "/clonescan?id=" + data[i][0] + "><i class='glyphicon glyphicon-plus-sign text-muted'></i></a>";
         table += "</td></tr>";
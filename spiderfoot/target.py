@@ -27,6 +27,9 @@ class SpiderFootTarget():
     _targetValue: str
     _targetAliases: typing.List[TargetAlias]
 
+    # Upper bound on the number of memoized matches() verdicts
+    _maxVerdicts = 100000
+
     def __init__(self, targetValue: str, typeName: str) -> None:
         """Initialize SpiderFoot target.
 
@@ -34,6 +37,9 @@ class SpiderFootTarget():
             targetValue (str): target value
             typeName (str): target type
         """
+        self._index = None
+        self._networkIndex = None
+        self._verdicts = dict()
         self.targetType = typeName
         self.targetValue = targetValue
         self.targetAliases = list()
@@ -51,6 +57,7 @@ class SpiderFootTarget():
             raise ValueError(f"targetType value is {targetType}; expected {self._validTypes}")
 
         self._targetType = targetType
+        self._invalidateIndex()
 
     @property
     def targetValue(self) -> str:
@@ -64,6 +71,7 @@ class SpiderFootTarget():
             raise ValueError("targetValue value is blank")
 
         self._targetValue = targetValue
+        self._invalidateIndex()
 
     @property
     def targetAliases(self) -> typing.List[TargetAlias]:
@@ -72,6 +80,8 @@ class SpiderFootTarget():
     @targetAliases.setter
     def targetAliases(self, value: typing.List[TargetAlias]) -> None:
         self._targetAliases = value
+        self._aliasKeys = set((alias['type'], alias['value']) for alias in value)
+        self._invalidateIndex()
 
     def setAlias(self, value: str, typeName: str) -> None:
         """Specify other hostnames, IPs, etc. that are aliases for this target.
@@ -99,10 +109,87 @@ class SpiderFootTarget():
 
         alias: TargetAlias = {'type': typeName, 'value': value.lower()}
 
-        if alias in self.targetAliases:
+        if (alias['type'], alias['value']) in self._aliasKeys:
             return
 
         self.targetAliases.append(alias)
+        self._aliasKeys.add((alias['type'], alias['value']))
+        self._invalidateIndex()
+
+    def _invalidateIndex(self) -> None:
+        """Discard the index and memoized verdicts used by matches()."""
+        self._index = None
+        self._networkIndex = None
+        self._verdicts = dict()
+
+    def _buildIndex(self) -> tuple:
+        """Index the target names and addresses for matches().
+
+        Names are stored in a trie keyed on their labels in reverse order,
+        so that "www.example.com" is stored as com -> example -> www. A
+        node holding the None key is the end of a target name.
+
+        Returns:
+            tuple: name trie and set of addresses
+        """
+        # An index built while the target changes is used for this match
+        # only, not kept
+        verdicts = self._verdicts
+
+        nameIndex: dict = dict()
+        for name in self.getNames():
+            node = nameIndex
+            for label in reversed(name.split(".")):
+                node = node.setdefault(label, dict())
+            node[None] = True
+
+        index = (nameIndex, set(self.getAddresses()))
+        if self._verdicts is verdicts:
+            self._index = index
+        return index
+
+    def _getNetworkIndex(self) -> typing.Optional[tuple]:
+        """Get the IP version and first and last address of the target netblock.
+
+        Returns:
+            tuple: IP version, first address and last address as integers,
+                or an empty tuple if the target value is not a valid network.
+        """
+        if self._networkIndex is None:
+            try:
+                network = netaddr.IPNetwork(self.targetValue)
+                self._networkIndex = (network.version, network.first, network.last)
+            except netaddr.AddrFormatError:
+                self._networkIndex = tuple()
+        return self._networkIndex
+
+    def _matchesName(self, nameIndex: dict, value: str, includeParents: bool, includeChildren: bool) -> bool:
+        """Check whether a value is equal to, a parent of, or a child of a target name.
+
+        Args:
+            nameIndex (dict): trie of target names
+            value (str): Internet name
+            includeParents (bool): match parent domains of target names
+            includeChildren (bool): match children of target names
+
+        Returns:
+            bool: whether the value matches a target name
+        """
+        labels = value.split(".")
+        node = nameIndex
+        for i, label in enumerate(reversed(labels)):
+            node = node.get(label)
+            if node is None:
+                return False
+            # a target name is a parent domain of the value
+            if includeChildren and None in node and i < len(labels) - 1:
+                return True
+
+        if None in node:
+            return True
+
+        # a target name is a child of the value
+        return includeParents and len(node) > 0
 
     def _getEquivalents(self, typeName: str) -> typing.List[str]:
         """Get all aliases of the specfied target data type.
@@ -192,32 +279,62 @@ class SpiderFootTarget():
         if self.targetType in ["HUMAN_NAME", "PHONE_NUMBER", "USERNAME", "BITCOIN_ADDRESS"]:
             return True
 
+        # The verdicts are read once, so that a verdict reached before an
+        # alias is set goes to the verdicts discarded by setAlias()
+        verdicts = self._verdicts
+
+        key = (value, includeParents, includeChildren)
+        verdict = verdicts.get(key)
+        if verdict is not None:
+            return verdict
+
+        index = self._index
+        if index is None:
+            index = self._buildIndex()
+
+        verdict = self._matchesIndex(index, value, includeParents, includeChildren)
+
+        if len(verdicts) >= self._maxVerdicts:
+            verdicts.clear()
+        verdicts[key] = verdict
+
+        return verdict
+
+    def _matchesIndex(self, index: tuple, value: str, includeParents: bool, includeChildren: bool) -> bool:
+        """Check the supplied value against the target index.
+
+        Args:
+            index (tuple): name trie and set of addresses
+            value (str): can be an Internet Name (hostname, subnet, domain) or an IP address.
+            includeParents (bool): match parent domains of the target
+            includeChildren (bool): match children of the target
+
+        Returns:
+            bool: whether the value matches the target
+        """
         # TODO: review handling of other potential self.targetType target types:
         # "INTERNET_NAME", "EMAILADDR", "BGP_AS_OWNER"
 
+        nameIndex, addresses = index
+
         # For IP addreses, check if it is an alias of the target or within the target's subnet.
         if netaddr.valid_ipv4(value) or netaddr.valid_ipv6(value):
-            if value in self.getAddresses():
+            if value in addresses:
                 return True
 
             if self.targetType in ["IP_ADDRESS", "IPV6_ADDRESS", "NETBLOCK_OWNER", "NETBLOCKV6_OWNER"]:
-                try:
-                    if netaddr.IPAddress(value) in netaddr.IPNetwork(self.targetValue):
-                        return True
-                except netaddr.AddrFormatError:
+                network = self._getNetworkIndex()
+                if not network:
                     return False
 
+                address = netaddr.IPAddress(value)
+                version, first, last = network
+                if address.version == version and first <= int(address) <= last:
+                    return True
+
             return False
 
         # For everything else, check if the value is within or equal to target names
-        for name in self.getNames():
-            if value == name:
-                return True
-            if includeParents and name.endswith("." + value):
-                return True
-            if includeChildren and value.endswith("." + name):
-                return True
-
-        return False
+        return self._matchesName(nameIndex, value, includeParents, includeChildren)
 
 # end of SpiderFootTarget class
@@ -47,10 +47,14 @@ class SpiderFootThreadPool:
         self.inputThread = None
         self.inputQueues = dict()
         self.outputQueues = dict()
+        self.pendingTasks = dict()
         self._stop = False
         self._lock = threading.Lock()
 
     def start(self) -> None:
+        # map() may be called on a pool which has already been started
+        if any(t is not None for t in self.pool):
+            return
         self.log.debug(f'Starting thread pool "{self.name}" with {self.threads:,} threads')
         for i in range(self.threads):
             t = ThreadPoolWorker(pool=self, name=f"{self.name}_worker_{i + 1}")
@@ -94,11 +98,12 @@ class SpiderFootThreadPool:
         self.stop = True
         # make sure input queues are empty
         with self._lock:
-            inputQueues = list(self.inputQueues.values())
-        for q in inputQueues:
+            inputQueues = list(self.inputQueues.items())
+        for taskName, q in inputQueues:
             with suppress(Exception):
                 while 1:
                     q.get_nowait()
+                    self.taskDone(taskName)
             with suppress(Exception):
                 q.close()
         # make sure output queues are empty
@@ -130,8 +135,19 @@ class SpiderFootThreadPool:
             sleep(.01)
             continue
         self.log.debug(f"Submitting function \"{callback.__name__}\" from module \"{taskName}\" to thread pool \"{self.name}\"")
+        with self._lock:
+            self.pendingTasks[taskName] = self.pendingTasks.get(taskName, 0) + 1
         self.inputQueue(taskName).put((callback, args, kwargs))
 
+    def taskDone(self, taskName: str) -> None:
+        """Mark a previously submitted function call as completed.
+
+        Args:
+            taskName (str): Name of task
+        """
+        with self._lock:
+            self.pendingTasks[taskName] -= 1
+
     def countQueuedTasks(self, taskName: str) -> int:
         """For the specified task, returns the number of queued function calls
         plus the number of functions which are currently executing
@@ -142,15 +158,11 @@ class SpiderFootThreadPool:
         Returns:
             int: the number of queued function calls plus the number of functions which are currently executing
         """
-        queuedTasks = 0
-        with suppress(Exception):
-            queuedTasks += self.inputQueues[taskName].qsize()
-        runningTasks = 0
-        for t in self.pool:
-            with suppress(Exception):
-                if t.taskName == taskName:
-                    runningTasks += 1
-        return queuedTasks + runningTasks
+        # Tasks are counted from submission until their result has been
+        # queued, so a task is never invisible while moving between the
+        # input queue and a worker.
+        with self._lock:
+            return self.pendingTasks.get(taskName, 0)
 
     def inputQueue(self, taskName: str = "default") -> str:
         try:
@@ -187,16 +199,19 @@ class SpiderFootThreadPool:
 
     def results(self, taskName: str = "default", wait: bool = False) -> None:
         while 1:
+            # check before draining so that results put by the last
+            # running task are still collected below
+            finished = not wait or (self.countQueuedTasks(taskName) == 0 and not self.feeding)
             result = False
             with suppress(Exception):
                 while 1:
                     yield self.outputQueue(taskName).get_nowait()
                     result = True
-            if self.countQueuedTasks(taskName) == 0 or not wait:
+            if finished:
                 break
             if not result:
                 # sleep briefly to save CPU
-                sleep(.1)
+                sleep(.05)
 
     def feedQueue(self, callback, iterable, args, kwargs) -> None:
         for i in iterable:
@@ -204,19 +219,26 @@ class SpiderFootThreadPool:
                 break
             self.submit(callback, i, *args, **kwargs)
 
+    @property
+    def feeding(self) -> bool:
+        """Whether map() is still submitting calls from its iterable.
+
+        Returns:
+            bool: input thread is alive
+        """
+        try:
+            return self.inputThread.is_alive()
+        except AttributeError:
+            return False
+
     @property
     def finished(self):
         if self.stop:
             return True
 
         finishedThreads = [not t.busy for t in self.pool if t is not None]
-        try:
-            inputThreadAlive = self.inputThread.is_alive()
-        except AttributeError:
-            inputThreadAlive = False
-
         inputQueuesEmpty = [q.empty() for q in self.inputQueues.values()]
-        return not inputThreadAlive and all(inputQueuesEmpty) and all(finishedThreads)
+        return not self.feeding and all(inputQueuesEmpty) and all(finishedThreads)
 
     def __enter__(self):
         return self
@@ -257,9 +279,11 @@ class ThreadPoolWorker(threading.Thread):
                     except Exception:  # noqa: B902
                         import traceback
                         self.log.error(f'Error in thread worker {self.name}: {traceback.format_exc()}')
+                        self.pool.taskDone(self.taskName)
                         break
                     if saveResult:
                         self.pool.outputQueue(self.taskName).put(result)
+                    self.pool.taskDone(self.taskName)
                 except queue.Empty:
                     self.busy = False
                 finally:
@@ -1,11 +1,12 @@
 # test_sfwebui.py
 import os
 import unittest
+import uuid
 
 import cherrypy
 from cherrypy.test import helper
 
-from spiderfoot import SpiderFootHelpers
+from spiderfoot import SpiderFootDb, SpiderFootHelpers
 from sfwebui import SpiderFootWebUi
 
 
@@ -77,6 +78,48 @@ class TestSpiderFootWebUiRoutes(helper.CPWebCase):
     def test_scanexportjsonmulti(self):
         self.getPage("/scanexportjsonmulti?ids=doesnotexist")
         self.assertStatus('200 OK')
+        self.assertBody("[]")
+
+    def test_scanexportjsonmulti_ndjson(self):
+        self.getPage("/scanexportjsonmulti?ids=doesnotexist&filetype=ndjson")
+        self.assertStatus('200 OK')
+        self.assertHeader("Content-Type", "application/x-ndjson; charset=utf-8")
+
+    def test_scanarchive_invalid_scan_id_returns_200(self):
+        self.getPage("/scanarchive?id=doesnotexist")
+        self.assertStatus('200 OK')
+        self.assertInBody("Scan ID not found.")
+
+    def test_logstats_returns_200(self):
+        self.getPage("/logstats")
+        self.assertStatus('200 OK')
+        self.assertInBody('"dropped"')
+
+    def test_scanevents_invalid_scan_id_ends_stream(self):
+        self.getPage("/scanevents?id=doesnotexist")
+        self.assertStatus('200 OK')
+        self.assertInBody("event: end")
+        self.assertIn('text/event-stream', dict(self.headers)['Content-Type'])
+
+    def test_scanevents_past_max_event_streams_returns_503(self):
+        webui = cherrypy.tree.apps[''].root
+        self.getPage("/scanevents?id=doesnotexist")
+        self.assertStatus('200 OK')
+
+        # Streams which ended are given up
+        streams = list()
+        while webui.eventStreams.acquire(blocking=False):
+            streams.append(None)
+        try:
+            self.assertEqual(webui.maxEventStreams, len(streams))
+
+            self.getPage("/scanevents?id=doesnotexist")
+            self.assertStatus(503)
+            self.assertInBody("retry: ")
+            self.assertNotInBody("event: end")
+        finally:
+            for _ in streams:
+                webui.eventStreams.release()
 
     def test_scanviz(self):
         self.getPage("/scanviz?id=doesnotexist")
@@ -235,6 +278,34 @@ class TestSpiderFootWebUiRoutes(helper.CPWebCase):
         self.getPage("/scaneventresults?id=doesnotexist&eventType=anything")
         self.assertStatus('200 OK')
 
+    def test_scaneventresults_paged_invalid_scan_returns_200(self):
+        self.getPage("/scaneventresults?id=doesnotexist&eventType=anything&pageSize=10")
+        self.assertStatus('200 OK')
+        self.assertInBody('"rows"')
+
+    def test_scaneventresults_invalid_page_size_returns_400(self):
+        self.getPage("/scaneventresults?id=doesnotexist&eventType=anything&pageSize=0")
+        self.assertStatus('400 Bad Request')
+
+    def test_scansummary_unchanged_scan_returns_304(self):
+        sfdb = SpiderFootDb({'__database': f"{SpiderFootHelpers.dataPath()}/spiderfoot.test.db"})
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'etag test', 'example.com')
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+
+        self.getPage(f"/scansummary?id={scan_id}&by=type")
+        self.assertStatus('200 OK')
+        etag = self.assertHeader('ETag')
+
+        self.getPage(f"/scansummary?id={scan_id}&by=type", headers=[('If-None-Match', etag)])
+        self.assertStatus('304 Not Modified')
+        self.assertBody('')
+
+        sfdb.scanInstanceSet(scan_id, status='ABORTED')
+        self.getPage(f"/scansummary?id={scan_id}&by=type", headers=[('If-None-Match', etag)])
+        self.assertStatus('200 OK')
+        self.assertNotEqual(etag, self.assertHeader('ETag'))
+
     def test_scaneventresultsunique_invalid_scan_returns_200(self):
         self.getPage("/scaneventresultsunique?id=doesnotexist&eventType=anything")
         self.assertStatus('200 OK')
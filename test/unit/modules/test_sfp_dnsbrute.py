@@ -3,6 +3,7 @@ import unittest
 
 from modules.sfp_dnsbrute import sfp_dnsbrute
 from sflib import SpiderFoot
+from spiderfoot import SpiderFootEvent, SpiderFootTarget
 
 
 @pytest.mark.usefixtures
@@ -24,3 +25,95 @@ class TestModuleDnsBrute(unittest.TestCase):
     def test_producedEvents_should_return_list(self):
         module = sfp_dnsbrute()
         self.assertIsInstance(module.producedEvents(), list)
+
+    def test_handleEvent_domain_name_should_return_resolved_hosts(self):
+        sf = SpiderFoot(self.default_options)
+
+        module = sfp_dnsbrute()
+        module.setup(sf, dict())
+
+        target_value = 'spiderfoot.net'
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+        module.setTarget(target)
+
+        module.sublist = {'www': True, 'mail': True, 'nonexistent': True}
+
+        def new_resolveHost(host):
+            return {
+                'www.spiderfoot.net': ['127.0.0.1'],
+                'mail.spiderfoot.net': ['127.0.0.2'],
+            }.get(host, list())
+
+        sf.resolveHost = new_resolveHost
+        sf.resolveHost6 = lambda host: list()
+
+        results = list()
+
+        def new_notifyListeners(self, event):
+            results.append(event.data)
+
+        module.notifyListeners = new_notifyListeners.__get__(module, sfp_dnsbrute)
+
+        event_type = 'ROOT'
+        event_data = 'example data'
+        event_module = ''
+        source_event = ''
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        event_type = 'DOMAIN_NAME'
+        event_data = 'spiderfoot.net'
+        event_module = 'example module'
+        source_event = evt
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        result = module.handleEvent(evt)
+
+        self.assertIsNone(result)
+        self.assertEqual(sorted(results), ['mail.spiderfoot.net', 'www.spiderfoot.net'])
+
+    def test_handleEvent_wildcard_dns_should_not_return_wildcard_hosts(self):
+        sf = SpiderFoot(self.default_options)
+
+        module = sfp_dnsbrute()
+        module.setup(sf, dict())
+        module.opts = dict(module.opts, skipcommonwildcard=False)
+
+        target_value = 'spiderfoot.net'
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+        module.setTarget(target)
+
+        module.sublist = {'www': True, 'mail': True, 'nonexistent': True}
+
+        def new_resolveHost(host):
+            if host == 'www.spiderfoot.net':
+                return ['127.0.0.1']
+            return ['127.0.0.99']
+
+        sf.resolveHost = new_resolveHost
+        sf.resolveHost6 = lambda host: list()
+
+        results = list()
+
+        def new_notifyListeners(self, event):
+            results.append(event.data)
+
+        module.notifyListeners = new_notifyListeners.__get__(module, sfp_dnsbrute)
+
+        event_type = 'ROOT'
+        event_data = 'example data'
+        event_module = ''
+        source_event = ''
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        event_type = 'DOMAIN_NAME'
+        event_data = 'spiderfoot.net'
+        event_module = 'example module'
+        source_event = evt
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        result = module.handleEvent(evt)
+
+        self.assertIsNone(result)
+        self.assertEqual(results, ['www.spiderfoot.net'])
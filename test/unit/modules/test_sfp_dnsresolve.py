@@ -3,6 +3,7 @@ import unittest
 
 from modules.sfp_dnsresolve import sfp_dnsresolve
 from sflib import SpiderFoot
+from spiderfoot import SpiderFootEvent, SpiderFootTarget
 
 
 @pytest.mark.usefixtures
@@ -24,3 +25,55 @@ class TestModuleDnsResolve(unittest.TestCase):
     def test_producedEvents_should_return_list(self):
         module = sfp_dnsresolve()
         self.assertIsInstance(module.producedEvents(), list)
+
+    def test_handleEvent_host_seen_from_several_parents_should_only_be_resolved_once(self):
+        sf = SpiderFoot(self.default_options)
+
+        module = sfp_dnsresolve()
+        module.setup(sf, dict())
+        module.opts = dict(module.opts, _internettlds=['com', 'net'])
+
+        target_value = 'spiderfoot.net'
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+        module.setTarget(target)
+
+        lookups = list()
+
+        def new_resolveHost(host):
+            lookups.append(host)
+            if host.endswith('spiderfoot.net'):
+                return ['1.1.1.1']
+            return list()
+
+        def new_resolveHost6(host):
+            lookups.append(host)
+            return list()
+
+        sf.resolveHost = new_resolveHost
+        sf.resolveHost6 = new_resolveHost6
+
+        results = list()
+
+        def new_notifyListeners(self, event):
+            results.append((event.eventType, event.data))
+
+        module.notifyListeners = new_notifyListeners.__get__(module, sfp_dnsresolve)
+
+        event_type = 'ROOT'
+        event_data = 'example data'
+        event_module = ''
+        source_event = ''
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        for event_type in ['RAW_DNS_RECORDS', 'RAW_RIR_DATA']:
+            event_data = f"{event_type} for www.spiderfoot.net and mail.spiderfoot.net"
+            event_module = 'example module'
+            source_event = evt
+            result = module.handleEvent(SpiderFootEvent(event_type, event_data, event_module, source_event))
+            self.assertIsNone(result)
+
+        self.assertEqual(results.count(('INTERNET_NAME', 'www.spiderfoot.net')), 2)
+        self.assertEqual(results.count(('INTERNET_NAME', 'mail.spiderfoot.net')), 2)
+        self.assertEqual(lookups.count('www.spiderfoot.net'), 2)
+        self.assertEqual(lookups.count('mail.spiderfoot.net'), 2)
@@ -3,6 +3,7 @@ import unittest
 
 from modules.sfp_tldsearch import sfp_tldsearch
 from sflib import SpiderFoot
+from spiderfoot import SpiderFootEvent, SpiderFootTarget
 
 
 @pytest.mark.usefixtures
@@ -25,3 +26,53 @@ class TestModuleTldsearch(unittest.TestCase):
     def test_producedEvents_should_return_list(self):
         module = sfp_tldsearch()
         self.assertIsInstance(module.producedEvents(), list)
+
+    def test_handleEvent_should_return_similar_domains_and_check_wildcards_once_per_tld(self):
+        sf = SpiderFoot(self.default_options)
+
+        module = sfp_tldsearch()
+        module.setup(sf, dict())
+        module.opts = dict(module.opts, _internettlds=['com', 'net', 'org', 'test', 'example'])
+
+        target_value = 'spiderfoot.net'
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+        module.setTarget(target)
+
+        wildcardChecks = list()
+
+        def new_checkDnsWildcard(tld):
+            wildcardChecks.append(tld)
+            return tld == 'example'
+
+        def new_resolveHost(host):
+            if host in ['spiderfoot.org', 'spiderfoot.example', 'spiderfoot.net', 'othername.test']:
+                return ['127.0.0.1']
+            return list()
+
+        sf.checkDnsWildcard = new_checkDnsWildcard
+        sf.resolveHost = new_resolveHost
+        sf.resolveHost6 = lambda host: list()
+
+        results = list()
+
+        def new_notifyListeners(self, event):
+            results.append(event.data)
+
+        module.notifyListeners = new_notifyListeners.__get__(module, sfp_tldsearch)
+
+        event_type = 'ROOT'
+        event_data = 'example data'
+        event_module = ''
+        source_event = ''
+        evt = SpiderFootEvent(event_type, event_data, event_module, source_event)
+
+        for event_data in ['spiderfoot.net', 'othername.net']:
+            event_type = 'INTERNET_NAME'
+            event_module = 'example module'
+            source_event = evt
+            result = module.handleEvent(SpiderFootEvent(event_type, event_data, event_module, source_event))
+            self.assertIsNone(result)
+
+        self.assertEqual(sorted(results), ['othername.test', 'spiderfoot.org'])
+        self.assertEqual(sorted(wildcardChecks), ['com', 'example', 'net', 'org', 'test'])
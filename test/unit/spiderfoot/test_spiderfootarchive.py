@@ -0,0 +1,138 @@
+# test_spiderfootarchive.py
+import io
+import pytest
+import unittest
+import uuid
+import zipfile
+
+from spiderfoot import SpiderFootArchive, SpiderFootDb, SpiderFootEvent
+
+
+@pytest.mark.usefixtures
+class TestSpiderFootArchive(unittest.TestCase):
+    """
+    Test SpiderFootArchive
+    """
+
+    def scan(self, sfdb, status='FINISHED'):
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'archive test', 'example.com')
+        sfdb.scanConfigSet(scan_id, {'_debug': '0', 'sfp_spider:maxpages': '10'})
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        other = SpiderFootEvent('INTERNET_NAME', 'mail.example.com', 'sfp_dnsresolve', root)
+        url = SpiderFootEvent('LINKED_URL_INTERNAL', 'https://www.example.com/', 'sfp_spider', host)
+        vuln = SpiderFootEvent('VULNERABILITY_GENERAL', 'example vulnerability', 'sfp_spider', url)
+        vuln.risk = 80
+        # A result whose source was not stored
+        orphan = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', SpiderFootEvent('INTERNET_NAME', 'ftp.example.com', 'sfp_dnsbrute', root))
+        for event in [root, host, other, url, vuln, orphan]:
+            sfdb.scanEventStore(scan_id, event)
+        sfdb.scanResultsUpdateFP(scan_id, [other.hash], 1)
+
+        sfdb.correlationResultCreate(scan_id, 'rule1', 'rule', 'descr', 'HIGH', 'yaml', 'title 1', [vuln.hash])
+        sfdb.correlationResultCreate(scan_id, 'rule2', 'rule', 'descr', 'LOW', 'yaml', 'title 2', [host.hash, other.hash])
+
+        sfdb.scanLogEvent(scan_id, 'INFO', 'scan started', 'SpiderFoot')
+        sfdb.scanLogEvent(scan_id, 'ERROR', 'example error', 'sfp_spider')
+
+        sfdb.scanInstanceSet(scan_id, status=status)
+
+        return scan_id, root, host, other, url, vuln
+
+    def archive(self, sfdb, scan_id):
+        fileobj = io.BytesIO()
+        SpiderFootArchive.create(sfdb, scan_id, fileobj)
+        fileobj.seek(0)
+        return SpiderFootArchive(fileobj)
+
+    def test_create_argument_dbh_invalid_type_should_raise_TypeError(self):
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootArchive.create(invalid_type, 'example scan id', io.BytesIO())
+
+    def test_create_should_only_archive_finished_scans(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb, status='RUNNING')[0]
+
+        with self.assertRaises(ValueError):
+            SpiderFootArchive.create(sfdb, scan_id, io.BytesIO())
+
+        with self.assertRaises(ValueError):
+            SpiderFootArchive.create(sfdb, str(uuid.uuid4()), io.BytesIO())
+
+    def test_create_should_archive_debug_logs(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)[0]
+        sfdb.scanLogEvents([(scan_id, 'DEBUG', 'example debug message', 'sfp_example', 1.0)])
+
+        with self.archive(sfdb, scan_id) as archive:
+            self.assertEqual(
+                [row[:4] for row in sfdb.scanLogs(scan_id, reverse=True, includeDebug=True)],
+                [row[:4] for row in archive.scanLogs(scan_id, reverse=True)]
+            )
+            self.assertIn('example debug message', [row[3] for row in archive.scanLogs(scan_id)])
+
+    def test_init_should_reject_other_files(self):
+        fileobj = io.BytesIO()
+        with zipfile.ZipFile(fileobj, 'w') as other:
+            other.writestr('example.txt', 'example data')
+        fileobj.seek(0)
+
+        with self.assertRaises(ValueError):
+            SpiderFootArchive(fileobj)
+
+    def test_archive_should_be_read_like_the_database(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)[0]
+
+        with self.archive(sfdb, scan_id) as archive:
+            self.assertEqual(scan_id, archive.scanId)
+            self.assertEqual(sfdb.scanInstanceGet(scan_id), archive.scanInstanceGet(scan_id))
+            self.assertEqual(sfdb.scanConfigGet(scan_id), archive.scanConfigGet(scan_id))
+            self.assertEqual(sfdb.scanResultEvent(scan_id), archive.scanResultEvent(scan_id))
+            self.assertEqual(sfdb.scanResultEvent(scan_id, filterFp=True), archive.scanResultEvent(scan_id, filterFp=True))
+            for by in ['type', 'module', 'entity']:
+                with self.subTest(by=by):
+                    self.assertEqual(sfdb.scanResultSummary(scan_id, by), archive.scanResultSummary(scan_id, by))
+            self.assertEqual(sfdb.scanCorrelationList(scan_id), archive.scanCorrelationList(scan_id))
+            for by in ['rule', 'risk']:
+                with self.subTest(by=by):
+                    self.assertEqual(sfdb.scanCorrelationSummary(scan_id, by), archive.scanCorrelationSummary(scan_id, by))
+            self.assertEqual(
+                [row[:4] for row in sfdb.scanLogs(scan_id, reverse=True)],
+                [row[:4] for row in archive.scanLogs(scan_id, reverse=True)]
+            )
+            self.assertEqual([2, 1], [row[4] for row in archive.scanLogs(scan_id)])
+            self.assertEqual([2], [row[4] for row in archive.scanLogs(scan_id, fromRowId=1)])
+
+            self.assertIsNone(archive.scanInstanceGet('other scan id'))
+            self.assertEqual([], archive.scanResultEvent('other scan id'))
+
+    def test_scanResultEvent_should_filter_results(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root, host, other, url, vuln = self.scan(sfdb)
+        correlation_id = sfdb.scanCorrelationList(scan_id)[1][0]
+
+        with self.archive(sfdb, scan_id) as archive:
+            for filters in [
+                {'eventType': 'INTERNET_NAME'},
+                {'eventType': ['INTERNET_NAME', 'LINKED_URL_INTERNAL']},
+                {'srcModule': 'sfp_spider'},
+                {'eventType': 'INTERNET_NAME', 'srcModule': ['sfp_dnsbrute']},
+                {'data': ['mail.example.com']},
+                {'sourceId': host.hash},
+                {'correlationId': correlation_id},
+            ]:
+                with self.subTest(filters=filters):
+                    self.assertEqual(sfdb.scanResultEvent(scan_id, **filters), archive.scanResultEvent(scan_id, **filters))
+
+            self.assertEqual([vuln.hash], [row[8] for row in archive.scanResultEvent(scan_id, risk=80)])
+            self.assertEqual([], archive.scanResultEvent(scan_id, eventType='IP_ADDRESS'))
+            self.assertEqual(
+                {url.hash, vuln.hash},
+                {archive.column('results', 'hash')[row] for row in archive.resultRows(srcModule='sfp_spider')}
+            )
@@ -1,7 +1,8 @@
 # test_spiderfootcorrelator.py
 import unittest
+import uuid
 
-from spiderfoot import SpiderFootCorrelator, SpiderFootDb
+from spiderfoot import SpiderFootCorrelator, SpiderFootDb, SpiderFootEvent
 
 
 class TestSpiderFootCorrelator(unittest.TestCase):
@@ -37,6 +38,231 @@ class TestSpiderFootCorrelator(unittest.TestCase):
         with self.assertRaises(ValueError):
             correlator.run_correlations()
 
+    def test_run_correlations_should_share_collections_between_rules(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'correlation test', 'example.com')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(scan_id, root)
+        for host, module in [('a.example.com', 'sfp_dnsbrute'), ('b.example.com', 'sfp_dnsbrute'), ('a.example.com', 'sfp_crt')]:
+            sfdb.scanEventStore(scan_id, SpiderFootEvent('INTERNET_NAME', host, module, root))
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+
+        rule = """
+id: {rule_id}
+version: 1
+meta:
+  name: Host only from bruteforcing
+  description: Host only from bruteforcing
+  risk: LOW
+collections:
+  - collect:
+      - method: exact
+        field: type
+        value: INTERNET_NAME
+      - method: exact
+        field: module
+        value: sfp_dnsbrute
+  - collect:
+      - method: exact
+        field: type
+        value: INTERNET_NAME
+      - method: exact
+        field: module
+        value: not sfp_dnsbrute
+aggregation:
+  field: data
+analysis:
+  - method: first_collection_only
+    field: data
+headline: "Host found only through bruteforcing: {{data}}"
+"""
+        ruleset = {rule_id: rule.format(rule_id=rule_id) for rule_id in ['rule_one', 'rule_two']}
+        correlator = SpiderFootCorrelator(sfdb, ruleset, scan_id)
+
+        queries = list()
+        scanResultEvent = sfdb.scanResultEvent
+
+        def countingScanResultEvent(*args, **kwargs):
+            queries.append(kwargs)
+            return scanResultEvent(*args, **kwargs)
+
+        sfdb.scanResultEvent = countingScanResultEvent
+        correlator.run_correlations()
+
+        # One query per distinct collection, shared by both rules. The
+        # exact module filter of the first collection is part of its query.
+        self.assertEqual(2, len(queries))
+        self.assertIn(['sfp_dnsbrute'], [q.get('srcModule') for q in queries])
+        correlations = sfdb.scanCorrelationList(scan_id)
+        self.assertEqual(['rule_one', 'rule_two'], sorted(c[2] for c in correlations))
+        self.assertTrue(all(c[1] == 'Host found only through bruteforcing: b.example.com' for c in correlations))
+
+    def test_collect_from_db_should_return_copies_of_cached_events(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'correlation test', 'example.com')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(scan_id, root)
+        sfdb.scanEventStore(scan_id, SpiderFootEvent('INTERNET_NAME', 'a.example.com', 'sfp_dnsbrute', root))
+        correlator = SpiderFootCorrelator(sfdb, {}, scan_id)
+
+        matchrule = {'method': 'exact', 'field': 'type', 'value': 'INTERNET_NAME'}
+        events = correlator.collect_from_db(matchrule, False, False, False)
+        self.assertEqual(1, len(events))
+        for e in events:
+            e['data'] = None
+            e['source'].append({})
+
+        for e in correlator.collect_from_db(matchrule, False, False, False):
+            self.assertIsNotNone(e['data'])
+            self.assertEqual([], e['source'])
+
+    def test_collect_from_db_should_find_entities_of_events_sharing_a_source(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'correlation test', 'example.com')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        url = SpiderFootEvent('LINKED_URL_INTERNAL', 'https://www.example.com/', 'sfp_spider', host)
+        for event in [root, host, url]:
+            sfdb.scanEventStore(scan_id, event)
+        for code in ['200', '404']:
+            sfdb.scanEventStore(scan_id, SpiderFootEvent('HTTP_CODE', code, 'sfp_spider', url))
+        correlator = SpiderFootCorrelator(sfdb, {}, scan_id)
+
+        matchrule = {'method': 'exact', 'field': 'type', 'value': 'HTTP_CODE'}
+        events = correlator.collect_from_db(matchrule, True, True, True)
+        self.assertEqual(2, len(events))
+        for e in events:
+            self.assertEqual(['https://www.example.com/'], [s['data'] for s in e['source']])
+            self.assertEqual(['www.example.com'], [ee['data'] for ee in e['entity']])
+            self.assertEqual([], e['child'])
+
+        matchrule = {'method': 'exact', 'field': 'type', 'value': 'LINKED_URL_INTERNAL'}
+        events = correlator.collect_from_db(matchrule, True, False, False)
+        self.assertEqual(['200', '404'], [c['data'] for c in events[0]['child']])
+
+    def test_aggregate_events_by_sub_field_should_only_keep_matching_sub_events(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootCorrelator(sfdb, {})
+
+        children = [{'data': data, 'id': data} for data in ['x', 'y', 'b', 'b']]
+        event = {'id': 'example id', 'data': 'example data', 'child': children, '_collection': 0}
+        buckets = correlator.aggregate_events({'field': 'child.data'}, [event])
+
+        self.assertEqual(['b', 'x', 'y'], sorted(buckets.keys()))
+        for bucket, members in buckets.items():
+            for member in members:
+                self.assertEqual('example id', member['id'])
+                self.assertTrue(member['child'])
+                self.assertTrue(all(c['data'] == bucket for c in member['child']))
+        self.assertEqual(2, len(buckets['b']))
+
+        # The collected event itself is left untouched
+        self.assertEqual(4, len(event['child']))
+
+    def test_aggregate_events_by_field_should_bucket_events(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootCorrelator(sfdb, {})
+
+        events = [{'id': str(i), 'data': data, '_collection': 0} for i, data in enumerate(['a', 'b', 'a'])]
+        buckets = correlator.aggregate_events({'field': 'data'}, events)
+        self.assertEqual({'a': ['0', '2'], 'b': ['1']}, {k: [e['id'] for e in v] for k, v in buckets.items()})
+
+    def test_compile_collection_should_fold_type_and_module_filters_into_query(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootCorrelator(sfdb, {})
+
+        collection = [
+            {'method': 'regex', 'field': 'type', 'value': 'VULNERABILITY_.*'},
+            {'method': 'exact', 'field': 'type', 'value': 'not VULNERABILITY_GENERAL'},
+            {'method': 'exact', 'field': 'module', 'value': ['sfp_a', 'sfp_b']},
+            {'method': 'exact', 'field': 'module', 'value': 'not sfp_b'},
+            {'method': 'regex', 'field': 'data', 'value': 'CVE-.*'}
+        ]
+        plan = correlator.compile_collection(collection)
+
+        self.assertNotIn('VULNERABILITY_GENERAL', plan['query']['eventType'])
+        self.assertIn('VULNERABILITY_CVE_CRITICAL', plan['query']['eventType'])
+        self.assertEqual(['sfp_a', 'sfp_b'], plan['query']['srcModule'])
+        self.assertEqual(['module', 'data'], [field for field, patterns in plan['filters']])
+
+    def test_collect_from_query_disjoint_module_filters_should_collect_nothing(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'correlation test', 'example.com')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(scan_id, root)
+        for host, module in [('a.example.com', 'sfp_dnsbrute'), ('b.example.com', 'sfp_crt')]:
+            sfdb.scanEventStore(scan_id, SpiderFootEvent('INTERNET_NAME', host, module, root))
+
+        correlator = SpiderFootCorrelator(sfdb, {}, scan_id)
+        plan = correlator.compile_collection([
+            {'method': 'exact', 'field': 'type', 'value': 'INTERNET_NAME'},
+            {'method': 'exact', 'field': 'module', 'value': 'sfp_dnsbrute'},
+            {'method': 'exact', 'field': 'module', 'value': 'sfp_crt'}
+        ])
+        self.assertEqual([], plan['query']['srcModule'])
+        self.assertEqual([], correlator.collect_from_query(plan['query'], False, False, False))
+
+    def test_event_match_should_apply_compiled_patterns(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootCorrelator(sfdb, {})
+
+        event = {'data': 'Example Data', 'child': [{'data': 'example child'}]}
+        cases = [
+            ('data', ['Example Data'], 'exact', True),
+            ('data', ['not Example Data'], 'exact', False),
+            ('data', ['not foo'], 'exact', True),
+            ('data', ['other', 'not foo'], 'exact', True),
+            ('data', ['not foo', 'other'], 'exact', False),
+            ('data', ['example'], 'regex', True),
+            ('data', ['not ^example', 'other'], 'regex', False),
+            ('child.data', ['child$'], 'regex', True),
+            ('child.data', ['not child'], 'regex', False),
+            ('data', ['Example Data'], 'invalid', False)
+        ]
+        for field, patterns, method, expected in cases:
+            with self.subTest(field=field, patterns=patterns, method=method):
+                self.assertEqual(expected, correlator.event_match(event, field, correlator.compile_patterns(patterns, method)))
+                self.assertEqual(expected, correlator.event_keep(event, field, patterns, method))
+
+    def test_init_should_reuse_compiled_rules(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        rule = """
+id: example_rule
+version: 1
+meta:
+  name: Example rule
+  description: Example rule
+  risk: INFO
+collections:
+  - collect:
+      - method: exact
+        field: type
+        value: INTERNET_NAME
+headline: "Example: {data}"
+"""
+        rules = SpiderFootCorrelator(sfdb, {'example_rule': rule}).get_ruleset()
+        self.assertIn('plan', rules[0])
+
+        correlator = SpiderFootCorrelator(sfdb, {r['id']: r for r in rules})
+        self.assertIs(rules[0], correlator.get_ruleset()[0])
+
+    def test_collection_key_should_ignore_value_order(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootCorrelator(sfdb, {})
+
+        criteria_a = correlator.build_db_criteria({'method': 'exact', 'field': 'type', 'value': ['IP_ADDRESS', 'INTERNET_NAME']})
+        criteria_b = correlator.build_db_criteria({'method': 'exact', 'field': 'type', 'value': ['INTERNET_NAME', 'IP_ADDRESS']})
+        self.assertEqual(correlator.collection_key(criteria_a), correlator.collection_key(criteria_b))
+
     def test_build_db_criteria_argument_matchrule_invalid_type_should_raise_TypeError(self):
         sfdb = SpiderFootDb(self.default_options, False)
         correlator = SpiderFootCorrelator(sfdb, {})
@@ -1,8 +1,22 @@
 # test_spiderfootdb.py
+import hashlib
+import multiprocessing
 import pytest
+import sqlite3
+import tempfile
 import unittest
+import uuid
 
 from spiderfoot import SpiderFootDb, SpiderFootEvent
+from spiderfoot.db import _compileRegex
+
+
+def open_database(opts):
+    try:
+        SpiderFootDb(opts, False).close()
+    except IOError as e:
+        return str(e)
+    return None
 
 
 @pytest.mark.usefixtures
@@ -130,6 +144,169 @@ class TestSpiderFootDb(unittest.TestCase):
         with self.assertRaises(ValueError):
             sfdb.search(criteria, False)
 
+    # A database of the test's own, for tests changing the database
+    # schema, which would break tests running at the same time on the
+    # shared test database
+    def private_options(self, **opts):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        return dict(self.default_options, __database=f"{tmpdir.name}/spiderfoot.db", **opts)
+
+    def text_scan(self, sfdb, token):
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, root)
+        for event_type, data in [
+            ('INTERNET_NAME', f"www.{token}.com"),
+            ('INTERNET_NAME', f"mail.{token}.net"),
+            ('RAW_RIR_DATA', f"{token} login portal"),
+        ]:
+            sfdb.scanEventStore(instance_id, SpiderFootEvent(event_type, data, 'example module', root))
+
+        return instance_id
+
+    def test_search_argument_criteria_text_should_search_all_scans(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        instance_ids = [self.text_scan(sfdb, token) for _ in range(2)]
+
+        results = sfdb.search({'text': token})
+        self.assertEqual(6, len(results))
+        self.assertEqual(set(instance_ids), set(row[12] for row in results))
+
+        results = sfdb.search({'scan_id': instance_ids[0], 'text': token})
+        self.assertEqual(3, len(results))
+
+        results = sfdb.search({'type': 'INTERNET_NAME', 'text': token})
+        self.assertEqual(
+            sorted([f"mail.{token}.net", f"www.{token}.com"] * 2),
+            [row[1] for row in results]
+        )
+
+    def test_search_argument_criteria_text_should_match_prefixes_and_phrases(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+
+        queries = {
+            f"{token[:12]}*": 3,
+            f'"www.{token}.com"': 1,
+            f'"{token} login"': 1,
+            f"{token} portal": 1,
+            f'"{token} portal"': 0,
+            f"{token[:12]}": 0,
+            "*": 0,
+        }
+        for query, count in queries.items():
+            with self.subTest(query=query):
+                results = sfdb.search({'scan_id': instance_id, 'text': query})
+                self.assertEqual(count, len(results))
+
+    def test_search_argument_criteria_text_should_search_data_stored_as_blobs(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        content = SpiderFootEvent('TARGET_WEB_CONTENT', "<p>example</p>" * 100 + f" {token} login " + "<p>example</p>" * 50, 'example module', root)
+        sfdb.scanEventStore(instance_id, content)
+
+        sfdb.dbh.execute("SELECT data, data_hash FROM tbl_scan_results WHERE hash = ?", [content.hash])
+        data, data_hash = sfdb.dbh.fetchone()
+        self.assertIsNone(data)
+        self.assertIsNotNone(data_hash)
+
+        for query, expected in [(token, 4), (f"{token} login", 2), (f"{token} example.com", 0)]:
+            with self.subTest(query=query):
+                results = sfdb.search({'scan_id': instance_id, 'text': query})
+                self.assertEqual(expected, len(results))
+                self.assertEqual(expected, len(sfdb.searchPage({'scan_id': instance_id, 'text': query})[0]))
+
+        self.assertIn(content.data, [row[1] for row in sfdb.search({'scan_id': instance_id, 'text': token})])
+
+    def test_searchIter_should_return_the_same_results_as_search(self):
+        """
+        Test searchIter(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        sfdb._fetchChunkSize = 2
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+
+        for criteria in [{'text': token}, {'scan_id': instance_id, 'value': '%'}, {'text': '*'}]:
+            with self.subTest(criteria=criteria):
+                self.assertEqual(sfdb.search(dict(criteria)), list(sfdb.searchIter(dict(criteria))))
+
+        with self.assertRaises(ValueError):
+            sfdb.searchIter({'type': 'INTERNET_NAME'})
+
+    def test_search_index_should_follow_deleted_results(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+        self.assertEqual(3, len(sfdb.search({'text': token})))
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.search({'text': token}))
+
+        sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_results_fts WHERE tbl_scan_results_fts MATCH ?", [token])
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+
+    def test_init_should_backfill_missing_search_index(self):
+        """
+        Test __init__(self, opts, init=False)
+        """
+        opts = self.private_options()
+        sfdb = SpiderFootDb(opts, False)
+        with sfdb.dbhLock:
+            sfdb.dbh.execute("DROP TRIGGER trg_scan_results_fts_insert")
+            sfdb.dbh.execute("DROP TRIGGER trg_scan_results_fts_delete")
+            sfdb.dbh.execute("DROP TRIGGER trg_scan_results_fts_update")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_results_fts")
+            sfdb.conn.commit()
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+
+        sfdb = SpiderFootDb(opts, False)
+        self.assertTrue(sfdb.searchIndex)
+        self.assertEqual(3, len(sfdb.search({'scan_id': instance_id, 'text': token})))
+
+    def test_search_argument_criteria_regex_should_compile_regex_once(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+
+        regex = f"^www\\.{token}\\."
+        misses = _compileRegex.cache_info().misses
+        results = sfdb.search({'scan_id': instance_id, 'regex': regex})
+        self.assertEqual([f"www.{token}.com"], [row[1] for row in results])
+        self.assertEqual(misses + 1, _compileRegex.cache_info().misses)
+
+        self.assertEqual([], sfdb.search({'scan_id': instance_id, 'regex': '(invalid'}))
+
     def test_eventTypes_should_return_a_list(self):
         """
         Test eventTypes(self)
@@ -343,6 +520,163 @@ class TestSpiderFootDb(unittest.TestCase):
         scan_results_summary = sfdb.scanResultSummary(instance_id, "type")
         self.assertIsInstance(scan_results_summary, list)
 
+    def summary_scan(self, sfdb):
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, root)
+        for event_type, data, module in [
+            ('INTERNET_NAME', 'www.example.com', 'example module'),
+            ('INTERNET_NAME', 'www.example.com', 'other module'),
+            ('INTERNET_NAME', 'mail.example.com', 'example module'),
+            ('IP_ADDRESS', '1.2.3.4', 'example module'),
+        ]:
+            sfdb.scanEventStore(instance_id, SpiderFootEvent(event_type, data, module, root))
+
+        sfdb.correlationResultCreate(instance_id, 'rule1', 'rule', 'descr', 'HIGH', 'yaml', 'title 1', [root.hash])
+        sfdb.correlationResultCreate(instance_id, 'rule2', 'rule', 'descr', 'HIGH', 'yaml', 'title 2', [root.hash])
+        sfdb.correlationResultCreate(instance_id, 'rule3', 'rule', 'descr', 'LOW', 'yaml', 'title 3', [root.hash])
+
+        return instance_id
+
+    def test_scanResultSummary_should_count_results_as_they_are_stored(self):
+        """
+        Test scanResultSummary(self, instanceId, by="type")
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = self.summary_scan(sfdb)
+
+        summary = [(row[0], row[3], row[4]) for row in sfdb.scanResultSummary(instance_id, "type")]
+        self.assertEqual([
+            ('IP_ADDRESS', 1, 1),
+            ('ROOT', 1, 1),
+            ('INTERNET_NAME', 3, 2),
+        ], summary)
+
+        summary = [(row[0], row[3], row[4]) for row in sfdb.scanResultSummary(instance_id, "module")]
+        self.assertEqual([
+            ('other module', 1, 1),
+            ('example module', 3, 3),
+            ('', 1, 1),
+        ], summary)
+
+        self.assertEqual([('HIGH', 2), ('LOW', 1)], sfdb.scanCorrelationSummary(instance_id, "risk"))
+        self.assertIn((instance_id, 'HIGH', 2), sfdb.scanCorrelationRiskSummary())
+
+        scan = [s for s in sfdb.scanInstanceList() if s[0] == instance_id]
+        self.assertEqual(4, scan[0][7])
+
+        correlation_ids = [c[0] for c in sfdb.scanCorrelationList(instance_id) if c[3] == 'HIGH']
+        sfdb.correlationResultDelete(instance_id, correlation_ids[:1])
+        self.assertEqual([('HIGH', 1), ('LOW', 1)], sfdb.scanCorrelationSummary(instance_id, "risk"))
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.scanResultSummary(instance_id, "type"))
+        self.assertNotIn(instance_id, [row[0] for row in sfdb.scanCorrelationRiskSummary()])
+
+    def test_init_should_backfill_missing_scan_summaries(self):
+        """
+        Test __init__(self, opts, init=False)
+        """
+        opts = self.private_options()
+        sfdb = SpiderFootDb(opts, False)
+        instance_id = self.summary_scan(sfdb)
+        scan_list = sfdb.scanInstanceList()
+        by_type = sfdb.scanResultSummary(instance_id, "type")
+        by_module = sfdb.scanResultSummary(instance_id, "module")
+        by_risk = sfdb.scanCorrelationSummary(instance_id, "risk")
+
+        with sfdb.dbhLock:
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_data")
+            sfdb.conn.commit()
+
+        sfdb = SpiderFootDb(opts, False)
+        self.assertEqual(scan_list, sfdb.scanInstanceList())
+        self.assertEqual(by_type, sfdb.scanResultSummary(instance_id, "type"))
+        self.assertEqual(by_module, sfdb.scanResultSummary(instance_id, "module"))
+        self.assertEqual(by_risk, sfdb.scanCorrelationSummary(instance_id, "risk"))
+
+        # Data already seen is not counted as unique again
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'other module', root))
+        summary = {row[0]: (row[3], row[4]) for row in sfdb.scanResultSummary(instance_id, "type")}
+        self.assertEqual((2, 1), summary['IP_ADDRESS'])
+
+    def test_init_should_upgrade_a_database_opened_by_several_processes_at_once(self):
+        """
+        Test __init__(self, opts, init=False)
+        """
+        opts = self.private_options()
+        sfdb = SpiderFootDb(opts, False)
+        instance_id = self.summary_scan(sfdb)
+        by_type = sfdb.scanResultSummary(instance_id, "type")
+        with sfdb.dbhLock:
+            for table in ["tbl_scan_summary", "tbl_scan_summary_data", "tbl_scan_log_debug"]:
+                sfdb.dbh.execute(f"DROP TABLE {table}")
+            sfdb.conn.commit()
+        sfdb.close()
+
+        with multiprocessing.Pool(4) as pool:
+            self.assertEqual([None] * 4, pool.map(open_database, [opts] * 4))
+
+        sfdb = SpiderFootDb(opts, False)
+        self.assertEqual(by_type, sfdb.scanResultSummary(instance_id, "type"))
+
+    def test_upgradeSchema_should_not_upgrade_a_schema_upgraded_meanwhile(self):
+        """
+        Test _upgradeSchema(self, upgraded, upgrade)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        # Upgraded by another process before the lock was held
+        checks = iter([False, True])
+        upgrades = list()
+        self.assertFalse(sfdb._upgradeSchema(lambda: next(checks), lambda: upgrades.append(True)))
+        self.assertEqual([], upgrades)
+        self.assertFalse(sfdb.conn.in_transaction)
+
+        def upgrade():
+            sfdb.dbh.execute("CREATE TABLE tbl_upgrade_test (id INT)")
+            raise sqlite3.OperationalError("upgrade failed")
+
+        with self.assertRaises(sqlite3.Error):
+            sfdb._upgradeSchema(lambda: False, upgrade)
+        self.assertFalse(sfdb._hasTable("main", "tbl_upgrade_test"))
+
+    def test_scan_partitions_should_keep_summary_data_with_the_results(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        opts = self.private_options(_scanpartitions=True)
+        partitioned = SpiderFootDb(opts, False)
+        instance_id = self.summary_scan(partitioned)
+        by_type = partitioned.scanResultSummary(instance_id, "type")
+        self.assertIn(('INTERNET_NAME', 3, 2), [(row[0], row[3], row[4]) for row in by_type])
+
+        schema = partitioned._scanSchema(instance_id)
+        partitioned.dbh.execute("SELECT COUNT(*) FROM main.tbl_scan_summary_data WHERE scan_instance_id = ?", [instance_id])
+        self.assertEqual(0, partitioned.dbh.fetchone()[0])
+        partitioned.dbh.execute(f"SELECT COUNT(*) FROM {schema}.tbl_scan_summary_data WHERE scan_instance_id = ?", [instance_id])
+        self.assertGreater(partitioned.dbh.fetchone()[0], 0)
+
+        # A scan database created before the data was kept with the
+        # results gets the table, filled from its results
+        with partitioned.dbhLock:
+            partitioned.dbh.execute(f"DROP TABLE {schema}.tbl_scan_summary_data")
+            partitioned.conn.commit()
+        partitioned._detachScan(instance_id)
+
+        sfdb = SpiderFootDb(opts, False)
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'other module', root))
+        summary = {row[0]: (row[3], row[4]) for row in sfdb.scanResultSummary(instance_id, "type")}
+        self.assertEqual((2, 1), summary['IP_ADDRESS'])
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.scanResultSummary(instance_id, "type"))
+
     def test_scanResultSummary_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
         """
         Test scanResultSummary(self, instanceId, by="type")
@@ -419,6 +753,120 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanResultEvent(instance_id, invalid_type, None)
 
+    def test_scanResultEventIter_should_read_results_in_chunks(self):
+        """
+        Test scanResultEventIter(self, instanceId, eventType='ALL', srcModule=None, data=None, sourceId=None, correlationId=None, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        sfdb._fetchChunkSize = 2
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+
+        results = sfdb.scanResultEventIter(instance_id)
+        self.assertNotIsInstance(results, list)
+        self.assertEqual(sfdb.scanResultEvent(instance_id), list(results))
+        self.assertEqual(
+            sfdb.scanResultEvent(instance_id, 'HTTP_CODE', filterFp=True),
+            list(sfdb.scanResultEventIter(instance_id, 'HTTP_CODE', filterFp=True))
+        )
+
+    def test_scanResultEventIter_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanResultEventIter(self, instanceId, eventType='ALL', srcModule=None, data=None, sourceId=None, correlationId=None, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanResultEventIter(invalid_type)
+
+    def test_scanResultRowsIter_should_include_results_whose_source_was_not_stored(self):
+        """
+        Test scanResultRowsIter(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        sfdb._fetchChunkSize = 2
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+
+        unstored = SpiderFootEvent('INTERNET_NAME', 'ftp.example.com', 'sfp_dnsbrute', root)
+        orphan = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', unstored)
+        sfdb.scanEventStore(instance_id, orphan)
+
+        results = sfdb.scanResultRowsIter(instance_id)
+        self.assertNotIsInstance(results, list)
+        rows = list(results)
+        self.assertEqual(
+            sorted([row[8] for row in sfdb.scanResultEvent(instance_id)] + [orphan.hash]),
+            sorted([row[7] for row in rows])
+        )
+
+        with self.assertRaises(TypeError):
+            sfdb.scanResultRowsIter(None)
+
+    def test_scanProgress_should_change_as_results_and_logs_are_stored(self):
+        """
+        Test scanProgress(self, instanceId)
+        Test scanResultsSince(self, instanceId, fromRowId=0, limit=None)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'progress test', 'example.com')
+
+        self.assertIsNone(sfdb.scanProgress(str(uuid.uuid4())))
+        self.assertEqual(('CREATED', 0, 0, 0, 0), tuple(sfdb.scanProgress(instance_id)))
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        sfdb.scanEventStore(instance_id, root)
+        status, results, correlations, last_result, last_log = sfdb.scanProgress(instance_id)
+        self.assertEqual(1, results)
+
+        sfdb.scanEventStore(instance_id, host)
+        sfdb.scanLogEvent(instance_id, 'ERROR', 'example error', 'sfp_dnsbrute')
+        progress = sfdb.scanProgress(instance_id)
+        self.assertEqual(2, progress[1])
+        self.assertGreater(progress[3], last_result)
+        self.assertGreater(progress[4], last_log)
+
+        rows = sfdb.scanResultsSince(instance_id, last_result)
+        self.assertEqual([(progress[3], 'www.example.com', host.hash)], [(row[0], row[2], row[5]) for row in rows])
+        self.assertEqual(1, len(sfdb.scanResultsSince(instance_id, limit=1)))
+
+        with self.assertRaises(TypeError):
+            sfdb.scanProgress(None)
+
+    def test_scanVersion_should_be_bumped_by_every_change_to_a_scan(self):
+        """
+        Test scanVersion(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'version test', 'example.com')
+
+        self.assertIsNone(sfdb.scanVersion(str(uuid.uuid4())))
+        self.assertEqual(('CREATED', 0), tuple(sfdb.scanVersion(instance_id)))
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        versions = [sfdb.scanVersion(instance_id)[1]]
+        for change in [
+            lambda: sfdb.scanEventStore(instance_id, root),
+            lambda: sfdb.scanInstanceSet(instance_id, status='FINISHED'),
+            lambda: sfdb.scanResultsUpdateFP(instance_id, [root.hash], 1),
+            lambda: sfdb.correlationResultCreate(instance_id, 'rule', 'rule', 'descr', 'HIGH', 'yaml', 'title', [root.hash]),
+            lambda: sfdb.correlationResultDelete(instance_id),
+        ]:
+            change()
+            versions.append(sfdb.scanVersion(instance_id)[1])
+
+        self.assertEqual(sorted(set(versions)), versions)
+        self.assertEqual('FINISHED', sfdb.scanVersion(instance_id)[0])
+
+        with self.assertRaises(TypeError):
+            sfdb.scanVersion(None)
+        with self.assertRaises(TypeError):
+            sfdb.scanResultsSince(None)
+
     def test_scanResultEventUnique_should_return_a_list(self):
         """
         Test scanResultEventUnique(self, instanceId, eventType='ALL', filterFp=False)
@@ -485,6 +933,88 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanLogs(invalid_type, limit, from_row_id, reverse)
 
+    def test_scanLogEvents_should_store_debug_logs_compressed_apart_from_other_logs(self):
+        """
+        Test scanLogEvents(self, batch)
+        Test scanDebugLogs(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        self.assertTrue(sfdb.scanLogEvents([
+            (instance_id, 'STATUS', 'scan started', 'SpiderFoot', 1.0),
+            (instance_id, 'DEBUG', 'first debug message', 'sfp_example', 2.0),
+            (instance_id, 'DEBUG', 'second debug message', None, 3.0),
+        ]))
+        self.assertTrue(sfdb.scanLogEvents([
+            (instance_id, 'DEBUG', 'third debug message', 'sfp_example', 4.0),
+        ]))
+
+        self.assertEqual(['STATUS'], [row[2] for row in sfdb.scanLogs(instance_id)])
+        self.assertEqual([
+            (2000.0, 'sfp_example', 'DEBUG', 'first debug message'),
+            (3000.0, 'SpiderFoot', 'DEBUG', 'second debug message'),
+            (4000.0, 'sfp_example', 'DEBUG', 'third debug message'),
+        ], sfdb.scanDebugLogs(instance_id))
+        self.assertEqual(
+            ['scan started', 'first debug message', 'second debug message', 'third debug message'],
+            [row[3] for row in sfdb.scanLogs(instance_id, reverse=True, includeDebug=True)]
+        )
+        self.assertEqual(
+            ['third debug message', 'second debug message'],
+            [row[3] for row in sfdb.scanLogs(instance_id, limit=2, includeDebug=True)]
+        )
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.scanDebugLogs(instance_id))
+
+    def test_scanLogEvents_should_store_debug_logs_of_scan_partitions_in_their_file(self):
+        """
+        Test scanLogEvents(self, batch)
+        """
+        opts = self.private_options(_scanpartitions=True)
+        sfdb = SpiderFootDb(opts, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        self.assertTrue(sfdb.scanLogEvents([
+            (instance_id, 'STATUS', 'scan started', 'SpiderFoot', 1.0),
+            (instance_id, 'DEBUG', 'debug message', 'sfp_example', 2.0),
+        ]))
+        sfdb.dbh.execute("SELECT COUNT(*) FROM main.tbl_scan_log_debug")
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+        self.assertEqual(['debug message'], [row[3] for row in sfdb.scanDebugLogs(instance_id)])
+
+        # Debug logs kept in the main database, before they were kept
+        # with the other logs of the scan, are moved to its file
+        schema = sfdb._scanSchema(instance_id)
+        with sfdb.dbhLock:
+            sfdb.dbh.execute(f"INSERT INTO main.tbl_scan_log_debug SELECT * FROM {schema}.tbl_scan_log_debug")
+            sfdb.dbh.execute(f"DROP TABLE {schema}.tbl_scan_log_debug")
+            sfdb.conn.commit()
+        sfdb._detachScan(instance_id)
+
+        sfdb = SpiderFootDb(opts, False)
+        self.assertEqual(['debug message'], [row[3] for row in sfdb.scanDebugLogs(instance_id)])
+        sfdb.dbh.execute("SELECT COUNT(*) FROM main.tbl_scan_log_debug")
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertFalse(sfdb._scanPartitionPath(instance_id).exists())
+
+    def test_scanDebugLogs_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanDebugLogs(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanDebugLogs(invalid_type)
+
     def test_scanErrors_should_return_a_list(self):
         """
         Test scanErrors(self, instanceId, limit=None)
@@ -528,6 +1058,181 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanInstanceDelete(invalid_type)
 
+    def test_scan_partitions_should_store_results_and_logs_in_a_file_per_scan(self):
+        """
+        Test scanInstanceCreate(self, instanceId, scanName, scanTarget)
+        """
+        sfdb = SpiderFootDb(dict(self.default_options, _scanpartitions=True), False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+        sfdb.scanLogEvent(instance_id, 'INFO', 'example message', 'example module')
+
+        self.assertIn(instance_id, sfdb.scanPartitionList())
+        self.assertTrue(sfdb._scanPartitionPath(instance_id).exists())
+
+        sfdb.dbh.execute("SELECT COUNT(*) FROM main.tbl_scan_results WHERE scan_instance_id = ?", [instance_id])
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+        sfdb.dbh.execute("SELECT COUNT(*) FROM main.tbl_scan_log WHERE scan_instance_id = ?", [instance_id])
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+
+        self.assertEqual(4, len(sfdb.scanResultEvent(instance_id)))
+        self.assertEqual(1, len(sfdb.scanLogs(instance_id)))
+        self.assertEqual(3, len(sfdb.search({'scan_id': instance_id, 'text': token})))
+
+        scan = [s for s in sfdb.scanInstanceList() if s[0] == instance_id]
+        self.assertEqual(3, scan[0][7])
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertNotIn(instance_id, sfdb.scanPartitionList())
+        self.assertFalse(sfdb._scanPartitionPath(instance_id).exists())
+        self.assertIsNone(sfdb.scanInstanceGet(instance_id))
+        self.assertEqual([], sfdb.scanResultEvent(instance_id))
+
+    def blob_scan(self, sfdb, payload):
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, root)
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('RAW_RIR_DATA', payload, 'example module', root))
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('RAW_RIR_DATA', payload, 'other module', root))
+
+        return instance_id
+
+    def blob_refcount(self, sfdb, payload, schema="main"):
+        sfdb.dbh.execute(f"SELECT refcount FROM {schema}.tbl_scan_blob WHERE hash = ?", [hashlib.sha256(payload.encode('utf-8')).hexdigest()])
+        row = sfdb.dbh.fetchone()
+        return row[0] if row else 0
+
+    def test_scanEventStore_should_store_large_data_once_in_the_blob_store(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        token = uuid.uuid4().hex
+        payload = f"whois {token} " + "registrar example " * sfdb._blobThreshold
+        instance_ids = [self.blob_scan(sfdb, payload) for _ in range(2)]
+        self.assertEqual(4, self.blob_refcount(sfdb, payload))
+
+        sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_results WHERE scan_instance_id = ? AND data IS NULL", [instance_ids[0]])
+        self.assertEqual(2, sfdb.dbh.fetchone()[0])
+
+        rows = sfdb.scanResultEvent(instance_ids[0], 'RAW_RIR_DATA')
+        self.assertEqual([payload, payload], [row[1] for row in rows])
+        self.assertEqual([(payload, 'RAW_RIR_DATA', 2)], sfdb.scanResultEventUnique(instance_ids[0], 'RAW_RIR_DATA'))
+        self.assertEqual(4, len(sfdb.search({'type': 'RAW_RIR_DATA', 'value': f"%{token}%"})))
+
+        summary = {row[0]: (row[3], row[4]) for row in sfdb.scanResultSummary(instance_ids[0], "type")}
+        self.assertEqual((2, 1), summary['RAW_RIR_DATA'])
+
+        sfdb.scanInstanceDelete(instance_ids[0])
+        self.assertEqual(2, self.blob_refcount(sfdb, payload))
+        self.assertEqual(payload, sfdb.scanResultEvent(instance_ids[1], 'RAW_RIR_DATA')[0][1])
+
+        sfdb.scanInstanceDelete(instance_ids[1])
+        self.assertEqual(0, self.blob_refcount(sfdb, payload))
+        sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_blob WHERE hash = ?", [hashlib.sha256(payload.encode('utf-8')).hexdigest()])
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+
+    def test_scanEventStore_should_keep_the_blobs_of_scan_partitions_in_their_file(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        partitioned = SpiderFootDb(dict(self.default_options, _scanpartitions=True), False)
+
+        payload = uuid.uuid4().hex * sfdb._blobThreshold
+        instance_id = self.blob_scan(sfdb, payload)
+        partitioned_id = self.blob_scan(partitioned, payload)
+        self.assertEqual(2, self.blob_refcount(sfdb, payload))
+        self.assertEqual(2, self.blob_refcount(partitioned, payload, partitioned._scanSchema(partitioned_id)))
+        self.assertEqual(payload, partitioned.scanResultEvent(partitioned_id, 'RAW_RIR_DATA')[0][1])
+        self.assertEqual([(payload, 'RAW_RIR_DATA', 2)], partitioned.scanResultEventUnique(partitioned_id, 'RAW_RIR_DATA'))
+
+        partitioned.scanInstanceDelete(partitioned_id)
+        self.assertEqual(2, self.blob_refcount(sfdb, payload))
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual(0, self.blob_refcount(sfdb, payload))
+
+    def test_scan_partitions_should_move_their_blobs_out_of_the_main_database(self):
+        """
+        Test scanResultEvent(self, instanceId, eventType='ALL', srcModule=None, data=None, sourceId=None, correlationId=None, filterFp=False)
+        """
+        opts = self.private_options(_scanpartitions=True)
+        partitioned = SpiderFootDb(opts, False)
+
+        payload = uuid.uuid4().hex * partitioned._blobThreshold
+        partitioned_id = self.blob_scan(partitioned, payload)
+        instance_id = self.blob_scan(SpiderFootDb(dict(opts, _scanpartitions=False), False), payload)
+
+        # A scan database created before the blob store was kept with the
+        # results has its blobs in the main database
+        schema = partitioned._scanSchema(partitioned_id)
+        with partitioned.dbhLock:
+            partitioned.dbh.execute(f"UPDATE main.tbl_scan_blob SET refcount = refcount + 2 \
+                WHERE hash IN (SELECT hash FROM {schema}.tbl_scan_blob)")
+            partitioned.dbh.execute(f"DROP TABLE {schema}.tbl_scan_blob")
+            partitioned.conn.commit()
+        partitioned._detachScan(partitioned_id)
+        self.assertEqual(4, self.blob_refcount(partitioned, payload))
+
+        sfdb = SpiderFootDb(opts, False)
+        self.assertEqual(payload, sfdb.scanResultEvent(partitioned_id, 'RAW_RIR_DATA')[0][1])
+        self.assertEqual(2, self.blob_refcount(sfdb, payload))
+        self.assertEqual(2, self.blob_refcount(sfdb, payload, sfdb._scanSchema(partitioned_id)))
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual(0, self.blob_refcount(sfdb, payload))
+        self.assertEqual(payload, sfdb.scanResultEvent(partitioned_id, 'RAW_RIR_DATA')[0][1])
+
+    def test_scan_partitions_should_be_searched_with_other_scans(self):
+        """
+        Test search(self, criteria, filterFp=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        partitioned = SpiderFootDb(dict(self.default_options, _scanpartitions=True), False)
+
+        token = uuid.uuid4().hex
+        instance_ids = [self.text_scan(sfdb, token)]
+        instance_ids += [self.text_scan(partitioned, token) for _ in range(partitioned._maxAttached + 2)]
+
+        results = sfdb.search({'text': token})
+        self.assertEqual(3 * len(instance_ids), len(results))
+        self.assertEqual(set(instance_ids), set(row[12] for row in results))
+        self.assertEqual(sorted(row[1] for row in results), [row[1] for row in results])
+        self.assertLessEqual(len(sfdb._attached), sfdb._maxAttached)
+
+        for instance_id in instance_ids:
+            sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.search({'text': token}))
+
+    def test_searchPage_should_search_scan_partitions(self):
+        """
+        Test searchPage(self, criteria, filterFp=False, after=None, limit=100)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        partitioned = SpiderFootDb(dict(self.default_options, _scanpartitions=True), False)
+
+        token = uuid.uuid4().hex
+        instance_id = self.text_scan(sfdb, token)
+        partitioned_id = self.text_scan(partitioned, token)
+
+        for criteria, expected in [
+            ({'scan_id': partitioned_id, 'text': token}, [partitioned_id] * 3),
+            ({'scan_id': instance_id, 'text': token}, [instance_id] * 3),
+            ({'text': token}, sorted([instance_id, partitioned_id] * 3)),
+        ]:
+            with self.subTest(criteria=criteria):
+                rows, after = sfdb.searchPage(dict(criteria), limit=10)
+                self.assertIsNone(after)
+                self.assertEqual(expected, [row[12] for row in rows])
+                self.assertEqual(sorted(sfdb.searchIter(dict(criteria))), sorted(rows))
+
+        sfdb.scanInstanceDelete(instance_id)
+        sfdb.scanInstanceDelete(partitioned_id)
+
     @unittest.skip("todo")
     def test_scanResultsUpdateFP(self):
         """
@@ -575,7 +1280,48 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanResultsUpdateFP(instance_id, invalid_type, fp_flag)
 
-    def test_configSet_should_set_config_opts(self):
+    def test_scanResultsUpdateFP_argument_children_should_set_descendants(self):
+        """
+        Test scanResultsUpdateFP(self, instanceId, resultHashes, fpFlag, children=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+
+        def false_positives():
+            return sorted(row[8] for row in sfdb.scanResultEvent(instance_id) if row[13])
+
+        self.assertTrue(sfdb.scanResultsUpdateFP(instance_id, [urls[0].hash, other.hash], 1))
+        self.assertEqual(sorted([urls[0].hash, other.hash]), false_positives())
+
+        self.assertTrue(sfdb.scanResultsUpdateFP(instance_id, [host.hash, host.hash], 1, children=True))
+        self.assertEqual(sorted([host.hash, other.hash] + [e.hash for e in urls + codes]), false_positives())
+
+        self.assertTrue(sfdb.scanResultsUpdateFP(instance_id, [root.hash], 0, children=True))
+        self.assertEqual([], false_positives())
+
+    def test_scanResultsUpdateFP_should_update_a_scan_partition_in_one_transaction(self):
+        """
+        Test scanResultsUpdateFP(self, instanceId, resultHashes, fpFlag, children=False)
+        """
+        partitioned = SpiderFootDb(dict(self.default_options, _scanpartitions=True), False)
+        instance_id, root, host, other, urls, codes = self.lineage_scan(partitioned)
+        partitioned._detachScan(instance_id)
+
+        sfdb = SpiderFootDb(self.default_options, False)
+        statements = list()
+        sfdb.conn.set_trace_callback(statements.append)
+        self.assertTrue(sfdb.scanResultsUpdateFP(instance_id, [host.hash], 1, children=True))
+        sfdb.conn.set_trace_callback(None)
+
+        first = next(i for i, statement in enumerate(statements) if "tbl_result_hashes" in statement)
+        self.assertEqual(["COMMIT"], [statement for statement in statements[first:] if statement == "COMMIT"])
+        self.assertEqual(
+            sorted([host.hash] + [e.hash for e in urls + codes]),
+            sorted(row[8] for row in sfdb.scanResultEvent(instance_id) if row[13])
+        )
+
+        sfdb.scanInstanceDelete(instance_id)
+
         """
         Test configSet(self, optMap=dict())
         """
@@ -1249,6 +1995,271 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanElementChildrenAll(instance_id, invalid_type)
 
+    def lineage_scan(self, sfdb):
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        other = SpiderFootEvent('INTERNET_NAME', 'mail.example.com', 'sfp_dnsbrute', root)
+        urls = [
+            SpiderFootEvent('LINKED_URL_INTERNAL', f"https://www.example.com/{path}", 'sfp_spider', host)
+            for path in ['a', 'b']
+        ]
+        codes = [
+            SpiderFootEvent('HTTP_CODE', code, 'sfp_spider', url)
+            for url in urls for code in ['200', '404']
+        ]
+        for event in [root, host, other] + urls + codes:
+            sfdb.scanEventStore(instance_id, event)
+
+        return instance_id, root, host, other, urls, codes
+
+    def test_scanResultEventPage_should_page_through_all_results(self):
+        """
+        Test scanResultEventPage(self, instanceId, eventType='ALL', srcModule=None, risk=None, text=None,
+            correlationId=None, filterFp=False, sort='generated', descending=False, after=None, limit=100)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = self.lineage_scan(sfdb)[0]
+        expected = sorted(sfdb.scanResultEvent(instance_id))
+
+        for sort in ['generated', 'type', 'module']:
+            for descending in [False, True]:
+                with self.subTest(sort=sort, descending=descending):
+                    rows, after, pages = [], None, 0
+                    while True:
+                        page, after = sfdb.scanResultEventPage(instance_id, sort=sort, descending=descending, after=after, limit=2)
+                        rows.extend(page)
+                        pages += 1
+                        if after is None:
+                            break
+                    self.assertEqual(expected, sorted(rows))
+                    self.assertEqual(5, pages)
+                    keys = [row[4] if sort == 'type' else row[3] for row in rows] if sort != 'generated' else None
+                    if keys:
+                        self.assertEqual(sorted(keys, reverse=descending), keys)
+
+        with self.assertRaises(ValueError):
+            sfdb.scanResultEventPage(instance_id, sort='data')
+        with self.assertRaises(TypeError):
+            sfdb.scanResultEventPage(None)
+
+    def test_scanResultEventPage_should_filter_results(self):
+        """
+        Test scanResultEventPage(self, instanceId, eventType='ALL', srcModule=None, risk=None, text=None,
+            correlationId=None, filterFp=False, sort='generated', descending=False, after=None, limit=100)
+        Test scanResultEventCount(self, instanceId, eventType='ALL', srcModule=None, risk=None, text=None,
+            correlationId=None, filterFp=False, maxCount=10000)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+        vuln = SpiderFootEvent('VULNERABILITY_GENERAL', 'example vulnerability', 'sfp_spider', urls[0])
+        vuln.risk = 80
+        sfdb.scanEventStore(instance_id, vuln)
+        sfdb.scanResultsUpdateFP(instance_id, [other.hash], 1)
+
+        for filters, expected in [
+            ({}, [root, host, other] + urls + codes + [vuln]),
+            ({'eventType': 'HTTP_CODE'}, codes),
+            ({'eventType': ['INTERNET_NAME', 'VULNERABILITY_GENERAL']}, [host, other, vuln]),
+            ({'srcModule': 'sfp_spider'}, urls + codes + [vuln]),
+            ({'risk': 50}, [vuln]),
+            ({'text': 'mail'}, [other]),
+            ({'text': 'www.example.com/*', 'eventType': 'LINKED_URL_INTERNAL'}, urls),
+            ({'filterFp': True, 'eventType': 'INTERNET_NAME'}, [host]),
+        ]:
+            with self.subTest(filters=filters):
+                rows, after = sfdb.scanResultEventPage(instance_id, **filters)
+                self.assertIsNone(after)
+                self.assertEqual(sorted(event.hash for event in expected), sorted(row[8] for row in rows))
+                self.assertEqual((len(expected), False), sfdb.scanResultEventCount(instance_id, **filters))
+
+        self.assertEqual((3, True), sfdb.scanResultEventCount(instance_id, srcModule='sfp_spider', filterFp=True, maxCount=3))
+
+    def test_scanResultEventUniquePage_should_page_through_unique_results(self):
+        """
+        Test scanResultEventUniquePage(self, instanceId, eventType='ALL', filterFp=False, after=None, limit=100)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = self.lineage_scan(sfdb)[0]
+
+        rows, after = sfdb.scanResultEventUniquePage(instance_id, 'HTTP_CODE', limit=1)
+        self.assertEqual([('200', 'HTTP_CODE', 2)], rows)
+        rows, after = sfdb.scanResultEventUniquePage(instance_id, 'HTTP_CODE', after=after, limit=1)
+        self.assertEqual([('404', 'HTTP_CODE', 2)], rows)
+        self.assertIsNone(after)
+
+        rows = sfdb.scanResultEventUniquePage(instance_id)[0]
+        self.assertEqual(sorted(rows), sorted(sfdb.scanResultEventUnique(instance_id)))
+
+    def test_scanLogPage_should_page_through_logs_latest_first(self):
+        """
+        Test scanLogPage(self, instanceId, logType=None, component=None, descending=True, after=None, limit=100)
+        Test scanLogCount(self, instanceId, logType=None, component=None, maxCount=10000)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = self.lineage_scan(sfdb)[0]
+        for i in range(5):
+            sfdb.scanLogEvent(instance_id, 'ERROR' if i % 2 else 'INFO', f"message {i}", 'sfp_spider' if i < 2 else 'sfp_dnsbrute')
+
+        rows, after = sfdb.scanLogPage(instance_id, limit=3)
+        self.assertEqual(['message 4', 'message 3', 'message 2'], [row[3] for row in rows])
+        rows, after = sfdb.scanLogPage(instance_id, after=after, limit=3)
+        self.assertEqual(['message 1', 'message 0'], [row[3] for row in rows])
+        self.assertIsNone(after)
+
+        rows = sfdb.scanLogPage(instance_id, descending=False, limit=2)[0]
+        self.assertEqual(['message 0', 'message 1'], [row[3] for row in rows])
+        rows = sfdb.scanLogPage(instance_id, logType='ERROR', component='sfp_dnsbrute')[0]
+        self.assertEqual(['message 3'], [row[3] for row in rows])
+
+        self.assertEqual((5, False), sfdb.scanLogCount(instance_id))
+        self.assertEqual((2, False), sfdb.scanLogCount(instance_id, logType='ERROR'))
+        self.assertEqual((2, True), sfdb.scanLogCount(instance_id, maxCount=2))
+
+    def test_scanLogPage_argument_includeDebug_should_page_through_debug_logs(self):
+        """
+        Test scanLogPage(self, instanceId, logType=None, component=None, descending=True, after=None, limit=100, includeDebug=False)
+        Test scanLogCount(self, instanceId, logType=None, component=None, maxCount=10000, includeDebug=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+        for batch in range(3):
+            sfdb.scanLogEvents([
+                (instance_id, 'DEBUG' if i % 3 else 'INFO', f"message {batch * 4 + i}", 'sfp_spider' if i % 2 else 'sfp_dnsbrute', batch * 4 + i)
+                for i in range(4)
+            ])
+        messages = [f"message {i}" for i in range(12)]
+
+        for descending in [True, False]:
+            for limit in [1, 2, 5, 12]:
+                with self.subTest(descending=descending, limit=limit):
+                    rows, after = sfdb.scanLogPage(instance_id, descending=descending, limit=limit, includeDebug=True)
+                    while after:
+                        page, after = sfdb.scanLogPage(instance_id, descending=descending, after=after, limit=limit, includeDebug=True)
+                        self.assertTrue(page)
+                        self.assertLessEqual(len(page), limit)
+                        rows += page
+                    self.assertEqual(messages[::-1] if descending else messages, [row[3] for row in rows])
+
+        rows = sfdb.scanLogPage(instance_id, logType='DEBUG', component='sfp_spider', descending=False, includeDebug=True)[0]
+        self.assertEqual(['message 1', 'message 5', 'message 9'], [row[3] for row in rows])
+        rows = sfdb.scanLogPage(instance_id, logType='INFO', includeDebug=True)[0]
+        self.assertEqual(['message 11', 'message 8', 'message 7', 'message 4', 'message 3', 'message 0'], [row[3] for row in rows])
+
+        self.assertEqual((12, False), sfdb.scanLogCount(instance_id, includeDebug=True))
+        self.assertEqual((6, False), sfdb.scanLogCount(instance_id, includeDebug=False))
+        self.assertEqual((6, False), sfdb.scanLogCount(instance_id, component='sfp_spider', includeDebug=True))
+        self.assertEqual((5, True), sfdb.scanLogCount(instance_id, component='sfp_spider', maxCount=5, includeDebug=True))
+
+        with self.assertRaises(ValueError):
+            sfdb.scanLogPage(instance_id, after=3, includeDebug=True)
+
+    def test_searchPage_should_page_through_search_results(self):
+        """
+        Test searchPage(self, criteria, filterFp=False, after=None, limit=100)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = self.lineage_scan(sfdb)[0]
+        criteria = {'scan_id': instance_id, 'value': '%example.com%'}
+
+        rows, after = [], None
+        while True:
+            page, after = sfdb.searchPage(dict(criteria), after=after, limit=2)
+            self.assertLessEqual(len(page), 2)
+            rows.extend(page)
+            if after is None:
+                break
+
+        self.assertEqual(sorted(sfdb.search(dict(criteria))), sorted(rows))
+
+        rows = sfdb.searchPage({'text': 'mail'})[0]
+        self.assertIn('mail.example.com', [row[1] for row in rows])
+
+    def test_scanElementSourcesAll_should_return_the_whole_discovery_path(self):
+        """
+        Test scanElementSourcesAll(self, instanceId, childData)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+
+        leaf_set = sfdb.scanResultEvent(instance_id, 'HTTP_CODE')
+        datamap, pc = sfdb.scanElementSourcesAll(instance_id, leaf_set)
+
+        self.assertEqual(
+            sorted([root.hash, host.hash] + [e.hash for e in urls + codes]),
+            sorted(datamap.keys())
+        )
+        self.assertEqual('www.example.com', datamap[host.hash][1])
+        self.assertEqual([host.hash], pc[root.hash])
+        self.assertEqual(sorted(u.hash for u in urls), sorted(pc[host.hash]))
+        for url in urls:
+            self.assertEqual(sorted(c.hash for c in codes if c.sourceEventHash == url.hash), sorted(pc[url.hash]))
+
+    def test_scanElementChildrenAll_should_return_all_descendants(self):
+        """
+        Test scanElementChildrenAll(self, instanceId, parentIds)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id, root, host, other, urls, codes = self.lineage_scan(sfdb)
+
+        children = sfdb.scanElementChildrenAll(instance_id, [host.hash])
+        self.assertEqual(sorted(e.hash for e in urls + codes), sorted(children))
+
+        children = sfdb.scanElementChildrenAll(instance_id, [urls[0].hash, other.hash])
+        self.assertEqual(sorted(c.hash for c in codes[:2]), sorted(children))
+
+        # ROOT is its own source, which must not stop the walk from ending
+        children = sfdb.scanElementChildrenAll(instance_id, [root.hash])
+        self.assertEqual(sorted([root.hash, host.hash, other.hash] + [e.hash for e in urls + codes]), sorted(children))
+
+    def test_scanResultLineage_should_return_a_list(self):
+        """
+        Test scanResultLineage(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = "example instance id"
+        scan_result_lineage = sfdb.scanResultLineage(instance_id)
+        self.assertIsInstance(scan_result_lineage, list)
+
+    def test_scanResultLineage_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanResultLineage(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanResultLineage(invalid_type)
+
+    def test_scanResultData_should_return_a_list(self):
+        """
+        Test scanResultData(self, instanceId, hashIds)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = "example instance id"
+        scan_result_data = sfdb.scanResultData(instance_id, ["example hash"])
+        self.assertIsInstance(scan_result_data, list)
+
+    def test_scanResultData_argument_hashIds_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanResultData(self, instanceId, hashIds)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = "example instance id"
+        invalid_types = [None, "", dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanResultData(instance_id, invalid_type)
+
     def test_correlationResultCreate_arguments_of_invalid_type_should_raise_TypeError(self):
         sfdb = SpiderFootDb(self.default_options, False)
 
@@ -1281,3 +2292,46 @@ class TestSpiderFootDb(unittest.TestCase):
             with self.subTest(invalid_type=invalid_type):
                 with self.assertRaises(TypeError):
                     sfdb.correlationResultCreate("", "", "", "", "", "", invalid_type, [])
+
+    def test_correlationResultDelete_arguments_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test correlationResultDelete(self, instanceId, correlationIds=None)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.correlationResultDelete(invalid_type)
+
+        invalid_types = ["", dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.correlationResultDelete("", invalid_type)
+
+    def test_correlationResultDelete_should_delete_correlation_results(self):
+        """
+        Test correlationResultDelete(self, instanceId, correlationIds=None)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(instance_id, root)
+
+        correlation_ids = [
+            sfdb.correlationResultCreate(instance_id, "rule", "name", "descr", "LOW", "yaml", title, [root.hash])
+            for title in ["first", "second", "third"]
+        ]
+
+        self.assertTrue(sfdb.correlationResultDelete(instance_id, correlation_ids[:1]))
+        self.assertEqual(['second', 'third'], sorted(c[1] for c in sfdb.scanCorrelationList(instance_id)))
+
+        self.assertTrue(sfdb.correlationResultDelete(instance_id, []))
+        self.assertEqual(2, len(sfdb.scanCorrelationList(instance_id)))
+
+        self.assertTrue(sfdb.correlationResultDelete(instance_id))
+        self.assertEqual([], sfdb.scanCorrelationList(instance_id))
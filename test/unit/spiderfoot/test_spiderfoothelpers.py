@@ -1,5 +1,6 @@
 # test_spiderfoot.py
 import pytest
+import sys
 import unittest
 
 from spiderfoot import SpiderFootHelpers
@@ -123,6 +124,36 @@ class TestSpiderFootHelpers(unittest.TestCase):
 
         self.assertEqual('TBD', 'TBD')
 
+    def test_buildGraphData_should_link_entities_to_nearest_entity_ancestors(self):
+        def row(data, source, event_type, event_hash):
+            return [0, data, source, 'module', 'type', 100, 0, 0, event_hash, 'source hash', 'descr', event_type, 'scan', 0, 0]
+
+        data = [
+            row('example.com', 'example.com', 'INTERNAL', 'ROOT'),
+            row('www.example.com', 'example.com', 'ENTITY', 'a'),
+            row('banner', 'www.example.com', 'DESCRIPTOR', 'b'),
+            row('user@example.com', 'banner', 'ENTITY', 'c'),
+            # Values that are not entities, found from each other
+            row('loop a', 'loop b', 'DATA', 'd'),
+            row('loop b', 'loop a', 'DATA', 'e'),
+            row('loop b', 'www.example.com', 'DATA', 'f'),
+            row('loop@example.com', 'loop a', 'ENTITY', 'g'),
+        ]
+        # Deeper than the recursion limit
+        for i in range(sys.getrecursionlimit() + 10):
+            data.append(row(f"chain {i}", f"chain {i - 1}" if i else 'example.com', 'DATA', f"chain {i}"))
+        data.append(row('chain@example.com', f"chain {i}", 'ENTITY', 'h'))
+
+        self.assertEqual(
+            {
+                ('www.example.com', 'example.com'),
+                ('user@example.com', 'www.example.com'),
+                ('loop@example.com', 'www.example.com'),
+                ('chain@example.com', 'example.com'),
+            },
+            SpiderFootHelpers.buildGraphData(data)
+        )
+
     def test_buildGraphGexf_should_return_bytes(self):
         gexf = SpiderFootHelpers.buildGraphGexf('test root', 'test title', [["test", "test", "test", "test", "test", "test", "test", "test", "test", "test", "test", "ENTITY", "test", "test", "test"]])
         self.assertIsInstance(gexf, bytes)
@@ -150,6 +181,25 @@ class TestSpiderFootHelpers(unittest.TestCase):
         tree = SpiderFootHelpers.dataParentChildToTree({"test": {"123": "456"}})
         self.assertIsInstance(tree, dict)
 
+    def test_dataParentChildToTree_should_nest_children(self):
+        depth = sys.getrecursionlimit() + 100
+        data = {str(i): [str(i + 1)] for i in range(depth)}
+        data['0'].append('loop')
+        data['loop'] = ['loop']
+
+        tree = SpiderFootHelpers.dataParentChildToTree(data)
+        self.assertEqual('0', tree['name'])
+        self.assertEqual(['1', 'loop'], [child['name'] for child in tree['children']])
+
+        loop = tree['children'][1]
+        self.assertEqual([{'name': 'loop', 'children': None}], loop['children'])
+
+        node = tree
+        for i in range(depth):
+            self.assertEqual(str(i), node['name'])
+            node = node['children'][0]
+        self.assertEqual({'name': str(depth), 'children': None}, node)
+
     def test_genScanInstanceId_should_return_a_string(self):
         scan_instance_id = SpiderFootHelpers.genScanInstanceId()
         self.assertIsInstance(scan_instance_id, str)
@@ -0,0 +1,228 @@
+# test_spiderfootincrementalcorrelator.py
+import queue
+import unittest
+import uuid
+
+from spiderfoot import SpiderFootCorrelator, SpiderFootDb, SpiderFootEvent, SpiderFootIncrementalCorrelator
+
+
+class TestSpiderFootIncrementalCorrelator(unittest.TestCase):
+    """
+    Test SpiderFootIncrementalCorrelator
+    """
+
+    ruleset = {
+        'host_bruteforce_only': """
+id: host_bruteforce_only
+version: 1
+meta:
+  name: Host only from bruteforcing
+  description: Host only from bruteforcing
+  risk: LOW
+collections:
+  - collect:
+      - method: exact
+        field: type
+        value: INTERNET_NAME
+      - method: exact
+        field: module
+        value: sfp_dnsbrute
+  - collect:
+      - method: exact
+        field: type
+        value: INTERNET_NAME
+      - method: exact
+        field: module
+        value: not sfp_dnsbrute
+aggregation:
+  field: data
+analysis:
+  - method: first_collection_only
+    field: data
+headline: "Host found only through bruteforcing: {data}"
+""",
+        'host_many_codes': """
+id: host_many_codes
+version: 1
+meta:
+  name: Several HTTP codes for a host
+  description: Several HTTP codes for a host
+  risk: INFO
+collections:
+  - collect:
+      - method: exact
+        field: type
+        value: HTTP_CODE
+aggregation:
+  field: entity.data
+analysis:
+  - method: threshold
+    field: entity.data
+    minimum: 2
+headline: "Several HTTP codes for {entity.data}"
+""",
+        'url_not_found': """
+id: url_not_found
+version: 1
+meta:
+  name: URL not found
+  description: URL not found
+  risk: INFO
+collections:
+  - collect:
+      - method: exact
+        field: type
+        value: LINKED_URL_INTERNAL
+      - method: exact
+        field: child.data
+        value: "404"
+headline: "URL not found: {data}"
+"""
+    }
+
+    def scan(self, sfdb, status='RUNNING'):
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'correlation test', 'example.com')
+        sfdb.scanInstanceSet(scan_id, status=status)
+        return scan_id
+
+    def events(self):
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        brute = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        other = SpiderFootEvent('INTERNET_NAME', 'mail.example.com', 'sfp_dnsbrute', root)
+        url = SpiderFootEvent('LINKED_URL_INTERNAL', 'https://www.example.com/', 'sfp_spider', brute)
+        found = SpiderFootEvent('HTTP_CODE', '200', 'sfp_spider', url)
+        missing = SpiderFootEvent('HTTP_CODE', '404', 'sfp_spider', url)
+        crt = SpiderFootEvent('INTERNET_NAME', 'mail.example.com', 'sfp_crt', root)
+        return [root, brute, other, url, found], [missing, crt]
+
+    def correlations(self, sfdb, scan_id):
+        return sorted((c[2], c[1], c[7]) for c in sfdb.scanCorrelationList(scan_id))
+
+    def test_init_argument_scanId_invalid_type_should_raise_TypeError(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootIncrementalCorrelator(sfdb, {}, invalid_type)
+
+    def test_add_event_argument_sfEvent_invalid_type_should_raise_TypeError(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, {}, self.scan(sfdb))
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    correlator.add_event(invalid_type)
+
+    def test_query_match_should_apply_empty_filters(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, {}, self.scan(sfdb))
+
+        query_args = {'eventType': ['INTERNET_NAME'], 'srcModule': []}
+        self.assertFalse(correlator.query_match(query_args, 'INTERNET_NAME', 'sfp_dnsbrute', 'www.example.com'))
+        self.assertTrue(correlator.query_match({'eventType': ['INTERNET_NAME']}, 'INTERNET_NAME', 'sfp_dnsbrute', 'www.example.com'))
+
+    def test_refresh_correlations_should_update_correlations_as_events_arrive(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, self.ruleset, scan_id)
+
+        first, second = self.events()
+        for event in first:
+            sfdb.scanEventStore(scan_id, event)
+            correlator.add_event(event)
+        self.assertEqual(len(self.ruleset), correlator.refresh_correlations())
+
+        self.assertEqual([
+            ('host_bruteforce_only', 'Host found only through bruteforcing: mail.example.com', 1),
+            ('host_bruteforce_only', 'Host found only through bruteforcing: www.example.com', 1)
+        ], self.correlations(sfdb, scan_id))
+        unchanged = [c[0] for c in sfdb.scanCorrelationList(scan_id) if 'www' in c[1]]
+
+        # Nothing new, nothing to do
+        self.assertEqual(0, correlator.refresh_correlations())
+
+        for event in second:
+            sfdb.scanEventStore(scan_id, event)
+            correlator.add_event(event)
+        correlator.refresh_correlations()
+
+        self.assertEqual([
+            ('host_bruteforce_only', 'Host found only through bruteforcing: www.example.com', 1),
+            ('host_many_codes', 'Several HTTP codes for www.example.com', 2),
+            ('url_not_found', 'URL not found: https://www.example.com/', 1)
+        ], self.correlations(sfdb, scan_id))
+        self.assertEqual(unchanged, [c[0] for c in sfdb.scanCorrelationList(scan_id) if 'bruteforcing' in c[1]])
+
+    def test_init_should_read_stored_event_data_when_rules_need_it(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)
+        first, second = self.events()
+        for event in first + second:
+            sfdb.scanEventStore(scan_id, event)
+
+        correlator = SpiderFootIncrementalCorrelator(sfdb, self.ruleset, scan_id)
+        self.assertEqual(dict(), correlator.lineage._data)
+
+        correlator.refresh_correlations()
+        self.assertEqual([
+            ('host_bruteforce_only', 'Host found only through bruteforcing: www.example.com', 1),
+            ('host_many_codes', 'Several HTTP codes for www.example.com', 2),
+            ('url_not_found', 'URL not found: https://www.example.com/', 1)
+        ], self.correlations(sfdb, scan_id))
+
+    def test_reconcile_correlations_should_match_batch_correlations(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        first, second = self.events()
+
+        batch_scan_id = self.scan(sfdb, 'FINISHED')
+        for event in first + second:
+            sfdb.scanEventStore(batch_scan_id, event)
+        SpiderFootCorrelator(sfdb, self.ruleset, batch_scan_id).run_correlations()
+        self.assertEqual(3, len(sfdb.scanCorrelationList(batch_scan_id)))
+
+        scan_id = self.scan(sfdb)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, self.ruleset, scan_id)
+        for event in first + second:
+            sfdb.scanEventStore(scan_id, event)
+            correlator.add_event(event)
+            correlator.refresh_correlations()
+
+        # Streamed results already match the batch
+        self.assertEqual(self.correlations(sfdb, batch_scan_id), self.correlations(sfdb, scan_id))
+        streamed = sorted(c[0] for c in sfdb.scanCorrelationList(scan_id))
+
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+        correlator.reconcile_correlations()
+        self.assertEqual(self.correlations(sfdb, batch_scan_id), self.correlations(sfdb, scan_id))
+        self.assertEqual(streamed, sorted(c[0] for c in sfdb.scanCorrelationList(scan_id)))
+
+    def test_stream_correlations_should_reconcile_once_finished(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, self.ruleset, scan_id)
+
+        events = queue.Queue()
+        first, second = self.events()
+        for event in first + second:
+            sfdb.scanEventStore(scan_id, event)
+            events.put(event)
+        events.put('FINISHED')
+
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+        self.assertTrue(correlator.stream_correlations(events, 60))
+        self.assertEqual(3, len(sfdb.scanCorrelationList(scan_id)))
+
+    def test_stream_correlations_should_stop_without_reconciling(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)
+        correlator = SpiderFootIncrementalCorrelator(sfdb, self.ruleset, scan_id)
+
+        events = queue.Queue()
+        events.put(None)
+        self.assertFalse(correlator.stream_correlations(events, 60))
+        self.assertEqual([], sfdb.scanCorrelationList(scan_id))
@@ -0,0 +1,131 @@
+# test_spiderfootlineage.py
+import pytest
+import unittest
+import uuid
+
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootLineage
+
+
+@pytest.mark.usefixtures
+class TestSpiderFootLineage(unittest.TestCase):
+    """
+    Test SpiderFootLineage
+    """
+
+    def scan(self, sfdb):
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'lineage test', 'example.com')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        url = SpiderFootEvent('LINKED_URL_INTERNAL', 'https://www.example.com/', 'sfp_spider', host)
+        codes = [
+            SpiderFootEvent('HTTP_CODE', code, 'sfp_spider', url)
+            for code in ['404', '200']
+        ]
+        for event in [root, host, url] + codes:
+            sfdb.scanEventStore(scan_id, event)
+
+        return scan_id, root, host, url, codes
+
+    def test_init_argument_dbh_invalid_type_should_raise_TypeError(self):
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootLineage(invalid_type, 'example scan id')
+
+    def test_init_argument_scanId_invalid_type_should_raise_TypeError(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootLineage(sfdb, invalid_type)
+
+    def test_lineage_should_describe_results(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root, host, url, codes = self.scan(sfdb)
+
+        lineage = SpiderFootLineage(sfdb, scan_id)
+        self.assertEqual(5, len(lineage))
+
+        node = lineage.node(url.hash)
+        self.assertEqual(url.hash, lineage.hash(node))
+        self.assertEqual('LINKED_URL_INTERNAL', lineage.eventType(node))
+        self.assertEqual('sfp_spider', lineage.module(node))
+        self.assertEqual('https://www.example.com/', lineage.data(node))
+        self.assertEqual(lineage.node(host.hash), lineage.parent(node))
+        self.assertEqual(
+            sorted(lineage.node(c.hash) for c in codes),
+            sorted(lineage.children(node))
+        )
+        self.assertIsNone(lineage.node('example unknown hash'))
+
+    def test_nearestAncestor_should_skip_results_of_other_types(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root, host, url, codes = self.scan(sfdb)
+
+        lineage = SpiderFootLineage(sfdb, scan_id)
+        for code in codes:
+            with self.subTest(code=code.data):
+                ancestor = lineage.nearestAncestor(lineage.node(code.hash), {'INTERNET_NAME'})
+                self.assertEqual(host.hash, lineage.hash(ancestor))
+
+        self.assertEqual(-1, lineage.nearestAncestor(lineage.node(host.hash), {'EMAILADDR'}))
+
+    def test_discoveryPaths_should_return_parents_up_to_root(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root, host, url, codes = self.scan(sfdb)
+
+        lineage = SpiderFootLineage(sfdb, scan_id)
+        paths = lineage.discoveryPaths([lineage.node(code.hash) for code in codes])
+        self.assertEqual(
+            {
+                lineage.node(codes[0].hash): lineage.node(url.hash),
+                lineage.node(codes[1].hash): lineage.node(url.hash),
+                lineage.node(url.hash): lineage.node(host.hash),
+                lineage.node(host.hash): lineage.node(root.hash),
+                lineage.node(root.hash): lineage.node(root.hash),
+            },
+            paths
+        )
+        self.assertEqual({}, lineage.discoveryPaths([]))
+
+    def test_addResult_should_extend_loaded_lineage(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root, host, url, codes = self.scan(sfdb)
+
+        lineage = SpiderFootLineage(sfdb, scan_id)
+        self.assertEqual(2, len(lineage.children(lineage.node(url.hash))))
+
+        code = SpiderFootEvent('HTTP_CODE', '500', 'sfp_spider', url)
+        node = lineage.addResult(code.hash, url.hash, code.eventType, code.module, code.data)
+        self.assertEqual(6, len(lineage))
+        self.assertEqual('500', lineage.data(node))
+        self.assertEqual(lineage.node(url.hash), lineage.parent(node))
+        self.assertIn(node, lineage.children(lineage.node(url.hash)))
+        self.assertIsNone(lineage.addResult(code.hash, url.hash, code.eventType, code.module, code.data))
+
+    def test_addResult_should_link_results_added_before_their_parent(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = str(uuid.uuid4())
+        lineage = SpiderFootLineage(sfdb, scan_id)
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        email = SpiderFootEvent('EMAILADDR', 'bob@www.example.com', 'sfp_spider', host)
+
+        rootNode = lineage.addResult(root.hash, root.sourceEventHash, root.eventType, root.module, root.data)
+        self.assertEqual(rootNode, lineage.parent(rootNode))
+
+        emailNode = lineage.addResult(email.hash, host.hash, email.eventType, email.module, email.data)
+        self.assertEqual(-1, lineage.parent(emailNode))
+        self.assertEqual(-1, lineage.nearestAncestor(emailNode, {'INTERNET_NAME'}))
+        self.assertEqual([emailNode], lineage.orphans(host.hash))
+
+        hostNode = lineage.addResult(host.hash, root.hash, host.eventType, host.module, host.data)
+        self.assertEqual(hostNode, lineage.parent(emailNode))
+        self.assertEqual(hostNode, lineage.nearestAncestor(emailNode, {'INTERNET_NAME'}))
+        self.assertEqual([], lineage.orphans(host.hash))
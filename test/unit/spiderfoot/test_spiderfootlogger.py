@@ -0,0 +1,109 @@
+# test_spiderfootlogger.py
+import logging
+import queue
+import pytest
+import time
+import unittest
+import uuid
+
+from spiderfoot import SpiderFootDb
+from spiderfoot.logger import SpiderFootSqliteLogHandler, logStats, logWorkerSetup
+
+
+@pytest.mark.usefixtures
+class TestSpiderFootLogger(unittest.TestCase):
+    """
+    Test spiderfoot.logger
+    """
+
+    def record(self, scan_id, level, message):
+        record = logging.LogRecord('spiderfoot.test', level, __file__, 1, message, None, None)
+        record.scanId = scan_id
+        return record
+
+    def scan(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'logger test', 'example.com')
+        return sfdb, scan_id
+
+    def test_handler_should_write_full_batches_without_waiting(self):
+        sfdb, scan_id = self.scan()
+        handler = SpiderFootSqliteLogHandler(self.default_options)
+        handler.batch_size = 2
+        handler.flushInterval = 60
+
+        try:
+            handler.emit(self.record(scan_id, logging.INFO, 'first message'))
+            handler.emit(self.record(scan_id, logging.ERROR, 'second message'))
+
+            for _ in range(100):
+                if handler.stats()['written'] == 2:
+                    break
+                time.sleep(0.05)
+
+            self.assertEqual(
+                [('STATUS', 'first message'), ('ERROR', 'second message')],
+                [(row[2], row[3]) for row in sfdb.scanLogs(scan_id, reverse=True)]
+            )
+        finally:
+            handler.close()
+
+    def test_handler_should_write_records_on_a_timer(self):
+        sfdb, scan_id = self.scan()
+        handler = SpiderFootSqliteLogHandler(self.default_options)
+        handler.flushInterval = 0.1
+
+        try:
+            handler.emit(self.record(scan_id, logging.INFO, 'example message'))
+            handler.emit(self.record(None, logging.INFO, 'not part of a scan'))
+
+            for _ in range(100):
+                if handler.stats()['written'] == 1:
+                    break
+                time.sleep(0.05)
+
+            stats = handler.stats()
+            self.assertEqual(1, stats['written'])
+            self.assertEqual(0, stats['buffered'])
+            self.assertGreaterEqual(stats['lag'], 0.1)
+            self.assertGreaterEqual(logStats()['written'], 1)
+            self.assertEqual(['example message'], [row[3] for row in sfdb.scanLogs(scan_id)])
+        finally:
+            handler.close()
+
+    def test_handler_should_drop_debug_records_when_too_many_are_buffered(self):
+        sfdb, scan_id = self.scan()
+        handler = SpiderFootSqliteLogHandler(self.default_options)
+        handler.flushInterval = 60
+        handler.maxBuffered = 2
+
+        for level in [logging.DEBUG, logging.DEBUG, logging.DEBUG, logging.ERROR]:
+            handler.emit(self.record(scan_id, level, logging.getLevelName(level)))
+        self.assertEqual(1, handler.stats()['dropped'])
+
+        handler.close()
+        self.assertEqual(3, handler.stats()['written'])
+        self.assertEqual(['ERROR'], [row[2] for row in sfdb.scanLogs(scan_id)])
+        self.assertEqual(2, len(sfdb.scanDebugLogs(scan_id)))
+
+    def test_logWorkerSetup_should_filter_by_level_before_queueing(self):
+        log = logging.getLogger("spiderfoot")
+        handlers = log.handlers[:]
+        level = log.level
+        log.handlers = []
+
+        try:
+            logging_queue = queue.Queue()
+            logWorkerSetup(logging_queue, {'_debug': False})
+            log.debug('debug message')
+            log.info('info message')
+            self.assertEqual(['info message'], [logging_queue.get_nowait().getMessage()])
+            self.assertTrue(logging_queue.empty())
+
+            logWorkerSetup(logging_queue, {'_debug': True})
+            log.debug('debug message')
+            self.assertEqual('debug message', logging_queue.get_nowait().getMessage())
+        finally:
+            log.handlers = handlers
+            log.setLevel(level)
@@ -0,0 +1,104 @@
+# test_spiderfootpublisher.py
+import pytest
+import queue
+import unittest
+import uuid
+
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootScanPublisher
+
+
+@pytest.mark.usefixtures
+class TestSpiderFootScanPublisher(unittest.TestCase):
+    """
+    Test SpiderFootScanPublisher
+    """
+
+    def scan(self, sfdb):
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'publisher test', 'example.com')
+        sfdb.scanInstanceSet(scan_id, status='RUNNING')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(scan_id, root)
+        return scan_id, root
+
+    def messages(self, subscriber):
+        messages = []
+        while True:
+            try:
+                messages.append(subscriber.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def publisher(self):
+        publisher = SpiderFootScanPublisher(self.default_options)
+        # Poll by hand rather than from the publisher thread
+        publisher._thread = object()
+        return publisher
+
+    def test_init_argument_opts_of_invalid_type_should_raise_TypeError(self):
+        invalid_types = [None, "", list(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootScanPublisher(invalid_type)
+
+    def test_poll_should_only_publish_changes(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id, root = self.scan(sfdb)
+        publisher = self.publisher()
+        subscriber = publisher.subscribe(scan_id)
+        follower = publisher.subscribe(scan_id, results=True)
+
+        publisher.poll(sfdb, scan_id)
+        self.assertEqual(['status', 'summary', 'errors'], [m[0] for m in self.messages(subscriber)])
+        self.assertEqual(3, len(self.messages(follower)))
+
+        publisher.poll(sfdb, scan_id)
+        self.assertEqual([], self.messages(subscriber))
+
+        host = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_dnsbrute', root)
+        sfdb.scanEventStore(scan_id, host)
+        sfdb.scanLogEvent(scan_id, 'ERROR', 'example error', 'sfp_dnsbrute')
+        publisher.poll(sfdb, scan_id)
+
+        messages = dict(self.messages(subscriber))
+        self.assertEqual(['summary', 'log', 'errors'], list(messages))
+        self.assertEqual(['example error'], [row[3] for row in messages['log']])
+        self.assertEqual(1, messages['errors'])
+
+        messages = dict(self.messages(follower))
+        self.assertEqual([host.hash], [row[5] for row in messages['results']])
+
+        # Late subscribers start from the latest state
+        late = publisher.subscribe(scan_id)
+        self.assertEqual(['status', 'summary', 'errors'], [m[0] for m in self.messages(late)])
+
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+        publisher.poll(sfdb, scan_id)
+        self.assertEqual([('status', 'FINISHED'), ('end', 'FINISHED')], [(m[0], m[1][0][5] if m[0] == 'status' else m[1]) for m in self.messages(subscriber)])
+
+    def test_unsubscribe_should_stop_publishing(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)[0]
+        publisher = self.publisher()
+        subscriber = publisher.subscribe(scan_id)
+
+        publisher.unsubscribe(scan_id, subscriber)
+        publisher.unsubscribe(scan_id, subscriber)
+        publisher.poll(sfdb, scan_id)
+        self.assertEqual([], self.messages(subscriber))
+
+    def test_subscribe_should_publish_from_a_thread(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = self.scan(sfdb)[0]
+        sfdb.scanInstanceSet(scan_id, status='ABORTED')
+        publisher = SpiderFootScanPublisher(self.default_options)
+        subscriber = publisher.subscribe(scan_id)
+
+        messages = []
+        while not messages or messages[-1][0] != 'end':
+            messages.append(subscriber.get(timeout=10))
+        self.assertEqual('ABORTED', messages[-1][1])
+        publisher.unsubscribe(scan_id, subscriber)
+
+        publisher.subscribe(str(uuid.uuid4()))
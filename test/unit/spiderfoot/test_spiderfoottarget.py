@@ -1,6 +1,8 @@
 # test_spiderfoottarget.py
 import unittest
 
+import netaddr
+
 from spiderfoot import SpiderFootTarget
 
 
@@ -311,3 +313,123 @@ class TestSpiderFootTarget(unittest.TestCase):
 
         matches = target.matches("")
         self.assertFalse(matches)
+
+    def test_matches_argument_includeParents_false_with_matching_target_parent_domain_should_return_False(self):
+        parent_domain = 'spiderfoot.net'
+        target_value = f"test.{parent_domain}"
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+
+        matches = target.matches(parent_domain, includeParents=False)
+        self.assertFalse(matches)
+
+    def test_matches_should_match_alias_set_after_previous_matches(self):
+        target_value = 'spiderfoot.net'
+        target_type = 'INTERNET_NAME'
+        target = SpiderFootTarget(target_value, target_type)
+
+        self.assertFalse(target.matches('www.spiderfoot.test'))
+
+        target.setAlias('spiderfoot.test', 'INTERNET_NAME')
+
+        self.assertTrue(target.matches('www.spiderfoot.test'))
+
+    def test_matches_should_match_alias_set_during_previous_matches(self):
+        target = SpiderFootTarget('spiderfoot.net', 'INTERNET_NAME')
+        matchesIndex = target._matchesIndex
+
+        # Another thread sets an alias after the verdict is reached
+        def set_alias_after_verdict(*args):
+            try:
+                return matchesIndex(*args)
+            finally:
+                target.setAlias('spiderfoot.test', 'INTERNET_NAME')
+
+        target._matchesIndex = set_alias_after_verdict
+        self.assertFalse(target.matches('www.spiderfoot.test'))
+        del target._matchesIndex
+        self.assertTrue(target.matches('www.spiderfoot.test'))
+
+        target = SpiderFootTarget('spiderfoot.net', 'INTERNET_NAME')
+        getAddresses = target.getAddresses
+
+        # Another thread sets an alias while the index is built
+        def set_alias_during_index():
+            target.setAlias('spiderfoot.test', 'INTERNET_NAME')
+            return getAddresses()
+
+        target.getAddresses = set_alias_during_index
+        self.assertFalse(target.matches('www.spiderfoot.test'))
+        del target.getAddresses
+        self.assertTrue(target.matches('www.spiderfoot.test'))
+
+    def test_matches_should_return_same_results_as_linear_matching(self):
+        def linear_matches(target, value, includeParents=False, includeChildren=True):
+            if not value:
+                return False
+            if target.targetType in ["HUMAN_NAME", "PHONE_NUMBER", "USERNAME", "BITCOIN_ADDRESS"]:
+                return True
+            if netaddr.valid_ipv4(value) or netaddr.valid_ipv6(value):
+                if value in target.getAddresses():
+                    return True
+                if target.targetType in ["IP_ADDRESS", "IPV6_ADDRESS", "NETBLOCK_OWNER", "NETBLOCKV6_OWNER"]:
+                    try:
+                        if netaddr.IPAddress(value) in netaddr.IPNetwork(target.targetValue):
+                            return True
+                    except netaddr.AddrFormatError:
+                        return False
+                return False
+            for name in target.getNames():
+                if value == name:
+                    return True
+                if includeParents and name.endswith("." + value):
+                    return True
+                if includeChildren and value.endswith("." + name):
+                    return True
+            return False
+
+        targets = [
+            ('spiderfoot.net', 'INTERNET_NAME'),
+            ('test.spiderfoot.net', 'INTERNET_NAME'),
+            ('user@spiderfoot.net', 'EMAILADDR'),
+            ('127.0.0.1', 'IP_ADDRESS'),
+            ('127.0.0.0/24', 'NETBLOCK_OWNER'),
+            ('::1', 'IPV6_ADDRESS'),
+            ('2001:db8::/64', 'NETBLOCKV6_OWNER'),
+            ('example target value', 'IP_ADDRESS'),
+            ('AS1234', 'BGP_AS_OWNER'),
+            ('SpiderFoot', 'USERNAME'),
+        ]
+
+        aliases = [
+            ('www.spiderfoot.net', 'INTERNET_NAME'),
+            ('spiderfoot.test', 'INTERNET_NAME'),
+            ('a.b.example.com', 'INTERNET_NAME'),
+            ('..net', 'INTERNET_NAME'),
+            ('127.0.0.5', 'IP_ADDRESS'),
+            ('10.0.0.1', 'IP_ADDRESS'),
+            ('2001:db8::5', 'IPV6_ADDRESS'),
+            ('::2', 'IPV6_ADDRESS'),
+        ]
+
+        values = [
+            'spiderfoot.net', 'www.spiderfoot.net', 'test.spiderfoot.net', 'a.test.spiderfoot.net',
+            'net', '.net', 'spiderfoot', 'otherspiderfoot.net', 'spiderfoot.net.test',
+            'spiderfoot.test', 'x.spiderfoot.test', 'test', 'example.com', 'b.example.com',
+            'x.a.b.example.com', 'com', 'SPIDERFOOT.NET', 'x..net', 'user@spiderfoot.net',
+            '127.0.0.1', '127.0.0.2', '127.0.0.5', '127.0.1.1', '10.0.0.1', '10.0.0.2',
+            '::1', '::2', '::3', '2001:db8::1', '2001:db8::5', '2001:db8:1::1',
+            'example target value', 'AS1234',
+        ]
+
+        for target_value, target_type in targets:
+            target = SpiderFootTarget(target_value, target_type)
+            for alias_count in range(len(aliases) + 1):
+                if alias_count:
+                    target.setAlias(*aliases[alias_count - 1])
+                for value in values:
+                    for includeParents in (True, False):
+                        for includeChildren in (True, False):
+                            with self.subTest(target=target_value, aliases=alias_count, value=value, includeParents=includeParents, includeChildren=includeChildren):
+                                expected = linear_matches(target, value, includeParents, includeChildren)
+                                self.assertEqual(expected, target.matches(value, includeParents, includeChildren))
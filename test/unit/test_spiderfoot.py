@@ -310,6 +310,46 @@ class TestSpiderFoot(unittest.TestCase):
         self.assertIsInstance(host_domain, str)
         self.assertEqual('spiderfoot.net', host_domain)
 
+    def test_private_suffix_should_return_a_string(self):
+        sf = SpiderFoot(self.default_options)
+        tlds = self.test_tlds.splitlines()
+
+        private_suffix = sf.privateSuffix('www.spiderfoot.net', tlds)
+        self.assertIsInstance(private_suffix, str)
+        self.assertEqual('spiderfoot.net', private_suffix)
+
+        private_suffix = sf.privateSuffix('www.spiderfoot.example', tlds)
+        self.assertEqual('spiderfoot.example', private_suffix)
+
+        private_suffix = sf.privateSuffix('www.spiderfoot.example', tlds, acceptUnknown=False)
+        self.assertIsNone(private_suffix)
+
+    def test_private_suffix_should_share_matchers_between_copies_of_tldlist(self):
+        sf = SpiderFoot(self.default_options)
+        tlds = self.test_tlds.splitlines()
+
+        sf.privateSuffix('www.spiderfoot.net', tlds)
+        matchers = len(SpiderFoot._suffixMatchers)
+
+        private_suffix = sf.privateSuffix('www.spiderfoot.net', list(tlds))
+        self.assertEqual('spiderfoot.net', private_suffix)
+        self.assertEqual(matchers, len(SpiderFoot._suffixMatchers))
+
+        private_suffix = sf.privateSuffix('www.spiderfoot.net', tlds + ['example'], acceptUnknown=False)
+        self.assertEqual('spiderfoot.net', private_suffix)
+        self.assertEqual(matchers + 1, len(SpiderFoot._suffixMatchers))
+
+    def test_private_suffix_should_remember_a_bounded_number_of_tldlists(self):
+        sf = SpiderFoot(self.default_options)
+        tlds = self.test_tlds.splitlines()
+
+        copies = [list(tlds) for _ in range(SpiderFoot._tldListKeysSize + 10)]
+        for copy in copies:
+            self.assertEqual('spiderfoot.net', sf.privateSuffix('www.spiderfoot.net', copy))
+        self.assertEqual(SpiderFoot._tldListKeysSize, len(SpiderFoot._tldListKeys))
+        self.assertIn(id(copies[-1]), SpiderFoot._tldListKeys)
+        self.assertNotIn(id(copies[0]), SpiderFoot._tldListKeys)
+
     def test_host_domain_invalid_tldlist_should_return_none(self):
         sf = SpiderFoot(dict())
 
@@ -726,6 +766,15 @@ class TestSpiderFoot(unittest.TestCase):
         check_dns_wildcard = sf.checkDnsWildcard('local')
         self.assertIsInstance(check_dns_wildcard, bool)
 
+    def test_dns_wildcard_addresses_invalid_target_should_return_a_list(self):
+        sf = SpiderFoot(self.default_options)
+
+        invalid_types = [None, "", bytes(), list(), dict()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                wildcard_addresses = sf.dnsWildcardAddresses(invalid_type)
+                self.assertEqual([], wildcard_addresses)
+
     @unittest.skip("todo")
     def test_google_iterate(self):
         sf = SpiderFoot(self.default_options)
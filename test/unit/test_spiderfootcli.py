@@ -294,6 +294,32 @@ class TestSpiderFootCli(unittest.TestCase):
                 result = sfcli.request(invalid_type)
                 self.assertEqual(None, result)
 
+    def test_request_pages_should_follow_cursors(self):
+        """
+        Test request_pages(self, url, post, count=None, cursor=None)
+        """
+        sfcli = SpiderFootCli()
+        pages = {
+            '': '{"rows": [1, 2], "next": "b", "total": 3, "totalCapped": true}',
+            'b': '{"rows": [3], "next": null, "total": null, "totalCapped": false}'
+        }
+        requests = []
+
+        def request(url, post=None):
+            requests.append(dict(post))
+            return pages[post['cursor']]
+
+        sfcli.request = request
+
+        self.assertEqual(([1, 2, 3], None, "3+"), sfcli.request_pages("/scanlog", {'id': 'example'}))
+        self.assertEqual([1000, 1000], [post['pageSize'] for post in requests])
+
+        self.assertEqual(([1, 2], "b", "3+"), sfcli.request_pages("/scanlog", {'id': 'example'}, count=2))
+        self.assertEqual(([3], None, None), sfcli.request_pages("/scanlog", {'id': 'example'}, count=2, cursor="b"))
+
+        sfcli.request = lambda url, post=None: None
+        self.assertIsNone(sfcli.request_pages("/scanlog", {'id': 'example'}))
+
     def test_emptyline_should_return_none(self):
         """
         Test emptyline(self)
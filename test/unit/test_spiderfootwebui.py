@@ -1,8 +1,15 @@
 # test_spiderfootwebui.py
+import csv
+import io
+import json
+import openpyxl
 import pytest
+import tracemalloc
 import unittest
+import uuid
 
 from sfwebui import SpiderFootWebUi
+from spiderfoot import SpiderFootArchive, SpiderFootDb, SpiderFootEvent
 
 
 @pytest.mark.usefixtures
@@ -169,6 +176,161 @@ class TestSpiderFootWebUi(unittest.TestCase):
         search_results = sfwebui.scansearchresultexport("", None, None, "excel")
         self.assertIsInstance(search_results, bytes)
 
+    def export_scan(self):
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'export scan', 'example.com')
+
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        sfdb.scanEventStore(scan_id, root)
+        for i in range(20):
+            sfdb.scanEventStore(scan_id, SpiderFootEvent('INTERNET_NAME', f"host{i}.example.com", 'example module', root))
+
+        return scan_id
+
+    def test_scan_event_result_export_csv_should_stream_chunks(self):
+        """
+        Test scaneventresultexport(self, id, type, filetype="csv", dialect="excel")
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        sfwebui.exportChunkSize = 64
+        scan_id = self.export_scan()
+
+        chunks = list(sfwebui.scaneventresultexport(scan_id, 'ALL', 'csv'))
+        self.assertGreater(len(chunks), 1)
+
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode('utf-8'))))
+        self.assertEqual(["Updated", "Type", "Module", "Source", "F/P", "Data"], rows[0])
+        self.assertEqual(
+            sorted(f"host{i}.example.com" for i in range(20)),
+            [row[5] for row in rows[1:]]
+        )
+
+    def test_scan_event_result_export_excel_should_continue_full_sheets(self):
+        """
+        Test scaneventresultexport(self, id, type, filetype="xlsx", dialect="excel")
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        sfwebui.exportChunkSize = 1024
+        sfwebui.excelMaxRows = 8
+        scan_id = self.export_scan()
+
+        chunks = list(sfwebui.scaneventresultexport(scan_id, 'ALL', 'xlsx'))
+        self.assertGreater(len(chunks), 1)
+
+        workbook = openpyxl.load_workbook(io.BytesIO(b"".join(chunks)), read_only=True)
+        self.assertEqual(['INTERNET_NAME', 'INTERNET_NAME_2', 'INTERNET_NAME_3'], workbook.sheetnames)
+        rows = [list(sheet.values) for sheet in workbook.worksheets]
+        self.assertEqual([8, 8, 7], [len(sheet_rows) for sheet_rows in rows])
+        self.assertEqual({("Updated", "Module", "Source", "F/P", "Data")}, {sheet_rows[0] for sheet_rows in rows})
+        self.assertEqual(
+            sorted(f"host{i}.example.com" for i in range(20)),
+            [row[4] for sheet_rows in rows for row in sheet_rows[1:]]
+        )
+
+    def test_build_excel_should_not_keep_rows_in_memory(self):
+        """
+        Test buildExcel(self, rows, columnNames, sheetNameIndex=0)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+
+        def rows(count):
+            for i in range(count):
+                yield [f"TYPE_{i % 10}", f"2022-01-01 00:00:{i % 60:02}", f"example data {i} " * 10]
+
+        peaks = list()
+        for count in [2000, 20000]:
+            tracemalloc.start()
+            try:
+                size = sum(len(chunk) for chunk in sfwebui.buildExcel(rows(count), ["Type", "Updated", "Data"]))
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            self.assertGreater(size, 0)
+
+        # Ten times the rows take about the same memory
+        self.assertLess(peaks[1], peaks[0] * 2)
+
+    def test_scan_event_result_export_multi_csv_should_stream_every_scan(self):
+        """
+        Test scaneventresultexportmulti(self, ids, filetype="csv", dialect="excel")
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_ids = [self.export_scan(), self.export_scan()]
+
+        data = b"".join(sfwebui.scaneventresultexportmulti(",".join(scan_ids), 'csv'))
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+        self.assertEqual(41, len(rows))
+        self.assertEqual({'export scan'}, set(row[0] for row in rows[1:]))
+
+        self.assertIsNone(sfwebui.scaneventresultexportmulti('doesnotexist', 'csv'))
+
+    def test_scan_export_json_multi_should_stream_json_and_ndjson(self):
+        """
+        Test scanexportjsonmulti(self, ids, filetype="json")
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        sfwebui.exportChunkSize = 64
+        scan_ids = [self.export_scan(), self.export_scan()]
+
+        chunks = list(sfwebui.scanexportjsonmulti(",".join(scan_ids)))
+        self.assertGreater(len(chunks), 1)
+        results = json.loads(b"".join(chunks))
+        self.assertEqual(40, len(results))
+        self.assertEqual(json.dumps(results).encode('utf-8'), b"".join(chunks))
+
+        data = b"".join(sfwebui.scanexportjsonmulti(",".join(scan_ids), "ndjson"))
+        self.assertEqual(results, [json.loads(line) for line in data.decode('utf-8').splitlines()])
+
+        self.assertEqual(b"[]", b"".join(sfwebui.scanexportjsonmulti('doesnotexist')))
+        self.assertEqual(b"", b"".join(sfwebui.scanexportjsonmulti('doesnotexist', "ndjson")))
+
+    def test_scan_search_result_export_csv_should_stream_search_results(self):
+        """
+        Test scansearchresultexport(self, id, eventType=None, value=None, filetype="csv", dialect="excel")
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_id = self.export_scan()
+
+        data = b"".join(sfwebui.scansearchresultexport(scan_id, None, "host1*", 'csv'))
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+        self.assertEqual(
+            sorted(["host1.example.com"] + [f"host{i}.example.com" for i in range(10, 20)]),
+            [row[5] for row in rows[1:]]
+        )
+
+        self.assertIsNone(sfwebui.scansearchresultexport(scan_id, None, "doesnotexist", 'csv'))
+
+    def test_scan_archive_should_return_archive_of_finished_scan(self):
+        """
+        Test scanarchive(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_id = self.export_scan()
+
+        self.assertIn("Only finished scans can be archived.", sfwebui.scanarchive(scan_id))
+        self.assertIn("Scan ID not found.", sfwebui.scanarchive('doesnotexist'))
+
+        SpiderFootDb(self.default_options, False).scanInstanceSet(scan_id, status='FINISHED')
+        data = sfwebui.scanarchive(scan_id)
+        self.assertIsInstance(data, bytes)
+        with SpiderFootArchive(io.BytesIO(data)) as archive:
+            self.assertEqual(20, len(archive.scanResultEvent(scan_id, 'INTERNET_NAME')))
+
     def test_scan_export_logs_invalid_scan_id_should_return_string(self):
         """
         Test scanexportlogs(self: 'SpiderFootWebUi', id: str, dialect: str = "excel") -> str
@@ -224,6 +386,37 @@ class TestSpiderFootWebUi(unittest.TestCase):
         scan_viz_multi = sfwebui.scanvizmulti(None, None)
         self.assertIsInstance(scan_viz_multi, str)
 
+    def test_scan_responses_should_be_cached_until_the_scan_changes(self):
+        """
+        Test scanResponse(self, endpoint, scanIds, args, build)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_id = self.export_scan()
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        # Only finished scans are kept
+        graph = sfwebui.scanviz(scan_id)
+        self.assertEqual(21, len(json.loads(graph)['nodes']))
+        self.assertIsNot(graph, sfwebui.scanviz(scan_id))
+
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+        graph = sfwebui.scanviz(scan_id)
+        self.assertIs(graph, sfwebui.scanviz(scan_id))
+        self.assertIs(sfwebui.scanvizmulti(scan_id), sfwebui.scanvizmulti(scan_id))
+        summary = sfwebui.scansummary(scan_id, 'type')
+        self.assertIs(summary, sfwebui.scansummary(scan_id, 'type'))
+        self.assertIsNot(summary, sfwebui.scansummary(scan_id, 'module'))
+
+        result_hash = sfdb.scanResultEvent(scan_id, 'INTERNET_NAME')[0][8]
+        sfwebui.resultsetfp(scan_id, json.dumps([result_hash]), '1')
+        self.assertEqual(20, len(json.loads(sfwebui.scanviz(scan_id))['nodes']))
+        self.assertIsNot(summary, sfwebui.scansummary(scan_id, 'type'))
+
+        sfwebui.responseCacheSize = 0
+        self.assertIsNot(sfwebui.scancorrelations(scan_id), sfwebui.scancorrelations(scan_id))
+
     def test_scanopts_should_return_dict(self):
         opts = self.default_options
         opts['__modules__'] = dict()
@@ -530,6 +723,31 @@ class TestSpiderFootWebUi(unittest.TestCase):
         scan_log = sfwebui.scanlog('', '', '', '')
         self.assertIsInstance(scan_log, list)
 
+    def test_scanlog_with_page_size_should_include_debug_logs(self):
+        """
+        Test scanlog(self, id, limit=None, rowId=None, reverse=None, logType=None, component=None, pageSize=None, cursor=None)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_id = self.export_scan()
+
+        dbh = SpiderFootDb(opts)
+        dbh.scanLogEvents([
+            (scan_id, 'INFO', 'example message', 'sfp_example', 1.0),
+            (scan_id, 'DEBUG', 'example debug message', 'sfp_example', 2.0)
+        ])
+
+        page = sfwebui.scanlog(scan_id, pageSize='1')
+        self.assertEqual(2, page['total'])
+        rows = page['rows']
+        while page['next']:
+            page = sfwebui.scanlog(scan_id, pageSize='1', cursor=page['next'])
+            rows.extend(page['rows'])
+        self.assertEqual(['example debug message', 'example message'], [row[3] for row in rows])
+
+        self.assertIn(b'example debug message', sfwebui.scanexportlogs(scan_id))
+
     def test_scanerrors_should_return_a_list(self):
         """
         Test scanerrors(self, id, limit=None)
@@ -586,6 +804,35 @@ class TestSpiderFootWebUi(unittest.TestCase):
         scan_results = sfwebui.scaneventresults('', '', '')
         self.assertIsInstance(scan_results, list)
 
+    def test_scaneventresults_with_page_size_should_return_pages(self):
+        """
+        Test scaneventresults(self, id, eventType, pageSize, cursor)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+        scan_id = self.export_scan()
+
+        page = json.loads(sfwebui.scaneventresults(scan_id, 'INTERNET_NAME', pageSize='8'))
+        self.assertEqual(['rows', 'next', 'total', 'totalCapped'], list(page))
+        self.assertEqual(20, page['total'])
+        self.assertFalse(page['totalCapped'])
+
+        rows = page['rows']
+        while page['next']:
+            page = json.loads(sfwebui.scaneventresults(scan_id, 'INTERNET_NAME', pageSize='8', cursor=page['next']))
+            self.assertIsNone(page['total'])
+            rows.extend(page['rows'])
+
+        self.assertEqual(
+            sorted(row[1] for row in json.loads(sfwebui.scaneventresults(scan_id, 'INTERNET_NAME'))),
+            sorted(row[1] for row in rows)
+        )
+
+        for invalid in [{'pageSize': '0'}, {'pageSize': 'x'}, {'pageSize': '8', 'cursor': 'invalid'}, {'pageSize': '8', 'sort': 'data'}]:
+            with self.subTest(invalid=invalid):
+                self.assertIn('error', sfwebui.scaneventresults(scan_id, 'ALL', **invalid))
+
     def test_scaneventresultsunique_should_return_a_list(self):
         """
         Test scaneventresultsunique(self, id, eventType, filterfp=False)
@@ -645,3 +892,48 @@ class TestSpiderFootWebUi(unittest.TestCase):
         self.assertIsInstance(scan_element_type_discovery, dict)
         scan_element_type_discovery = sfwebui.scanelementtypediscovery('', '')
         self.assertIsInstance(scan_element_type_discovery, dict)
+
+    def test_scan_element_type_discovery_should_reuse_finished_scan_lineage(self):
+        """
+        Test scanelementtypediscovery(self, id, eventType)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.web_default_options, opts)
+
+        sfdb = SpiderFootDb(self.default_options, False)
+        scan_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(scan_id, 'discovery scan', 'example.com')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        host = SpiderFootEvent('INTERNET_NAME', 'example.com', 'SpiderFoot UI', root)
+        url = SpiderFootEvent('LINKED_URL_INTERNAL', 'https://example.com/', 'example module', host)
+        codes = [SpiderFootEvent('HTTP_CODE', code, 'example module', url) for code in ['200', '404']]
+        for event in [root, host, url] + codes:
+            sfdb.scanEventStore(scan_id, event)
+        sfdb.scanInstanceSet(scan_id, status='FINISHED')
+
+        discovery = json.loads(sfwebui.scanelementtypediscovery(scan_id, 'HTTP_CODE'))
+        self.assertEqual(
+            {'name': host.hash, 'children': [
+                {'name': url.hash, 'children': [
+                    {'name': code.hash, 'children': None} for code in codes
+                ]}
+            ]},
+            discovery['tree']
+        )
+        self.assertEqual(
+            {root.hash, host.hash, url.hash} | {code.hash for code in codes},
+            set(discovery['data'])
+        )
+        self.assertEqual('404', discovery['data'][codes[1].hash][1])
+
+        lineage = sfwebui.lineageCache[scan_id][1]
+        discovery = json.loads(sfwebui.scanelementtypediscovery(scan_id, 'LINKED_URL_INTERNAL'))
+        self.assertEqual({'name': host.hash, 'children': [{'name': url.hash, 'children': None}]}, discovery['tree'])
+        self.assertIs(lineage, sfwebui.lineageCache[scan_id][1])
+
+        sfdb.scanResultsUpdateFP(scan_id, [codes[0].hash], 1)
+        sfwebui.scanelementtypediscovery(scan_id, 'HTTP_CODE')
+        self.assertIsNot(lineage, sfwebui.lineageCache[scan_id][1])
+
+        self.assertEqual({}, json.loads(sfwebui.scanelementtypediscovery(scan_id, 'ROOT')))